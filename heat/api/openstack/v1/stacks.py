@@ -444,8 +444,11 @@ class StackController(object):
                 p_name, params[p_name])
         else:
             resolve_outputs = True
+        live = self._extract_bool_param(
+            rpc_api.PARAM_LIVE, params.get(rpc_api.PARAM_LIVE, False))
         stack_list = self.rpc_client.show_stack(req.context,
-                                                identity, resolve_outputs)
+                                                identity, resolve_outputs,
+                                                live=live)
 
         if not stack_list:
             raise exc.HTTPInternalServerError()
@@ -735,9 +738,12 @@ class StackController(object):
 
     @util.identified_stack
     def show_output(self, req, identity, output_key):
+        live = self._extract_bool_param(
+            rpc_api.PARAM_LIVE, req.params.get(rpc_api.PARAM_LIVE, False))
         return {'output': self.rpc_client.show_output(req.context,
                                                       identity,
-                                                      output_key)}
+                                                      output_key,
+                                                      live=live)}
 
 
 class StackSerializer(serializers.JSONResponseSerializer):
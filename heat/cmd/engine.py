@@ -33,6 +33,7 @@ from oslo_service import service
 
 from heat.common import config
 from heat.common import messaging
+from heat.common import metrics
 from heat.common import profiler
 from heat.engine import template
 from heat.rpc import api as rpc_api
@@ -66,6 +67,8 @@ def launch_engine(setup_logging=True):
     from heat.engine import service as engine  # noqa
 
     profiler.setup('heat-engine', cfg.CONF.host)
+    if cfg.CONF.enable_metrics:
+        gmr.TextGuruMeditation.register_section('Metrics', metrics.report)
     gmr.TextGuruMeditation.setup_autorun(version)
     srv = engine.EngineService(cfg.CONF.host, rpc_api.ENGINE_TOPIC)
     workers = cfg.CONF.num_engine_workers
@@ -74,10 +77,9 @@ def launch_engine(setup_logging=True):
 
     launcher = service.launch(cfg.CONF, srv, workers=workers,
                               restart_method='mutate')
-    if cfg.CONF.enable_cloud_watch_lite:
-        # We create the periodic tasks here, which mean they are created
-        # only in the parent process when num_engine_workers>1 is specified
-        srv.create_periodic_tasks()
+    # We create the periodic tasks here, which mean they are created
+    # only in the parent process when num_engine_workers>1 is specified
+    srv.create_periodic_tasks()
     return launcher
 
 
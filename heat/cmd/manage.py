@@ -138,7 +138,8 @@ def purge_deleted():
     db_api.purge_deleted(CONF.command.age,
                          CONF.command.granularity,
                          CONF.command.project_id,
-                         CONF.command.batch_size)
+                         CONF.command.batch_size,
+                         CONF.command.workers)
 
 
 def do_crypt_parameters_and_properties():
@@ -199,6 +200,11 @@ def add_command_parsers(subparsers):
         help=_('Number of stacks to delete at a time (per transaction). '
                'Note that a single stack may have many db rows '
                '(events, etc.) associated with it.'))
+    # optional parameter, can be skipped. default='1'
+    parser.add_argument(
+        '-w', '--workers', default='1',
+        help=_('Number of concurrent workers purging stacks, each for a '
+               'separate range of stack IDs.'))
 
     # update_params parser
     parser = subparsers.add_parser('update_params')
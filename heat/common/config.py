@@ -157,6 +157,14 @@ engine_opts = [
                help=_('Number of times to retry when a client encounters an '
                       'expected intermittent error. Set to 0 to disable '
                       'retries.')),
+    cfg.IntOpt('client_session_pool_size',
+               default=256,
+               min=0,
+               help=_('Maximum number of authenticated keystone sessions, '
+                      'one per project and user or trust, that the engine '
+                      'keeps to reuse tokens, service catalogs and HTTP '
+                      'connections across requests. Set to 0 to create a '
+                      'new session for each request.')),
     # Server host name limit to 53 characters by due to typical default
     # linux HOST_NAME_MAX of 64, minus the .novalocal appended to the name
     cfg.IntOpt('max_server_name_length',
@@ -169,6 +177,20 @@ engine_opts = [
                default=10,
                help=_('Number of times to check whether an interface has '
                       'been attached or detached.')),
+    cfg.BoolOpt('batch_status_polling',
+                default=False,
+                help=_('When enabled, resources waiting for a Nova server or '
+                       'a Cinder volume to change state share a single '
+                       'list request per service and project, made at most '
+                       'once per status_polling_interval, instead of each '
+                       'requesting the state of their own server or volume '
+                       'on every step.')),
+    cfg.IntOpt('status_polling_interval',
+               min=1,
+               default=2,
+               help=_('Interval in seconds between the list requests used '
+                      'to poll the state of servers and volumes when '
+                      'batch_status_polling is enabled.')),
     cfg.IntOpt('event_purge_batch_size',
                min=1,
                default=200,
@@ -184,6 +206,14 @@ engine_opts = [
                       '200/event_purge_batch_size percent of the time. '
                       'Older events are deleted when events are purged. '
                       'Set to 0 for unlimited events per stack.')),
+    cfg.IntOpt('event_purge_interval',
+               min=0,
+               default=0,
+               help=_('Interval in seconds between runs of the periodic '
+                      'task that deletes the oldest events of stacks with '
+                      'more than max_events_per_stack events. When set to '
+                      '0, events are instead purged while new events are '
+                      'stored.')),
     cfg.IntOpt('stack_action_timeout',
                default=3600,
                help=_('Timeout in seconds for stack action (ie. create or'
@@ -197,9 +227,33 @@ engine_opts = [
                default=2,
                help=_('RPC timeout for the engine liveness check that is used'
                       ' for stack locking.')),
+    cfg.IntOpt('template_cache_size',
+               min=0,
+               default=100,
+               help=_('Maximum number of raw templates that each engine '
+                      'process keeps cached in memory, so that loading the '
+                      'same template again does not need to fetch and '
+                      'decode it from the database. Loading a cached '
+                      'template still reads its content hash from the '
+                      'database once per request, and copies its sections '
+                      'and environment. Set to 0 to disable the cache.')),
+    cfg.IntOpt('template_cache_max_bytes',
+               min=0,
+               default=33554432,
+               help=_('Maximum approximate size in bytes of the raw '
+                      'templates, including their environments and legacy '
+                      'inline files, that each engine process keeps cached '
+                      'in memory. Templates larger than this are not '
+                      'cached.')),
     cfg.BoolOpt('enable_cloud_watch_lite',
                 default=False,
                 help=_('Enable the legacy OS::Heat::CWLiteAlarm resource.')),
+    cfg.IntOpt('watch_evaluation_batch_size',
+               min=1,
+               default=100,
+               help=_('Maximum number of due watch rules loaded and '
+                      'evaluated at once by the periodic watch task of '
+                      'OS::Heat::CWLiteAlarm resources.')),
     cfg.BoolOpt('enable_stack_abandon',
                 default=False,
                 help=_('Enable the preview Stack Abandon feature.')),
@@ -211,6 +265,86 @@ engine_opts = [
                 help=_('Enables engine with convergence architecture. All '
                        'stacks with this option will be created using '
                        'convergence engine.')),
+    cfg.BoolOpt('convergence_keyed_sync_points',
+                default=False,
+                help=_('When enabled, each predecessor of a convergence sync '
+                       'point stores its input in a separate row and the '
+                       'sync point is satisfied by a single atomic update, '
+                       'instead of all predecessors retrying updates of one '
+                       'shared row. This reduces contention for resources '
+                       'with many dependencies. All engines should use the '
+                       'same setting.')),
+    cfg.IntOpt('check_resource_batch_size',
+               min=1,
+               default=20,
+               help=_('Maximum number of resources that are sent to a '
+                      'worker in a single message when a convergence '
+                      'traversal triggers several resources at once. The '
+                      'worker loads the stack only once for each message '
+                      'and processes all of its resources concurrently. Set '
+                      'to 1 to send a separate message for every '
+                      'resource.')),
+    cfg.StrOpt('worker_rpc_version_cap',
+               help=_('Maximum version of the worker RPC API used for '
+                      'messages sent to other engines. While upgrading, set '
+                      'it to the version supported by the oldest engine, '
+                      'e.g. 1.4 so that resources are never sent in '
+                      'batches. By default the latest version is used.')),
+    cfg.BoolOpt('event_driven_scheduler',
+                default=False,
+                help=_('When enabled, stacks that do not use the convergence '
+                       'engine schedule their resources by tracking the '
+                       'outstanding dependencies of each resource, instead '
+                       'of scanning the whole dependency graph on every '
+                       'step, and resources are stepped without waiting '
+                       'as soon as the resources they depend on complete.')),
+    cfg.BoolOpt('batch_resource_writes',
+                default=False,
+                help=_('When enabled, stacks that do not use the convergence '
+                       'engine buffer the state changes and events of their '
+                       'resources, and write them to the database in bulk '
+                       'once per scheduler step instead of one transaction '
+                       'per change. Buffered writes are always flushed '
+                       'before a stack action completes or fails.')),
+    cfg.IntOpt('max_concurrent_validations',
+               min=1,
+               default=1,
+               help=_('Maximum number of resources of a stack and its '
+                      'nested stacks in total that are validated '
+                      'concurrently in green threads when validating the '
+                      'stack. Each thread uses its own database session. '
+                      'Errors are still reported for the first invalid '
+                      'resource in dependency order. Set to 1 to validate '
+                      'resources one at a time.')),
+    cfg.BoolOpt('nested_stack_notify',
+                default=False,
+                help=_('When enabled, a nested stack that does not use the '
+                       'convergence engine notifies the engine working on '
+                       'its parent stack when an action reaches a final '
+                       'state, sending its outputs along with the '
+                       'notification. The parent resource then waits for '
+                       'the notification instead of polling the state of '
+                       'the nested stack on every step, and reads the '
+                       'outputs without a further request. All engines '
+                       'should use the same setting.')),
+    cfg.IntOpt('nested_stack_poll_interval',
+               min=1,
+               default=30,
+               help=_('Interval in seconds at which the state of a nested '
+                      'stack is still read from the database when '
+                      'nested_stack_notify is enabled, in case a '
+                      'notification is lost.')),
+    cfg.BoolOpt('cache_stack_outputs',
+                default=False,
+                help=_('When enabled, the resolved values of stack outputs '
+                       'are stored in the database once a stack action '
+                       'completes, and requests to show the stack or an '
+                       'output are answered from the stored values instead '
+                       'of resolving the outputs again. The stored values '
+                       'are discarded when the stack changes state or the '
+                       'stored attributes of a resource referenced by an '
+                       'output change. Requests may still ask for the '
+                       'outputs to be resolved with the live parameter.')),
     cfg.BoolOpt('observe_on_update',
                 default=False,
                 help=_('On update, enables heat to collect existing resource '
@@ -254,6 +388,15 @@ engine_opts = [
                       'credentials. ZAQAR_SIGNAL will create a dedicated '
                       'zaqar queue to be signaled using the provided keystone '
                       'credentials.')),
+    cfg.FloatOpt('deployment_metadata_push_delay',
+                 default=0,
+                 min=0,
+                 help=_('Number of seconds to wait before pushing the '
+                        'metadata of a server after its software deployments '
+                        'change. Changes made to the deployments of the '
+                        'server in that time are pushed together, in the '
+                        'background. If 0, the metadata is pushed '
+                        'immediately after every change.')),
     cfg.StrOpt('default_user_data_format',
                choices=['HEAT_CFNTOOLS',
                         'RAW',
@@ -296,7 +439,24 @@ engine_opts = [
                 default=False,
                 help=_('Encrypt template parameters that were marked as'
                        ' hidden and also all the resource properties before'
-                       ' storing them in database.'))]
+                       ' storing them in database.')),
+    cfg.BoolOpt('enable_metrics',
+                default=False,
+                help=_('Record the durations of resource actions and '
+                       'checks, the number of polls and database calls of '
+                       'each resource action and the wait time of scheduler '
+                       'steps. Metrics are aggregated per process and shown '
+                       'in its Guru Meditation Report.')),
+    cfg.StrOpt('metrics_statsd_host',
+               help=_('Host of a statsd server to send metrics to when '
+                      'enable_metrics is set.')),
+    cfg.PortOpt('metrics_statsd_port',
+                default=8125,
+                help=_('Port of the statsd server to send metrics to.')),
+    cfg.StrOpt('metrics_statsd_prefix',
+               default='heat',
+               help=_('Prefix of the names of the metrics sent to the '
+                      'statsd server.'))]
 
 rpc_opts = [
     cfg.StrOpt('host',
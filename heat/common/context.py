@@ -10,6 +10,9 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
+import contextlib
+
+from eventlet import greenthread
 import keyring
 
 from heat.common.i18n import _
@@ -35,6 +38,7 @@ from heat.common import policy
 from heat.common import wsgi
 from heat.db.sqlalchemy import api as db_api
 from heat.engine import clients
+from heat.engine.clients import session_pool
 
 LOG = logging.getLogger(__name__)
 
@@ -123,14 +127,17 @@ class RequestContext(context.RequestContext):
         self.auth_token_info = auth_token_info
         self.auth_url = auth_url
         self._session = None
+        self._thread_sessions = {}
         self._clients = None
-        self._keystone_session = session.Session(
-            **config.get_ssl_options('keystone'))
+        self._keystone_session = None
         self.trust_id = trust_id
         self.trustor_user_id = trustor_user_id
         self.policy = policy.get_enforcer()
         self._auth_plugin = auth_plugin
         self._trusts_auth_plugin = trusts_auth_plugin
+        # Sessions are only shared if the credentials are known to the pool
+        self._pooled_session = None
+        self._use_session_pool = not (auth_plugin or trusts_auth_plugin)
 
         if is_admin is None:
             self.is_admin = self.policy.check_is_admin(self)
@@ -153,12 +160,43 @@ class RequestContext(context.RequestContext):
 
     @property
     def session(self):
+        thread_session = self._thread_sessions.get(greenthread.getcurrent())
+        if thread_session is not None:
+            return thread_session
         if self._session is None:
             self._session = db_api.get_session()
         return self._session
 
+    @contextlib.contextmanager
+    def thread_session(self):
+        """Use a separate database session in the current green thread.
+
+        Green threads working concurrently for the same request must not
+        share the context's database session.
+        """
+        current = greenthread.getcurrent()
+        thread_session = db_api.get_session()
+        self._thread_sessions[current] = thread_session
+        try:
+            yield thread_session
+        finally:
+            del self._thread_sessions[current]
+            thread_session.close()
+
+    def _get_pooled_session(self):
+        if (self._pooled_session is None and self._use_session_pool and
+                self._auth_plugin is None):
+            self._pooled_session = session_pool.get_session(
+                self, self._create_pooled_auth_plugin)
+        return self._pooled_session
+
     @property
     def keystone_session(self):
+        if self._keystone_session is None:
+            self._keystone_session = self._get_pooled_session()
+        if self._keystone_session is None:
+            self._keystone_session = session.Session(
+                **config.get_ssl_options('keystone'))
         if not self._keystone_session.auth:
             self._keystone_session.auth = self.auth_plugin
         return self._keystone_session
@@ -293,13 +331,25 @@ class RequestContext(context.RequestContext):
 
         raise exception.AuthorizationFailure()
 
+    def _create_pooled_auth_plugin(self):
+        if self.trust_id:
+            return self.trusts_auth_plugin
+        return self._create_auth_plugin()
+
     def reload_auth_plugin(self):
         self._auth_plugin = None
+        if self._pooled_session is not None:
+            session_pool.discard(self._pooled_session)
+            self._pooled_session = None
+            self._keystone_session = None
 
     @property
     def auth_plugin(self):
         if not self._auth_plugin:
-            if self.trust_id:
+            pooled_session = self._get_pooled_session()
+            if pooled_session is not None:
+                self._auth_plugin = pooled_session.auth
+            elif self.trust_id:
                 self._auth_plugin = self.trusts_auth_plugin
             else:
                 self._auth_plugin = self._create_auth_plugin()
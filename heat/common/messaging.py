@@ -131,11 +131,12 @@ def get_rpc_server(target, endpoint):
                                          access_policy=access_policy)
 
 
-def get_rpc_client(**kwargs):
+def get_rpc_client(version_cap=None, **kwargs):
     """Return a configured oslo_messaging RPCClient."""
     target = oslo_messaging.Target(**kwargs)
     serializer = RequestContextSerializer(JsonPayloadSerializer())
     return oslo_messaging.RPCClient(TRANSPORT, target,
+                                    version_cap=version_cap,
                                     serializer=serializer)
 
 
@@ -0,0 +1,288 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Timings and counts of the work done by the engine.
+
+When enable_metrics is set, durations and counts recorded by the engine are
+aggregated in memory in each process, where they can be viewed in the Guru
+Meditation Report of the process. If metrics_statsd_host is also set, each
+value is sent to that statsd server as well.
+
+Names are made of a metric name and tags, such as the resource type and the
+action, joined with dots.
+"""
+
+import contextlib
+import re
+import socket
+import threading
+
+from oslo_config import cfg
+from oslo_log import log as logging
+from oslo_reports.models import with_default_views
+
+from heat.common import timeutils
+
+LOG = logging.getLogger(__name__)
+
+CONF = cfg.CONF
+CONF.import_opt('enable_metrics', 'heat.common.config')
+CONF.import_opt('metrics_statsd_host', 'heat.common.config')
+CONF.import_opt('metrics_statsd_port', 'heat.common.config')
+CONF.import_opt('metrics_statsd_prefix', 'heat.common.config')
+
+# Upper bounds in seconds (or counts) of the buckets of histograms
+BUCKETS = (0.01, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 600, float('inf'))
+
+_TAG_RE = re.compile(r'[^A-Za-z0-9_-]+')
+
+
+def enabled():
+    return CONF.enable_metrics
+
+
+def _name(name, tags):
+    return '.'.join([name] + [_TAG_RE.sub('_', str(t)).strip('_')
+                              for t in tags])
+
+
+class Histogram(object):
+    """Aggregate of the values observed for a metric."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.buckets = [0] * len(BUCKETS)
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+                break
+
+    def as_dict(self):
+        return {'count': self.count,
+                'sum': self.total,
+                'min': self.min,
+                'max': self.max,
+                'mean': self.total / self.count if self.count else None,
+                'buckets': dict((str(bound), n)
+                                for bound, n in zip(BUCKETS, self.buckets)
+                                if n)}
+
+
+class Registry(object):
+    """The metrics of a process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+        self._socket = None
+
+    def _send(self, name, value, kind):
+        host = CONF.metrics_statsd_host
+        if not host:
+            return
+        line = '%s.%s:%s|%s' % (CONF.metrics_statsd_prefix, name,
+                                value, kind)
+        try:
+            if self._socket is None:
+                self._socket = socket.socket(socket.AF_INET,
+                                             socket.SOCK_DGRAM)
+            self._socket.sendto(line.encode('utf-8'),
+                                (host, CONF.metrics_statsd_port))
+        except (socket.error, UnicodeError) as ex:
+            LOG.debug('Unable to send metric %(name)s: %(error)s',
+                      {'name': name, 'error': ex})
+
+    def _observe(self, name, value):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(value)
+
+    def observe(self, name, value, *tags):
+        """Add a value to the histogram of a metric."""
+        name = _name(name, tags)
+        self._observe(name, value)
+        self._send(name, value, 'h')
+
+    def timing(self, name, seconds, *tags):
+        """Add a duration in seconds to the histogram of a metric."""
+        name = _name(name, tags)
+        self._observe(name, seconds)
+        self._send(name, int(seconds * 1000), 'ms')
+
+    def incr(self, name, value=1, *tags):
+        """Add to the count of a metric."""
+        name = _name(name, tags)
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+        self._send(name, value, 'c')
+
+    def gauge(self, name, value, *tags):
+        """Set the current value of a metric."""
+        name = _name(name, tags)
+        with self._lock:
+            self._gauges[name] = value
+        self._send(name, value, 'g')
+
+    def snapshot(self):
+        """Return the current values of all metrics."""
+        with self._lock:
+            return {
+                'histograms': dict((name, h.as_dict())
+                                   for name, h in self._histograms.items()),
+                'counters': dict(self._counters),
+                'gauges': dict(self._gauges),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+
+_registry = Registry()
+
+
+def observe(name, value, *tags):
+    if enabled():
+        _registry.observe(name, value, *tags)
+
+
+def timing(name, seconds, *tags):
+    if enabled():
+        _registry.timing(name, seconds, *tags)
+
+
+def incr(name, value=1, *tags):
+    if enabled():
+        _registry.incr(name, value, *tags)
+
+
+def gauge(name, value, *tags):
+    if enabled():
+        _registry.gauge(name, value, *tags)
+
+
+def snapshot():
+    return _registry.snapshot()
+
+
+def report():
+    """Generate the metrics section of a Guru Meditation Report."""
+    return with_default_views.ModelWithDefaultViews(snapshot())
+
+
+class Meter(object):
+    """Measure the duration and the database calls of an operation.
+
+    The database calls are those counted in the scope that is active when
+    the meter is created, so they include the calls of other operations
+    running in the same task.
+    """
+
+    def __init__(self, name, *tags):
+        self.name = name
+        self.tags = tags
+        self._enabled = enabled()
+        if self._enabled:
+            self._start = timeutils.wallclock()
+            self._scope = current_scope()
+            if self._scope is not None:
+                self._db_calls = self._scope.db_calls
+
+    def stop(self):
+        if not self._enabled:
+            return
+        _registry.timing(self.name, timeutils.wallclock() - self._start,
+                         *self.tags)
+        if self._scope is not None:
+            _registry.observe(self.name + '.db_calls',
+                              self._scope.db_calls - self._db_calls,
+                              *self.tags)
+
+
+@contextlib.contextmanager
+def timer(name, *tags):
+    """Measure the duration of the context."""
+    meter = Meter(name, *tags)
+    try:
+        yield
+    finally:
+        meter.stop()
+
+
+class Scope(object):
+    """Count the database calls made while a scope is active.
+
+    Scopes are activated by the scheduler around each step of a task, so
+    that the calls made by interleaved tasks in the same thread are counted
+    separately. The calls made in a nested scope count for the enclosing
+    scopes too.
+    """
+
+    def __init__(self):
+        self.db_calls = 0
+
+
+_local = threading.local()
+
+
+def _scopes():
+    try:
+        return _local.scopes
+    except AttributeError:
+        _local.scopes = []
+        return _local.scopes
+
+
+def current_scope():
+    """Return the innermost active scope, or None."""
+    scopes = _scopes()
+    return scopes[-1] if scopes else None
+
+
+@contextlib.contextmanager
+def scope(active_scope):
+    """Activate a scope for the duration of the context."""
+    if active_scope is None or not enabled():
+        yield
+        return
+    scopes = _scopes()
+    scopes.append(active_scope)
+    try:
+        yield
+    finally:
+        scopes.pop()
+
+
+def count_db_call(*args, **kwargs):
+    """Count a database call in the active scopes.
+
+    This is registered as a listener for the statements executed by the
+    database engine.
+    """
+    for active_scope in _scopes():
+        active_scope.db_calls += 1
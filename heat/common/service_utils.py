@@ -13,12 +13,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import datetime
 import uuid
 
+from oslo_config import cfg
+from oslo_log import log as logging
 from oslo_utils import timeutils
 
+from heat.objects import service as service_objects
 from heat.rpc import listener_client
 
+LOG = logging.getLogger(__name__)
+
 SERVICE_KEYS = (
     SERVICE_ID,
     SERVICE_HOST,
@@ -83,3 +89,25 @@ def engine_alive(context, engine_id):
 
 def generate_engine_id():
     return str(uuid.uuid4())
+
+
+def engine_shard(context, host):
+    """Return the index of a host among the running engines, and their count.
+
+    Work done by a periodic task of every engine may be split in shards by
+    this, so that each part is done by only one of the hosts with a running
+    heat-engine.
+    """
+    expiry = timeutils.utcnow() - datetime.timedelta(
+        seconds=3 * cfg.CONF.periodic_interval)
+    try:
+        services = service_objects.Service.get_all(context)
+    except Exception as ex:
+        LOG.warning('Unable to list engine services: %s', ex)
+        services = []
+    hosts = set(srv.host for srv in services
+                if srv.binary == 'heat-engine' and
+                (srv.updated_at or srv.created_at) >= expiry)
+    hosts.add(host)
+    hosts = sorted(hosts)
+    return hosts.index(host), len(hosts)
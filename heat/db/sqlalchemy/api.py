@@ -12,18 +12,24 @@
 #    under the License.
 
 """Implementation of SQLAlchemy backend."""
+import collections
 import datetime
+import hashlib
 import itertools
 import random
+import threading
 
 from oslo_config import cfg
 from oslo_db import api as oslo_db_api
+from oslo_db import exception as db_exception
 from oslo_db import options
 from oslo_db.sqlalchemy import enginefacade
 from oslo_db.sqlalchemy import utils
 from oslo_log import log as logging
+from oslo_serialization import jsonutils
 from oslo_utils import encodeutils
 from oslo_utils import timeutils
+from oslo_utils import uuidutils
 import osprofiler.sqlalchemy
 import six
 import sqlalchemy
@@ -37,6 +43,7 @@ from sqlalchemy.orm import aliased as orm_aliased
 from heat.common import crypt
 from heat.common import exception
 from heat.common.i18n import _
+from heat.common import metrics
 from heat.db.sqlalchemy import filters as db_filters
 from heat.db.sqlalchemy import migration
 from heat.db.sqlalchemy import models
@@ -47,6 +54,7 @@ from heat.rpc import api as rpc_api
 CONF = cfg.CONF
 CONF.import_opt('hidden_stack_tags', 'heat.common.config')
 CONF.import_opt('max_events_per_stack', 'heat.common.config')
+CONF.import_opt('enable_metrics', 'heat.common.config')
 CONF.import_group('profiler', 'heat.common.config')
 
 options.set_defaults(CONF)
@@ -77,6 +85,10 @@ def get_facade():
                 osprofiler.sqlalchemy.add_tracing(sqlalchemy,
                                                   _facade.get_engine(),
                                                   "db")
+        if CONF.enable_metrics:
+            sqlalchemy.event.listen(_facade.get_engine(),
+                                    'before_cursor_execute',
+                                    metrics.count_db_call)
     return _facade
 
 
@@ -122,50 +134,168 @@ def raw_template_get(context, template_id):
     return result
 
 
+def raw_template_get_content_hash(context, template_id):
+    """Return the content hash of a raw template, or None if not found.
+
+    The hash changes whenever the template is modified in place.
+    """
+    return context.session.query(models.RawTemplate.content_hash).filter_by(
+        id=template_id).scalar()
+
+
+RAW_TEMPLATE_CONTENT = ('template', 'files', 'files_id', 'environment')
+RAW_TEMPLATE_FILES_CONTENT = ('files',)
+
+
+def _content_hash(values, keys):
+    content = dict((k, values.get(k)) for k in keys)
+    return hashlib.sha256(encodeutils.safe_encode(
+        jsonutils.dumps(content, sort_keys=True))).hexdigest()
+
+
+def _acquire_shared(session, model, content_hash):
+    """Take a reference to an existing row with the given content, if any."""
+    shared = session.query(model).filter_by(
+        content_hash=content_hash).first()
+    if shared is None:
+        return None
+    # The row may have been deleted or modified in place since we found it
+    if session.query(model).filter_by(
+            id=shared.id, content_hash=content_hash).update(
+                {'ref_count': model.ref_count + 1},
+                synchronize_session='evaluate'):
+        return shared
+    return None
+
+
+def _release_shared(session, model, row_id):
+    """Drop a reference to a row, deleting it if it is no longer used.
+
+    Returns True if the row was deleted.
+    """
+    session.query(model).filter_by(id=row_id).update(
+        {'ref_count': model.ref_count - 1},
+        synchronize_session='evaluate')
+    return session.query(model).filter_by(id=row_id).filter(
+        model.ref_count <= 0).delete(synchronize_session='fetch') > 0
+
+
+def _reference_files(session, files_id):
+    if files_id is None:
+        return
+    if not session.query(models.RawTemplateFiles).filter_by(
+            id=files_id).update(
+                {'ref_count': models.RawTemplateFiles.ref_count + 1},
+                synchronize_session='evaluate'):
+        raise exception.NotFound(
+            _("raw_template_files with files_id %d not found") %
+            files_id)
+
+
 def raw_template_create(context, values):
-    raw_template_ref = models.RawTemplate()
-    raw_template_ref.update(values)
-    raw_template_ref.save(context.session)
+    """Store a raw template, sharing any existing row with the same content.
+
+    Every call takes a new reference to the returned row, which must be
+    released with raw_template_delete().
+    """
+    content_hash = _content_hash(values, RAW_TEMPLATE_CONTENT)
+    session = context.session
+    with session.begin(subtransactions=True):
+        shared = _acquire_shared(session, models.RawTemplate, content_hash)
+        if shared is not None:
+            return shared
+        _reference_files(session, values.get('files_id'))
+        raw_template_ref = models.RawTemplate()
+        raw_template_ref.update(values)
+        raw_template_ref.content_hash = content_hash
+        raw_template_ref.ref_count = 1
+        raw_template_ref.save(session)
     return raw_template_ref
 
 
 def raw_template_update(context, template_id, values):
+    """Update a raw template, copying it first if it is shared.
+
+    The returned row may therefore have a different id to template_id.
+    """
     raw_template_ref = raw_template_get(context, template_id)
     # get only the changed values
     values = dict((k, v) for k, v in values.items()
                   if getattr(raw_template_ref, k) != v)
 
-    if values:
+    if not values:
+        return raw_template_ref
+
+    content = dict((k, getattr(raw_template_ref, k))
+                   for k in RAW_TEMPLATE_CONTENT)
+    content.update(values)
+    content_hash = _content_hash(content, RAW_TEMPLATE_CONTENT)
+    session = context.session
+    with session.begin(subtransactions=True):
+        # Changing the hash at the same time as checking the reference count
+        # ensures that nobody can start sharing the row while we modify it.
+        if not session.query(models.RawTemplate).filter_by(
+                id=template_id).filter(
+                    models.RawTemplate.ref_count <= 1).update(
+                        {'content_hash': content_hash},
+                        synchronize_session='evaluate'):
+            _release_shared(session, models.RawTemplate, template_id)
+            return raw_template_create(context, content)
+
+        old_files_id = raw_template_ref.files_id
+        if 'files_id' in values:
+            _reference_files(session, values['files_id'])
         update_and_save(context, raw_template_ref, values)
+        if 'files_id' in values and old_files_id is not None:
+            _release_shared(session, models.RawTemplateFiles, old_files_id)
 
     return raw_template_ref
 
 
 def raw_template_delete(context, template_id):
+    """Release a reference to a raw template, deleting it if unused."""
     raw_template = raw_template_get(context, template_id)
     raw_tmpl_files_id = raw_template.files_id
     session = context.session
     with session.begin(subtransactions=True):
-        session.delete(raw_template)
+        if not _release_shared(session, models.RawTemplate, template_id):
+            return
         if raw_tmpl_files_id is None:
             return
         # If no other raw_template is referencing the same raw_template_files,
         # delete that too
-        if session.query(models.RawTemplate).filter_by(
-                files_id=raw_tmpl_files_id).first() is None:
-            raw_tmpl_files = raw_template_files_get(context, raw_tmpl_files_id)
-            session.delete(raw_tmpl_files)
+        _release_shared(session, models.RawTemplateFiles, raw_tmpl_files_id)
 
 
 def raw_template_files_create(context, values):
+    """Store template files, sharing any existing row with the same content.
+
+    Every call takes a new reference to the returned row, so that it cannot
+    be deleted before a raw_template referencing it is created. The reference
+    must be released with raw_template_files_delete() once that is done.
+    """
+    content_hash = _content_hash(values, RAW_TEMPLATE_FILES_CONTENT)
     session = context.session
-    raw_templ_files_ref = models.RawTemplateFiles()
-    raw_templ_files_ref.update(values)
-    with session.begin():
+    with session.begin(subtransactions=True):
+        shared = _acquire_shared(session, models.RawTemplateFiles,
+                                 content_hash)
+        if shared is not None:
+            return shared
+        raw_templ_files_ref = models.RawTemplateFiles()
+        raw_templ_files_ref.update(values)
+        raw_templ_files_ref.content_hash = content_hash
+        raw_templ_files_ref.ref_count = 1
         raw_templ_files_ref.save(session)
     return raw_templ_files_ref
 
 
+def raw_template_files_delete(context, files_id):
+    """Release a reference to template files, deleting them if unused."""
+    session = context.session
+    with session.begin(subtransactions=True):
+        _release_shared(session, models.RawTemplateFiles, files_id)
+
+
 def raw_template_files_get(context, files_id):
     result = context.session.query(models.RawTemplateFiles).get(files_id)
     if not result:
@@ -266,6 +396,22 @@ def resource_update_and_save(context, resource_id, values):
     update_and_save(context, resource, values)
 
 
+def resource_update_many(context, values_by_id):
+    """Update several resources, each with its own values, in one go.
+
+    Resources that no longer exist are ignored.
+    """
+    if not values_by_id:
+        return
+    session = context.session
+    with session.begin(subtransactions=True):
+        resources = session.query(models.Resource).filter(
+            models.Resource.id.in_(list(values_by_id)))
+        for resource in resources:
+            for k, v in six.iteritems(values_by_id[resource.id]):
+                setattr(resource, k, v)
+
+
 def resource_delete(context, resource_id):
     session = context.session
     with session.begin(subtransactions=True):
@@ -477,6 +623,33 @@ def resource_get_all_by_root_stack(context, stack_id, filters=None):
     return dict((res.id, res) for res in results)
 
 
+def resource_summary_get_all_by_root_stack(context, stack_id, filters=None):
+    """Return the columns of the resources in a tree of stacks to list them.
+
+    Only the columns needed to list resources are loaded, in the order the
+    resources were created.
+    """
+    query = context.session.query(
+        models.Resource.id,
+        models.Resource.uuid,
+        models.Resource.name,
+        models.Resource.stack_id,
+        models.Resource.physical_resource_id,
+        models.Resource.action,
+        models.Resource.status,
+        models.Resource.status_reason,
+        models.Resource.created_at,
+        models.Resource.updated_at,
+        models.Resource.current_template_id,
+        models.Resource.needed_by
+    ).filter_by(
+        root_stack_id=stack_id
+    )
+
+    query = db_filters.exact_filter(query, models.Resource, filters)
+    return query.order_by(models.Resource.id).all()
+
+
 def engine_get_all_locked_by_stack(context, stack_id):
     query = context.session.query(
         func.distinct(models.Resource.engine_id)
@@ -563,6 +736,24 @@ def stack_get_status(context, stack_id):
             result.updated_at)
 
 
+def stack_output_data_set(context, stack_id, output_data, exp_state=None):
+    """Store the output data of a stack.
+
+    If ``exp_state`` is given, it is the (action, status, status_reason,
+    updated_at) tuple returned by stack_get_status(), and the data is stored
+    only if the stack is still in that state.
+    """
+    query = context.session.query(models.Stack).filter_by(id=stack_id)
+    if exp_state is not None:
+        action, status, status_reason, updated_at = exp_state
+        query = query.filter_by(action=action, status=status,
+                                updated_at=updated_at)
+    with context.session.begin(subtransactions=True):
+        rows_updated = query.update({'output_data': output_data},
+                                    synchronize_session=False)
+    return bool(rows_updated)
+
+
 def stack_get_all_by_owner_id(context, owner_id):
     results = soft_delete_aware_query(
         context, models.Stack).filter_by(owner_id=owner_id).all()
@@ -713,6 +904,15 @@ def stack_count_all(context, filters=None,
 def stack_create(context, values):
     stack_ref = models.Stack()
     stack_ref.update(values)
+    if stack_ref.id is None:
+        stack_ref.id = uuidutils.generate_uuid()
+    if stack_ref.owner_id is None:
+        ancestry = []
+    else:
+        ancestry = _stack_lineage(context, stack_ref.owner_id)
+    if ancestry is not None:
+        stack_ref.ancestry = ancestry
+        stack_ref.root_stack_id = ancestry[0] if ancestry else stack_ref.id
     stack_ref.save(context.session)
     return stack_ref
 
@@ -824,13 +1024,82 @@ def stack_lock_release(context, stack_id, engine_id):
         return True
 
 
+def _stack_lineage(context, stack_id):
+    """Return the IDs of a stack and its ancestors, starting at the root.
+
+    Stacks created before the ancestry was stored on the stack row are
+    resolved by walking up the owner_id chain.
+    """
+    s = context.session.query(
+        models.Stack.id, models.Stack.owner_id, models.Stack.ancestry
+    ).filter_by(id=stack_id).first()
+    if s is None:
+        return None
+    if s.ancestry is not None or s.owner_id is None:
+        return (s.ancestry or []) + [s.id]
+    lineage = _stack_lineage(context, s.owner_id)
+    if lineage is None:
+        return None
+    return lineage + [s.id]
+
+
 def stack_get_root_id(context, stack_id):
-    s = stack_get(context, stack_id, eager_load=False)
-    if not s:
+    s = context.session.query(
+        models.Stack.root_stack_id
+    ).filter_by(id=stack_id).first()
+    if s is None:
         return None
-    while s.owner_id:
-        s = stack_get(context, s.owner_id, eager_load=False)
-    return s.id
+    if s.root_stack_id is not None:
+        return s.root_stack_id
+    return _stack_lineage(context, stack_id)[0]
+
+
+def stack_summary_get_all_by_root(context, root_stack_id):
+    """Return the columns of the stacks in a tree needed to list resources.
+
+    Deleted stacks are included.
+    """
+    query = context.session.query(
+        models.Stack.id,
+        models.Stack.name,
+        models.Stack.tenant,
+        models.Stack.owner_id,
+        models.Stack.parent_resource_name,
+        models.Stack.raw_template_id,
+        models.Stack.convergence,
+        models.Stack.root_stack_id)
+    stacks = query.filter(or_(models.Stack.id == root_stack_id,
+                              models.Stack.root_stack_id ==
+                              root_stack_id)).all()
+    if any(s.id == root_stack_id and s.root_stack_id is None
+           for s in stacks):
+        # The stacks of trees created before the root stack ID was stored
+        # on the stack row are found by walking down the owner_id chain.
+        seen = set(s.id for s in stacks)
+        owner_ids = [root_stack_id]
+        while owner_ids:
+            nested = [s for s in query.filter(
+                models.Stack.owner_id.in_(owner_ids)) if s.id not in seen]
+            stacks.extend(nested)
+            owner_ids = [s.id for s in nested]
+            seen.update(owner_ids)
+    return stacks
+
+
+def stack_get_path(context, stack_ids):
+    """Return (parent_resource_name, name) for each of the given stacks.
+
+    The results are returned in the same order as stack_ids, which is
+    normally the ancestry of a stack as stored on its row.
+    """
+    if not stack_ids:
+        return []
+    results = context.session.query(
+        models.Stack.id, models.Stack.name, models.Stack.parent_resource_name
+    ).filter(models.Stack.id.in_(stack_ids))
+    stacks = dict((s.id, s) for s in results)
+    return [(stacks[s_id].parent_resource_name, stacks[s_id].name)
+            for s_id in stack_ids if s_id in stacks]
 
 
 def stack_count_total_resources(context, stack_id):
@@ -926,6 +1195,42 @@ def event_get_all_by_stack(context, stack_id, limit=None, marker=None,
                                          sort_keys, sort_dir, filters).all()
 
 
+def event_get_all_by_root_stack(context, root_stack_id, limit=None,
+                                marker=None, sort_keys=None, sort_dir=None,
+                                filters=None, nested_depth=None):
+    """Return the events of a stack and the stacks nested in it.
+
+    Only events of stacks at most nested_depth levels below the root are
+    returned, and those of deleted nested stacks are omitted. Unless other
+    sort keys are given, the events are returned in the order they were
+    stored, and paginated on the (root_stack_id, id) index.
+    """
+    query = context.session.query(models.Event).filter_by(
+        root_stack_id=root_stack_id)
+    query = db_filters.exact_filter(query, models.Event, filters)
+    nested = models.Stack.deleted_at.is_(None)
+    if nested_depth is not None:
+        nested = and_(nested, models.Stack.nested_depth <= nested_depth)
+    query = query.join(models.Event.stack).filter(
+        or_(models.Stack.id == root_stack_id, nested))
+    if sort_keys:
+        return _events_filter_and_page_query(context, query, limit, marker,
+                                             sort_keys, sort_dir).all()
+
+    descending = sort_dir != 'asc'
+    if marker:
+        marker_id = context.session.query(models.Event.id).filter_by(
+            uuid=marker).scalar()
+        if marker_id is not None:
+            query = query.filter(models.Event.id < marker_id if descending
+                                 else models.Event.id > marker_id)
+    query = query.order_by(models.Event.id.desc() if descending
+                           else models.Event.id.asc())
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+
 def _events_paginate_query(context, query, model, limit=None, sort_keys=None,
                            marker=None, sort_dir=None):
     default_sort_keys = ['created_at']
@@ -982,11 +1287,12 @@ def _delete_event_rows(context, stack_id, limit):
     # So we must manually supply the IN() values.
     # pgsql SHOULD work with the pure DELETE/JOIN below but that must be
     # confirmed via integration tests.
-    query = _query_all_by_stack(context, stack_id)
     session = context.session
-    id_pairs = [(e.id, e.rsrc_prop_data_id) for e in query.order_by(
-        models.Event.id).limit(limit).all()]
-    if id_pairs is None:
+    id_pairs = session.query(
+        models.Event.id, models.Event.rsrc_prop_data_id
+    ).filter_by(stack_id=stack_id).order_by(models.Event.id).limit(
+        limit).all()
+    if not id_pairs:
         return 0
     (ids, rsrc_prop_ids) = zip(*id_pairs)
     max_id = ids[-1]
@@ -995,40 +1301,92 @@ def _delete_event_rows(context, stack_id, limit):
         models.Event.id <= max_id).filter(
             models.Event.stack_id == stack_id).delete()
 
-    # delete unreferenced resource_properties_data
-    rsrc_prop_ids = set(rsrc_prop_ids)
+    # delete the resource_properties_data no longer referenced by any
+    # event or resource, using the indexes on the referencing columns
+    rsrc_prop_ids = set(rsrc_prop_ids) - {None}
     if rsrc_prop_ids:
-        still_ref_ids_from_events = [e.rsrc_prop_data_id for e
-                                     in _query_all_by_stack(
-                                         context, stack_id).all()]
-        still_ref_ids_from_rsrcs = [r.rsrc_prop_data_id for r
-                                    in context.session.query(models.Resource).
-                                    filter_by(stack_id=stack_id).all()]
-        rsrc_prop_ids = rsrc_prop_ids - set(still_ref_ids_from_events) \
-            - set(still_ref_ids_from_rsrcs)
-        q_rpd = session.query(models.ResourcePropertiesData.id).filter(
-            models.ResourcePropertiesData.id.in_(rsrc_prop_ids))
+        rpd = models.ResourcePropertiesData
+        event_refs = session.query(models.Event.id).filter(
+            models.Event.rsrc_prop_data_id == rpd.id)
+        rsrc_refs = session.query(models.Resource.id).filter(
+            models.Resource.rsrc_prop_data_id == rpd.id)
+        q_rpd = session.query(rpd.id).filter(
+            rpd.id.in_(rsrc_prop_ids),
+            ~event_refs.exists(),
+            ~rsrc_refs.exists())
         q_rpd.delete(synchronize_session=False)
     return retval
 
 
+def event_delete_oldest(context, stack_id, limit):
+    """Delete up to limit of the oldest events of a stack.
+
+    Return the number of events deleted.
+    """
+    with context.session.begin(subtransactions=True):
+        return _delete_event_rows(context, stack_id, limit)
+
+
+def event_get_stack_ids(context, after_id, limit):
+    """Return the (id, stack_id) of the events created after an event ID.
+
+    At most limit events are returned, ordered by ID, so that new events
+    can be scanned in bounded batches along the primary key.
+    """
+    return context.session.query(
+        models.Event.id, models.Event.stack_id
+    ).filter(models.Event.id > after_id).order_by(
+        models.Event.id).limit(limit).all()
+
+
+def _maybe_purge_events(context, stack_id, new_events=1):
+    # only count events and purge on average
+    # 200.0/cfg.CONF.event_purge_batch_size percent of the time
+    # for each event created.
+    check = ((2.0 * new_events / cfg.CONF.event_purge_batch_size) >
+             random.uniform(0, 1))
+    if (check and
+        (event_count_all_by_stack(context, stack_id) >=
+         cfg.CONF.max_events_per_stack)):
+        # prune
+        _delete_event_rows(
+            context, stack_id, cfg.CONF.event_purge_batch_size)
+
+
 def event_create(context, values):
-    if 'stack_id' in values and cfg.CONF.max_events_per_stack:
-        # only count events and purge on average
-        # 200.0/cfg.CONF.event_purge_batch_size percent of the time.
-        check = (2.0 / cfg.CONF.event_purge_batch_size) > random.uniform(0, 1)
-        if (check and
-            (event_count_all_by_stack(context, values['stack_id']) >=
-             cfg.CONF.max_events_per_stack)):
-            # prune
-            _delete_event_rows(
-                context, values['stack_id'], cfg.CONF.event_purge_batch_size)
+    if ('stack_id' in values and cfg.CONF.max_events_per_stack and
+            not cfg.CONF.event_purge_interval):
+        _maybe_purge_events(context, values['stack_id'])
     event_ref = models.Event()
     event_ref.update(values)
     event_ref.save(context.session)
     return event_ref
 
 
+def event_create_many(context, values_list):
+    """Insert several events in one go.
+
+    The database IDs of the new events are not returned.
+    """
+    if not values_list:
+        return
+    if cfg.CONF.max_events_per_stack and not cfg.CONF.event_purge_interval:
+        stack_events = collections.Counter(values['stack_id']
+                                           for values in values_list
+                                           if 'stack_id' in values)
+        for stack_id, count in six.iteritems(stack_events):
+            _maybe_purge_events(context, stack_id, count)
+
+    event_refs = []
+    for values in values_list:
+        event_ref = models.Event()
+        event_ref.update(values)
+        event_refs.append(event_ref)
+    session = context.session
+    with session.begin(subtransactions=True):
+        session.bulk_save_objects(event_refs)
+
+
 def watch_rule_get(context, watch_rule_id):
     result = context.session.query(models.WatchRule).get(watch_rule_id)
     return result
@@ -1051,6 +1409,30 @@ def watch_rule_get_all_by_stack(context, stack_id):
     return results
 
 
+def watch_rule_get_due(context, now, limit, after_id=None,
+                       shard_index=0, shard_count=1):
+    """Return the watch rules whose next evaluation is due.
+
+    Rules are returned in order of ID, at most ``limit`` at a time, starting
+    after the rule with ID ``after_id``. Only the rules in the given shard
+    (by ID modulo ``shard_count``) are returned.
+    """
+    query = context.session.query(models.WatchRule).join(
+        models.Stack, models.WatchRule.stack_id == models.Stack.id).filter(
+        models.Stack.deleted_at.is_(None),
+        models.WatchRule.state.notin_(
+            [rpc_api.WATCH_STATE_CEILOMETER_CONTROLLED,
+             rpc_api.WATCH_STATE_SUSPENDED]),
+        or_(models.WatchRule.next_evaluation.is_(None),
+            models.WatchRule.next_evaluation <= now))
+    if shard_count > 1:
+        query = query.filter(
+            models.WatchRule.id % shard_count == shard_index)
+    if after_id is not None:
+        query = query.filter(models.WatchRule.id > after_id)
+    return query.order_by(models.WatchRule.id).limit(limit).all()
+
+
 def watch_rule_create(context, values):
     obj_ref = models.WatchRule()
     obj_ref.update(values)
@@ -1101,6 +1483,24 @@ def watch_data_get_all_by_watch_rule_id(context, watch_rule_id):
     return results
 
 
+def watch_data_get_recent(context, watch_rule_id, created_since,
+                          after_id=None):
+    query = context.session.query(models.WatchData).filter(
+        models.WatchData.watch_rule_id == watch_rule_id,
+        models.WatchData.created_at >= created_since)
+    if after_id is not None:
+        query = query.filter(models.WatchData.id > after_id)
+    return query.order_by(models.WatchData.id).all()
+
+
+def watch_data_delete_before(context, watch_rule_id, before):
+    with context.session.begin(subtransactions=True):
+        return context.session.query(models.WatchData).filter(
+            models.WatchData.watch_rule_id == watch_rule_id,
+            models.WatchData.created_at < before).delete(
+                synchronize_session=False)
+
+
 def software_config_create(context, values):
     obj_ref = models.SoftwareConfig()
     obj_ref.update(values)
@@ -1296,18 +1696,25 @@ def expire_events(max_events):
     engine.execute(event_del)
 
 
-def purge_deleted(age, granularity='days', project_id=None, batch_size=20):
+# Number of events or resources of purged stacks deleted per statement
+PURGE_CHUNK_SIZE = 1000
+
+
+def purge_deleted(age, granularity='days', project_id=None, batch_size=20,
+                  workers=1):
     def _validate_positive_integer(val, argname):
         try:
-            return int(val)
+            val = int(val)
         except ValueError:
             raise exception.Error(_("%s should be an integer") % argname)
         if val < 0:
             raise exception.Error(_("%s should be a positive integer")
                                   % argname)
+        return val
 
     age = _validate_positive_integer(age, 'age')
     batch_size = _validate_positive_integer(batch_size, 'batch_size')
+    workers = max(_validate_positive_integer(workers, 'workers'), 1)
 
     if granularity not in ('days', 'hours', 'minutes', 'seconds'):
         raise exception.Error(
@@ -1347,22 +1754,208 @@ def purge_deleted(age, granularity='days', project_id=None, batch_size=20):
         stack_where = sel.where(
             stack.c.deleted_at < time_line)
 
-    stacks = engine.execute(stack_where)
+    progress = _PurgeProgress()
+    if workers == 1:
+        _purge_stack_range(engine, meta, stack_where, None, None,
+                           batch_size, progress)
+    else:
+        # Workers purging stacks that share a template or credentials
+        # may each find the other's stack still there, so whatever they
+        # kept is checked again once they are all done.
+        kept = {'raw_template': set(), 'user_creds': set()}
+        errors = []
+        # Reflecting a table is not thread safe, so load them all up front
+        meta.reflect()
+
+        def worker(lower, upper):
+            try:
+                _purge_stack_range(engine, meta, stack_where, lower, upper,
+                                   batch_size, progress, kept)
+            except Exception as ex:
+                LOG.exception('Purge of stacks with IDs from %(lower)s to '
+                              '%(upper)s failed',
+                              {'lower': lower, 'upper': upper})
+                errors.append(ex)
+
+        threads = [threading.Thread(target=worker, args=id_range)
+                   for id_range in _id_ranges(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        _purge_raw_templates(engine, meta, kept['raw_template'])
+        _purge_user_creds(engine, meta, kept['user_creds'])
+        if errors:
+            raise errors[0]
+    progress.report()
+
+
+class _PurgeProgress(object):
+    """Count the purged stacks, and log the progress of the purge."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stacks = 0
+        self.watch = timeutils.StopWatch()
+        self.watch.start()
+
+    def add(self, count):
+        with self.lock:
+            self.stacks += count
+        self.report()
+
+    def report(self):
+        elapsed = self.watch.elapsed()
+        LOG.info("Purged %(count)d stacks in %(elapsed).1fs "
+                 "(%(rate).1f stacks/s)",
+                 {'count': self.stacks, 'elapsed': elapsed,
+                  'rate': self.stacks / elapsed if elapsed else 0.0})
+
+
+def _id_ranges(workers):
+    """Split the space of stack IDs in ranges for the given workers.
+
+    Stack IDs are UUIDs, so the ranges are split on their first four hex
+    digits. The first and last ranges are open, so that any other ID is
+    still covered.
+    """
+    bounds = ['%04x' % (i * 0x10000 // workers) for i in range(1, workers)]
+    return list(zip([None] + bounds, bounds + [None]))
+
 
+def _purge_stack_range(engine, meta, stack_where, lower, upper, batch_size,
+                       progress, kept=None):
+    """Purge the selected stacks with IDs in a range, in batches.
+
+    Stacks are read in batches of batch_size in the order of their IDs, and
+    each batch is read starting after the last ID of the previous one, so
+    that no cursor is held open while the stacks are purged.
+    """
+    stack = sqlalchemy.Table('stack', meta, autoload=True)
+    if lower is not None:
+        stack_where = stack_where.where(stack.c.id >= lower)
+    if upper is not None:
+        stack_where = stack_where.where(stack.c.id < upper)
+    last_id = None
     while True:
-        next_stacks_to_purge = list(itertools.islice(stacks, batch_size))
-        if len(next_stacks_to_purge):
-            _purge_stacks(next_stacks_to_purge, engine, meta)
-        else:
+        sel = stack_where
+        if last_id is not None:
+            sel = sel.where(stack.c.id > last_id)
+        stack_infos = engine.execute(
+            sel.order_by(stack.c.id).limit(batch_size)).fetchall()
+        if not stack_infos:
             break
+        _purge_stacks(stack_infos, engine, meta, kept)
+        progress.add(len(stack_infos))
+        last_id = stack_infos[-1][0]
+
+
+def _purge_rsrc_prop_data(engine, meta, rsrc_prop_data_ids):
+    """Delete the given resource_properties_data that is not referenced."""
+    resource = sqlalchemy.Table('resource', meta, autoload=True)
+    event = sqlalchemy.Table('event', meta, autoload=True)
+    rpd = sqlalchemy.Table('resource_properties_data', meta, autoload=True)
+    rsrc_prop_data_ids = list(set(rsrc_prop_data_ids) - {None})
+    if rsrc_prop_data_ids:
+        engine.execute(rpd.delete().where(and_(
+            rpd.c.id.in_(rsrc_prop_data_ids),
+            ~sqlalchemy.exists().where(
+                event.c.rsrc_prop_data_id == rpd.c.id),
+            ~sqlalchemy.exists().where(
+                resource.c.rsrc_prop_data_id == rpd.c.id),
+            ~sqlalchemy.exists().where(
+                resource.c.attr_data_id == rpd.c.id))))
+
+
+def _release_refs(conn, table, row_ids):
+    """Drop a reference to each of the given shared rows.
+
+    An ID that appears several times in row_ids loses one reference for each
+    time it appears.
+    """
+    ids_by_count = collections.defaultdict(list)
+    for row_id, count in collections.Counter(
+            i for i in row_ids if i is not None).items():
+        ids_by_count[count].append(row_id)
+    for count, ids in ids_by_count.items():
+        conn.execute(table.update().where(table.c.id.in_(ids)).values(
+            ref_count=table.c.ref_count - count))
+
+
+def _purge_raw_templates(engine, meta, raw_template_ids):
+    """Delete the given raw templates and files that are not referenced.
 
+    Templates are deleted only once their references have been released
+    and no stack refers to them. Deleting a template releases its reference
+    to its files.
 
-def _purge_stacks(stack_infos, engine, meta):
+    Return the IDs of the templates that are kept.
+    """
+    stack = sqlalchemy.Table('stack', meta, autoload=True)
+    raw_template = sqlalchemy.Table('raw_template', meta, autoload=True)
+    raw_template_files = sqlalchemy.Table('raw_template_files', meta,
+                                          autoload=True)
+    raw_template_ids = list(set(raw_template_ids) - {None})
+    if not raw_template_ids:
+        return set()
+    with engine.begin() as conn:
+        raw_tmpl_file_sel = sqlalchemy.select(
+            [raw_template.c.id, raw_template.c.files_id]).where(
+                raw_template.c.id.in_(raw_template_ids))
+        raw_tmpl_files = dict(conn.execute(raw_tmpl_file_sel).fetchall())
+        conn.execute(raw_template.delete().where(and_(
+            raw_template.c.id.in_(raw_template_ids),
+            raw_template.c.ref_count <= 0,
+            ~sqlalchemy.exists().where(
+                stack.c.raw_template_id == raw_template.c.id),
+            ~sqlalchemy.exists().where(
+                stack.c.prev_raw_template_id == raw_template.c.id))))
+        kept_sel = sqlalchemy.select([raw_template.c.id]).where(
+            raw_template.c.id.in_(raw_template_ids))
+        kept = set(i[0] for i in conn.execute(kept_sel))
+        raw_tmpl_file_ids = [files_id for tmpl_id, files_id
+                             in raw_tmpl_files.items()
+                             if tmpl_id not in kept and files_id is not None]
+        if raw_tmpl_file_ids:
+            _release_refs(conn, raw_template_files, raw_tmpl_file_ids)
+            conn.execute(raw_template_files.delete().where(and_(
+                raw_template_files.c.id.in_(set(raw_tmpl_file_ids)),
+                raw_template_files.c.ref_count <= 0,
+                ~sqlalchemy.exists().where(
+                    raw_template.c.files_id == raw_template_files.c.id))))
+    return kept
+
+
+def _purge_user_creds(engine, meta, user_creds_ids):
+    """Delete the given user credentials that are not referenced.
+
+    Return the IDs of the credentials that are kept.
+    """
+    stack = sqlalchemy.Table('stack', meta, autoload=True)
+    user_creds = sqlalchemy.Table('user_creds', meta, autoload=True)
+    user_creds_ids = list(set(user_creds_ids) - {None})
+    if not user_creds_ids:
+        return set()
+    engine.execute(user_creds.delete().where(and_(
+        user_creds.c.id.in_(user_creds_ids),
+        ~sqlalchemy.exists().where(
+            stack.c.user_creds_id == user_creds.c.id))))
+    kept_sel = sqlalchemy.select([user_creds.c.id]).where(
+        user_creds.c.id.in_(user_creds_ids))
+    return set(i[0] for i in engine.execute(kept_sel))
+
+
+def _purge_stacks(stack_infos, engine, meta, kept=None):
     """Purge some stacks and their releated events, raw_templates, etc.
 
     stack_infos is a list of lists of selected stack columns:
     [[id, raw_template_id, prev_raw_template_id, user_creds_id,
       action, status, name], ...]
+
+    Rows referencing the stacks are deleted before the stacks, and shared
+    rows are deleted only when nothing references them any more, so that
+    an interrupted purge is completed by the next one. The IDs of the
+    shared rows that were kept are added to the kept sets, if given.
     """
 
     stack = sqlalchemy.Table('stack', meta, autoload=True)
@@ -1370,21 +1963,14 @@ def _purge_stacks(stack_infos, engine, meta):
     stack_tag = sqlalchemy.Table('stack_tag', meta, autoload=True)
     resource = sqlalchemy.Table('resource', meta, autoload=True)
     resource_data = sqlalchemy.Table('resource_data', meta, autoload=True)
-    resource_properties_data = sqlalchemy.Table(
-        'resource_properties_data', meta, autoload=True)
     event = sqlalchemy.Table('event', meta, autoload=True)
-    raw_template = sqlalchemy.Table('raw_template', meta, autoload=True)
-    raw_template_files = sqlalchemy.Table('raw_template_files', meta,
-                                          autoload=True)
-    user_creds = sqlalchemy.Table('user_creds', meta, autoload=True)
     syncpoint = sqlalchemy.Table('sync_point', meta, autoload=True)
+    syncpoint_input = sqlalchemy.Table('sync_point_input', meta,
+                                       autoload=True)
 
     stack_info_str = ','.join([str(i) for i in stack_infos])
-    LOG.info("Purging stacks %s", stack_info_str)
+    LOG.debug("Purging stacks %s", stack_info_str)
 
-    # TODO(cwolfe): find a way to make this re-entrant with
-    # reasonably sized transactions (good luck), or add
-    # a cleanup for orphaned rows.
     stack_ids = [stack_info[0] for stack_info in stack_infos]
     # delete stack locks (just in case some got stuck)
     stack_lock_del = stack_lock.delete().where(
@@ -1394,111 +1980,74 @@ def _purge_stacks(stack_infos, engine, meta):
     stack_tag_del = stack_tag.delete().where(
         stack_tag.c.stack_id.in_(stack_ids))
     engine.execute(stack_tag_del)
-    # delete resource_data
-    res_where = sqlalchemy.select([resource.c.id]).where(
-        resource.c.stack_id.in_(stack_ids))
-    res_data_del = resource_data.delete().where(
-        resource_data.c.resource_id.in_(res_where))
-    engine.execute(res_data_del)
     # clean up any sync_points that may have lingered
+    sync_input_del = syncpoint_input.delete().where(
+        syncpoint_input.c.stack_id.in_(stack_ids))
+    engine.execute(sync_input_del)
     sync_del = syncpoint.delete().where(
         syncpoint.c.stack_id.in_(stack_ids))
     engine.execute(sync_del)
 
-    # get rsrc_prop_data_ids to delete
-    rsrc_prop_data_where = sqlalchemy.select(
-        [resource.c.rsrc_prop_data_id]).where(
-            resource.c.stack_id.in_(stack_ids))
-    rsrc_prop_data_ids = set(
-        [i[0] for i in list(engine.execute(rsrc_prop_data_where))])
-    rsrc_prop_data_where = sqlalchemy.select(
-        [resource.c.attr_data_id]).where(
-            resource.c.stack_id.in_(stack_ids))
-    rsrc_prop_data_ids.update(
-        [i[0] for i in list(engine.execute(rsrc_prop_data_where))])
-    rsrc_prop_data_where = sqlalchemy.select(
-        [event.c.rsrc_prop_data_id]).where(
-            event.c.stack_id.in_(stack_ids))
-    rsrc_prop_data_ids.update(
-        [i[0] for i in list(engine.execute(rsrc_prop_data_where))])
-    # delete events
-    event_del = event.delete().where(event.c.stack_id.in_(stack_ids))
-    engine.execute(event_del)
-    # delete resources (normally there shouldn't be any)
-    res_del = resource.delete().where(resource.c.stack_id.in_(stack_ids))
-    engine.execute(res_del)
-    # delete resource_properties_data
-    if rsrc_prop_data_ids:  # keep rpd's in events
-        rsrc_prop_data_where = sqlalchemy.select(
-            [event.c.rsrc_prop_data_id]).where(
-                event.c.rsrc_prop_data_id.in_(rsrc_prop_data_ids))
-        ids = list(engine.execute(rsrc_prop_data_where))
-        rsrc_prop_data_ids.difference_update([i[0] for i in ids])
-    if rsrc_prop_data_ids:  # keep rpd's in resources
-        rsrc_prop_data_where = sqlalchemy.select(
-            [resource.c.rsrc_prop_data_id]).where(
-                resource.c.rsrc_prop_data_id.in_(rsrc_prop_data_ids))
-        ids = list(engine.execute(rsrc_prop_data_where))
-        rsrc_prop_data_ids.difference_update([i[0] for i in ids])
-    if rsrc_prop_data_ids:  # delete if we have any
-        rsrc_prop_data_del = resource_properties_data.delete().where(
-            resource_properties_data.c.id.in_(rsrc_prop_data_ids))
-        engine.execute(rsrc_prop_data_del)
-    # delete the stacks
-    stack_del = stack.delete().where(stack.c.id.in_(stack_ids))
-    engine.execute(stack_del)
-    # delete orphaned raw templates
-    raw_template_ids = [i[1] for i in stack_infos if i[1] is not None]
-    raw_template_ids.extend(i[2] for i in stack_infos if i[2] is not None)
-    if raw_template_ids:  # keep those still referenced
-        raw_tmpl_sel = sqlalchemy.select([stack.c.raw_template_id]).where(
-            stack.c.raw_template_id.in_(raw_template_ids))
-        raw_tmpl = [i[0] for i in engine.execute(raw_tmpl_sel)]
-        raw_template_ids = set(raw_template_ids) - set(raw_tmpl)
-    if raw_template_ids:  # keep those still referenced (previous tmpl)
-        raw_tmpl_sel = sqlalchemy.select(
-            [stack.c.prev_raw_template_id]).where(
-            stack.c.prev_raw_template_id.in_(raw_template_ids))
-        raw_tmpl = [i[0] for i in engine.execute(raw_tmpl_sel)]
-        raw_template_ids = raw_template_ids - set(raw_tmpl)
-    if raw_template_ids:  # delete raw_templates if we have any
-        raw_tmpl_file_sel = sqlalchemy.select(
-            [raw_template.c.files_id]).where(
-                raw_template.c.id.in_(raw_template_ids))
-        raw_tmpl_file_ids = [i[0] for i in engine.execute(
-            raw_tmpl_file_sel)]
-        raw_templ_del = raw_template.delete().where(
-            raw_template.c.id.in_(raw_template_ids))
-        engine.execute(raw_templ_del)
-        if raw_tmpl_file_ids:  # keep _files still referenced
-            raw_tmpl_file_sel = sqlalchemy.select(
-                [raw_template.c.files_id]).where(
-                    raw_template.c.files_id.in_(raw_tmpl_file_ids))
-            raw_tmpl_files = [i[0] for i in engine.execute(
-                raw_tmpl_file_sel)]
-            raw_tmpl_file_ids = set(raw_tmpl_file_ids) \
-                - set(raw_tmpl_files)
-        if raw_tmpl_file_ids:  # delete _files if we have any
-            raw_tmpl_file_del = raw_template_files.delete().where(
-                raw_template_files.c.id.in_(raw_tmpl_file_ids))
-            engine.execute(raw_tmpl_file_del)
+    # delete events, and the resource_properties_data only they used, in
+    # chunks of bounded size
+    event_sel = sqlalchemy.select(
+        [event.c.id, event.c.rsrc_prop_data_id]).where(
+            event.c.stack_id.in_(stack_ids)).order_by(
+                event.c.id).limit(PURGE_CHUNK_SIZE)
+    while True:
+        rows = engine.execute(event_sel).fetchall()
+        if not rows:
+            break
+        engine.execute(event.delete().where(
+            event.c.id.in_([row[0] for row in rows])))
+        _purge_rsrc_prop_data(engine, meta, [row[1] for row in rows])
+
+    # delete resources (normally there shouldn't be any) and their data
+    res_sel = sqlalchemy.select(
+        [resource.c.id, resource.c.rsrc_prop_data_id,
+         resource.c.attr_data_id]).where(
+             resource.c.stack_id.in_(stack_ids)).order_by(
+                 resource.c.id).limit(PURGE_CHUNK_SIZE)
+    while True:
+        rows = engine.execute(res_sel).fetchall()
+        if not rows:
+            break
+        res_ids = [row[0] for row in rows]
+        engine.execute(resource_data.delete().where(
+            resource_data.c.resource_id.in_(res_ids)))
+        engine.execute(resource.delete().where(
+            resource.c.id.in_(res_ids)))
+        _purge_rsrc_prop_data(engine, meta,
+                              [row[1] for row in rows] +
+                              [row[2] for row in rows])
+
+    # delete the stacks, releasing their references to their raw templates
+    # in the same transaction
+    raw_template = sqlalchemy.Table('raw_template', meta, autoload=True)
+    raw_template_ids = [i[1] for i in stack_infos]
+    raw_template_ids.extend(i[2] for i in stack_infos)
+    with engine.begin() as conn:
+        stack_del = stack.delete().where(stack.c.id.in_(stack_ids))
+        conn.execute(stack_del)
+        _release_refs(conn, raw_template, raw_template_ids)
+    # delete orphaned raw templates and files
+    kept_templates = _purge_raw_templates(engine, meta, raw_template_ids)
     # purge any user creds that are no longer referenced
-    user_creds_ids = [i[3] for i in stack_infos if i[3] is not None]
-    if user_creds_ids:  # keep those still referenced
-        user_sel = sqlalchemy.select([stack.c.user_creds_id]).where(
-            stack.c.user_creds_id.in_(user_creds_ids))
-        users = [i[0] for i in engine.execute(user_sel)]
-        user_creds_ids = set(user_creds_ids) - set(users)
-    if user_creds_ids:  # delete if we have any
-        usr_creds_del = user_creds.delete().where(
-            user_creds.c.id.in_(user_creds_ids))
-        engine.execute(usr_creds_del)
+    kept_creds = _purge_user_creds(engine, meta,
+                                   [i[3] for i in stack_infos])
+    if kept is not None:
+        kept['raw_template'].update(kept_templates)
+        kept['user_creds'].update(kept_creds)
 
 
 def sync_point_delete_all_by_stack_and_traversal(context, stack_id,
                                                  traversal_id):
-    rows_deleted = context.session.query(models.SyncPoint).filter_by(
-        stack_id=stack_id, traversal_id=traversal_id).delete()
+    session = context.session
+    with session.begin(subtransactions=True):
+        session.query(models.SyncPointInput).filter_by(
+            stack_id=stack_id, traversal_id=traversal_id).delete()
+        rows_deleted = session.query(models.SyncPoint).filter_by(
+            stack_id=stack_id, traversal_id=traversal_id).delete()
     return rows_deleted
 
 
@@ -1532,6 +2081,62 @@ def sync_point_update_input_data(context, entity_id,
     return rows_updated
 
 
+def sync_point_claim(context, entity_id, traversal_id, is_update):
+    """Atomically mark a sync point as satisfied.
+
+    Returns True only for the single caller that makes the transition, so
+    that the successor is triggered exactly once.
+    """
+    entity_id = str(entity_id)
+    rows_updated = context.session.query(models.SyncPoint).filter_by(
+        entity_id=entity_id,
+        traversal_id=traversal_id,
+        is_update=is_update,
+        atomic_key=0
+    ).update({"atomic_key": 1})
+    return bool(rows_updated)
+
+
+@oslo_db_api.wrap_db_retry(max_retries=3, retry_on_deadlock=True,
+                           retry_interval=0.5, inc_retry_interval=True)
+def sync_point_input_create(context, values):
+    values['entity_id'] = str(values['entity_id'])
+    input_ref = models.SyncPointInput()
+    input_ref.update(values)
+    try:
+        input_ref.save(context.session)
+    except db_exception.DBDuplicateEntry:
+        # The same predecessor reported twice (e.g. a redelivered message);
+        # the latest data wins.
+        context.session.query(models.SyncPointInput).filter_by(
+            entity_id=values['entity_id'],
+            traversal_id=values['traversal_id'],
+            is_update=values['is_update'],
+            sender_key=values['sender_key']
+        ).update({'input_data': values.get('input_data')})
+    return input_ref
+
+
+def sync_point_input_count(context, entity_id, traversal_id, is_update):
+    entity_id = str(entity_id)
+    return context.session.query(
+        func.count(models.SyncPointInput.sender_key)
+    ).filter_by(
+        entity_id=entity_id,
+        traversal_id=traversal_id,
+        is_update=is_update
+    ).scalar()
+
+
+def sync_point_input_get_all(context, entity_id, traversal_id, is_update):
+    entity_id = str(entity_id)
+    return context.session.query(models.SyncPointInput).filter_by(
+        entity_id=entity_id,
+        traversal_id=traversal_id,
+        is_update=is_update
+    ).all()
+
+
 def db_sync(engine, version=None):
     """Migrate the database to `version` or the most recent version."""
     if version is not None and int(version) < db_version(engine):
@@ -1612,8 +2217,10 @@ def _db_encrypt_or_decrypt_template_params(
                             newenv['encrypted_param_names'] = []
 
                     if needs_update:
-                        raw_template_update(ctxt, raw_template.id,
-                                            {'environment': newenv})
+                        # Update in place, even if the template is shared,
+                        # since the content is unchanged once decrypted
+                        update_and_save(ctxt, raw_template,
+                                        {'environment': newenv})
                 except Exception as exc:
                     LOG.exception('Failed to %(crypt_action)s parameters '
                                   'of raw template %(id)d',
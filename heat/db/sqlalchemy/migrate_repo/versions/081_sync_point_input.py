@@ -0,0 +1,48 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import sqlalchemy
+
+from heat.db.sqlalchemy import types
+
+
+def upgrade(migrate_engine):
+    meta = sqlalchemy.MetaData(bind=migrate_engine)
+
+    sqlalchemy.Table('stack', meta, autoload=True)
+
+    sync_point_input = sqlalchemy.Table(
+        'sync_point_input', meta,
+        sqlalchemy.Column('entity_id', sqlalchemy.String(36)),
+        sqlalchemy.Column('traversal_id', sqlalchemy.String(36)),
+        sqlalchemy.Column('is_update', sqlalchemy.Boolean),
+        sqlalchemy.Column('sender_key', sqlalchemy.String(64)),
+        sqlalchemy.Column('stack_id', sqlalchemy.String(36),
+                          nullable=False),
+        sqlalchemy.Column('input_data', types.Json),
+        sqlalchemy.Column('created_at', sqlalchemy.DateTime),
+        sqlalchemy.Column('updated_at', sqlalchemy.DateTime),
+
+        sqlalchemy.PrimaryKeyConstraint('entity_id',
+                                        'traversal_id',
+                                        'is_update',
+                                        'sender_key'),
+        sqlalchemy.ForeignKeyConstraint(['stack_id'], ['stack.id'],
+                                        name='fk_sync_point_input_stack_id'),
+        sqlalchemy.Index('ix_sync_point_input_stack_traversal',
+                         'stack_id', 'traversal_id'),
+
+        mysql_engine='InnoDB',
+        mysql_charset='utf8'
+    )
+    sync_point_input.create()
@@ -0,0 +1,51 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import sqlalchemy
+
+from heat.db.sqlalchemy import types
+
+
+def upgrade(migrate_engine):
+    meta = sqlalchemy.MetaData(bind=migrate_engine)
+
+    stack = sqlalchemy.Table('stack', meta, autoload=True)
+    root_stack_id = sqlalchemy.Column('root_stack_id',
+                                      sqlalchemy.String(36))
+    root_stack_id.create(stack)
+    ancestry = sqlalchemy.Column('ancestry', types.Json)
+    ancestry.create(stack)
+
+    # Store the ancestry of the existing stacks by following their owners
+    owners = dict((s.id, s.owner_id)
+                  for s in sqlalchemy.select([stack.c.id,
+                                              stack.c.owner_id]).execute())
+
+    def lineage(stack_id):
+        ancestors = []
+        owner_id = owners.get(stack_id)
+        while (owner_id in owners and owner_id != stack_id and
+               owner_id not in ancestors):
+            ancestors.insert(0, owner_id)
+            owner_id = owners[owner_id]
+        return ancestors
+
+    for stack_id in owners:
+        ancestors = lineage(stack_id)
+        migrate_engine.execute(stack.update().where(
+            stack.c.id == stack_id).values(
+                ancestry=ancestors,
+                root_stack_id=ancestors[0] if ancestors else stack_id))
+
+    sqlalchemy.Index('ix_stack_root_stack_id',
+                     stack.c.root_stack_id).create(migrate_engine)
@@ -0,0 +1,43 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import sqlalchemy
+
+
+def upgrade(migrate_engine):
+    meta = sqlalchemy.MetaData(bind=migrate_engine)
+
+    raw_template = sqlalchemy.Table('raw_template', meta, autoload=True)
+    raw_template_files = sqlalchemy.Table('raw_template_files', meta,
+                                          autoload=True)
+
+    for table in (raw_template, raw_template_files):
+        content_hash = sqlalchemy.Column('content_hash',
+                                         sqlalchemy.String(64))
+        content_hash.create(table)
+        sqlalchemy.Index('ix_%s_content_hash' % table.name,
+                         table.c.content_hash).create(migrate_engine)
+
+    # Existing templates each belong to a single stack
+    ref_count = sqlalchemy.Column('ref_count', sqlalchemy.Integer,
+                                  server_default='1')
+    ref_count.create(raw_template)
+
+    # Existing files are referenced by any number of templates
+    ref_count = sqlalchemy.Column('ref_count', sqlalchemy.Integer,
+                                  server_default='0')
+    ref_count.create(raw_template_files)
+    refs = sqlalchemy.select(
+        [sqlalchemy.func.count(raw_template.c.id)]).where(
+            raw_template.c.files_id == raw_template_files.c.id).as_scalar()
+    migrate_engine.execute(raw_template_files.update().values(ref_count=refs))
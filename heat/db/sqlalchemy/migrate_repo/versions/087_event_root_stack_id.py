@@ -0,0 +1,56 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import sqlalchemy
+
+
+def upgrade(migrate_engine):
+    meta = sqlalchemy.MetaData(bind=migrate_engine)
+
+    stack = sqlalchemy.Table('stack', meta, autoload=True)
+    event = sqlalchemy.Table('event', meta, autoload=True)
+    root_stack_id = sqlalchemy.Column('root_stack_id',
+                                      sqlalchemy.String(36))
+    root_stack_id.create(event)
+
+    # Stacks created before their root stack ID was stored have none, so
+    # find the root of every stack by following the owners.
+    owners = dict((s.id, (s.owner_id, s.root_stack_id))
+                  for s in sqlalchemy.select([stack.c.id, stack.c.owner_id,
+                                              stack.c.root_stack_id]).
+                  execute())
+
+    def root_of(stack_id):
+        seen = set()
+        while stack_id in owners and stack_id not in seen:
+            seen.add(stack_id)
+            owner_id, root_id = owners[stack_id]
+            if root_id is not None:
+                return root_id
+            if owner_id is None:
+                return stack_id
+            stack_id = owner_id
+        return stack_id
+
+    roots = {}
+    for stack_id in owners:
+        roots.setdefault(root_of(stack_id), []).append(stack_id)
+    for root_id, stack_ids in roots.items():
+        for i in range(0, len(stack_ids), 500):
+            migrate_engine.execute(event.update().where(
+                event.c.stack_id.in_(stack_ids[i:i + 500])).values(
+                    root_stack_id=root_id))
+
+    sqlalchemy.Index('ix_event_root_stack_id_id',
+                     event.c.root_stack_id,
+                     event.c.id).create(migrate_engine)
@@ -55,6 +55,9 @@ class RawTemplate(BASE, HeatBase):
         sqlalchemy.Integer(),
         sqlalchemy.ForeignKey('raw_template_files.id'))
     environment = sqlalchemy.Column('environment', types.Json)
+    # templates with identical content are shared, see content_hash
+    content_hash = sqlalchemy.Column(sqlalchemy.String(64), index=True)
+    ref_count = sqlalchemy.Column(sqlalchemy.Integer, server_default='1')
 
 
 class RawTemplateFiles(BASE, HeatBase):
@@ -62,6 +65,9 @@ class RawTemplateFiles(BASE, HeatBase):
     __tablename__ = 'raw_template_files'
     id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
     files = sqlalchemy.Column(types.Json)
+    content_hash = sqlalchemy.Column(sqlalchemy.String(64), index=True)
+    # number of raw_templates referencing these files
+    ref_count = sqlalchemy.Column(sqlalchemy.Integer, server_default='0')
 
 
 class StackTag(BASE, HeatBase):
@@ -101,6 +107,33 @@ class SyncPoint(BASE, HeatBase):
     input_data = sqlalchemy.Column(types.Json)
 
 
+class SyncPointInput(BASE, HeatBase):
+    """Represents the input from one predecessor of a syncpoint.
+
+    Each predecessor writes its own row, so that fan-in to a sync point
+    does not contend on a single input_data blob.
+    """
+
+    __tablename__ = 'sync_point_input'
+    __table_args__ = (
+        sqlalchemy.PrimaryKeyConstraint('entity_id',
+                                        'traversal_id',
+                                        'is_update',
+                                        'sender_key'),
+        sqlalchemy.ForeignKeyConstraint(['stack_id'], ['stack.id']),
+        sqlalchemy.Index('ix_sync_point_input_stack_traversal',
+                         'stack_id', 'traversal_id'),
+    )
+
+    entity_id = sqlalchemy.Column(sqlalchemy.String(36))
+    traversal_id = sqlalchemy.Column(sqlalchemy.String(36))
+    is_update = sqlalchemy.Column(sqlalchemy.Boolean)
+    sender_key = sqlalchemy.Column(sqlalchemy.String(64))
+    stack_id = sqlalchemy.Column(sqlalchemy.String(36),
+                                 nullable=False)
+    input_data = sqlalchemy.Column(types.Json)
+
+
 class Stack(BASE, HeatBase, SoftDelete, StateAware):
     """Represents a stack created by the heat engine."""
 
@@ -143,6 +176,11 @@ class Stack(BASE, HeatBase, SoftDelete, StateAware):
     current_traversal = sqlalchemy.Column('current_traversal',
                                           sqlalchemy.String(36))
     current_deps = sqlalchemy.Column('current_deps', types.Json)
+    root_stack_id = sqlalchemy.Column(sqlalchemy.String(36), index=True)
+    # IDs of the ancestor stacks, from the root down to the direct parent
+    ancestry = sqlalchemy.Column('ancestry', types.Json)
+    # Resolved output values, stored when cache_stack_outputs is enabled
+    output_data = sqlalchemy.Column('output_data', types.Json)
 
     # Override timestamp column to store the correct value: it should be the
     # time the create/update call was issued, not the time the DB entry is
@@ -197,12 +235,15 @@ class Event(BASE, HeatBase):
     """Represents an event generated by the heat engine."""
 
     __tablename__ = 'event'
+    __table_args__ = (
+        sqlalchemy.Index('ix_event_root_stack_id_id', 'root_stack_id', 'id'),)
 
     id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
     stack_id = sqlalchemy.Column(sqlalchemy.String(36),
                                  sqlalchemy.ForeignKey('stack.id'),
                                  nullable=False)
     stack = relationship(Stack, backref=backref('events'))
+    root_stack_id = sqlalchemy.Column(sqlalchemy.String(36))
 
     uuid = sqlalchemy.Column(sqlalchemy.String(36),
                              default=lambda: str(uuid.uuid4()),
@@ -216,7 +257,8 @@ class Event(BASE, HeatBase):
     resource_type = sqlalchemy.Column(sqlalchemy.String(255))
     rsrc_prop_data_id = sqlalchemy.Column(sqlalchemy.Integer,
                                           sqlalchemy.ForeignKey(
-                                              'resource_properties_data.id'))
+                                              'resource_properties_data.id'),
+                                          index=True)
     rsrc_prop_data = relationship(ResourcePropertiesData,
                                   backref=backref('event'))
     resource_properties = sqlalchemy.Column(sqlalchemy.PickleType)
@@ -276,7 +318,8 @@ class Resource(BASE, HeatBase, StateAware):
                         backref=backref('resource'))
     rsrc_prop_data_id = sqlalchemy.Column(sqlalchemy.Integer,
                                           sqlalchemy.ForeignKey(
-                                              'resource_properties_data.id'))
+                                              'resource_properties_data.id'),
+                                          index=True)
     rsrc_prop_data = relationship(ResourcePropertiesData,
                                   foreign_keys=[rsrc_prop_data_id])
     attr_data_id = sqlalchemy.Column(sqlalchemy.Integer,
@@ -305,6 +348,8 @@ class Resource(BASE, HeatBase, StateAware):
         'current_template_id',
         sqlalchemy.Integer,
         sqlalchemy.ForeignKey('raw_template.id'))
+    definition_fingerprint = sqlalchemy.Column('definition_fingerprint',
+                                               sqlalchemy.String(64))
 
 
 class WatchRule(BASE, HeatBase):
@@ -318,6 +363,7 @@ class WatchRule(BASE, HeatBase):
     state = sqlalchemy.Column('state', sqlalchemy.String(255))
     last_evaluated = sqlalchemy.Column(sqlalchemy.DateTime,
                                        default=timeutils.utcnow)
+    next_evaluation = sqlalchemy.Column(sqlalchemy.DateTime, index=True)
 
     stack_id = sqlalchemy.Column(sqlalchemy.String(36),
                                  sqlalchemy.ForeignKey('stack.id'),
@@ -329,6 +375,10 @@ class WatchData(BASE, HeatBase):
     """Represents a watch_data created by the heat engine."""
 
     __tablename__ = 'watch_data'
+    __table_args__ = (
+        sqlalchemy.Index('ix_watch_data_watch_rule_id_created_at',
+                         'watch_rule_id', 'created_at'),
+    )
 
     id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
     data = sqlalchemy.Column('data', types.Json)
@@ -33,6 +33,8 @@ class FindInMap(function.Function):
                               "value" ] }
     """
 
+    pure = True
+
     def __init__(self, stack, fn_name, args):
         super(FindInMap, self).__init__(stack, fn_name, args)
 
@@ -78,6 +80,13 @@ class ParamRef(function.Function):
 
         self.parameters = self.stack.parameters
 
+    def is_constant(self):
+        # Pseudo parameters such as the stack ID may change after parsing,
+        # and values from any other mapping may change at any time
+        non_pseudo = getattr(self.parameters, 'non_pseudo_param_keys', ())
+        return (function.is_constant(self.args) and
+                function.resolve(self.args) in non_pseudo)
+
     def result(self):
         param_name = function.resolve(self.args)
 
@@ -140,6 +149,8 @@ class Select(function.Function):
     string.
     """
 
+    pure = True
+
     def __init__(self, stack, fn_name, args):
         super(Select, self).__init__(stack, fn_name, args)
 
@@ -223,6 +234,8 @@ class Split(function.Function):
         [ "<string_1>", "<string_2>", ... ]
     """
 
+    pure = True
+
     def __init__(self, stack, fn_name, args):
         super(Split, self).__init__(stack, fn_name, args)
 
@@ -304,6 +317,8 @@ class Base64(function.Function):
     in plain text.
     """
 
+    pure = True
+
     def result(self):
         resolved = function.resolve(self.args)
         if not isinstance(resolved, six.string_types):
@@ -329,6 +344,8 @@ class MemberListToMap(function.Function):
     The first two arguments are the names of the key and value.
     """
 
+    pure = True
+
     def __init__(self, stack, fn_name, args):
         super(MemberListToMap, self).__init__(stack, fn_name, args)
 
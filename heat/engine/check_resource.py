@@ -18,6 +18,7 @@ import six
 import eventlet.queue
 import functools
 
+from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_utils import excutils
 
@@ -225,14 +226,20 @@ class CheckResource(object):
 
         try:
             input_forward_data = None
-            for req, fwd in deps.required_by(graph_key):
-                input_data = _get_input_data(req, fwd, input_forward_data)
-                if fwd:
-                    input_forward_data = input_data
-                propagate_check_resource(
-                    cnxt, self._rpc_client, req, current_traversal,
-                    set(graph[(req, fwd)]), graph_key, input_data, fwd,
-                    stack.adopt_stack_data)
+            checks = []
+            try:
+                for req, fwd in deps.required_by(graph_key):
+                    input_data = _get_input_data(req, fwd, input_forward_data)
+                    if fwd:
+                        input_forward_data = input_data
+                    propagate_check_resource(
+                        cnxt, self._rpc_client, req, current_traversal,
+                        set(graph[(req, fwd)]), graph_key, input_data, fwd,
+                        stack.adopt_stack_data, checks)
+            finally:
+                check_resources(cnxt, self._rpc_client, stack.id,
+                                current_traversal, checks,
+                                stack.adopt_stack_data)
             if is_update:
                 if input_forward_data is None:
                     # we haven't resolved attribute data for the resource,
@@ -303,10 +310,11 @@ class CheckResource(object):
 
 
 def load_resource(cnxt, resource_id, resource_data,
-                  current_traversal, is_update):
+                  current_traversal, is_update, db_stack=None):
     try:
         return resource.Resource.load(cnxt, resource_id, current_traversal,
-                                      is_update, resource_data)
+                                      is_update, resource_data,
+                                      db_stack=db_stack)
     except (exception.ResourceNotFound, exception.NotFound):
         # can be ignored
         return None, None, None
@@ -334,9 +342,17 @@ def check_stack_complete(cnxt, stack, current_traversal, sender_id, deps,
 
 def propagate_check_resource(cnxt, rpc_client, next_res_id,
                              current_traversal, predecessors, sender_key,
-                             sender_data, is_update, adopt_stack_data):
-    """Trigger processing of node if all of its dependencies are satisfied."""
+                             sender_data, is_update, adopt_stack_data,
+                             checks=None):
+    """Trigger processing of node if all of its dependencies are satisfied.
+
+    If a list of checks is passed, the node is appended to it for sending
+    later with check_resources() instead of being triggered immediately.
+    """
     def do_check(entity_id, data):
+        if checks is not None:
+            checks.append((entity_id, is_update, data))
+            return
         rpc_client.check_resource(cnxt, entity_id, current_traversal,
                                   data, is_update, adopt_stack_data)
 
@@ -345,6 +361,19 @@ def propagate_check_resource(cnxt, rpc_client, next_res_id,
                     {sender_key: sender_data})
 
 
+def check_resources(cnxt, rpc_client, stack_id, current_traversal, checks,
+                    adopt_stack_data):
+    """Trigger processing of the given nodes in as few messages as possible.
+
+    :param checks: a list of (resource_id, is_update, data) tuples.
+    """
+    batch_size = cfg.CONF.check_resource_batch_size
+    for i in range(0, len(checks), batch_size):
+        rpc_client.check_resources(cnxt, stack_id, current_traversal,
+                                   checks[i:i + batch_size],
+                                   adopt_stack_data)
+
+
 def _check_for_message(msg_queue):
     if msg_queue is None:
         return
@@ -14,12 +14,14 @@
 from cinderclient import client as cc
 from cinderclient import exceptions
 from keystoneauth1 import exceptions as ks_exceptions
+from oslo_config import cfg
 from oslo_log import log as logging
 
 from heat.common import exception
 from heat.common.i18n import _
 from heat.engine.clients import client_plugin
 from heat.engine.clients import os as os_client
+from heat.engine.clients import status_poller
 from heat.engine import constraints
 
 
@@ -84,6 +86,35 @@ class CinderClientPlugin(client_plugin.ClientPlugin):
         except exceptions.NotFound:
             raise exception.EntityNotFound(entity='Volume', name=volume)
 
+    def list_volume_ids(self):
+        """Return the ids of the volumes of the project.
+
+        Volumes are only looked up by id, so no names are returned.
+        """
+        return [(volume.id, None)
+                for volume in self.client().volumes.list(detailed=False)]
+
+    def _list_volumes(self, changes_since):
+        """List all volumes of the project, for the status poller."""
+        return self.client().volumes.list(detailed=True)
+
+    def poll_volume(self, volume_id):
+        """Fetch a volume object to check its status.
+
+        When batch status polling is enabled the volume is looked up in a
+        list of the volumes of the project that is shared by all resources
+        waiting for a volume, and that is refreshed once per polling
+        interval. None is returned until the volume has been listed.
+        """
+        if cfg.CONF.batch_status_polling:
+            try:
+                return status_poller.fetch(self, volume_id,
+                                           self._list_volumes,
+                                           changes_since=False)
+            except status_poller.NotListed:
+                pass
+        return self.client().volumes.get(volume_id)
+
     def get_volume_snapshot(self, snapshot):
         try:
             return self.client().volume_snapshots.get(snapshot)
@@ -153,7 +184,9 @@ class CinderClientPlugin(client_plugin.ClientPlugin):
             return True
 
     def check_attach_volume_complete(self, vol_id):
-        vol = self.client().volumes.get(vol_id)
+        vol = self.poll_volume(vol_id)
+        if vol is None:
+            return False
         if vol.status in ('available', 'attaching'):
             LOG.debug("Volume %(id)s is being attached - "
                       "volume status: %(status)s",
@@ -180,6 +213,7 @@ class BaseCinderConstraint(constraints.BaseCustomConstraint):
 class VolumeConstraint(BaseCinderConstraint):
 
     resource_getter_name = 'get_volume'
+    resource_lister_name = 'list_volume_ids'
 
 
 class VolumeSnapshotConstraint(BaseCinderConstraint):
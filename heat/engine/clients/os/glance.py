@@ -100,6 +100,11 @@ class GlanceClientPlugin(client_plugin.ClientPlugin):
                 pass
         return self._find_with_attr('images', name=image_identifier)
 
+    def list_image_ids_and_names(self):
+        """Return the ids and names of the images available."""
+        return [(image.id, image.name)
+                for image in self.client().images.list()]
+
 
 class ImageConstraint(constraints.BaseCustomConstraint):
     expected_exceptions = (client_exception.EntityMatchNotFound,
@@ -107,3 +112,4 @@ class ImageConstraint(constraints.BaseCustomConstraint):
 
     resource_client_name = CLIENT_NAME
     resource_getter_name = 'find_image_by_name_or_id'
+    resource_lister_name = 'list_image_ids_and_names'
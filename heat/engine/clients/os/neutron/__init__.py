@@ -89,6 +89,13 @@ class NeutronClientPlugin(client_plugin.ClientPlugin):
         return neutronV20.find_resourceid_by_name_or_id(
             self.client(), resource, name_or_id, cmd_resource=cmd_resource)
 
+    def list_resource_ids_and_names(self, resource):
+        """Return the ids and names of all the resources of a type."""
+        collection = '%ss' % resource
+        resources = getattr(self.client(), 'list_%s' % collection)(
+            retrieve_all=True)[collection]
+        return [(res['id'], res.get('name')) for res in resources]
+
     @os_client.MEMOIZE_EXTENSIONS
     def _list_extensions(self):
         extensions = self.client().list_extensions().get('extensions')
@@ -33,6 +33,7 @@ from heat.common import exception
 from heat.common.i18n import _
 from heat.engine.clients import client_plugin
 from heat.engine.clients import os as os_client
+from heat.engine.clients import status_poller
 from heat.engine import constraints
 
 LOG = logging.getLogger(__name__)
@@ -167,6 +168,51 @@ class NovaClientPlugin(client_plugin.ClientPlugin):
                 raise
         return server
 
+    def _list_servers(self, changes_since):
+        """List the servers of the project, for the status poller.
+
+        Return None for non-critical API errors.
+        """
+        search_opts = {}
+        if changes_since is not None:
+            search_opts['changes-since'] = changes_since.isoformat()
+        try:
+            return self.client().servers.list(detailed=True,
+                                              search_opts=search_opts,
+                                              limit=-1)
+        except exceptions.OverLimit as exc:
+            LOG.warning("Received an OverLimit response when "
+                        "listing servers: %s", exc)
+        except exceptions.ClientException as exc:
+            if ((getattr(exc, 'http_status', getattr(exc, 'code', None)) in
+                 (500, 503))):
+                LOG.warning("Received the following exception when "
+                            "listing servers: %s", exc)
+            else:
+                raise
+        return None
+
+    def poll_server(self, server_id):
+        """Fetch a server object to check its status.
+
+        This behaves like :meth:`fetch_server`, but when batch status polling
+        is enabled the server is looked up in a list of the servers of the
+        project that is shared by all resources waiting for a server, and
+        that is refreshed once per polling interval. None is returned until
+        the server has been listed.
+        """
+        if cfg.CONF.batch_status_polling:
+            try:
+                server = status_poller.fetch(self, server_id,
+                                             self._list_servers)
+            except status_poller.NotListed:
+                pass
+            else:
+                # Let fetch_server() report deleted servers as usual
+                if server is None or self.get_status(server) != 'DELETED':
+                    return server
+        return self.fetch_server(server_id)
+
     def refresh_server(self, server):
         """Refresh server's attributes.
 
@@ -221,7 +267,7 @@ class NovaClientPlugin(client_plugin.ClientPlugin):
         """
         # not checking with is_uuid_like as most tests use strings e.g. '1234'
         if isinstance(server, six.string_types):
-            server = self.fetch_server(server)
+            server = self.poll_server(server)
             if server is None:
                 return False
             else:
@@ -277,6 +323,11 @@ class NovaClientPlugin(client_plugin.ClientPlugin):
 
         return flavor
 
+    def list_flavor_ids_and_names(self):
+        """Return the ids and names of the flavors available."""
+        return [(flavor.id, flavor.name)
+                for flavor in self.client().flavors.list()]
+
     def get_host(self, host_name):
         """Get the host id specified by name.
 
@@ -304,6 +355,11 @@ class NovaClientPlugin(client_plugin.ClientPlugin):
         except exceptions.NotFound:
             raise exception.EntityNotFound(entity='Key', name=key_name)
 
+    def list_keypair_ids(self):
+        """Return the names, which are also the ids, of the keypairs."""
+        return [(keypair.name, None)
+                for keypair in self.client().keypairs.list()]
+
     def build_userdata(self, metadata, userdata=None, instance_user=None,
                        user_data_format='HEAT_CFNTOOLS'):
         """Build multipart data blob for CloudInit.
@@ -500,7 +556,7 @@ echo -e '%s\tALL=(ALL)\tNOPASSWD: ALL' >> /etc/sudoers
     def check_delete_server_complete(self, server_id):
         """Wait for server to disappear from Nova."""
         try:
-            server = self.fetch_server(server_id)
+            server = self.poll_server(server_id)
         except Exception as exc:
             self.ignore_not_found(exc)
             return True
@@ -548,7 +604,7 @@ echo -e '%s\tALL=(ALL)\tNOPASSWD: ALL' >> /etc/sudoers
 
         If that's the case, confirm the resize, if not raise an error.
         """
-        server = self.fetch_server(server_id)
+        server = self.poll_server(server_id)
         # resize operation is asynchronous so the server resize may not start
         # when checking server status (the server may stay ACTIVE instead
         # of RESIZE).
@@ -575,7 +631,7 @@ echo -e '%s\tALL=(ALL)\tNOPASSWD: ALL' >> /etc/sudoers
                 result=msg, resource_status=status)
 
     def check_verify_resize(self, server_id):
-        server = self.fetch_server(server_id)
+        server = self.poll_server(server_id)
         if not server:
             return False
         status = self.get_status(server)
@@ -607,7 +663,7 @@ echo -e '%s\tALL=(ALL)\tNOPASSWD: ALL' >> /etc/sudoers
 
         Raise error if it ends up in an ERROR state.
         """
-        server = self.fetch_server(server_id)
+        server = self.poll_server(server_id)
         if server is None or server.status == 'REBUILD':
             return False
         if server.status == 'ERROR':
@@ -829,6 +885,7 @@ class ServerConstraint(NovaBaseConstraint):
 class KeypairConstraint(NovaBaseConstraint):
 
     resource_getter_name = 'get_keypair'
+    resource_lister_name = 'list_keypair_ids'
 
     def validate_with_client(self, client, key_name):
         if not key_name:
@@ -843,6 +900,7 @@ class FlavorConstraint(NovaBaseConstraint):
     expected_exceptions = (exceptions.NotFound,)
 
     resource_getter_name = 'find_flavor_by_name_or_id'
+    resource_lister_name = 'list_flavor_ids_and_names'
 
 
 class HostConstraint(NovaBaseConstraint):
@@ -0,0 +1,164 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Engine-wide pool of authenticated keystone sessions.
+
+Every request handled by the engine gets a new context. Without the pool,
+each context authenticates again, looks up endpoints in a fresh service
+catalog and opens new HTTP connections. Contexts for the same identity
+instead share a session, and so its token, endpoints and connection pool,
+until the token is about to expire.
+"""
+
+import collections
+
+from keystoneauth1 import session
+from oslo_config import cfg
+from oslo_log import log as logging
+import six
+
+from heat.common import config
+
+LOG = logging.getLogger(__name__)
+
+cfg.CONF.import_opt('client_session_pool_size', 'heat.common.config')
+
+# Sessions whose token expires within this many seconds are not reused
+STALE_DURATION = 120
+
+
+class PooledSession(session.Session):
+    """A keystone session shared by the contexts of one identity.
+
+    Endpoints are looked up in the service catalog of the session's token
+    once per set of arguments (service type, interface, region and so on)
+    and cached for as long as the token is in use.
+    """
+
+    def __init__(self, auth, **kwargs):
+        super(PooledSession, self).__init__(auth=auth, **kwargs)
+        self._endpoints = {}
+        self._endpoints_auth_ref = None
+
+    def _auth_ref(self):
+        return getattr(self.auth, 'auth_ref', None)
+
+    def expired(self):
+        """Return True if the session's token is about to expire."""
+        auth_ref = self._auth_ref()
+        return (auth_ref is not None and
+                auth_ref.will_expire_soon(STALE_DURATION))
+
+    def get_endpoint(self, auth=None, **kwargs):
+        if auth is not None:
+            return super(PooledSession, self).get_endpoint(auth, **kwargs)
+
+        try:
+            key = tuple(sorted(six.iteritems(kwargs)))
+            hash(key)
+        except TypeError:
+            return super(PooledSession, self).get_endpoint(**kwargs)
+
+        if (key in self._endpoints and
+                self._endpoints_auth_ref is self._auth_ref()):
+            return self._endpoints[key]
+
+        url = super(PooledSession, self).get_endpoint(**kwargs)
+        if url is not None:
+            auth_ref = self._auth_ref()
+            if auth_ref is not self._endpoints_auth_ref:
+                # The token has been renewed, maybe with a different catalog
+                self._endpoints = {}
+                self._endpoints_auth_ref = auth_ref
+            self._endpoints[key] = url
+        return url
+
+
+class SessionPool(object):
+    """Least recently used sessions, keyed by identity."""
+
+    def __init__(self):
+        self._sessions = collections.OrderedDict()
+
+    def get(self, key, create_auth_plugin):
+        """Return the session for the given key.
+
+        A new session, authenticated with the plugin returned by
+        create_auth_plugin(), is added to the pool if there is no session
+        for the key or if its token is about to expire.
+        """
+        max_size = cfg.CONF.client_session_pool_size
+        sess = self._sessions.pop(key, None)
+        if sess is not None and sess.expired():
+            LOG.debug('Token of pooled session %s is expiring', key[0])
+            sess = None
+        if sess is None:
+            sess = PooledSession(create_auth_plugin(),
+                                 **config.get_ssl_options('keystone'))
+        self._sessions[key] = sess
+        while len(self._sessions) > max_size:
+            self._sessions.popitem(last=False)
+        return sess
+
+    def discard(self, sess):
+        """Remove a session from the pool, e.g. if its catalog is empty."""
+        for key, pooled in list(six.iteritems(self._sessions)):
+            if pooled is sess:
+                del self._sessions[key]
+
+    def clear(self):
+        self._sessions.clear()
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+_pool = SessionPool()
+
+
+def session_key(context):
+    """Return the key of the pooled session to use for a context.
+
+    Return None if the context's credentials can not be shared with other
+    contexts.
+    """
+    if context.trust_id:
+        return ('trust', context.trust_id)
+    if context.auth_token_info:
+        return ('access', context.tenant_id, context.user_id,
+                context.auth_token)
+    if context.password:
+        return ('password', context.tenant_id, context.user_domain_id,
+                context.user_domain_name, context.username)
+    if context.auth_token:
+        return ('token', context.tenant_id, context.user_id,
+                context.auth_token)
+    return None
+
+
+def get_session(context, create_auth_plugin):
+    """Return a pooled session for the context, or None."""
+    if cfg.CONF.client_session_pool_size <= 0:
+        return None
+    key = session_key(context)
+    if key is None:
+        return None
+    return _pool.get(key, create_auth_plugin)
+
+
+def discard(sess):
+    _pool.discard(sess)
+
+
+def clear():
+    _pool.clear()
@@ -0,0 +1,154 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Shared polling of the status of physical resources.
+
+Resources waiting for a server or volume to reach a given state ask for it
+on every step of their ``check_*_complete`` loop. When batch status polling
+is enabled, these requests are collected per service, project and region,
+and answered from a single list request made at most once per polling
+interval, instead of one request per resource and step.
+"""
+
+import collections
+import datetime
+
+from oslo_config import cfg
+from oslo_utils import timeutils as oslo_timeutils
+
+from heat.common import timeutils
+
+# Allowance for clock skew between the engine and the service when listing
+# only the objects changed since the previous poll.
+CHANGES_SINCE_MARGIN = 60
+
+# Maximum number of pollers kept, one for each service, project and region
+_POLLERS_MAX = 256
+
+
+class NotListed(Exception):
+    """The object was not found in the latest complete list.
+
+    The caller should fetch the object individually, which reports a missing
+    object in the usual way.
+    """
+
+
+class StatusPoller(object):
+    """Poll the status of many objects of one project with one request.
+
+    ``list_func`` is passed to each :meth:`fetch` call, since the request is
+    made with the client of whichever resource finds the poll due. It is
+    called with the time from which changes should be listed, or None to
+    list all objects, and returns the list of objects, or None if the
+    request failed with an error that may be ignored. If the service cannot
+    filter by the time of the last change, ``changes_since`` should be False
+    so that all objects are always listed.
+    """
+
+    def __init__(self, changes_since=True):
+        self.changes_since = changes_since
+        self._requested = {}
+        self._listed = {}
+        self._missing = set()
+        self._changes_since = None
+        self._last_poll = None
+        self._polling = False
+        self.last_fetch = None
+
+    def fetch(self, object_id, list_func):
+        """Return the latest listed object with the given ID.
+
+        Return None if the object has not been listed yet, in which case the
+        caller should try again later. Raise NotListed if the object was not
+        found in a complete list.
+        """
+        now = timeutils.wallclock()
+        self.last_fetch = now
+        self._requested[object_id] = now
+        interval = cfg.CONF.status_polling_interval
+        if not self._polling and (self._last_poll is None or
+                                  now - self._last_poll >= interval):
+            self._poll(now, list_func)
+
+        if object_id in self._missing:
+            self._missing.discard(object_id)
+            raise NotListed(object_id)
+        return self._listed.get(object_id)
+
+    def _expire(self, now):
+        """Forget the objects that are no longer being waited for."""
+        expiry = now - 3 * cfg.CONF.status_polling_interval
+        for object_id, requested in list(self._requested.items()):
+            if requested < expiry:
+                del self._requested[object_id]
+                self._listed.pop(object_id, None)
+                self._missing.discard(object_id)
+
+    def _poll(self, now, list_func):
+        self._expire(now)
+        self._last_poll = now
+
+        # Changes since the previous poll suffice only once every requested
+        # object has been listed at least once.
+        complete = (not self.changes_since or self._changes_since is None or
+                    any(object_id not in self._listed
+                        for object_id in self._requested))
+        since = (oslo_timeutils.utcnow() -
+                 datetime.timedelta(seconds=CHANGES_SINCE_MARGIN))
+
+        self._polling = True
+        try:
+            objects = list_func(None if complete else self._changes_since)
+        finally:
+            self._polling = False
+        if objects is None:
+            return
+
+        listed = dict((obj.id, obj) for obj in objects
+                      if obj.id in self._requested)
+        if complete:
+            self._listed = listed
+            self._missing = set(self._requested) - set(listed)
+        else:
+            self._listed.update(listed)
+        self._changes_since = since
+
+
+_pollers = collections.OrderedDict()
+
+
+def _expire_pollers():
+    """Forget the least recently used pollers that are idle or too many.
+
+    Pollers are kept in order of their last use, so the search stops at the
+    first one that is still in use.
+    """
+    expiry = timeutils.wallclock() - 3 * cfg.CONF.status_polling_interval
+    while _pollers:
+        key, poller = next(iter(_pollers.items()))
+        if len(_pollers) < _POLLERS_MAX and poller.last_fetch >= expiry:
+            break
+        del _pollers[key]
+
+
+def fetch(client_plugin, object_id, list_func, changes_since=True):
+    """Fetch an object through the poller of the client plugin's project."""
+    key = (client_plugin.service_types[0], client_plugin.context.tenant_id,
+           client_plugin._get_region_name())
+    poller = _pollers.pop(key, None)
+    _expire_pollers()
+    if poller is None:
+        poller = StatusPoller(changes_since)
+    _pollers[key] = poller
+    return poller.fetch(object_id, list_func)
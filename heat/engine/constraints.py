@@ -15,6 +15,7 @@ import collections
 import numbers
 import re
 
+import eventlet
 from oslo_cache import core
 from oslo_config import cfg
 from oslo_log import log
@@ -660,16 +661,96 @@ class CustomConstraint(Constraint):
         return result
 
 
+class ListedResources(object):
+    """The resources listed to validate custom constraints in bulk.
+
+    This is a context scoped cache (see RequestContext.cache()) of the ids
+    and names of all the resources of each type, as listed by
+    BaseCustomConstraint.list_with_client().
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._names = {}
+
+    def __contains__(self, constraint_class):
+        return constraint_class in self._ids
+
+    def add(self, constraint_class, ids_and_names):
+        ids_and_names = list(ids_and_names)
+        self._ids[constraint_class] = set(i for i, n in ids_and_names)
+        self._names[constraint_class] = collections.Counter(
+            n for i, n in ids_and_names if n is not None)
+
+    def is_listed(self, constraint_class, value):
+        """Return True if the value is the id or unique name of a resource.
+
+        Values not found may still be valid, e.g. for resources not included
+        in the listing, and must be validated individually.
+        """
+        if constraint_class not in self._ids:
+            return False
+        return (value in self._ids[constraint_class] or
+                self._names[constraint_class].get(value) == 1)
+
+
+# The minimum number of distinct values of a custom constraint for which
+# listing all the resources is cheaper than validating each value
+PREFETCH_MIN_VALUES = 2
+
+
+def prefetch(context, environment, values):
+    """List the resources referenced by custom constraints in bulk.
+
+    :param values: a mapping of custom constraint names to the set of values
+                   to be validated against each constraint
+
+    The resources of each type are listed concurrently, with one call per
+    type, and the validation of the individual values is answered from the
+    listings.
+    """
+    listed = context.cache(ListedResources)
+    to_list = []
+    for name, constraint_values in six.iteritems(values):
+        if len(constraint_values) < PREFETCH_MIN_VALUES:
+            continue
+        constraint_class = environment.get_constraint(name)
+        if (constraint_class is None or constraint_class in listed or
+                not issubclass(constraint_class, BaseCustomConstraint)):
+            continue
+        to_list.append(constraint_class)
+
+    def list_resources(constraint_class):
+        try:
+            return (constraint_class,
+                    constraint_class().list_with_client(context.clients))
+        except Exception as ex:
+            LOG.debug('Unable to list resources for %(cls)s: %(err)s',
+                      {'cls': constraint_class.__name__, 'err': ex})
+            return constraint_class, None
+
+    if not to_list:
+        return
+    pool = eventlet.GreenPool(len(to_list))
+    for constraint_class, ids_and_names in pool.imap(list_resources,
+                                                     to_list):
+        if ids_and_names is not None:
+            listed.add(constraint_class, ids_and_names)
+
+
 class BaseCustomConstraint(object):
     """A base class for validation using API clients.
 
     It will provide a better error message, and reduce a bit of duplication.
     Subclass must provide `expected_exceptions` and implement
-    `validate_with_client`.
+    `validate_with_client`. Subclasses which can list all the resources
+    they validate set `resource_lister_name` or implement `list_with_client`,
+    so that many values can be validated at once.
     """
     expected_exceptions = (exception.EntityNotFound,)
     resource_client_name = None
     resource_getter_name = None
+    resource_lister_name = None
 
     _error_message = None
 
@@ -680,6 +761,8 @@ class BaseCustomConstraint(object):
             "value": value, "message": self._error_message}
 
     def validate(self, value, context, template=None):
+        if context.cache(ListedResources).is_listed(type(self), value):
+            return True
 
         @MEMOIZE
         def check_cache_or_validate_value(cache_value_prefix,
@@ -726,3 +809,13 @@ class BaseCustomConstraint(object):
             raise exception.InvalidSchemaError(
                 message=_('Client name and resource getter name must be '
                           'specified.'))
+
+    def list_with_client(self, client):
+        """Return the (id, name) pairs of all the resources to validate.
+
+        Return None if the resources can not be listed.
+        """
+        if self.resource_client_name and self.resource_lister_name:
+            return getattr(client.client_plugin(self.resource_client_name),
+                           self.resource_lister_name)()
+        return None
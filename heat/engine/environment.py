@@ -260,14 +260,83 @@ class GlobResourceInfo(MapResourceInfo):
         return match
 
 
+def _as_list(value):
+    if isinstance(value, six.string_types):
+        return [value]
+    elif isinstance(value, collections.Sequence):
+        return value
+    return []
+
+
+class _NameMatcher(object):
+    """Match a name against a set of glob patterns in a single step."""
+
+    def __init__(self, patterns):
+        self.names = set()
+        globs = []
+        for pattern in patterns:
+            if any(c in pattern for c in '*?['):
+                globs.append(fnmatch.translate(pattern))
+            else:
+                self.names.add(pattern)
+        self.regex = re.compile('|'.join(globs)) if globs else None
+
+    def matches(self, name):
+        if name in self.names:
+            return True
+        return self.regex is not None and self.regex.match(name) is not None
+
+
+class _RegistryIndex(object):
+    """Precomputed lookups of the patterns in a resource registry.
+
+    This avoids having to try every pattern in the registry on each lookup.
+    It must be rebuilt whenever the registry changes.
+    """
+
+    def __init__(self, registry):
+        # Glob type mappings (e.g. "OS::Nova::*") keyed by prefix
+        self.globs = collections.defaultdict(list)
+        for name in registry:
+            if name.endswith('*'):
+                self.globs[name[:-1]].append(name)
+
+        hooks = collections.defaultdict(list)
+        actions = collections.defaultdict(list)
+        for name_pattern, resource in six.iteritems(registry['resources']):
+            if not isinstance(resource, dict):
+                continue
+            for hook in _as_list(resource.get('hooks')):
+                hooks[hook].append(name_pattern)
+            for action in _as_list(resource.get('restricted_actions')):
+                actions[action].append(name_pattern)
+        self.hooks = dict((hook, _NameMatcher(patterns))
+                          for hook, patterns in six.iteritems(hooks))
+        self.restricted_actions = dict(
+            (action, _NameMatcher(patterns))
+            for action, patterns in six.iteritems(actions))
+
+    def glob_matches(self, resource_type):
+        """Return the names of glob mappings that may match the type."""
+        for i in range(len(resource_type) + 1):
+            for name in self.globs.get(resource_type[:i], []):
+                yield name
+
+
 class ResourceRegistry(object):
     """By looking at the environment, find the resource implementation."""
 
     def __init__(self, global_registry, param_defaults):
         self._registry = {'resources': {}}
+        self._index = None
         self.global_registry = global_registry
         self.param_defaults = param_defaults
 
+    def _get_index(self):
+        if self._index is None:
+            self._index = _RegistryIndex(self._registry)
+        return self._index
+
     def load(self, json_snippet):
         self._load_registry([], json_snippet)
 
@@ -297,6 +366,7 @@ class ResourceRegistry(object):
                 registry[key] = {}
             registry = registry[key]
         registry[name] = item
+        self._index = None
 
     def _register_info(self, path, info):
         """Place the new info in the correct location in the registry.
@@ -313,6 +383,7 @@ class ResourceRegistry(object):
             registry = registry[key]
 
         if info is None:
+            self._index = None
             if name.endswith('*'):
                 # delete all matching entries.
                 for res_name, reg_info in list(registry.items()):
@@ -354,6 +425,7 @@ class ResourceRegistry(object):
 
         info.user_resource = (self.global_registry is not None)
         registry[name] = info
+        self._index = None
 
     def log_resource_info(self, show_all=False, prefix=None):
         registry = self._registry
@@ -376,6 +448,7 @@ class ResourceRegistry(object):
             registry = registry[key]
         if info.path[-1] in registry:
             registry.pop(info.path[-1])
+            self._index = None
 
     def get_rsrc_restricted_actions(self, resource_name):
         """Returns a set of restricted actions.
@@ -392,17 +465,9 @@ class ResourceRegistry(object):
         of those values. Resources support wildcard matching. The asterisk
         sign matches everything.
         """
-        ress = self._registry['resources']
-        restricted_actions = set()
-        for name_pattern, resource in six.iteritems(ress):
-            if fnmatch.fnmatchcase(resource_name, name_pattern):
-                if 'restricted_actions' in resource:
-                    actions = resource['restricted_actions']
-                    if isinstance(actions, six.string_types):
-                        restricted_actions.add(actions)
-                    elif isinstance(actions, collections.Sequence):
-                        restricted_actions |= set(actions)
-        return restricted_actions
+        return set(action for action, matcher
+                   in six.iteritems(self._get_index().restricted_actions)
+                   if matcher.matches(resource_name))
 
     def matches_hook(self, resource_name, hook):
         """Return whether a resource have a hook set in the environment.
@@ -428,18 +493,8 @@ class ResourceRegistry(object):
         values. Resources support wildcard matching. The asterisk sign matches
         everything.
         """
-        ress = self._registry['resources']
-        for name_pattern, resource in six.iteritems(ress):
-            if fnmatch.fnmatchcase(resource_name, name_pattern):
-                if 'hooks' in resource:
-                    hooks = resource['hooks']
-                    if isinstance(hooks, six.string_types):
-                        if hook == hooks:
-                            return True
-                    elif isinstance(hooks, collections.Sequence):
-                        if hook in hooks:
-                            return True
-        return False
+        matcher = self._get_index().hooks.get(hook)
+        return matcher is not None and matcher.matches(resource_name)
 
     def remove_resources_except(self, resource_name):
         ress = self._registry['resources']
@@ -450,6 +505,7 @@ class ResourceRegistry(object):
         if resource_name in ress:
             new_resources.update(ress[resource_name])
         self._registry['resources'] = new_resources
+        self._index = None
 
     def iterable_by(self, resource_type, resource_name=None):
         is_templ_type = resource_type.endswith(('.yaml', '.template'))
@@ -475,10 +531,7 @@ class ResourceRegistry(object):
             yield impl
 
         # handle: "OS::*" -> "Dreamhost::*"
-        def is_a_glob(resource_type):
-            return resource_type.endswith('*')
-        globs = six.moves.filter(is_a_glob, iter(self._registry))
-        for pattern in globs:
+        for pattern in self._get_index().glob_matches(resource_type):
             if self._registry[pattern].matches(resource_type):
                 yield self._registry[pattern]
 
@@ -11,6 +11,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from oslo_utils import timeutils
+from oslo_utils import uuidutils
+
 from heat.common import identifier
 from heat.objects import event as event_object
 from heat.objects import resource_properties_data as rpd_objects
@@ -29,6 +32,7 @@ class Event(object):
         """
         self.context = context
         self._stack_identifier = stack.identifier()
+        self._root_stack_id = stack.root_stack_id()
         self.action = action
         self.status = status
         self.reason = reason
@@ -50,12 +54,24 @@ class Event(object):
         self.timestamp = timestamp
         self.id = id
 
-    def store(self):
-        """Store the Event in the database."""
+    def store(self, write_buffer=None):
+        """Store the Event in the database.
+
+        If a write buffer is supplied, the Event is added to it to be stored
+        with the next batch of writes instead, and its database ID remains
+        unset.
+        """
+        if write_buffer is not None:
+            if self.uuid is None:
+                self.uuid = uuidutils.generate_uuid()
+            if self.timestamp is None:
+                self.timestamp = timeutils.utcnow()
+
         ev = {
             'resource_name': self.resource_name,
             'physical_resource_id': self.physical_resource_id,
             'stack_id': self._stack_identifier.stack_id,
+            'root_stack_id': self._root_stack_id,
             'resource_action': self.action,
             'resource_status': self.status,
             'resource_status_reason': self.reason,
@@ -71,6 +87,10 @@ class Event(object):
         if self.rsrc_prop_data:
             ev['rsrc_prop_data_id'] = self.rsrc_prop_data.id
 
+        if write_buffer is not None:
+            write_buffer.add_event(ev)
+            return None
+
         new_ev = event_object.Event.create(self.context, ev)
 
         self.id = new_ev.id
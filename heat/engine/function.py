@@ -22,10 +22,22 @@ from heat.common import exception
 from heat.common.i18n import _
 
 
+_NO_RESULT = object()
+
+
 @six.add_metaclass(abc.ABCMeta)
 class Function(object):
     """Abstract base class for template functions."""
 
+    #: Subclasses whose result depends only on their arguments (and on data
+    #: that is fixed for the lifetime of the template, such as parameters or
+    #: files) should set this to True, so that constant expressions can be
+    #: folded and resolved only once.
+    pure = False
+
+    _constant = None
+    _constant_result = _NO_RESULT
+
     def __init__(self, stack, fn_name, args):
         """Initialise with a Stack, the function name and the arguments.
 
@@ -66,6 +78,29 @@ class Function(object):
         """
         return {self.fn_name: self.args}
 
+    def is_constant(self):
+        """Return whether the result of the function can never change.
+
+        By default a function is constant if it is pure and all of its
+        arguments are constant. Functions that depend on the state of
+        resources must never be constant.
+        """
+        return self.pure and is_constant(self.args)
+
+    def _is_constant(self):
+        if self._constant is None:
+            self._constant = bool(self.is_constant())
+        return self._constant
+
+    def _resolve(self):
+        """Return the result, calculating it only once if it is constant."""
+        if not self._is_constant():
+            return self.result()
+
+        if self._constant_result is _NO_RESULT:
+            self._constant_result = self.result()
+        return _copy_result(self._constant_result)
+
     def dependencies(self, path):
         return dependencies(self.args, '.'.join([path, self.fn_name]))
 
@@ -201,6 +236,14 @@ class Macro(Function):
         """Return the resolved result of the macro contents."""
         return resolve(self.parsed)
 
+    def is_constant(self):
+        """Return whether the result of the macro can never change.
+
+        The macro contents have already been expanded at parse time, so the
+        result is constant if the parsed output is.
+        """
+        return is_constant(self.parsed)
+
     def dependencies(self, path):
         return dependencies(self.parsed, '.'.join([path, self.fn_name]))
 
@@ -254,7 +297,7 @@ class Macro(Function):
 
 def resolve(snippet):
     if isinstance(snippet, Function):
-        return snippet.result()
+        return snippet._resolve()
 
     if isinstance(snippet, collections.Mapping):
         return dict((k, resolve(v)) for k, v in snippet.items())
@@ -265,6 +308,37 @@ def resolve(snippet):
     return snippet
 
 
+def _copy_result(value):
+    """Copy the containers in a memoised result.
+
+    Callers are free to modify resolved data, so each caller gets its own
+    copy of any dicts and lists.
+    """
+    if isinstance(value, dict):
+        return dict((k, _copy_result(v)) for k, v in value.items())
+    elif isinstance(value, list):
+        return [_copy_result(v) for v in value]
+    return value
+
+
+def is_constant(snippet):
+    """Return whether a template snippet always resolves to the same value.
+
+    The snippet should be already parsed to insert Function objects where
+    appropriate.
+    """
+    if isinstance(snippet, Function):
+        return snippet._is_constant()
+
+    if isinstance(snippet, collections.Mapping):
+        return all(is_constant(v) for v in snippet.values())
+    elif (not isinstance(snippet, six.string_types) and
+          isinstance(snippet, collections.Iterable)):
+        return all(is_constant(v) for v in snippet)
+
+    return True
+
+
 def validate(snippet, path=''):
     if isinstance(snippet, Function):
         try:
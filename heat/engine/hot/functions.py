@@ -67,6 +67,19 @@ class GetParam(function.Function):
 
         self.parameters = self.stack.parameters
 
+    def is_constant(self):
+        # Pseudo parameters such as the stack ID may change after parsing,
+        # and values from any other mapping may change at any time
+        non_pseudo = getattr(self.parameters, 'non_pseudo_param_keys', ())
+        if not function.is_constant(self.args):
+            return False
+
+        args = function.resolve(self.args)
+        if (isinstance(args, collections.Sequence) and
+                not isinstance(args, six.string_types)):
+            args = args[0] if args else None
+        return args in non_pseudo
+
     def result(self):
         args = function.resolve(self.args)
 
@@ -362,6 +375,8 @@ class Replace(function.Function):
     of equal length, lexicographically smaller keys are preferred.
     """
 
+    pure = True
+
     _strict = False
     _allow_empty_value = True
 
@@ -542,6 +557,8 @@ class GetFile(function.Function):
     key.
     """
 
+    pure = True
+
     def __init__(self, stack, fn_name, args):
         super(GetFile, self).__init__(stack, fn_name, args)
 
@@ -578,6 +595,8 @@ class Join(function.Function):
         "<string_1><delim><string_2><delim>..."
     """
 
+    pure = True
+
     def __init__(self, stack, fn_name, args):
         super(Join, self).__init__(stack, fn_name, args)
 
@@ -639,6 +658,8 @@ class JoinMultiple(function.Function):
     Optionally multiple lists may be specified, which will also be joined.
     """
 
+    pure = True
+
     def __init__(self, stack, fn_name, args):
         super(JoinMultiple, self).__init__(stack, fn_name, args)
         example = '"%s" : [ " ", [ "str1", "str2"] ...]' % fn_name
@@ -712,6 +733,8 @@ class MapMerge(function.Function):
 
     """
 
+    pure = True
+
     def __init__(self, stack, fn_name, args):
         super(MapMerge, self).__init__(stack, fn_name, args)
         example = (_('"%s" : [ { "key1": "val1" }, { "key2": "val2" } ]')
@@ -759,6 +782,8 @@ class MapReplace(function.Function):
 
     """
 
+    pure = True
+
     def __init__(self, stack, fn_name, args):
         super(MapReplace, self).__init__(stack, fn_name, args)
         example = (_('"%s" : [ { "key1": "val1" }, '
@@ -892,6 +917,8 @@ class Repeat(function.Function):
     corresponding item of <list>.
     """
 
+    pure = True
+
     def __init__(self, stack, fn_name, args):
         super(Repeat, self).__init__(stack, fn_name, args)
         self._parse_args()
@@ -1057,6 +1084,8 @@ class Digest(function.Function):
     sha224, sha256, sha384, and sha512) or any one provided by OpenSSL.
     """
 
+    pure = True
+
     def validate_usage(self, args):
         if not (isinstance(args, list) and
                 all([isinstance(a, six.string_types) for a in args])):
@@ -1106,6 +1135,8 @@ class StrSplit(function.Function):
     path based attributes accessing lists.
     """
 
+    pure = True
+
     def __init__(self, stack, fn_name, args):
         super(StrSplit, self).__init__(stack, fn_name, args)
         example = '"%s" : [ ",", "apples,pears", <index>]' % fn_name
@@ -1167,6 +1198,8 @@ class Yaql(function.Function):
     Evaluates expression <body> on the given data.
     """
 
+    pure = True
+
     _parser = None
 
     @classmethod
@@ -1236,6 +1269,8 @@ class Equals(function.Function):
     if the two values are equal or false if they aren't.
     """
 
+    pure = True
+
     def __init__(self, stack, fn_name, args):
         super(Equals, self).__init__(stack, fn_name, args)
         try:
@@ -1297,6 +1332,8 @@ class If(function.Macro):
 class ConditionBoolean(function.Function):
     """Abstract parent class of boolean condition functions."""
 
+    pure = True
+
     def __init__(self, stack, fn_name, args):
         super(ConditionBoolean, self).__init__(stack, fn_name, args)
         self._check_args()
@@ -1391,6 +1428,9 @@ class Filter(function.Function):
 
     Returns a new list without the values.
     """
+
+    pure = True
+
     def __init__(self, stack, fn_name, args):
         super(Filter, self).__init__(stack, fn_name, args)
 
@@ -1446,6 +1486,8 @@ class MakeURL(function.Function):
     components.
     """
 
+    pure = True
+
     _ARG_KEYS = (
         SCHEME, USERNAME, PASSWORD, HOST, PORT,
         PATH, QUERY, FRAGMENT,
@@ -1557,6 +1599,8 @@ class ListConcat(function.Function):
 
     """
 
+    pure = True
+
     _unique = False
 
     def __init__(self, stack, fn_name, args):
@@ -1619,6 +1663,8 @@ class Contains(function.Function):
     if the specific value is in the sequence, otherwise returns false.
     """
 
+    pure = True
+
     def __init__(self, stack, fn_name, args):
         super(Contains, self).__init__(stack, fn_name, args)
         example = '"%s" : [ "value1", [ "value1", "value2"]]' % self.fn_name
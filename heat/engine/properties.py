@@ -212,6 +212,36 @@ def schemata(schema_dicts):
     return dict((n, Schema.from_legacy(s)) for n, s in schema_dicts.items())
 
 
+def _has_custom_constraint(schema):
+    if any(isinstance(c, constr.CustomConstraint)
+           for c in schema.constraints):
+        return True
+    return schema.schema is not None and any(
+        _has_custom_constraint(s) for s in six.itervalues(schema.schema))
+
+
+def _custom_constraint_values(schema, value):
+    if not value:
+        return
+    if isinstance(value, six.string_types):
+        for c in schema.constraints:
+            if isinstance(c, constr.CustomConstraint):
+                yield c.name, value
+    if schema.schema is None:
+        return
+    if schema.type == schema.MAP and isinstance(value, collections.Mapping):
+        children = ((schema.schema[k], v) for k, v in six.iteritems(value)
+                    if k in schema.schema)
+    elif schema.type == schema.LIST and isinstance(value, list):
+        children = ((schema.schema[i], v) for i, v in enumerate(value))
+    else:
+        return
+    for child_schema, child_value in children:
+        for name_value in _custom_constraint_values(child_schema,
+                                                    child_value):
+            yield name_value
+
+
 class Property(object):
 
     def __init__(self, schema, name=None, context=None, path=None):
@@ -450,6 +480,22 @@ class Properties(collections.Mapping):
                 message=ex.error_message
             )
 
+    def custom_constraint_values(self):
+        """Iterate over the values checked by custom constraints.
+
+        Yields (constraint name, value) pairs. Values that can not be
+        resolved are skipped; validate() reports them.
+        """
+        for key, prop in six.iteritems(self.props):
+            if not _has_custom_constraint(prop.schema):
+                continue
+            try:
+                value = self._get_property_value(key)
+            except Exception:
+                continue
+            for name_value in _custom_constraint_values(prop.schema, value):
+                yield name_value
+
     def _find_deps_any_in_init(self, unresolved_value):
         deps = function.dependencies(unresolved_value)
         if any(res.action == res.INIT for res in deps):
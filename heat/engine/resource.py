@@ -28,6 +28,7 @@ import six
 from heat.common import exception
 from heat.common.i18n import _
 from heat.common import identifier
+from heat.common import metrics
 from heat.common import short_id
 from heat.common import timeutils
 from heat.engine import attributes
@@ -158,6 +159,11 @@ class Resource(status.ResourceStatus):
     # a signal to this resource
     signal_needs_metadata_updates = True
 
+    # Types of the resources in the same stack that add_dependencies() may
+    # make this resource depend on. If add_dependencies() is overridden and
+    # this is empty, any resource may be depended on.
+    implicit_dependency_types = ()
+
     def __new__(cls, name, definition, stack):
         """Create a new Resource of the appropriate class for its type."""
 
@@ -239,6 +245,7 @@ class Resource(status.ResourceStatus):
         self._rsrc_metadata = None
         self._rsrc_prop_data = None
         self._stored_properties_data = None
+        self._definition_fingerprint = None
         self.created_time = stack.created_time
         self.updated_time = stack.updated_time
         self._rpc_client = None
@@ -292,6 +299,7 @@ class Resource(status.ResourceStatus):
         self._rsrc_metadata = resource.rsrc_metadata
         self._stored_properties_data = resource.properties_data
         self._rsrc_prop_data = resource.rsrc_prop_data
+        self._definition_fingerprint = resource.definition_fingerprint
         self.created_time = resource.created_at
         self.updated_time = resource.updated_at
         self.needed_by = resource.needed_by
@@ -323,11 +331,14 @@ class Resource(status.ResourceStatus):
         self._stackref = weakref.ref(stack)
 
     @classmethod
-    def load(cls, context, resource_id, current_traversal, is_update, data):
+    def load(cls, context, resource_id, current_traversal, is_update, data,
+             db_stack=None):
         from heat.engine import stack as stack_mod
         db_res = resource_objects.Resource.get_obj(context, resource_id)
+        if db_stack is not None and db_stack.id != db_res.stack_id:
+            db_stack = None
         curr_stack = stack_mod.Stack.load(context, stack_id=db_res.stack_id,
-                                          cache_data=data)
+                                          stack=db_stack, cache_data=data)
 
         resource_owning_stack = curr_stack
         if (db_res.current_template_id != curr_stack.t.id and
@@ -422,6 +433,7 @@ class Resource(status.ResourceStatus):
             return self.t.metadata()
         if self._rsrc_metadata is not None:
             return self._rsrc_metadata
+        self._flush_writes()
         rs = resource_objects.Resource.get_obj(self.stack.context, self.id,
                                                refresh=True,
                                                fields=('rsrc_metadata', ))
@@ -445,6 +457,7 @@ class Resource(status.ResourceStatus):
         if self.id is None or self.action == self.INIT:
             raise exception.ResourceNotAvailable(resource_name=self.name)
         refresh = merge_metadata is not None
+        self._flush_writes()
         db_res = resource_objects.Resource.get_obj(
             self.stack.context, self.id, refresh=refresh,
             fields=('name', 'rsrc_metadata', 'atomic_key', 'engine_id',
@@ -812,6 +825,7 @@ class Resource(status.ResourceStatus):
                 attempts += max(cfg.CONF.client_retry_limit, 0)
         else:
             lock_acquire = lock_release = self.LOCK_NONE
+        meter = metrics.Meter('resource.action', self.type(), action)
 
         # retry for convergence DELETE or UPDATE if we get the usual
         # lock-acquire exception of exception.UpdateInProgress
@@ -863,6 +877,8 @@ class Resource(status.ResourceStatus):
                     LOG.exception('Error marking resource as failed')
         else:
             self.state_set(action, self.COMPLETE, lock=lock_release)
+        finally:
+            meter.stop()
 
     def action_handler_task(self, action, args=None, action_prefix=None):
         """A task to call the Resource subclass's handler methods for action.
@@ -885,17 +901,24 @@ class Resource(status.ResourceStatus):
         handler = getattr(self, 'handle_%s' % handler_action, None)
 
         if callable(handler):
-            handler_data = handler(*args)
+            with metrics.timer('resource.handle', self.type(), action):
+                handler_data = handler(*args)
             yield
             if callable(check):
+                polls = 0
                 try:
                     while True:
+                        polls += 1
                         try:
-                            done = check(handler_data)
+                            with metrics.timer('resource.check', self.type(),
+                                               action):
+                                done = check(handler_data)
                         except PollDelay as delay:
                             yield delay.period
                         else:
                             if done:
+                                metrics.observe('resource.polls', polls,
+                                                self.type(), action)
                                 break
                             else:
                                 yield
@@ -1142,6 +1165,10 @@ class Resource(status.ResourceStatus):
         self.reparse()
         self._update_stored_properties()
 
+        def pre_create():
+            self.properties.validate()
+            self._definition_fingerprint = self.t.freeze().fingerprint()
+
         count = {self.CREATE: 0, self.DELETE: 0}
 
         retry_limit = max(cfg.CONF.action_retry_limit, 0)
@@ -1157,7 +1184,7 @@ class Resource(status.ResourceStatus):
                 yield waiter.as_task(timeout=delay)
             elif action == self.CREATE:
                 # Only validate properties in first create call.
-                pre_func = self.properties.validate
+                pre_func = pre_create
 
             try:
                 yield self._do_action(action, pre_func)
@@ -1320,6 +1347,35 @@ class Resource(status.ResourceStatus):
         except ValueError:
             return True
 
+    def _definition_unchanged(self, after):
+        """Return True if the definition is the one last created or updated.
+
+        The fingerprint stored with the resource is compared with that of the
+        new definition, so that the properties of the old and new definitions
+        need not be built and compared. Resources that are not in a completed
+        state, or that customise the checks of _needs_update(), are always
+        compared in full.
+        """
+        if (self._definition_fingerprint is None or
+                self.status != self.COMPLETE or
+                self.action in (self.INIT, self.DELETE) or
+                cfg.CONF.observe_on_update or self.converge):
+            return False
+
+        for method in ('_needs_update', 'needs_replace'):
+            if (getattr(getattr(self, method), '__func__', None) is not
+                    six.get_unbound_function(getattr(Resource, method))):
+                return False
+
+        return after.freeze().fingerprint() == self._definition_fingerprint
+
+    def _set_definition_fingerprint(self, frozen_defn):
+        fingerprint = frozen_defn.fingerprint()
+        if fingerprint != self._definition_fingerprint:
+            self._definition_fingerprint = fingerprint
+            if self.id is not None:
+                self._update_by_id({'definition_fingerprint': fingerprint})
+
     def _check_for_convergence_replace(self, restricted_actions):
         if 'replace' in restricted_actions:
             ex = exception.ResourceActionRestricted(action='replace')
@@ -1501,8 +1557,6 @@ class Resource(status.ResourceStatus):
         action = self.UPDATE
 
         assert isinstance(after, rsrc_defn.ResourceDefinition)
-        if before is None:
-            before = self.frozen_definition()
 
         after_external_id = after.external_id()
         if self.external_id != after_external_id:
@@ -1515,6 +1569,16 @@ class Resource(status.ResourceStatus):
             LOG.debug("Skip update on external resource.")
             return
 
+        if self._definition_unchanged(after):
+            yield self._break_if_required(
+                self.UPDATE, environment.HOOK_PRE_UPDATE)
+            LOG.debug("Definition of %s is unchanged", self)
+            if update_templ_func is not None:
+                update_templ_func(persist=True)
+            return
+
+        if before is None:
+            before = self.frozen_definition()
         after_props, before_props = self._prepare_update_props(after, before)
 
         yield self._break_if_required(
@@ -1529,6 +1593,7 @@ class Resource(status.ResourceStatus):
                                                       after_props,
                                                       before_props,
                                                       prev_resource):
+                    self._set_definition_fingerprint(after.freeze())
                     if update_templ_func is not None:
                         update_templ_func(persist=True)
                     return
@@ -1536,6 +1601,7 @@ class Resource(status.ResourceStatus):
                 if not self._needs_update(after, before,
                                           after_props, before_props,
                                           prev_resource):
+                    self._set_definition_fingerprint(after.freeze())
                     if update_templ_func is not None:
                         update_templ_func(persist=True)
                     if self.status == self.FAILED:
@@ -1563,7 +1629,8 @@ class Resource(status.ResourceStatus):
             with self._action_recorder(action, UpdateReplace):
                 after_props.validate()
 
-                tmpl_diff = self.update_template_diff(after.freeze(), before)
+                after_frozen = after.freeze()
+                tmpl_diff = self.update_template_diff(after_frozen, before)
                 if tmpl_diff and self.needs_replace_with_tmpl_diff(tmpl_diff):
                     raise UpdateReplace(self)
 
@@ -1577,6 +1644,7 @@ class Resource(status.ResourceStatus):
                 self.t = after
                 self.reparse()
                 self._update_stored_properties()
+                self._definition_fingerprint = after_frozen.fingerprint()
                 if update_templ_func is not None:
                     # template/requires will be persisted by _action_recorder()
                     update_templ_func(persist=False)
@@ -1956,10 +2024,7 @@ class Resource(status.ResourceStatus):
         self.resource_id = inst
         if self.id is not None:
             try:
-                resource_objects.Resource.update_by_id(
-                    self.context,
-                    self.id,
-                    {'physical_resource_id': self.resource_id})
+                self._update_by_id({'physical_resource_id': self.resource_id})
             except Exception as ex:
                 LOG.warning('db error %s', ex)
 
@@ -1986,6 +2051,7 @@ class Resource(status.ResourceStatus):
               'current_template_id': self.current_template_id,
               'root_stack_id': self.root_stack_id,
               'updated_at': self.updated_time,
+              'definition_fingerprint': self._definition_fingerprint,
               'properties_data': None}
 
         if set_metadata:
@@ -1994,13 +2060,13 @@ class Resource(status.ResourceStatus):
             self._rsrc_metadata = metadata
 
         if self.id is not None:
-            if (lock == self.LOCK_NONE or self._calling_engine_id is None):
+            if lock == self.LOCK_NONE:
+                self._update_by_id(rs)
+            elif self._calling_engine_id is None:
+                self._flush_writes()
                 resource_objects.Resource.update_by_id(
                     self.context, self.id, rs)
-                if (lock != self.LOCK_NONE and
-                        self._calling_engine_id is None):
-                    LOG.warning('no calling_engine_id in store %s',
-                                str(rs))
+                LOG.warning('no calling_engine_id in store %s', str(rs))
             else:
                 self._store_with_lock(rs, lock)
         else:
@@ -2009,7 +2075,23 @@ class Resource(status.ResourceStatus):
             self.uuid = new_rs.uuid
             self.created_time = new_rs.created_at
 
+    def _update_by_id(self, values):
+        """Update the resource row, via the stack's write buffer if any."""
+        write_buffer = self.stack.write_buffer
+        if write_buffer is not None:
+            write_buffer.update_resource(self.id, values)
+        else:
+            resource_objects.Resource.update_by_id(self.context, self.id,
+                                                   values)
+
+    def _flush_writes(self):
+        """Write any buffered update to the resource row immediately."""
+        write_buffer = self.stack.write_buffer
+        if write_buffer is not None and self.id is not None:
+            write_buffer.flush_resource(self.id)
+
     def _store_with_lock(self, rs, lock):
+        self._flush_writes()
         if lock == self.LOCK_ACQUIRE:
             rs['engine_id'] = self._calling_engine_id
             expected_engine_id = None
@@ -2042,7 +2124,7 @@ class Resource(status.ResourceStatus):
                          physical_res_id, self._rsrc_prop_data,
                          self.name, self.type())
 
-        ev.store()
+        ev.store(self.stack.write_buffer)
         self.stack.dispatch_event(ev)
 
     @contextlib.contextmanager
@@ -2235,6 +2317,11 @@ class Resource(status.ResourceStatus):
                 self.attributes.cached_attrs, self._attr_data_id)
             if attr_data_id is not None:
                 self._attr_data_id = attr_data_id
+                if cfg.CONF.cache_stack_outputs and any(
+                        self.name in output.required_resource_names()
+                        for output in six.itervalues(self.stack.outputs)):
+                    # The stored outputs may use the previous values
+                    self.stack.clear_outputs()
         except Exception as ex:
             LOG.error('store_attributes rsrc %(name)s %(id)s DB error %(ex)s',
                       {'name': self.name, 'id': self.id, 'ex': ex})
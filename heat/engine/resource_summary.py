@@ -0,0 +1,260 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Lightweight listing of the resources of a tree of stacks.
+
+Listing resources does not need Resource objects, with their properties and
+attributes, nor Stack objects for each nested stack. The summaries here are
+built from a few columns of the resource and stack tables, loaded for the
+whole tree of stacks in a couple of queries, and from the resource types
+and dependencies of each template, which are parsed once per template.
+"""
+
+import collections
+
+from oslo_log import log as logging
+import six
+
+from heat.common import identifier
+from heat.common import short_id
+from heat.engine import resource
+from heat.engine import stk_defn
+from heat.engine import template
+from heat.objects import resource as resource_objects
+from heat.objects import stack as stack_object
+
+LOG = logging.getLogger(__name__)
+
+
+def _overrides(cls, method_name):
+    method = six.get_unbound_function(getattr(cls, method_name))
+    base_method = six.get_unbound_function(getattr(resource.Resource,
+                                                   method_name))
+    return method is not base_method
+
+
+class StackSummary(object):
+    """The parts of a stack needed to list its resources."""
+
+    def __init__(self, db_stack):
+        self.id = db_stack.id
+        self.name = db_stack.name
+        self.tenant_id = db_stack.tenant
+        self.owner_id = db_stack.owner_id
+        self.raw_template_id = db_stack.raw_template_id
+        self.convergence = db_stack.convergence
+        self.parent_resource_name = db_stack.parent_resource_name
+
+    def identifier(self):
+        """Return an identifier for this stack."""
+        return identifier.HeatIdentifier(self.tenant_id, self.name, self.id)
+
+
+class ResourceSummary(object):
+    """The parts of a resource shown when listing resources.
+
+    This provides the subset of the Resource interface used by
+    heat.engine.api.format_stack_resource() without details.
+    """
+
+    def __init__(self, stack, db_res, resource_type, required_by,
+                 nested_identifier=None):
+        self.stack = stack
+        self.id = db_res.id
+        self.name = db_res.name
+        self.resource_id = db_res.physical_resource_id
+        self.action = db_res.action
+        self.status = db_res.status
+        self.status_reason = db_res.status_reason
+        self.created_time = db_res.created_at
+        self.updated_time = db_res.updated_at
+        self._type = resource_type
+        self._required_by = required_by
+        self._nested_identifier = nested_identifier
+
+    def type(self):
+        return self._type
+
+    def identifier(self):
+        """Return an identifier for this resource."""
+        return identifier.ResourceIdentifier(resource_name=self.name,
+                                             **self.stack.identifier())
+
+    def required_by(self):
+        return list(self._required_by)
+
+    def has_nested(self):
+        return self._nested_identifier is not None
+
+    def nested_identifier(self):
+        return self._nested_identifier
+
+
+class TemplateSummary(object):
+    """The resource types and dependencies of a template."""
+
+    def __init__(self, context, template_id, stack_identifier):
+        tmpl = template.Template.load(context, template_id)
+        defn = stk_defn.StackDefinition(context, tmpl, stack_identifier, None)
+        registry = tmpl.env.registry
+        definitions = dict((name, defn.resource_definition(name))
+                           for name in defn.enabled_rsrc_names())
+
+        # The name of a resource only matters to look up its type if the
+        # environment maps types for that resource specifically
+        named_resources = registry.as_dict().get('resources', {})
+        infos = {}
+
+        self.types = {}
+        self.classes = {}
+        interfaces = set()
+        for name, rsrc_defn in six.iteritems(definitions):
+            key = (rsrc_defn.resource_type,
+                   name if name in named_resources else None)
+            if key not in infos:
+                infos[key] = registry.get_resource_info(*key)
+            self.types[name] = rsrc_defn.resource_type
+            self.classes[name] = infos[key].get_class_to_instantiate()
+            interfaces.add(rsrc_defn.resource_type)
+            interfaces.add(infos[key].name)
+
+        self.required_by = collections.defaultdict(list)
+        for name, rsrc_defn in six.iteritems(definitions):
+            for dep in rsrc_defn.required_resource_names():
+                if dep in self.classes and getattr(self.classes[dep],
+                                                   'strict_dependency', True):
+                    self.required_by[dep].append(name)
+
+        # Dependencies added by resource plugins can only be found by loading
+        # the resources
+        self.implicit_dependencies = any(
+            _overrides(cls, 'add_dependencies') and (
+                not cls.implicit_dependency_types or
+                interfaces.intersection(cls.implicit_dependency_types))
+            for cls in six.itervalues(self.classes))
+
+
+class StackTree(object):
+    """The resources of a tree of stacks, loaded in a couple of queries."""
+
+    def __init__(self, context, root_stack_id, filters=None):
+        self.context = context
+        self._stacks = dict(
+            (db_stack.id, StackSummary(db_stack))
+            for db_stack in stack_object.Stack.get_all_summary_by_root(
+                context, root_stack_id))
+        self._resources = collections.defaultdict(collections.OrderedDict)
+        for db_res in resource_objects.Resource.get_all_summary_by_root_stack(
+                context, root_stack_id):
+            # As when loading resources by stack, the latest resource of
+            # each name is used
+            self._resources[db_res.stack_id][db_res.name] = db_res
+        self._selected = None
+        if filters:
+            self._selected = set(
+                db_res.id for db_res in
+                resource_objects.Resource.get_all_summary_by_root_stack(
+                    context, root_stack_id, filters))
+        self._templates = {}
+
+    def nested_stack_ids(self, stack_id):
+        """Return the ids of the stacks nested in the given stack."""
+        for db_res in six.itervalues(self._resources[stack_id]):
+            nested = self._stacks.get(db_res.physical_resource_id)
+            if nested is not None and nested.owner_id == stack_id:
+                yield nested.id
+
+    def iter_stack_ids(self, stack_id, nested_depth=0):
+        """Iterate over the given stack and the stacks nested in it.
+
+        The stacks are returned in the same order as iterating over their
+        resources returns them.
+        """
+        yield stack_id
+        if nested_depth > 0:
+            for nested_id in self.nested_stack_ids(stack_id):
+                for sid in self.iter_stack_ids(nested_id, nested_depth - 1):
+                    yield sid
+
+    def _template(self, template_id, stack):
+        if template_id not in self._templates:
+            try:
+                self._templates[template_id] = TemplateSummary(
+                    self.context, template_id, stack.identifier())
+            except Exception as ex:
+                LOG.debug('Unable to summarise template %(tmpl)s: %(err)s',
+                          {'tmpl': template_id, 'err': ex})
+                self._templates[template_id] = None
+        return self._templates[template_id]
+
+    def _nested_identifier(self, stack, db_res, rsrc_class):
+        if (not _overrides(rsrc_class, 'has_nested') or
+                db_res.physical_resource_id is None):
+            return None
+        nested = self._stacks.get(db_res.physical_resource_id)
+        if nested is not None:
+            name = nested.name
+        elif db_res.action == resource.Resource.INIT:
+            name = None
+        else:
+            name = '%s-%s-%s' % (stack.name.rstrip('*'), db_res.name,
+                                 short_id.get_id(db_res.uuid))
+            if rsrc_class.physical_resource_name_limit:
+                name = resource.Resource.reduce_physical_resource_name(
+                    name, rsrc_class.physical_resource_name_limit)
+        return identifier.HeatIdentifier(self.context.tenant_id, name,
+                                         db_res.physical_resource_id)
+
+    def resource_summaries(self, stack_id):
+        """Return summaries of the resources of the given stack.
+
+        Return None if the stack can not be summarised, in which case its
+        resources must be loaded in full.
+        """
+        stack = self._stacks.get(stack_id)
+        if stack is None:
+            return None
+        current = self._template(stack.raw_template_id, stack)
+        if current is None or current.implicit_dependencies:
+            return None
+
+        db_resources = self._resources[stack_id]
+        summaries = []
+        for db_res in six.itervalues(db_resources):
+            template_id = db_res.current_template_id or stack.raw_template_id
+            if template_id == stack.raw_template_id:
+                tmpl = current
+            else:
+                tmpl = self._template(template_id, stack)
+                if tmpl is None:
+                    return None
+            if db_res.name not in tmpl.types:
+                continue
+            if self._selected is not None and db_res.id not in self._selected:
+                continue
+
+            if tmpl is current:
+                required_by = current.required_by[db_res.name]
+            elif stack.convergence:
+                needed_by = db_res.needed_by or []
+                required_by = [r.name for r in six.itervalues(db_resources)
+                               if r.id in needed_by and
+                               r.name in current.types]
+            else:
+                required_by = []
+
+            summaries.append(ResourceSummary(
+                stack, db_res, tmpl.types[db_res.name], required_by,
+                self._nested_identifier(stack, db_res,
+                                        tmpl.classes[db_res.name])))
+        return summaries
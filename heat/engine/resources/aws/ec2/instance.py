@@ -864,7 +864,7 @@ class Instance(resource.Resource, sh.SchedulerHintsMixin):
 
     def check_suspend_complete(self, server_id):
         cp = self.client_plugin()
-        server = cp.fetch_server(server_id)
+        server = cp.poll_server(server_id)
         if not server:
             return False
         status = cp.get_status(server)
@@ -35,6 +35,72 @@ from heat.scaling import rolling_update
 from heat.scaling import template as scl_template
 
 
+class MemberDefinitions(object):
+    """Builds the definitions of the members of a group.
+
+    The places where the index variable appears in the properties of the
+    resource definition are found once. The definitions of the members then
+    share every part of the properties in which the variable does not
+    appear, and only the strings in which it is replaced, and the maps and
+    lists containing them, are built for each member.
+    """
+
+    def __init__(self, res_defn, index_var):
+        self.res_defn = res_defn
+        self.index_var = index_var
+        self.res_type = res_defn[ResourceGroup.RESOURCE_DEF_TYPE]
+        self.props = res_defn.get(ResourceGroup.RESOURCE_DEF_PROPERTIES)
+        self.meta = res_defn[ResourceGroup.RESOURCE_DEF_METADATA]
+        self._replace = self._replacer(self.props) if self.props else None
+
+    def _replacer(self, val):
+        """Return a function to replace the index variable in a value.
+
+        Return None if the index variable does not appear in the value.
+        """
+        index_var = self.index_var
+
+        if isinstance(val, six.string_types):
+            if index_var not in val:
+                return None
+            return lambda name: val.replace(index_var, name)
+
+        if isinstance(val, collections.Mapping):
+            items = [(k, self._replacer(v)) for k, v in val.items()]
+            replacers = [(k, r) for k, r in items if r is not None]
+            container = dict
+        elif isinstance(val, collections.Sequence):
+            items = enumerate(self._replacer(v) for v in val)
+            replacers = [(i, r) for i, r in items if r is not None]
+            container = list
+        else:
+            return None
+
+        if not replacers:
+            return None
+
+        def replace(name):
+            result = container(val)
+            for key, replacer in replacers:
+                result[key] = replacer(name)
+            return result
+
+        return replace
+
+    def definition(self, res_name):
+        """Return the resource definition of the named member."""
+        props = self.props
+        if self._replace is not None:
+            props = self._replace(res_name)
+        # Members are given their own metadata map, as the group index may
+        # be added to it
+        meta = self.meta
+        if meta is not None:
+            meta = dict(meta)
+        return rsrc_defn.ResourceDefinition(res_name, self.res_type,
+                                            props, meta)
+
+
 class ResourceGroup(stack_resource.StackResource):
     """Creates one or more identically configured nested resources.
 
@@ -270,6 +336,8 @@ class ResourceGroup(stack_resource.StackResource):
         )
     }
 
+    _members = None
+
     def get_size(self):
         return self.properties.get(self.COUNT)
 
@@ -481,16 +549,22 @@ class ResourceGroup(stack_resource.StackResource):
                 yield output.OutputDefinition(output_name, value)
 
     def build_resource_definition(self, res_name, res_defn):
-        res_def = copy.deepcopy(res_defn)
-
-        props = res_def.get(self.RESOURCE_DEF_PROPERTIES)
-        if props:
-            props = self._handle_repl_val(res_name, props)
+        return self._member_definitions(res_defn).definition(res_name)
 
-        res_type = res_def[self.RESOURCE_DEF_TYPE]
-        meta = res_def[self.RESOURCE_DEF_METADATA]
+    def _member_definitions(self, res_defn):
+        """Return the MemberDefinitions for a group resource definition.
 
-        return rsrc_defn.ResourceDefinition(res_name, res_type, props, meta)
+        The last one built is reused for as long as the same resource
+        definition is passed, so that the definitions of all the members of
+        the group are built from it.
+        """
+        index_var = self.properties[self.INDEX_VAR]
+        members = self._members
+        if (members is None or members.res_defn is not res_defn or
+                members.index_var != index_var):
+            members = MemberDefinitions(res_defn, index_var)
+            self._members = members
+        return members
 
     def get_resource_def(self, include_all=False):
         """Returns the resource definition portion of the group.
@@ -537,20 +611,6 @@ class ResourceGroup(stack_resource.StackResource):
             res_def[self.RESOURCE_DEF_PROPERTIES] = props
         return res_def
 
-    def _handle_repl_val(self, res_name, val):
-        repl_var = self.properties[self.INDEX_VAR]
-
-        def recurse(x):
-            return self._handle_repl_val(res_name, x)
-
-        if isinstance(val, six.string_types):
-            return val.replace(repl_var, res_name)
-        elif isinstance(val, collections.Mapping):
-            return {k: recurse(v) for k, v in val.items()}
-        elif isinstance(val, collections.Sequence):
-            return [recurse(v) for v in val]
-        return val
-
     def _assemble_nested(self, names, include_all=False,
                          template_version=('heat_template_version',
                                            '2015-04-30')):
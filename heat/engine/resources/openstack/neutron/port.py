@@ -41,6 +41,8 @@ class Port(neutron.NeutronResource):
 
     entity = 'port'
 
+    implicit_dependency_types = ('OS::Neutron::Subnet',)
+
     PROPERTIES = (
         NAME, NETWORK_ID, NETWORK, FIXED_IPS, SECURITY_GROUPS,
         REPLACEMENT_POLICY, DEVICE_ID, DEVICE_OWNER, DNS_NAME,
@@ -723,6 +723,8 @@ class Server(server_base.BaseServer, sh.SchedulerHintsMixin,
 
     default_client_name = 'nova'
 
+    implicit_dependency_types = ('OS::Neutron::Subnet',)
+
     def translation_rules(self, props):
         rules = [
             translation.TranslationRule(
@@ -1776,7 +1778,7 @@ class Server(server_base.BaseServer, sh.SchedulerHintsMixin,
 
     def check_suspend_complete(self, server_id):
         cp = self.client_plugin()
-        server = cp.fetch_server(server_id)
+        server = cp.poll_server(server_id)
         if not server:
             return False
         status = cp.get_status(server)
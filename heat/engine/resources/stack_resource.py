@@ -11,6 +11,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import json
 import weakref
 
@@ -18,25 +19,44 @@ from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_utils import excutils
 from oslo_utils import reflection
+from oslo_utils import timeutils as oslo_timeutils
 import six
 
 from heat.common import exception
 from heat.common.i18n import _
 from heat.common import identifier
 from heat.common import template_format
+from heat.common import timeutils
 from heat.engine import attributes
 from heat.engine import environment
 from heat.engine import resource
 from heat.engine import scheduler
 from heat.engine import stack as parser
 from heat.engine import template
-from heat.objects import raw_template
 from heat.objects import stack as stack_object
 from heat.objects import stack_lock
 from heat.rpc import api as rpc_api
 
 LOG = logging.getLogger(__name__)
 
+# The most recent final states of nested stacks, as notified by the engines
+# that ran their actions, keyed by nested stack ID.
+_NESTED_STATUS_MAX = 1000
+_nested_status = collections.OrderedDict()
+
+
+def nested_stack_complete(stack_id, action, status, status_reason,
+                          updated_time, outputs):
+    """Record the final state of an action on a nested stack."""
+    if updated_time is not None:
+        updated_time = oslo_timeutils.normalize_time(
+            oslo_timeutils.parse_isotime(updated_time))
+    _nested_status.pop(stack_id, None)
+    _nested_status[stack_id] = (action, status, status_reason,
+                                updated_time, outputs)
+    while len(_nested_status) > _NESTED_STATUS_MAX:
+        _nested_status.popitem(last=False)
+
 
 class StackResource(resource.Resource):
     """Allows entire stack to be managed as a resource in a parent stack.
@@ -54,6 +74,8 @@ class StackResource(resource.Resource):
         super(StackResource, self).__init__(name, json_snippet, stack)
         self._nested = None
         self._outputs = None
+        self._last_status_poll = None
+        self._nested_notifies = None
         self.resource_info = None
 
     def validate(self):
@@ -313,8 +335,8 @@ class StackResource(resource.Resource):
             except exception.HeatException:
                 with excutils.save_and_reraise_exception():
                     if adopt_data is None:
-                        raw_template.RawTemplate.delete(self.context,
-                                                        kwargs['template_id'])
+                        template.Template.delete(self.context,
+                                                 kwargs['template_id'])
 
         self.resource_id_set(result['stack_id'])
 
@@ -371,19 +393,80 @@ class StackResource(resource.Resource):
     def check_create_complete(self, cookie=None):
         return self._check_status_complete(self.CREATE)
 
-    def _check_status_complete(self, expected_action, cookie=None):
+    def _clear_nested_status(self):
+        """Discard any notified state left over from a previous action."""
+        if self.resource_id is not None:
+            _nested_status.pop(self.resource_id, None)
+        self._last_status_poll = None
+        self._nested_notifies = None
 
-        try:
-            data = stack_object.Stack.get_status(self.context,
-                                                 self.resource_id)
-        except exception.NotFound:
-            if expected_action == self.DELETE:
-                return True
-            # It's possible the engine handling the create hasn't persisted
-            # the stack to the DB when we first start polling for state
+    def _notified_status(self, expected_action):
+        """Return the notified final state of the expected nested action.
+
+        Return None if no notification for the expected action has been
+        received.
+        """
+        if self.resource_id is None:
+            return None
+        data = _nested_status.get(self.resource_id)
+        if data is None or data[0] != expected_action:
+            return None
+        return _nested_status.pop(self.resource_id)
+
+    def _nested_stack_notifies(self):
+        """Return whether the nested stack notifies us of its final state.
+
+        Only legacy nested stacks notify their parent, and only while the
+        parent is locked, which convergence stacks never are.
+        """
+        if not cfg.CONF.nested_stack_notify or self.stack.convergence:
             return False
+        if self._nested_notifies is None:
+            nested = stack_object.Stack.get_by_id(self.context,
+                                                  self.resource_id,
+                                                  show_deleted=True,
+                                                  eager_load=False)
+            if nested is None:
+                return False
+            self._nested_notifies = not nested.convergence
+        return self._nested_notifies
 
-        action, status, status_reason, updated_time = data
+    def _poll_due(self):
+        """Return whether the nested stack state should be read now.
+
+        When the nested stack notifies us of its final state, the database
+        is only polled occasionally in case a notification is lost.
+        """
+        if not self._nested_stack_notifies():
+            return True
+        now = timeutils.wallclock()
+        if (self._last_status_poll is not None and
+                now - self._last_status_poll <
+                cfg.CONF.nested_stack_poll_interval):
+            return False
+        self._last_status_poll = now
+        return True
+
+    def _check_status_complete(self, expected_action, cookie=None):
+        notified = self._notified_status(expected_action)
+        if notified is not None:
+            action, status, status_reason, updated_time, outputs = notified
+        else:
+            if not self._poll_due():
+                return False
+            outputs = None
+            try:
+                data = stack_object.Stack.get_status(self.context,
+                                                     self.resource_id)
+            except exception.NotFound:
+                if expected_action == self.DELETE:
+                    return True
+                # It's possible the engine handling the create hasn't
+                # persisted the stack to the DB when we first start polling
+                # for state
+                return False
+
+            action, status, status_reason, updated_time = data
 
         if action != expected_action:
             return False
@@ -411,14 +494,17 @@ class StackResource(resource.Resource):
         if status == self.IN_PROGRESS:
             return False
         elif status == self.COMPLETE:
-            ret = stack_lock.StackLock.get_engine_id(
+            # A notification is only sent once the stack lock is released
+            ret = notified is not None or stack_lock.StackLock.get_engine_id(
                 self.context, self.resource_id) is None
             if ret:
                 # Reset nested, to indicate we changed status
                 self._nested = None
                 # (handle new outputs added by update)
-                # Clear outputs to trigger re-querying them
-                self._outputs = None
+                # Use any notified outputs, or clear them to trigger
+                # re-querying them
+                self._outputs = (None if outputs is None else
+                                 {o[rpc_api.OUTPUT_KEY]: o for o in outputs})
             return ret
         elif status == self.FAILED:
             raise exception.ResourceFailure(status_reason, self,
@@ -505,13 +591,14 @@ class StackResource(resource.Resource):
             'args': {rpc_api.PARAM_TIMEOUT: timeout_mins,
                      rpc_api.PARAM_CONVERGE: self.converge}
         })
+        self._clear_nested_status()
         with self.translate_remote_exceptions:
             try:
                 self.rpc_client()._update_stack(self.context, **kwargs)
             except exception.HeatException:
                 with excutils.save_and_reraise_exception():
-                    raw_template.RawTemplate.delete(self.context,
-                                                    kwargs['template_id'])
+                    template.Template.delete(self.context,
+                                             kwargs['template_id'])
         return cookie
 
     def check_update_complete(self, cookie=None):
@@ -543,6 +630,7 @@ class StackResource(resource.Resource):
         stack_identity = self.nested_identifier()
         if stack_identity is None:
             return
+        self._clear_nested_status()
 
         cookie = None
         try:
@@ -584,6 +672,7 @@ class StackResource(resource.Resource):
         if stack_identity is None:
             raise exception.Error(_('Cannot suspend %s, stack not created')
                                   % self.name)
+        self._clear_nested_status()
         self.rpc_client().stack_suspend(self.context, dict(stack_identity))
 
     def check_suspend_complete(self, cookie=None):
@@ -594,6 +683,7 @@ class StackResource(resource.Resource):
         if stack_identity is None:
             raise exception.Error(_('Cannot resume %s, stack not created')
                                   % self.name)
+        self._clear_nested_status()
         self.rpc_client().stack_resume(self.context, dict(stack_identity))
 
     def check_resume_complete(self, cookie=None):
@@ -604,7 +694,7 @@ class StackResource(resource.Resource):
         if stack_identity is None:
             raise exception.Error(_('Cannot check %s, stack not created')
                                   % self.name)
-
+        self._clear_nested_status()
         self.rpc_client().stack_check(self.context, dict(stack_identity))
 
     def check_check_complete(self, cookie=None):
@@ -45,7 +45,9 @@ class BaseVolume(resource.Resource):
         return vol.id
 
     def check_create_complete(self, vol_id):
-        vol = self.client().volumes.get(vol_id)
+        vol = self.client_plugin().poll_volume(vol_id)
+        if vol is None:
+            return False
 
         if vol.status == 'available':
             return True
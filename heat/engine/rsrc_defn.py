@@ -12,9 +12,11 @@
 
 import collections
 import copy
+import hashlib
 import itertools
 import operator
 
+from oslo_serialization import jsonutils
 import six
 
 from heat.common import exception
@@ -99,6 +101,7 @@ class ResourceDefinition(object):
 
         self._hash = hash(self.resource_type)
         self._rendering = None
+        self._fingerprint = None
         self._dep_names = None
         self._all_dep_attrs = None
 
@@ -312,6 +315,7 @@ class ResourceDefinition(object):
         # WRS: need to clear the rendering field otherwise the old
         # metadata used by render_hot gets re-used
         self._rendering = None
+        self._fingerprint = None
 
     def get_group_index(self):
         if self._metadata is None:
@@ -358,6 +362,19 @@ class ResourceDefinition(object):
 
         return self._rendering
 
+    def fingerprint(self):
+        """Return a digest of the HOT snippet for the resource definition.
+
+        Definitions that compare equal have the same fingerprint, which
+        unlike the hash is stable across processes and so may be stored to
+        detect later whether a definition has changed.
+        """
+        if self._fingerprint is None:
+            snippet = jsonutils.dumps(self.render_hot(), sort_keys=True)
+            self._fingerprint = hashlib.sha256(
+                snippet.encode('utf-8')).hexdigest()
+        return self._fingerprint
+
     def __sub__(self, previous):
         """Calculate the difference between this definition and a previous one.
 
@@ -422,7 +439,10 @@ class ResourceDefinition(object):
 def _hash_data(data):
     """Return a stable hash value for an arbitrary parsed-JSON data snippet."""
     if isinstance(data, function.Function):
-        data = copy.deepcopy(data)
+        # Hash the JSON form that a copy of the function would return to,
+        # without copying the whole of its arguments
+        constructor, args = data.__reduce__()
+        data = constructor(*args)
 
     if not isinstance(data, six.string_types):
         if isinstance(data, collections.Sequence):
@@ -11,6 +11,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import functools
 import sys
 import types
@@ -23,6 +24,7 @@ import six
 
 from heat.common.i18n import _
 from heat.common.i18n import repr_wrapper
+from heat.common import metrics
 from heat.common import timeutils
 
 LOG = logging.getLogger(__name__)
@@ -32,6 +34,19 @@ LOG = logging.getLogger(__name__)
 ENABLE_SLEEP = True
 
 
+class _NoWait(object):
+    """Sentinel yielded by a task to be stepped again without waiting."""
+
+    def __repr__(self):
+        return 'NO_WAIT'
+
+
+# A task may yield NO_WAIT instead of a poll period to indicate that it has
+# new work that should be stepped immediately, rather than after the usual
+# wait_time between steps.
+NO_WAIT = _NoWait()
+
+
 def task_description(task):
     """Return a human-readable string description of a task.
 
@@ -132,6 +147,9 @@ class TaskRunner(object):
         the TaskRunner, it may yield an integer which is the period of the
         task. e.g. "yield 2" will result in the task being advanced on every
         second step.
+
+        If the task yields NO_WAIT, the TaskRunner does not sleep before
+        advancing it again.
         """
         assert callable(task), "Task is not callable"
 
@@ -142,7 +160,9 @@ class TaskRunner(object):
         self._done = False
         self._timeout = None
         self._poll_period = 1
+        self._no_wait = False
         self.name = task_description(task)
+        self.metrics_scope = metrics.Scope()
 
     def __str__(self):
         """Return a human-readable string representation of the task."""
@@ -153,7 +173,14 @@ class TaskRunner(object):
         """Sleep for the specified number of seconds."""
         if ENABLE_SLEEP and wait_time is not None:
             LOG.debug('%s sleeping', six.text_type(self))
-            eventlet.sleep(wait_time)
+            if metrics.enabled():
+                start = timeutils.wallclock()
+                eventlet.sleep(wait_time)
+                metrics.timing('scheduler.tick_wait',
+                               max(timeutils.wallclock() - start - wait_time,
+                                   0))
+            else:
+                eventlet.sleep(wait_time)
 
     def __call__(self, wait_time=1, timeout=None, progress_callback=None):
         """Start and run the task to completion.
@@ -166,7 +193,11 @@ class TaskRunner(object):
         started = False
         for step in self.as_task(timeout=timeout,
                                  progress_callback=progress_callback):
-            self._sleep(wait_time if (started or wait_time is None) else 0)
+            if self._no_wait and wait_time is not None:
+                self._sleep(0)
+            else:
+                self._sleep(wait_time if (started or wait_time is None)
+                            else 0)
             started = True
 
     def start(self, timeout=None):
@@ -184,7 +215,8 @@ class TaskRunner(object):
         if timeout is not None:
             self._timeout = Timeout(self, timeout)
 
-        result = self._task(*self._args, **self._kwargs)
+        with metrics.scope(self.metrics_scope):
+            result = self._task(*self._args, **self._kwargs)
         if isinstance(result, types.GeneratorType):
             self._runner = result
             self.step()
@@ -201,6 +233,7 @@ class TaskRunner(object):
         if not self.done():
             assert self._runner is not None, "Task not started"
 
+            self._no_wait = False
             if self._poll_period > 1:
                 self._poll_period -= 1
                 return False
@@ -209,12 +242,14 @@ class TaskRunner(object):
                 LOG.info('%s timed out', self)
                 self._done = True
 
-                self._timeout.trigger(self._runner)
+                with metrics.scope(self.metrics_scope):
+                    self._timeout.trigger(self._runner)
             else:
                 LOG.debug('%s running', six.text_type(self))
 
                 try:
-                    poll_period = next(self._runner)
+                    with metrics.scope(self.metrics_scope):
+                        poll_period = next(self._runner)
                 except StopIteration:
                     self._done = True
                     LOG.debug('%s complete', six.text_type(self))
@@ -223,6 +258,7 @@ class TaskRunner(object):
                         self._poll_period = max(poll_period, 1)
                     else:
                         self._poll_period = 1
+                        self._no_wait = poll_period is NO_WAIT
 
         return self._done
 
@@ -235,7 +271,8 @@ class TaskRunner(object):
         assert self._runner is not None, "Task not started"
 
         for step in self.as_task(progress_callback=progress_callback):
-            self._sleep(wait_time)
+            self._sleep(0 if self._no_wait and wait_time is not None
+                        else wait_time)
 
     def as_task(self, timeout=None, progress_callback=None):
         """Return a task that drives the TaskRunner."""
@@ -251,7 +288,7 @@ class TaskRunner(object):
         done = self.step() if resuming else self.done()
         while not done:
             try:
-                yield
+                yield NO_WAIT if self._no_wait else None
 
                 if progress_callback is not None:
                     progress_callback()
@@ -376,7 +413,7 @@ class DependencyTaskGroup(object):
 
     def __init__(self, dependencies, task=lambda o: o(),
                  reverse=False, name=None, error_wait_time=None,
-                 aggregate_exceptions=False):
+                 aggregate_exceptions=False, event_driven=False):
         """Initialise with the task dependencies.
 
         A task to run on each dependency may optionally be specified.  If no
@@ -396,12 +433,23 @@ class DependencyTaskGroup(object):
         will not be cancelled in the event of an error (operations downstream
         of the error will be cancelled). Once all chains are complete, any
         errors will be rolled up into an ExceptionGroup exception.
+
+        If event_driven is True, the number of outstanding requirements of
+        each task is tracked so that a completing task makes its dependents
+        ready directly, rather than the whole graph being rescanned on every
+        step. Tasks that become ready are started straight away and the
+        group yields NO_WAIT, so that they are stepped again without waiting
+        for the next poll interval; tasks that were already running are
+        stepped only on regular steps.
         """
         self._keys = list(dependencies)
         self._runners = dict((o, TaskRunner(task, o)) for o in self._keys)
         self._graph = dependencies.graph(reverse=reverse)
         self.error_wait_time = error_wait_time
         self.aggregate_exceptions = aggregate_exceptions
+        self.event_driven = event_driven
+        if event_driven:
+            self._key_order = dict((k, i) for i, k in enumerate(self._keys))
 
         if name is None:
             name = '(%s) %s' % (getattr(task, '__name__',
@@ -416,6 +464,11 @@ class DependencyTaskGroup(object):
 
     def __call__(self):
         """Return a co-routine which runs the task group."""
+        if self.event_driven:
+            return self._run_event_driven()
+        return self._run_polling()
+
+    def _run_polling(self):
         raised_exceptions = []
         thrown_exceptions = []
 
@@ -464,6 +517,110 @@ class DependencyTaskGroup(object):
             del raised_exceptions
             del thrown_exceptions
 
+    def _run_event_driven(self):
+        raised_exceptions = []
+        thrown_exceptions = []
+
+        ready = collections.deque(self._leaves())
+        running = []
+        # The key and runner of the subtask being started or stepped
+        current = [None, None]
+
+        try:
+            while ready or running:
+                current[:] = None, None
+                try:
+                    started = self._start_ready(ready, running, current)
+
+                    if running:
+                        try:
+                            yield NO_WAIT if started else None
+                        except Exception:
+                            thrown_exceptions.append(sys.exc_info())
+                            raise
+
+                    self._step_running(started or list(running),
+                                       ready, running, current)
+                except Exception:
+                    exc_info = None
+                    try:
+                        exc_info = sys.exc_info()
+                        if self.aggregate_exceptions:
+                            k, r = current
+                            if k in running:
+                                running.remove(k)
+                            self._cancel_recursively(k, r)
+                        else:
+                            self.cancel_all(grace_period=self.error_wait_time)
+                        raised_exceptions.append(exc_info)
+                    finally:
+                        del exc_info
+                except:  # noqa
+                    with excutils.save_and_reraise_exception():
+                        self.cancel_all()
+
+            if raised_exceptions:
+                if self.aggregate_exceptions:
+                    raise ExceptionGroup(v for t, v, tb in raised_exceptions)
+                else:
+                    if thrown_exceptions:
+                        six.reraise(*thrown_exceptions[-1])
+                    else:
+                        six.reraise(*raised_exceptions[0])
+        finally:
+            del raised_exceptions
+            del thrown_exceptions
+
+    def _start_ready(self, ready, running, current):
+        """Start the subtasks that are ready, and any that become ready.
+
+        Return the keys of the subtasks started that are still running.
+        """
+        started = []
+        while ready:
+            k = ready.popleft()
+            r = self._runners[k]
+            current[:] = k, r
+            if not r or r.started():
+                continue
+            r.start()
+            if r:
+                running.append(k)
+                started.append(k)
+            else:
+                ready.extend(self._complete(k))
+        return started
+
+    def _step_running(self, keys, ready, running, current):
+        """Step the given running subtasks, queueing their dependents."""
+        for k in keys:
+            r = self._runners[k]
+            current[:] = k, r
+            if k not in self._graph:
+                # Cancelled along with a failed requirement
+                running.remove(k)
+            elif r.step():
+                running.remove(k)
+                ready.extend(self._complete(k))
+
+    def _leaves(self):
+        """Return the keys of all subtasks with no outstanding requirements."""
+        return [k for k in self._keys if not self._graph.get(k, True)]
+
+    def _complete(self, key):
+        """Remove a finished subtask from the graph.
+
+        Return the keys of any dependent subtasks that have no outstanding
+        requirements as a result, in the same order as they would be started
+        by a full scan of the graph.
+        """
+        dependents = list(self._graph[key].required_by())
+        del self._graph[key]
+        newly_ready = [d for d in dependents if not self._graph.get(d, True)]
+        if len(newly_ready) > 1:
+            newly_ready.sort(key=self._key_order.get)
+        return newly_ready
+
     def cancel_all(self, grace_period=None):
         if callable(grace_period):
             get_grace_period = grace_period
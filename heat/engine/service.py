@@ -53,6 +53,8 @@ from heat.engine.hot import functions as hot_functions
 from heat.engine import parameter_groups
 from heat.engine import properties
 from heat.engine import resources
+from heat.engine.resources import stack_resource
+from heat.engine import service_event_pruner
 from heat.engine import service_software_config
 from heat.engine import service_stack_watch
 from heat.engine import stack as parser
@@ -205,6 +207,11 @@ class ThreadGroupManager(object):
                     signal.alarm(1)
                     sys.exit(-1)
 
+            if stack is not None:
+                # The outputs are resolved at most once for both
+                outputs = stack.store_outputs()
+                stack.notify_owner(outputs)
+
         # Link to self to allow the stack to run tasks
         stack.thread_group_mgr = self
         th = self.start(stack.id, func, *args, **kwargs)
@@ -269,7 +276,13 @@ class EngineListener(object):
     support.
     """
 
-    ACTIONS = (STOP_STACK, SEND) = ('stop_stack', 'send')
+    RPC_API_VERSION = '1.1'
+
+    ACTIONS = (
+        STOP_STACK, SEND, NESTED_COMPLETE,
+    ) = (
+        'stop_stack', 'send', 'nested_complete',
+    )
 
     def __init__(self, host, engine_id, thread_group_mgr):
         self.thread_group_mgr = thread_group_mgr
@@ -280,7 +293,8 @@ class EngineListener(object):
     def start(self):
         self.target = messaging.Target(
             server=self.engine_id,
-            topic=rpc_api.LISTENER_TOPIC)
+            topic=rpc_api.LISTENER_TOPIC,
+            version=self.RPC_API_VERSION)
         self._server = rpc_messaging.get_rpc_server(self.target, self)
         self._server.start()
 
@@ -311,6 +325,14 @@ class EngineListener(object):
         stack_id = stack_identity['stack_id']
         self.thread_group_mgr.send(stack_id, message)
 
+    def nested_complete(self, ctxt, stack_identity, action, status,
+                        status_reason, updated_time, outputs):
+        """Record the final state of a nested stack for its parent resource.
+        """
+        stack_resource.nested_stack_complete(
+            stack_identity['stack_id'], action, status, status_reason,
+            updated_time, outputs)
+
 
 @profiler.trace_cls("rpc")
 class EngineService(service.ServiceBase):
@@ -324,7 +346,7 @@ class EngineService(service.ServiceBase):
     by the RPC caller.
     """
 
-    RPC_API_VERSION = '1.35'
+    RPC_API_VERSION = '1.36'
 
     def __init__(self, host, topic):
         resources.initialise()
@@ -336,6 +358,7 @@ class EngineService(service.ServiceBase):
         # The following are initialized here, but assigned in start() which
         # happens after the fork when spawning multiple worker processes
         self.stack_watch = None
+        self.event_pruner = None
         self.listener = None
         self.worker_service = None
         self.engine_id = None
@@ -360,28 +383,23 @@ class EngineService(service.ServiceBase):
         # so we need to create a ThreadGroupManager here for the periodic tasks
         if self.thread_group_mgr is None:
             self.thread_group_mgr = ThreadGroupManager()
-        self.stack_watch = service_stack_watch.StackWatch(
-            self.thread_group_mgr)
-
-        def create_watch_tasks():
-            while True:
-                try:
-                    # Create a periodic_watcher_task per-stack
-                    admin_context = context.get_admin_context()
-                    stacks = stack_object.Stack.get_all(
-                        admin_context,
-                        show_hidden=True)
-                    for s in stacks:
-                        self.stack_watch.start_watch_task(s.id, admin_context)
-                    LOG.info("Watch tasks created")
-                    return
-                except Exception as e:
-                    LOG.error("Watch task creation attempt failed, %s", e)
-                    eventlet.sleep(5)
-
         if self.manage_thread_grp is None:
             self.manage_thread_grp = threadgroup.ThreadGroup()
-        self.manage_thread_grp.add_thread(create_watch_tasks)
+
+        # A single periodic task evaluates the due watch rules of all stacks
+        if cfg.CONF.enable_cloud_watch_lite:
+            self.stack_watch = service_stack_watch.StackWatch(
+                self.thread_group_mgr, self.host)
+            self.manage_thread_grp.add_timer(
+                cfg.CONF.periodic_interval,
+                self.stack_watch.periodic_watcher_task)
+
+        # Events are pruned in the background instead of when stored
+        if cfg.CONF.event_purge_interval:
+            self.event_pruner = service_event_pruner.EventPruner(self.host)
+            self.manage_thread_grp.add_timer(
+                cfg.CONF.event_purge_interval,
+                self.event_pruner.periodic_prune_task)
 
     def start(self):
         self.engine_id = service_utils.generate_engine_id()
@@ -463,6 +481,7 @@ class EngineService(service.ServiceBase):
                 # Stop threads gracefully
                 self.thread_group_mgr.stop(stack_id, True)
                 LOG.info("Stack %s processing was finished", stack_id)
+        self.software_config.flush_metadata_pushes()
         if self.manage_thread_grp:
             self.manage_thread_grp.stop()
             ctxt = context.get_admin_context()
@@ -525,7 +544,8 @@ class EngineService(service.ServiceBase):
         return s
 
     @context.request_context
-    def show_stack(self, cnxt, stack_identity, resolve_outputs=True):
+    def show_stack(self, cnxt, stack_identity, resolve_outputs=True,
+                   live=False):
         """Return detailed information about one or all stacks.
 
         :param cnxt: RPC context.
@@ -533,6 +553,8 @@ class EngineService(service.ServiceBase):
             to show all
         :param resolve_outputs: If True, outputs for given stack/stacks will
             be resolved
+        :param live: If True, outputs are resolved even if their values are
+            stored
         """
         if stack_identity is not None:
             db_stack = self._get_stack(cnxt, stack_identity, show_deleted=True)
@@ -541,6 +563,15 @@ class EngineService(service.ServiceBase):
             stacks = parser.Stack.load_all(cnxt)
 
         def show(stack):
+            cached = None
+            if resolve_outputs and not live:
+                cached = stack.cached_outputs()
+            if cached is not None:
+                info = api.format_stack(stack, resolve_outputs=False)
+                if stack.action != stack.DELETE:
+                    info[rpc_api.STACK_OUTPUTS] = cached
+                return info
+
             if resolve_outputs:
                 for res in stack._explicit_dependencies():
                     ensure_cache = stack.convergence and res.id is not None
@@ -559,7 +590,10 @@ class EngineService(service.ServiceBase):
                     if ensure_cache:
                         res.store_attributes()
 
-            return api.format_stack(stack, resolve_outputs=resolve_outputs)
+            info = api.format_stack(stack, resolve_outputs=resolve_outputs)
+            if rpc_api.STACK_OUTPUTS in info:
+                stack.store_outputs(info[rpc_api.STACK_OUTPUTS])
+            return info
 
         return [show(stack) for stack in stacks]
 
@@ -829,18 +863,14 @@ class EngineService(service.ServiceBase):
                                     six.text_type(ex))
 
         def _stack_create(stack, msg_queue=None):
-            # Create/Adopt a stack, and create the periodic task if successful
+            # Create/Adopt a stack
             if stack.adopt_stack_data:
                 stack.adopt()
             elif stack.status != stack.FAILED:
                 stack.create(msg_queue=msg_queue)
 
-            if (stack.action in (stack.CREATE, stack.ADOPT)
+            if not (stack.action in (stack.CREATE, stack.ADOPT)
                     and stack.status == stack.COMPLETE):
-                if self.stack_watch:
-                    # Schedule a periodic watcher task for this stack
-                    self.stack_watch.start_watch_task(stack.id, cnxt)
-            else:
                 LOG.info("Stack create failed, status %s", stack.status)
 
         convergence = cfg.CONF.convergence_engine
@@ -1383,12 +1413,14 @@ class EngineService(service.ServiceBase):
         return api.format_stack_outputs(stack.outputs)
 
     @context.request_context
-    def show_output(self, cntx, stack_identity, output_key):
+    def show_output(self, cntx, stack_identity, output_key, live=False):
         """Returns dict with specified output key, value and description.
 
         :param cntx: RPC context.
         :param stack_identity: Name of the stack you want to see.
         :param output_key: key of desired stack output.
+        :param live: If True, the output is resolved even if its value is
+            stored.
         :return: dict with output key, value and description in defined format.
         """
         s = self._get_stack(cntx, stack_identity)
@@ -1400,6 +1432,11 @@ class EngineService(service.ServiceBase):
             raise exception.NotFound(_('Specified output key %s not '
                                        'found.') % output_key)
 
+        cached = None if live else stack.cached_outputs()
+        for output in cached or []:
+            if output[rpc_api.OUTPUT_KEY] == output_key:
+                return output
+
         stack._update_all_resource_data(for_resources=False,
                                         for_outputs={output_key})
         return api.format_stack_output(outputs[output_key])
@@ -1769,31 +1806,21 @@ class EngineService(service.ServiceBase):
 
             if nested_depth:
                 root_stack_identifier = st.identifier()
-                # find all resources associated with a root stack
-                all_r = resource_objects.Resource.get_all_by_root_stack(
-                    cnxt, st.id, None)
-
-                # find stacks to the requested nested_depth
-                stack_ids = {r.stack_id for r in six.itervalues(all_r)}
-                stack_filters = {
-                    'id': stack_ids,
-                    'nested_depth': list(range(nested_depth + 1))
-                }
-
-                stacks = stack_object.Stack.get_all(cnxt,
-                                                    filters=stack_filters,
-                                                    show_nested=True)
-                stack_identifiers = {s.id: s.identifier() for s in stacks}
-
-                if filters is None:
-                    filters = {}
-                filters['stack_id'] = list(stack_identifiers.keys())
-                events = list(event_object.Event.get_all_by_tenant(
-                    cnxt, limit=limit,
+                events = list(event_object.Event.get_all_by_root_stack(
+                    cnxt, st.id,
+                    limit=limit,
                     marker=marker,
                     sort_keys=sort_keys,
                     sort_dir=sort_dir,
-                    filters=filters))
+                    filters=filters,
+                    nested_depth=nested_depth))
+
+                stack_ids = {e.stack_id for e in events}
+                stacks = stack_object.Stack.get_all(cnxt,
+                                                    filters={'id': stack_ids},
+                                                    show_nested=True,
+                                                    show_deleted=True)
+                stack_identifiers = {s.id: s.identifier() for s in stacks}
 
             else:
                 events = list(event_object.Event.get_all_by_stack(
@@ -2045,20 +2072,22 @@ class EngineService(service.ServiceBase):
             # so sqlalchemy filters can't be used.
             res_type = filters.pop('type', None)
 
-        if depth > 0:
-            # populate context with resources from all nested depths
-            resource_objects.Resource.get_all_by_root_stack(
-                cnxt, stack.id, filters, cache=True)
+        if with_detail:
+            if depth > 0:
+                # populate context with resources from all nested depths
+                resource_objects.Resource.get_all_by_root_stack(
+                    cnxt, stack.id, filters, cache=True)
+            rsrcs = stack.iter_resources(depth, filters=filters)
+        else:
+            rsrcs = stack.iter_resource_summaries(depth, filters=filters)
 
         def filter_type(res_iter):
             for res in res_iter:
                 if res_type not in res.type():
                     continue
                 yield res
-        if res_type is None:
-            rsrcs = stack.iter_resources(depth, filters=filters)
-        else:
-            rsrcs = filter_type(stack.iter_resources(depth, filters=filters))
+        if res_type is not None:
+            rsrcs = filter_type(rsrcs)
         return [api.format_stack_resource(resource, detail=with_detail)
                 for resource in rsrcs]
 
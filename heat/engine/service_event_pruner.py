@@ -0,0 +1,109 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import zlib
+
+import eventlet
+from oslo_config import cfg
+from oslo_log import log as logging
+
+from heat.common import context
+from heat.common import metrics
+from heat.common import service_utils
+from heat.objects import event as event_object
+
+LOG = logging.getLogger(__name__)
+
+# Number of new events read at once to find the stacks that may need pruning
+SCAN_BATCH_SIZE = 1000
+
+
+class EventPruner(object):
+    """Periodically delete the oldest events of stacks with too many.
+
+    When event_purge_interval is set, events are stored without counting
+    the events of their stack, and a periodic task of each engine host
+    enforces max_events_per_stack for the stacks of its shard instead. Only
+    the stacks with events created since the previous run are checked.
+    """
+
+    def __init__(self, host=None):
+        self.host = host or cfg.CONF.host
+        self.last_event_id = 0
+        # Number of events over the limit found by the latest run
+        self.backlog = 0
+
+    def _in_shard(self, stack_id, shard_index, shard_count):
+        crc = zlib.crc32(stack_id.encode('utf-8')) & 0xffffffff
+        return crc % shard_count == shard_index
+
+    def prune_stack_events(self, cnxt, stack_id, excess):
+        """Delete the given number of the oldest events of a stack.
+
+        Events are deleted in batches of event_purge_batch_size. Return the
+        number of events deleted.
+        """
+        deleted = 0
+        while deleted < excess:
+            batch_size = min(cfg.CONF.event_purge_batch_size,
+                             excess - deleted)
+            count = event_object.Event.delete_oldest(cnxt, stack_id,
+                                                     batch_size)
+            if not count:
+                break
+            deleted += count
+            eventlet.sleep(0)
+        return deleted
+
+    def periodic_prune_task(self):
+        """Prune the events of the stacks of this host's shard."""
+        max_events = cfg.CONF.max_events_per_stack
+        if not max_events:
+            return
+        admin_context = context.get_admin_context()
+        shard_index, shard_count = service_utils.engine_shard(admin_context,
+                                                              self.host)
+        checked = set()
+        pruned_stacks = 0
+        backlog = 0
+        while True:
+            try:
+                rows = event_object.Event.get_stack_ids(
+                    admin_context, self.last_event_id, SCAN_BATCH_SIZE)
+                for stack_id in set(row[1] for row in rows) - checked:
+                    checked.add(stack_id)
+                    if not self._in_shard(stack_id, shard_index,
+                                          shard_count):
+                        continue
+                    excess = event_object.Event.count_all_by_stack(
+                        admin_context, stack_id) - max_events
+                    if excess > 0:
+                        backlog += excess
+                        pruned_stacks += 1
+                        self.prune_stack_events(admin_context, stack_id,
+                                                excess)
+            except Exception as ex:
+                LOG.warning('Unable to prune events: %s', ex)
+                return
+
+            if rows:
+                self.last_event_id = rows[-1][0]
+            if len(rows) < SCAN_BATCH_SIZE:
+                break
+            eventlet.sleep(0)
+
+        self.backlog = backlog
+        metrics.gauge('events.prune_backlog', backlog)
+        if backlog:
+            LOG.info('Pruned %(count)s events of %(stacks)s stacks',
+                     {'count': backlog, 'stacks': pruned_stacks})
@@ -13,6 +13,8 @@
 
 import uuid
 
+import eventlet
+from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_serialization import jsonutils
 from oslo_utils import timeutils
@@ -38,6 +40,11 @@ LOG = logging.getLogger(__name__)
 
 class SoftwareConfigService(object):
 
+    def __init__(self):
+        # Metadata pushes waiting to run, by server ID
+        self._pending_pushes = {}
+        self._http_session = None
+
     def show_software_config(self, cnxt, config_id):
         sc = software_config_object.SoftwareConfig.get_by_id(cnxt, config_id)
         return api.format_software_config(sc)
@@ -96,9 +103,48 @@ class SoftwareConfigService(object):
         result = [api.format_software_config(sd.config) for sd in flt_sd_s]
         return result
 
-    @resource_objects.retry_on_conflict
     def _push_metadata_software_deployments(
             self, cnxt, server_id, stack_user_project_id):
+        delay = cfg.CONF.deployment_metadata_push_delay
+        if delay <= 0:
+            self._store_metadata_software_deployments(
+                cnxt, server_id, stack_user_project_id)
+        elif server_id not in self._pending_pushes:
+            # A push that is already pending will include this change, as
+            # the deployments are read when it runs
+            thread = eventlet.spawn_after(delay, self._deferred_push,
+                                          cnxt, server_id,
+                                          stack_user_project_id)
+            self._pending_pushes[server_id] = (thread, cnxt,
+                                               stack_user_project_id)
+
+    def _deferred_push(self, cnxt, server_id, stack_user_project_id):
+        # Any change made from now on needs another push
+        self._pending_pushes.pop(server_id, None)
+        try:
+            self._store_metadata_software_deployments(
+                cnxt, server_id, stack_user_project_id)
+        except Exception:
+            LOG.exception('Failed to push the deployments metadata of '
+                          'server %s', server_id)
+
+    def flush_metadata_pushes(self):
+        """Run all of the pending metadata pushes now."""
+        while self._pending_pushes:
+            server_id, (thread, cnxt, stack_user_project_id) = (
+                self._pending_pushes.popitem())
+            thread.cancel()
+            self._deferred_push(cnxt, server_id, stack_user_project_id)
+
+    def _put_metadata(self, url, json_md):
+        # Reuse connections to the object store between pushes
+        if self._http_session is None:
+            self._http_session = requests.Session()
+        self._http_session.put(url, json_md)
+
+    @resource_objects.retry_on_conflict
+    def _store_metadata_software_deployments(
+            self, cnxt, server_id, stack_user_project_id):
         rs = db_api.resource_get_by_physical_resource_id(cnxt, server_id)
         if not rs:
             return
@@ -123,7 +169,7 @@ class SoftwareConfigService(object):
                 metadata_queue_id = rd.value
         if metadata_put_url:
             json_md = jsonutils.dumps(md)
-            requests.put(metadata_put_url, json_md)
+            self._put_metadata(metadata_put_url, json_md)
         if metadata_queue_id:
             project = stack_user_project_id
             queue = self._get_zaqar_queue(cnxt, rs, project, metadata_queue_id)
@@ -11,55 +11,47 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+
+import eventlet
+from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_utils import timeutils
 
 from heat.common import context
+from heat.common import service_utils
 from heat.engine import stack
 from heat.engine import stk_defn
 from heat.engine import watchrule
 from heat.objects import stack as stack_object
 from heat.objects import watch_rule as watch_rule_object
-from heat.rpc import api as rpc_api
 
 LOG = logging.getLogger(__name__)
 
 
 class StackWatch(object):
-    def __init__(self, thread_group_mgr):
-        self.thread_group_mgr = thread_group_mgr
-
-    def start_watch_task(self, stack_id, cnxt):
-
-        def stack_has_a_watchrule(sid):
-            wrs = watch_rule_object.WatchRule.get_all_by_stack(cnxt, sid)
-
-            now = timeutils.utcnow()
-            start_watch_thread = False
-            for wr in wrs:
-                # reset the last_evaluated so we don't fire off alarms when
-                # the engine has not been running.
-                watch_rule_object.WatchRule.update_by_id(
-                    cnxt, wr.id,
-                    {'last_evaluated': now})
+    """Periodically evaluate the watch rules that are due.
 
-                if wr.state != rpc_api.WATCH_STATE_CEILOMETER_CONTROLLED:
-                    start_watch_thread = True
+    A single periodic task per engine host evaluates the due rules of its
+    shard in batches, instead of one periodic task per stack evaluating all
+    of the stack's rules.
+    """
 
-            children = stack_object.Stack.get_all_by_owner_id(cnxt, sid)
-            for child in children:
-                if stack_has_a_watchrule(child.id):
-                    start_watch_thread = True
+    def __init__(self, thread_group_mgr, host=None):
+        self.thread_group_mgr = thread_group_mgr
+        self.host = host or cfg.CONF.host
+        self.started_at = timeutils.utcnow()
 
-            return start_watch_thread
+    def _shard(self, cnxt):
+        """Return the shard of watch rules evaluated by this host.
 
-        if stack_has_a_watchrule(stack_id):
-            self.thread_group_mgr.add_timer(
-                stack_id,
-                self.periodic_watcher_task,
-                sid=stack_id)
+        Rules are spread across the hosts with a running heat-engine, so
+        that each rule is evaluated by only one of them.
+        """
+        return service_utils.engine_shard(cnxt, self.host)
 
-    def check_stack_watches(self, sid):
+    def check_stack_watches(self, sid, wrs):
+        """Evaluate the given watch rules of the stack with ID sid."""
         # Use admin_context for stack_get to defeat tenant
         # scoping otherwise we fail to retrieve the stack
         LOG.debug("Periodic watcher task for stack %s", sid)
@@ -69,21 +61,11 @@ class StackWatch(object):
         if not db_stack:
             LOG.error("Unable to retrieve stack %s for periodic task", sid)
             return
+        # Only the stored context is needed to evaluate the rules, so the
+        # template and resources are loaded only if an alarm action is run
         stk = stack.Stack.load(admin_context, stack=db_stack,
-                               use_stored_context=True)
-
-        # recurse into any nested stacks.
-        children = stack_object.Stack.get_all_by_owner_id(admin_context, sid)
-        for child in children:
-            self.check_stack_watches(child.id)
-
-        # Get all watchrules for this stack and evaluate them
-        try:
-            wrs = watch_rule_object.WatchRule.get_all_by_stack(admin_context,
-                                                               sid)
-        except Exception as ex:
-            LOG.warning('periodic_task db error watch rule removed? %s', ex)
-            return
+                               use_stored_context=True,
+                               load_template=False)
 
         def run_alarm_action(stk, actions, details):
             for action in actions:
@@ -93,17 +75,59 @@ class StackWatch(object):
                 stk_defn.update_resource_data(stk.defn, res.name,
                                               res.node_data())
 
+        full_stk = None
         for wr in wrs:
             rule = watchrule.WatchRule.load(stk.context, watch=wr)
+            if (rule.last_evaluated is None or
+                    rule.last_evaluated < self.started_at):
+                # reset the last_evaluated so we don't fire off alarms when
+                # the engine has not been running.
+                watch_rule_object.WatchRule.update_by_id(
+                    admin_context, rule.id,
+                    {'last_evaluated': self.started_at,
+                     'next_evaluation': self.started_at + rule.timeperiod})
+                continue
             actions = rule.evaluate()
             if actions:
-                self.thread_group_mgr.start(sid, run_alarm_action, stk,
+                if full_stk is None:
+                    full_stk = stack.Stack.load(admin_context,
+                                                stack=db_stack,
+                                                use_stored_context=True)
+                self.thread_group_mgr.start(sid, run_alarm_action, full_stk,
                                             actions, rule.get_details())
 
-    def periodic_watcher_task(self, sid):
-        """Evaluate all watch-rules defined for stack ID.
+    def periodic_watcher_task(self):
+        """Evaluate all watch rules of this host's shard that are due.
 
-        Periodic task, created for each stack, triggers watch-rule evaluation
-        for all rules defined for the stack sid = stack ID.
+        Rules are loaded in batches of watch_evaluation_batch_size, and
+        grouped by stack so that each stack is loaded once per batch.
         """
-        self.check_stack_watches(sid)
+        admin_context = context.get_admin_context()
+        shard_index, shard_count = self._shard(admin_context)
+        now = timeutils.utcnow()
+        batch_size = cfg.CONF.watch_evaluation_batch_size
+        after_id = None
+        while True:
+            try:
+                wrs = watch_rule_object.WatchRule.get_due(
+                    admin_context, now, batch_size, after_id=after_id,
+                    shard_index=shard_index, shard_count=shard_count)
+            except Exception as ex:
+                LOG.warning('periodic_task db error %s', ex)
+                return
+
+            by_stack = collections.OrderedDict()
+            for wr in wrs:
+                by_stack.setdefault(wr.stack_id, []).append(wr)
+            for sid, stack_wrs in by_stack.items():
+                try:
+                    self.check_stack_watches(sid, stack_wrs)
+                except Exception as ex:
+                    LOG.error('Unable to evaluate watch rules of stack '
+                              '%(stack)s: %(error)s',
+                              {'stack': sid, 'error': ex})
+
+            if len(wrs) < batch_size:
+                return
+            after_id = wrs[-1].id
+            eventlet.sleep(0)
@@ -12,6 +12,7 @@
 #    under the License.
 
 import collections
+import contextlib
 import copy
 import eventlet
 import functools
@@ -32,6 +33,8 @@ from heat.common import exception
 from heat.common.i18n import _
 from heat.common import identifier
 from heat.common import lifecycle_plugin_utils
+from heat.engine import api
+from heat.engine import constraints
 from heat.engine import dependencies
 from heat.engine import environment
 from heat.engine import event
@@ -39,19 +42,22 @@ from heat.engine.notification import stack as notification
 from heat.engine import parameter_groups as param_groups
 from heat.engine import parent_rsrc
 from heat.engine import resource
+from heat.engine import resource_summary
 from heat.engine import resources
 from heat.engine import scheduler
 from heat.engine import stk_defn
 from heat.engine import sync_point
 from heat.engine import template as tmpl
 from heat.engine import update
-from heat.objects import raw_template as raw_template_object
+from heat.engine import write_behind
 from heat.objects import resource as resource_objects
 from heat.objects import snapshot as snapshot_object
 from heat.objects import stack as stack_object
+from heat.objects import stack_lock as stack_lock_object
 from heat.objects import stack_tag as stack_tag_object
 from heat.objects import user_creds as ucreds_object
 from heat.rpc import api as rpc_api
+from heat.rpc import listener_client
 from heat.rpc import worker_client as rpc_worker_client
 
 LOG = logging.getLogger(__name__)
@@ -67,6 +73,21 @@ class ForcedCancel(Exception):
         return "Operation cancelled"
 
 
+class ValidationThreads(object):
+    """The green threads validating the resources of stacks.
+
+    This is a context scoped cache (see RequestContext.cache()) shared by a
+    stack and the nested stacks that its stack resources validate, so that
+    max_concurrent_validations limits the number of threads used for the
+    whole tree of stacks.
+    """
+
+    def __init__(self):
+        self.semaphore = eventlet.semaphore.Semaphore(
+            cfg.CONF.max_concurrent_validations)
+        self.threads = set()
+
+
 def reset_state_on_error(func):
     @six.wraps(func)
     def handle_exceptions(stack, *args, **kwargs):
@@ -121,7 +142,8 @@ class Stack(collections.Mapping):
                  nested_depth=0, strict_validate=True, convergence=False,
                  current_traversal=None, tags=None, prev_raw_template_id=None,
                  current_deps=None, cache_data=None,
-                 deleted_time=None, converge=False):
+                 deleted_time=None, converge=False, ancestry=None,
+                 output_data=None):
 
         """Initialise the Stack.
 
@@ -181,7 +203,10 @@ class Stack(collections.Mapping):
         self._worker_client = None
         self._convg_deps = None
         self.thread_group_mgr = None
+        self.write_buffer = None
         self.converge = converge
+        self.ancestry = ancestry
+        self.output_data = output_data
 
         # strict_validate can be used to disable value validation
         # in the resource properties schema, this is useful when
@@ -350,6 +375,26 @@ class Stack(collections.Mapping):
                                                           filters):
                 yield nested_res
 
+    def iter_resource_summaries(self, nested_depth=0, filters=None):
+        """Iterates over summaries of all the resources in a stack.
+
+        This returns the same resources as iter_resources(), but for the
+        stacks that allow it, only the data needed to list the resources is
+        loaded, for all the nested stacks at once. Other stacks have their
+        resources loaded in full.
+        """
+        tree = resource_summary.StackTree(self.context, self.root_stack_id(),
+                                          filters)
+        for stack_id in tree.iter_stack_ids(self.id, nested_depth):
+            summaries = tree.resource_summaries(stack_id)
+            if summaries is None:
+                stack = self
+                if stack_id != self.id:
+                    stack = type(self).load(self.context, stack_id=stack_id)
+                summaries = stack._find_filtered_resources(filters)
+            for summary in summaries:
+                yield summary
+
     def db_active_resources_get(self):
         resources = resource_objects.Resource.get_all_active_by_stack(
             self.context, self.id)
@@ -427,6 +472,8 @@ class Stack(collections.Mapping):
     def root_stack_id(self):
         if not self.owner_id:
             return self.id
+        if self.ancestry:
+            return self.ancestry[0]
         return stack_object.Stack.get_root_id(self.context, self.owner_id)
 
     def object_path_in_stack(self):
@@ -436,7 +483,8 @@ class Stack(collections.Mapping):
         and stacks in path from the root stack and including this stack.
 
         Note that this is horribly inefficient, as it requires us to load every
-        stack in the chain back to the root in memory at the same time.
+        stack in the chain back to the root in memory at the same time. Use
+        path_in_stack() where only the names are needed.
 
         :returns: a list of (stack_resource, stack) tuples.
         """
@@ -455,12 +503,20 @@ class Stack(collections.Mapping):
         names (stack_resource.name, stack.name) in path from the root stack and
         including this stack.
 
+        The names of the ancestor stacks are retrieved in a single query
+        using the ancestry stored with the stack.
+
         :returns: a list of (string, string) tuples.
 
         """
-        opis = self.object_path_in_stack()
-        return [(stckres.name if stckres else None,
-                 stck.name if stck else None) for stckres, stck in opis]
+        if self.ancestry is None:
+            opis = self.object_path_in_stack()
+            return [(stckres.name if stckres else None,
+                     stck.name if stck else None) for stckres, stck in opis]
+
+        path = stack_object.Stack.get_path(self.context, self.ancestry)
+        path.append((self.parent_resource_name, self.name))
+        return path
 
     def total_resources(self, stack_id=None):
         """Return the total number of resources in a stack.
@@ -590,7 +646,9 @@ class Stack(collections.Mapping):
                    prev_raw_template_id=stack.prev_raw_template_id,
                    current_deps=stack.current_deps, cache_data=cache_data,
                    nested_depth=stack.nested_depth,
-                   deleted_time=stack.deleted_at)
+                   deleted_time=stack.deleted_at,
+                   ancestry=stack.ancestry,
+                   output_data=stack.output_data)
 
     def get_kwargs_for_cloning(self, keep_status=False, only_db=False,
                                keep_tags=False):
@@ -650,6 +708,7 @@ class Stack(collections.Mapping):
         s['name'] = self.name
         s['backup'] = backup
         s['updated_at'] = self.updated_time
+        s['output_data'] = None
         if self.t.id is None:
             stack_object.Stack.encrypt_hidden_parameters(self.t)
             s['raw_template_id'] = self.t.store(self.context)
@@ -691,6 +750,7 @@ class Stack(collections.Mapping):
             new_s = stack_object.Stack.create(self.context, s)
             self.id = new_s.id
             self.created_time = new_s.created_at
+            self.ancestry = new_s.ancestry
 
         if self.tags:
             stack_tag_object.StackTagList.set(self.context, self.id, self.tags)
@@ -728,7 +788,7 @@ class Stack(collections.Mapping):
         self.resources[resource.name] = resource
         stk_defn.add_resource(self.defn, definition)
         if self.t.id is not None:
-            self.t.store(self.context)
+            self.store_template()
         resource.store()
 
     def remove_resource(self, resource_name):
@@ -736,7 +796,20 @@ class Stack(collections.Mapping):
         del self.resources[resource_name]
         stk_defn.remove_resource(self.defn, resource_name)
         if self.t.id is not None:
-            self.t.store(self.context)
+            self.store_template()
+
+    def store_template(self):
+        """Store changes to the stack's template in the database.
+
+        Templates with identical content are shared between stacks, so the
+        changed template may be stored under a new ID. If so, the stack is
+        updated to refer to it.
+        """
+        template_id = self.t.id
+        self.t.store(self.context)
+        if self.id is not None and self.t.id != template_id:
+            stack_object.Stack.update_by_id(self.context, self.id,
+                                            {'raw_template_id': self.t.id})
 
     def __contains__(self, key):
         """Determine whether the stack contains the specified resource."""
@@ -866,35 +939,45 @@ class Stack(collections.Mapping):
         unique_defns = set(res.t for res in six.itervalues(resources))
         unique_defn_names = set(defn.name for defn in unique_defns)
 
-        for res in iter_rsc:
-            # Don't validate identical definitions multiple times
-            if res.name not in unique_defn_names:
-                continue
-            result = None
-            try:
-                if not validate_res_tmpl_only:
-                    if res.external_id is not None:
-                        res.validate_external()
-                        continue
-                    result = res.validate()
-                elif res.external_id is None:
-                    result = res.validate_template()
-            except exception.HeatException as ex:
-                LOG.debug('%s', ex)
-                if ignorable_errors and ex.error_code in ignorable_errors:
-                    result = None
-                else:
+        if self.strict_validate and not validate_res_tmpl_only:
+            self._prefetch_constraint_values(
+                res for res in six.itervalues(resources)
+                if res.name in unique_defn_names and res.external_id is None)
+
+        def validate_resource(res):
+            if not validate_res_tmpl_only:
+                if res.external_id is not None:
+                    res.validate_external()
+                    return None
+                return res.validate()
+            elif res.external_id is None:
+                return res.validate_template()
+
+        # Don't validate identical definitions multiple times
+        to_validate = [res for res in iter_rsc
+                       if res.name in unique_defn_names]
+        validations = self._resource_validations(to_validate,
+                                                 validate_resource)
+        with contextlib.closing(validations):
+            for res, validate in validations:
+                result = None
+                try:
+                    result = validate()
+                except exception.HeatException as ex:
+                    LOG.debug('%s', ex)
+                    if ignorable_errors and ex.error_code in ignorable_errors:
+                        result = None
+                    else:
+                        raise
+                except AssertionError:
                     raise
-            except AssertionError:
-                raise
-            except Exception as ex:
-                LOG.info("Exception in stack validation",
-                         exc_info=True)
-                raise exception.StackValidationFailed(error=ex,
-                                                      resource=res)
-            if result:
-                raise exception.StackValidationFailed(message=result)
-            eventlet.sleep(0)
+                except Exception as ex:
+                    LOG.info("Exception in stack validation",
+                             exc_info=True)
+                    raise exception.StackValidationFailed(error=ex,
+                                                          resource=res)
+                if result:
+                    raise exception.StackValidationFailed(message=result)
 
         for op_name, output in six.iteritems(self.outputs):
             try:
@@ -906,6 +989,69 @@ class Stack(collections.Mapping):
             except AssertionError:
                 raise
 
+    def _resource_validations(self, resources, validate_resource):
+        """Iterate over (resource, validate) pairs in the given order.
+
+        Calling validate() returns the result of validating the resource or
+        raises its validation error. Up to max_concurrent_validations
+        resources of the stack and its nested stacks are validated at once
+        in green threads, each with its own database session, but the
+        results are still returned in order, so that the first error
+        reported is the same as when validating the resources one at a time.
+        """
+        if (cfg.CONF.max_concurrent_validations <= 1 or
+                len(resources) <= 1):
+            for res in resources:
+                yield res, functools.partial(validate_resource, res)
+                eventlet.sleep(0)
+            return
+
+        shared = self.context.cache(ValidationThreads)
+        # A nested stack validated in one of the threads must not wait for
+        # another thread, since all of them may be waiting for their nested
+        # stacks. Its resources are validated in the same thread instead.
+        nested = eventlet.getcurrent() in shared.threads
+
+        def validate_in_thread(res):
+            current = eventlet.getcurrent()
+            shared.threads.add(current)
+            self.context.update_store()
+            try:
+                with self.context.thread_session():
+                    return validate_resource(res)
+            finally:
+                shared.threads.discard(current)
+
+        def release(thread):
+            shared.semaphore.release()
+
+        threads = []
+        try:
+            for res in resources:
+                thread = None
+                if shared.semaphore.acquire(blocking=not nested):
+                    thread = eventlet.spawn(validate_in_thread, res)
+                    thread.link(release)
+                threads.append((res, thread))
+            for res, thread in threads:
+                if thread is None:
+                    yield res, functools.partial(validate_resource, res)
+                else:
+                    yield res, thread.wait
+        finally:
+            # Stop validating the remaining resources once one has failed
+            for res, thread in threads:
+                if thread is not None:
+                    thread.kill()
+
+    def _prefetch_constraint_values(self, resources):
+        """List the resources referenced by custom constraints in bulk."""
+        values = collections.defaultdict(set)
+        for res in resources:
+            for name, value in res.properties.custom_constraint_values():
+                values[name].add(value)
+        constraints.prefetch(self.context, self.env, values)
+
     def requires_deferred_auth(self):
         """Determine whether to perform API requests with deferred auth.
 
@@ -1001,7 +1147,8 @@ class Stack(collections.Mapping):
             values = {'action': self.action,
                       'status': self.status,
                       'updated_at': self.updated_time,
-                      'status_reason': six.text_type(self.status_reason)}
+                      'status_reason': six.text_type(self.status_reason),
+                      'output_data': None}
             self._send_notification_and_add_event()
             if self.convergence:
                 # do things differently for convergence
@@ -1031,11 +1178,93 @@ class Stack(collections.Mapping):
         if stack is not None:
             values = {'action': self.action,
                       'status': self.status,
-                      'status_reason': six.text_type(self.status_reason)}
+                      'status_reason': six.text_type(self.status_reason),
+                      'output_data': None}
             self._send_notification_and_add_event()
             stack.persist_state_and_release_lock(self.context, self.id,
                                                  engine_id, values)
 
+    def notify_owner(self, outputs=None):
+        """Notify the engine working on the parent stack of our final state.
+
+        The outputs are sent with the notification when an action other than
+        DELETE completes, so that the parent resource need not request them.
+        They are resolved if not given. Failure to notify is not fatal, as
+        the parent resource still polls the state of the stack occasionally.
+        """
+        if (not cfg.CONF.nested_stack_notify or self.owner_id is None or
+                self.id is None or self.convergence or
+                self.status == self.IN_PROGRESS):
+            return
+
+        try:
+            engine_id = stack_lock_object.StackLock.get_engine_id(
+                self.context, self.owner_id)
+            if engine_id is None:
+                return
+
+            if self.status != self.COMPLETE or self.action == self.DELETE:
+                outputs = None
+            elif outputs is None:
+                outputs = api.format_stack_outputs(self.outputs,
+                                                   resolve_value=True)
+            updated_time = self.updated_time
+            listener_client.EngineListenerClient(engine_id).nested_complete(
+                self.context, dict(self.identifier()), self.action,
+                self.status, six.text_type(self.status_reason),
+                updated_time and updated_time.isoformat(), outputs)
+        except Exception as ex:
+            LOG.warning('Failed to notify owner of stack %(name)s: %(ex)s',
+                        {'name': self.name, 'ex': ex})
+
+    def cached_outputs(self):
+        """Return the stored resolved outputs, or None if there are none."""
+        if not cfg.CONF.cache_stack_outputs:
+            return None
+        return stack_object.Stack.decrypt_output_data(self.output_data)
+
+    def store_outputs(self, outputs=None):
+        """Store the resolved outputs of a complete stack in the database.
+
+        The outputs are resolved if not given. Outputs that were resolved
+        earlier are stored only if the stack has not changed state since it
+        was loaded, so that they cannot replace the outputs of a later
+        action.
+
+        Return the outputs if they were resolved here, so that they can be
+        reused, or None otherwise.
+        """
+        if (not cfg.CONF.cache_stack_outputs or self.id is None or
+                self.status != self.COMPLETE or self.action == self.DELETE):
+            return None
+        resolved = None
+        try:
+            state = stack_object.Stack.get_status(self.context, self.id)
+            if state[:2] != (self.action, self.status):
+                return None
+            if outputs is None:
+                self._update_all_resource_data(for_resources=False,
+                                               for_outputs=True)
+                outputs = resolved = api.format_stack_outputs(
+                    self.outputs, resolve_value=True)
+            elif state[3] != (self.updated_time and
+                              self.updated_time.replace(tzinfo=None)):
+                return None
+            if stack_object.Stack.update_output_data(self.context, self.id,
+                                                     outputs,
+                                                     exp_state=state):
+                self.output_data = {'encrypted': False, 'outputs': outputs}
+        except Exception as ex:
+            LOG.warning('Failed to store the outputs of stack %(name)s: '
+                        '%(ex)s', {'name': self.name, 'ex': ex})
+        return resolved
+
+    def clear_outputs(self):
+        """Discard the stored resolved outputs of the stack."""
+        if cfg.CONF.cache_stack_outputs and self.id is not None:
+            stack_object.Stack.update_output_data(self.context, self.id, None)
+            self.output_data = None
+
     @property
     def state(self):
         """Returns state, tuple of action, status."""
@@ -1142,10 +1371,11 @@ class Stack(collections.Mapping):
             resource_action,
             reverse,
             error_wait_time=get_error_wait_time,
-            aggregate_exceptions=aggregate_exceptions)
+            aggregate_exceptions=aggregate_exceptions,
+            event_driven=cfg.CONF.event_driven_scheduler)
 
         try:
-            yield action_task()
+            yield self._batch_writes(action_task())
         except scheduler.Timeout:
             stack_status = self.FAILED
             reason = '%s timed out' % action.title()
@@ -1168,6 +1398,17 @@ class Stack(collections.Mapping):
         lifecycle_plugin_utils.do_post_ops(self.context, self, None, action,
                                            (self.status == self.FAILED))
 
+    def _batch_writes(self, task):
+        """Return the task with its resource writes batched, if enabled.
+
+        Resource state changes and events made during each step of the task
+        are written in bulk at the end of the step.
+        """
+        if (not cfg.CONF.batch_resource_writes or
+                self.write_buffer is not None):
+            return task
+        return write_behind.flush_each_step(self, task)
+
     @profiler.trace('Stack.check', hide_args=False)
     @reset_state_on_error
     def check(self):
@@ -1351,6 +1592,7 @@ class Stack(collections.Mapping):
         if not any(leaves):
             self.mark_complete()
         else:
+            checks = []
             for rsrc_id, is_update in self.convergence_dependencies.leaves():
                 if is_update:
                     LOG.info("Triggering resource %s for update", rsrc_id)
@@ -1358,11 +1600,15 @@ class Stack(collections.Mapping):
                     LOG.info("Triggering resource %s for cleanup",
                              rsrc_id)
                 input_data = sync_point.serialize_input_data({})
-                self.worker_client.check_resource(self.context, rsrc_id,
-                                                  self.current_traversal,
-                                                  input_data, is_update,
-                                                  self.adopt_stack_data,
-                                                  self.converge)
+                checks.append((rsrc_id, is_update, input_data))
+
+            batch_size = cfg.CONF.check_resource_batch_size
+            for i in range(0, len(checks), batch_size):
+                self.worker_client.check_resources(self.context, self.id,
+                                                   self.current_traversal,
+                                                   checks[i:i + batch_size],
+                                                   self.adopt_stack_data,
+                                                   self.converge)
                 if scheduler.ENABLE_SLEEP:
                     eventlet.sleep(1)
 
@@ -1521,7 +1767,7 @@ class Stack(collections.Mapping):
         self._send_notification_and_add_event()
         self.store()
         if prev_tmpl_id is not None:
-            raw_template_object.RawTemplate.delete(self.context, prev_tmpl_id)
+            tmpl.Template.delete(self.context, prev_tmpl_id)
 
         if action == self.UPDATE:
             # Oldstack is useless when the action is not UPDATE , so we don't
@@ -1614,12 +1860,11 @@ class Stack(collections.Mapping):
                 backup_stack.t.t[newstack.t.version[0]] = max(
                     newstack.t.version[1], self.t.version[1])
                 backup_stack.t.merge_snippets(newstack.t)
-                backup_stack.t.store(self.context)
+                backup_stack.store_template()
             self.store()
 
             if previous_template_id is not None:
-                raw_template_object.RawTemplate.delete(self.context,
-                                                       previous_template_id)
+                tmpl.Template.delete(self.context, previous_template_id)
 
             lifecycle_plugin_utils.do_post_ops(self.context, self,
                                                newstack, action,
@@ -1836,11 +2081,14 @@ class Stack(collections.Mapping):
                                'Failed stack pre-ops: %s' % six.text_type(e))
                 return
 
-        action_task = scheduler.DependencyTaskGroup(self.dependencies,
-                                                    resource.Resource.destroy,
-                                                    reverse=True)
+        action_task = scheduler.DependencyTaskGroup(
+            self.dependencies,
+            resource.Resource.destroy,
+            reverse=True,
+            event_driven=cfg.CONF.event_driven_scheduler)
         try:
-            scheduler.TaskRunner(action_task)(timeout=self.timeout_secs())
+            scheduler.TaskRunner(self._batch_writes, action_task())(
+                timeout=self.timeout_secs())
         except exception.ResourceFailure as ex:
             stack_status = self.FAILED
             reason = 'Resource %s failed: %s' % (action, six.text_type(ex))
@@ -2113,7 +2361,7 @@ class Stack(collections.Mapping):
             return
 
         if prev_tmpl_id is not None:
-            raw_template_object.RawTemplate.delete(self.context, prev_tmpl_id)
+            tmpl.Template.delete(self.context, prev_tmpl_id)
 
         sync_point.delete_all(self.context, self.id, exp_trvsl)
 
@@ -2161,5 +2409,4 @@ class Stack(collections.Mapping):
         self.prev_raw_template_id = None
         self.store(ignore_traversal_check=True)
         if prev_raw_template_id:
-            raw_template_object.RawTemplate.delete(self.context,
-                                                   prev_raw_template_id)
+            tmpl.Template.delete(self.context, prev_raw_template_id)
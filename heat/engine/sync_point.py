@@ -17,6 +17,7 @@ import eventlet
 import random
 import six
 
+from oslo_config import cfg
 from oslo_log import log as logging
 
 from heat.common import exception
@@ -73,6 +74,24 @@ def update_input_data(context, entity_id, current_traversal,
     return rows_updated
 
 
+def _add_input(context, entity_id, current_traversal, is_update, stack_id,
+               sender_key, sender_data):
+    values = {'entity_id': entity_id, 'traversal_id': current_traversal,
+              'is_update': is_update, 'stack_id': stack_id,
+              'sender_key': _serialize_key(sender_key),
+              'input_data': serialize_input_data({sender_key: sender_data})}
+    return sync_point_object.SyncPoint.add_input(context, values)
+
+
+def _get_inputs(context, entity_id, current_traversal, is_update):
+    inputs = sync_point_object.SyncPoint.get_inputs(
+        context, entity_id, current_traversal, is_update)
+    db_input_data = {}
+    for data in inputs.values():
+        db_input_data.update((data or {}).get('input_data') or {})
+    return deserialize_input_data({'input_data': db_input_data})
+
+
 def str_pack_tuple(t):
     return u'tuple:' + str(t)
 
@@ -93,11 +112,16 @@ def _deserialize(d):
     return d2
 
 
+def _serialize_key(k):
+    if isinstance(k, tuple):
+        return str_pack_tuple(k)
+    return k
+
+
 def _serialize(d):
     d2 = {}
     for k, v in d.items():
-        if isinstance(k, tuple):
-            k = str_pack_tuple(k)
+        k = _serialize_key(k)
         if isinstance(v, dict):
             v = _serialize(v)
         d2[k] = v
@@ -118,6 +142,10 @@ def serialize_input_data(input_data):
 
 def sync(cnxt, entity_id, current_traversal, is_update, propagate,
          predecessors, new_data):
+    if cfg.CONF.convergence_keyed_sync_points:
+        return _sync_keyed(cnxt, entity_id, current_traversal, is_update,
+                           propagate, predecessors, new_data)
+
     rows_updated = None
     sync_point = None
     input_data = None
@@ -144,3 +172,43 @@ def sync(cnxt, entity_id, current_traversal, is_update, propagate,
         LOG.debug('[%s] Ready %s: Got %s',
                   key, entity_id, _dump_list(input_data))
         propagate(entity_id, serialize_input_data(input_data))
+
+
+def _sync_keyed(cnxt, entity_id, current_traversal, is_update, propagate,
+                predecessors, new_data):
+    """Merge data into a sync point without contending on a single row.
+
+    Each predecessor inserts its own input row, so there is no
+    read-modify-write retry loop. Once the number of inputs reaches the
+    number of predecessors, the sync point row is claimed with a single
+    atomic update, which guarantees that only one of the predecessors
+    propagates to the successor.
+    """
+    sync_point = get(cnxt, entity_id, current_traversal, is_update)
+    for sender_key, sender_data in new_data.items():
+        _add_input(cnxt, entity_id, current_traversal, is_update,
+                   sync_point.stack_id, sender_key, sender_data)
+
+    key = make_key(entity_id, current_traversal, is_update)
+    num_inputs = sync_point_object.SyncPoint.count_inputs(
+        cnxt, entity_id, current_traversal, is_update)
+    if num_inputs < len(predecessors):
+        LOG.debug('[%s] Waiting %s: Got %d of %d inputs',
+                  key, entity_id, num_inputs, len(predecessors))
+        return
+
+    input_data = _get_inputs(cnxt, entity_id, current_traversal, is_update)
+    waiting = predecessors - set(input_data)
+    if waiting:
+        LOG.debug('[%s] Waiting %s: Got %s; still need %s',
+                  key, entity_id, _dump_list(input_data), _dump_list(waiting))
+        return
+
+    if not sync_point_object.SyncPoint.claim(cnxt, entity_id,
+                                             current_traversal, is_update):
+        LOG.debug('[%s] Already propagated %s', key, entity_id)
+        return
+
+    LOG.debug('[%s] Ready %s: Got %s',
+              key, entity_id, _dump_list(input_data))
+    propagate(entity_id, serialize_input_data(input_data))
@@ -17,6 +17,8 @@ import copy
 import functools
 import hashlib
 
+from oslo_config import cfg
+from oslo_serialization import jsonutils
 import six
 from stevedore import extension
 
@@ -64,6 +66,72 @@ def raise_extension_exception(extmanager, ep, err):
     raise TemplatePluginNotRegistered(name=ep.name, error=six.text_type(err))
 
 
+class _TemplateCache(object):
+    """A bounded, least-recently-used cache of raw templates keyed by ID.
+
+    Entries hold the decoded and decrypted contents of a raw_template row and
+    are never modified; every Template loaded from the cache gets its own
+    copies of anything it may change. Writes made to a raw template by this
+    process invalidate its entry. Each entry also records the content hash of
+    the row it was read from, which changes when any engine updates the row
+    in place, so that callers can check that the entry is still current.
+
+    The cache is bounded both by the number of entries and by their total
+    approximate size, which is the length of their JSON encoding.
+    """
+
+    def __init__(self):
+        self._entries = collections.OrderedDict()
+        self._total_size = 0
+
+    def get(self, template_id):
+        item = self._entries.pop(template_id, None)
+        if item is None:
+            return None
+        self._entries[template_id] = item
+        return item[0]
+
+    def put(self, template_id, entry, size):
+        self.invalidate(template_id)
+        if (cfg.CONF.template_cache_size <= 0 or
+                size > cfg.CONF.template_cache_max_bytes):
+            return
+        self._entries[template_id] = (entry, size)
+        self._total_size += size
+        while (len(self._entries) > cfg.CONF.template_cache_size or
+               self._total_size > cfg.CONF.template_cache_max_bytes):
+            self._total_size -= self._entries.popitem(last=False)[1][1]
+
+    def invalidate(self, template_id):
+        item = self._entries.pop(template_id, None)
+        if item is not None:
+            self._total_size -= item[1]
+
+    def clear(self):
+        self._entries.clear()
+        self._total_size = 0
+
+
+class _CurrentTemplates(object):
+    """The content hashes of the raw templates read during a request.
+
+    This is a context scoped cache (see RequestContext.cache()), so that a
+    cached template is checked against the database only the first time it
+    is loaded for a request.
+    """
+
+    def __init__(self):
+        self.content_hashes = {}
+
+
+_template_cache = _TemplateCache()
+
+
+def clear_cache():
+    """Discard all of the raw templates cached by this process."""
+    _template_cache.clear()
+
+
 class TemplatePluginNotRegistered(exception.HeatException):
     msg_fmt = _("Could not load %(name)s: %(error)s")
 
@@ -150,14 +218,50 @@ class Template(collections.Mapping):
 
     @classmethod
     def load(cls, context, template_id, t=None):
-        """Retrieve a Template with the given ID from the database."""
+        """Retrieve a Template with the given ID from the database.
+
+        Raw templates are cached by each engine process. If t is not
+        supplied and a copy of the template is cached, only the content hash
+        of the template is read from the database, once per request, to
+        check that the cached copy is still current.
+        """
+        entry = None
+        current = context.cache(_CurrentTemplates).content_hashes
         if t is None:
-            t = template_object.RawTemplate.get_by_id(context, template_id)
-        env = environment.Environment(t.environment)
-        # support loading the legacy t.files, but modern templates will
-        # have a t.files_id
-        t_files = t.files or t.files_id
-        return cls(t.template, template_id=template_id, env=env,
+            cached = _template_cache.get(template_id)
+            if cached is not None:
+                content_hash = current.get(template_id)
+                if content_hash != cached[0]:
+                    content_hash = (
+                        template_object.RawTemplate.get_content_hash(
+                            context, template_id))
+                if content_hash is not None and content_hash == cached[0]:
+                    entry = cached[1]
+                    current[template_id] = content_hash
+        if entry is None:
+            if t is None:
+                t = template_object.RawTemplate.get_by_id(context,
+                                                          template_id)
+            # support loading the legacy t.files, but modern templates will
+            # have a t.files_id
+            entry = (t.template, t.environment, t.files or t.files_id)
+            if t.content_hash is None:
+                _template_cache.invalidate(template_id)
+                current.pop(template_id, None)
+            else:
+                files = t.files if isinstance(t.files, dict) else None
+                size = len(jsonutils.dumps([t.template, t.environment,
+                                            files]))
+                _template_cache.put(template_id, (t.content_hash, entry),
+                                    size)
+                current[template_id] = t.content_hash
+
+        template, env, t_files = entry
+        # Templates may be modified in place (e.g. during a legacy stack
+        # update), so don't share the cached sections or environment.
+        sections = dict((k, copy.copy(v)) for k, v in six.iteritems(template))
+        return cls(sections, template_id=template_id,
+                   env=environment.Environment(copy.deepcopy(env)),
                    files=t_files)
 
     def store(self, context):
@@ -167,13 +271,27 @@ class Template(collections.Mapping):
             'files_id': self.files.store(context),
             'environment': self.env.env_as_dict()
         }
-        if self.id is None:
-            new_rt = template_object.RawTemplate.create(context, rt)
-            self.id = new_rt.id
-        else:
-            template_object.RawTemplate.update_by_id(context, self.id, rt)
+        try:
+            if self.id is None:
+                new_rt = template_object.RawTemplate.create(context, rt)
+            else:
+                # Templates with identical content share a row, so the
+                # update may result in a new copy of the template with a
+                # different id
+                _template_cache.invalidate(self.id)
+                new_rt = template_object.RawTemplate.update_by_id(
+                    context, self.id, rt)
+        finally:
+            self.files.release(context)
+        self.id = new_rt.id
         return self.id
 
+    @staticmethod
+    def delete(context, template_id):
+        """Delete the raw template with the given ID from the database."""
+        _template_cache.invalidate(template_id)
+        template_object.RawTemplate.delete(context, template_id)
+
     @property
     def files(self):
         return self._template_files
@@ -33,6 +33,7 @@ class TemplateFiles(collections.Mapping):
     def __init__(self, files):
         self.files = None
         self.files_id = None
+        self._holds_ref = False
         if files is None:
             return
         if isinstance(files, TemplateFiles):
@@ -106,9 +107,20 @@ class TemplateFiles(collections.Mapping):
         rtf_obj = raw_template_files.RawTemplateFiles.create(
             ctxt, {'files': self.files})
         self.files_id = rtf_obj.id
+        self._holds_ref = True
         _d[self.files_id] = self.files
         return self.files_id
 
+    def release(self, ctxt):
+        """Release the reference to the files taken by store(), if any.
+
+        Each raw template using the files holds its own reference, so this
+        should be called once the raw template has been stored.
+        """
+        if self._holds_ref:
+            self._holds_ref = False
+            raw_template_files.RawTemplateFiles.delete(ctxt, self.files_id)
+
     def update(self, files):
         # Sets up the next call to store() to create a new
         # raw_template_files db obj. It seems like we *could* just
@@ -11,6 +11,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from oslo_config import cfg
 from oslo_log import log as logging
 import six
 
@@ -54,7 +55,8 @@ class StackUpdate(object):
         cleanup_prev = scheduler.DependencyTaskGroup(
             self.previous_stack.dependencies,
             self._remove_backup_resource,
-            reverse=True)
+            reverse=True,
+            event_driven=cfg.CONF.event_driven_scheduler)
 
         def get_error_wait_time(resource):
             return resource.cancel_grace_period()
@@ -62,7 +64,8 @@ class StackUpdate(object):
         updater = scheduler.DependencyTaskGroup(
             self.dependencies(),
             self._resource_update,
-            error_wait_time=get_error_wait_time)
+            error_wait_time=get_error_wait_time,
+            event_driven=cfg.CONF.event_driven_scheduler)
 
         if not self.rollback:
             yield cleanup_prev()
@@ -131,7 +134,7 @@ class StackUpdate(object):
                 self.previous_stack.t[self.previous_stack.t.RESOURCES]):
             LOG.debug("Storing definition of new Resource %s", res_name)
             self.previous_stack.t.add_resource(new_res.t)
-            self.previous_stack.t.store(self.previous_stack.context)
+            self.previous_stack.store_template()
 
         yield new_res.create()
 
@@ -183,7 +186,7 @@ class StackUpdate(object):
                     LOG.debug("Storing definition of updated Resource %s",
                               res_name)
                     self.previous_stack.t.add_resource(new_res.t)
-                    self.previous_stack.t.store(self.previous_stack.context)
+                    self.previous_stack.store_template()
 
                     LOG.info("Resource %(res_name)s for stack "
                              "%(stack_name)s updated",
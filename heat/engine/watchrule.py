@@ -11,7 +11,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-
+import collections
 import datetime
 
 from oslo_log import log as logging
@@ -49,6 +49,75 @@ def create_cfn_samples(clients, data):
         clients.client('ceilometer').samples.create(**sample)
 
 
+class MetricWindow(object):
+    """Running aggregates of the samples of a metric in a time window.
+
+    Samples must be added in the order in which they were created. The
+    minimum and maximum are kept in monotonic queues, so that all of the
+    aggregates are updated in constant amortised time as samples are added
+    and expire. ``built_at`` is the time from which samples were first read
+    into the window.
+    """
+
+    def __init__(self, period, built_at=None):
+        self.period = period
+        self.built_at = built_at
+        self.last_id = None
+        self.sum = 0.0
+        self._samples = collections.deque()
+        self._minima = collections.deque()
+        self._maxima = collections.deque()
+
+    def add(self, created_at, value, data_id=None):
+        """Add a sample, ignoring any already added with the same ID."""
+        if data_id is not None:
+            if self.last_id is not None and data_id <= self.last_id:
+                return
+            self.last_id = data_id
+
+        sample = (created_at, value)
+        self._samples.append(sample)
+        self.sum += value
+        while self._minima and self._minima[-1][1] >= value:
+            self._minima.pop()
+        self._minima.append(sample)
+        while self._maxima and self._maxima[-1][1] <= value:
+            self._maxima.pop()
+        self._maxima.append(sample)
+
+    def expire(self, now):
+        """Drop the samples created before the window ending at now."""
+        start = now - self.period
+        while self._samples and self._samples[0][0] < start:
+            sample = self._samples.popleft()
+            self.sum -= sample[1]
+            if self._minima[0] is sample:
+                self._minima.popleft()
+            if self._maxima[0] is sample:
+                self._maxima.popleft()
+        if not self._samples:
+            # Avoid accumulating rounding errors
+            self.sum = 0.0
+
+    @property
+    def count(self):
+        return len(self._samples)
+
+    @property
+    def minimum(self):
+        return self._minima[0][1]
+
+    @property
+    def maximum(self):
+        return self._maxima[0][1]
+
+
+# The metric windows of the watch rules evaluated by this engine, keyed by
+# watch rule ID, in order of their last use.
+_windows = collections.OrderedDict()
+_WINDOWS_MAX = 1000
+
+
 class WatchRule(object):
     WATCH_STATES = (
         ALARM,
@@ -88,7 +157,7 @@ class WatchRule(object):
             period = int(rule['period'])
         self.timeperiod = datetime.timedelta(seconds=period)
         self.id = wid
-        self.watch_data = watch_data or []
+        self.watch_data = watch_data
         self.last_evaluated = last_evaluated
 
     @classmethod
@@ -115,7 +184,6 @@ class WatchRule(object):
                        stack_id=watch.stack_id,
                        state=watch.state,
                        wid=watch.id,
-                       watch_data=watch.watch_data,
                        last_evaluated=watch.last_evaluated)
 
     def store(self):
@@ -132,15 +200,20 @@ class WatchRule(object):
         }
 
         if self.id is None:
+            wr_values['next_evaluation'] = self.now + self.timeperiod
             wr = watch_rule_objects.WatchRule.create(self.context, wr_values)
             self.id = wr.id
         else:
+            wr_values['last_evaluated'] = self.last_evaluated
+            wr_values['next_evaluation'] = (self.last_evaluated +
+                                            self.timeperiod)
             watch_rule_objects.WatchRule.update_by_id(self.context, self.id,
                                                       wr_values)
 
     def destroy(self):
         """Delete the watchrule from the database."""
         if self.id is not None:
+            _windows.pop(self.id, None)
             watch_rule_objects.WatchRule.delete(self.context, self.id)
 
     def do_data_cmp(self, data, threshold):
@@ -156,94 +229,76 @@ class WatchRule(object):
         else:
             return False
 
-    def do_Maximum(self):
-        data = 0
-        have_data = False
-        for d in self.watch_data:
-            if d.created_at < self.now - self.timeperiod:
-                continue
-            if not have_data:
-                data = float(d.data[self.rule['MetricName']]['Value'])
-                have_data = True
-            if float(d.data[self.rule['MetricName']]['Value']) > data:
-                data = float(d.data[self.rule['MetricName']]['Value'])
-
-        if not have_data:
-            return self.NODATA
+    def _sample_value(self, watch_data):
+        return float(watch_data.data[self.rule['MetricName']]['Value'])
 
+    def _update_window(self, window):
+        """Add any samples stored since the window was last updated.
+
+        Samples may have been stored by other engines, so this is done
+        even when all samples sent to this engine have already been added.
+        """
+        since = self.now - self.timeperiod
+        for wd in watch_data_objects.WatchData.get_recent(
+                self.context, self.id, since, after_id=window.last_id):
+            window.add(wd.created_at, self._sample_value(wd), wd.id)
+
+    def _window(self):
+        """Return the window of samples to evaluate the rule with."""
+        if self.watch_data is not None:
+            window = MetricWindow(self.timeperiod)
+            for wd in sorted(self.watch_data, key=lambda wd: wd.created_at):
+                window.add(wd.created_at, self._sample_value(wd))
+        elif self.id is None:
+            window = MetricWindow(self.timeperiod)
+        else:
+            window = _windows.pop(self.id, None)
+            # Other engines may commit samples with a lower ID after one
+            # with a higher ID has been read, and those are never read
+            # incrementally. So the window is rebuilt once all of the samples
+            # it was built from have expired, which costs no more reads than
+            # keeping it.
+            if (window is None or window.period != self.timeperiod or
+                    self.now - window.built_at >= window.period):
+                window = MetricWindow(self.timeperiod, self.now)
+            _windows[self.id] = window
+            while len(_windows) > _WINDOWS_MAX:
+                _windows.popitem(last=False)
+            self._update_window(window)
+        window.expire(self.now)
+        return window
+
+    def _compare(self, data):
         if self.do_data_cmp(data,
                             float(self.rule['Threshold'])):
             return self.ALARM
         else:
             return self.NORMAL
 
-    def do_Minimum(self):
-        data = 0
-        have_data = False
-        for d in self.watch_data:
-            if d.created_at < self.now - self.timeperiod:
-                continue
-            if not have_data:
-                data = float(d.data[self.rule['MetricName']]['Value'])
-                have_data = True
-            elif float(d.data[self.rule['MetricName']]['Value']) < data:
-                data = float(d.data[self.rule['MetricName']]['Value'])
-
-        if not have_data:
+    def do_Maximum(self):
+        window = self._window()
+        if not window.count:
             return self.NODATA
+        return self._compare(window.maximum)
 
-        if self.do_data_cmp(data,
-                            float(self.rule['Threshold'])):
-            return self.ALARM
-        else:
-            return self.NORMAL
+    def do_Minimum(self):
+        window = self._window()
+        if not window.count:
+            return self.NODATA
+        return self._compare(window.minimum)
 
     def do_SampleCount(self):
         """Count all samples within the specified period."""
-        data = 0
-        for d in self.watch_data:
-            if d.created_at < self.now - self.timeperiod:
-                continue
-            data = data + 1
-
-        if self.do_data_cmp(data,
-                            float(self.rule['Threshold'])):
-            return self.ALARM
-        else:
-            return self.NORMAL
+        return self._compare(self._window().count)
 
     def do_Average(self):
-        data = 0
-        samples = 0
-        for d in self.watch_data:
-            if d.created_at < self.now - self.timeperiod:
-                continue
-            samples = samples + 1
-            data = data + float(d.data[self.rule['MetricName']]['Value'])
-
-        if samples == 0:
+        window = self._window()
+        if not window.count:
             return self.NODATA
-
-        data = data / samples
-        if self.do_data_cmp(data,
-                            float(self.rule['Threshold'])):
-            return self.ALARM
-        else:
-            return self.NORMAL
+        return self._compare(window.sum / window.count)
 
     def do_Sum(self):
-        data = 0
-        for d in self.watch_data:
-            if d.created_at < self.now - self.timeperiod:
-                LOG.debug('ignoring %s', str(d.data))
-                continue
-            data = data + float(d.data[self.rule['MetricName']]['Value'])
-
-        if self.do_data_cmp(data,
-                            float(self.rule['Threshold'])):
-            return self.ALARM
-        else:
-            return self.NORMAL
+        return self._compare(self._window().sum)
 
     def get_alarm_state(self):
         fn = getattr(self, 'do_%s' % self.rule['Statistic'])
@@ -269,8 +324,15 @@ class WatchRule(object):
 
         self.last_evaluated = self.now
         self.store()
+        self.prune_watch_data()
         return actions
 
+    def prune_watch_data(self):
+        """Delete the stored samples that are older than the rule period."""
+        if self.id is not None:
+            watch_data_objects.WatchData.delete_before(
+                self.context, self.id, self.now - self.timeperiod)
+
     def rule_actions(self, new_state):
         LOG.info('WATCH: stack:%(stack)s, watch_name:%(watch_name)s, '
                  'new_state:%(new_state)s', {'stack': self.stack_id,
@@ -328,6 +390,11 @@ class WatchRule(object):
         LOG.debug('new watch:%(name)s data:%(data)s'
                   % {'name': self.name, 'data': str(wd.data)})
 
+        window = _windows.get(self.id)
+        if window is not None:
+            self.now = timeutils.utcnow()
+            self._update_window(window)
+
     def state_set(self, state):
         """Persistently store the watch state."""
         if state not in self.WATCH_STATES:
@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import eventlet
 import eventlet.queue
 import functools
 
@@ -61,7 +62,7 @@ class WorkerService(object):
     or expect replies from these messages.
     """
 
-    RPC_API_VERSION = '1.4'
+    RPC_API_VERSION = '1.5'
 
     def __init__(self,
                  host,
@@ -167,11 +168,50 @@ class WorkerService(object):
         The node may be associated with either an update or a cleanup of its
         associated resource.
         """
+        self._check_resource(cnxt, resource_id, current_traversal, data,
+                             is_update, adopt_stack_data, converge)
+
+    @context.request_context
+    @log_exceptions
+    def check_resources(self, cnxt, stack_id, current_traversal, checks,
+                        adopt_stack_data, converge=False):
+        """Process several nodes in the dependency graph of a stack.
+
+        The stack is loaded from the database once for the whole batch, then
+        each node is processed concurrently as if it had been received in its
+        own check_resource message, with its own copy of the request context.
+        """
+        db_stack = stack_objects.Stack.get_by_id(cnxt, stack_id,
+                                                 show_deleted=True)
+        if db_stack is None:
+            return
+
+        def check(resource_id, is_update, data):
+            # Green threads must not share a context, since the context owns
+            # the database session.
+            check_cnxt = context.RequestContext.from_dict(cnxt.to_dict())
+            check_cnxt.update_store()
+            try:
+                self._check_resource(check_cnxt, resource_id,
+                                     current_traversal, data, is_update,
+                                     adopt_stack_data, converge, db_stack)
+            except Exception:
+                LOG.exception('Unhandled exception in check_resources')
+
+        pool = eventlet.GreenPool(len(checks))
+        for resource_id, is_update, data in checks:
+            pool.spawn_n(check, resource_id, is_update, data)
+        pool.waitall()
+
+    def _check_resource(self, cnxt, resource_id, current_traversal, data,
+                        is_update, adopt_stack_data, converge,
+                        db_stack=None):
         in_data = sync_point.deserialize_input_data(data)
         resource_data = node_data.load_resources_data(in_data if is_update
                                                       else {})
         rsrc, rsrc_owning_stack, stack = check_resource.load_resource(
-            cnxt, resource_id, resource_data, current_traversal, is_update)
+            cnxt, resource_id, resource_data, current_traversal, is_update,
+            db_stack)
 
         if rsrc is None:
             return
@@ -0,0 +1,94 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import sys
+
+from heat.objects import event as event_object
+from heat.objects import resource as resource_objects
+
+
+class WriteBuffer(object):
+    """A buffer of resource updates and events to be written in bulk.
+
+    Successive updates to the same resource are merged, so that each
+    resource row is written at most once per flush.
+    """
+
+    def __init__(self, context):
+        self.context = context
+        self._resources = collections.OrderedDict()
+        self._events = []
+
+    def update_resource(self, resource_id, values):
+        """Buffer an update to the specified resource row."""
+        self._resources.setdefault(resource_id, {}).update(values)
+
+    def add_event(self, values):
+        """Buffer a new event row."""
+        self._events.append(values)
+
+    def flush_resource(self, resource_id):
+        """Write any buffered update to the specified resource row now."""
+        values = self._resources.pop(resource_id, None)
+        if values:
+            resource_objects.Resource.update_by_id(self.context,
+                                                   resource_id, values)
+
+    def flush(self):
+        """Write all buffered resource updates and events."""
+        resources = self._resources
+        events = self._events
+        self._resources = collections.OrderedDict()
+        self._events = []
+
+        if resources:
+            resource_objects.Resource.update_many(self.context, resources)
+        if events:
+            event_object.Event.create_many(self.context, events)
+
+    def __len__(self):
+        """Return the number of buffered writes."""
+        return len(self._resources) + len(self._events)
+
+
+def flush_each_step(stack, task):
+    """Run a task, batching the resource writes made in each of its steps.
+
+    A WriteBuffer is attached to the stack while the task runs, and is
+    flushed after every step. It is also flushed when the task completes,
+    fails or is cancelled, so that no write is delayed beyond the end of the
+    task, e.g. until after an error has been reported or a lock released.
+    """
+    write_buffer = WriteBuffer(stack.context)
+    stack.write_buffer = write_buffer
+    try:
+        step = next(task)
+        while True:
+            write_buffer.flush()
+            try:
+                yield step
+            except GeneratorExit:
+                task.close()
+                raise
+            except:  # noqa
+                step = task.throw(*sys.exc_info())
+            else:
+                step = next(task)
+    except StopIteration:
+        pass
+    finally:
+        try:
+            write_buffer.flush()
+        finally:
+            stack.write_buffer = None
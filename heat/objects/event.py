@@ -33,6 +33,7 @@ class Event(
     fields = {
         'id': fields.IntegerField(),
         'stack_id': fields.StringField(),
+        'root_stack_id': fields.StringField(nullable=True),
         'uuid': fields.StringField(),
         'resource_action': fields.StringField(nullable=True),
         'resource_status': fields.StringField(nullable=True),
@@ -98,10 +99,24 @@ class Event(
                                                               stack_id,
                                                               **kwargs)]
 
+    @classmethod
+    def get_all_by_root_stack(cls, context, root_stack_id, **kwargs):
+        return [cls._from_db_object(context, cls(), db_event)
+                for db_event in db_api.event_get_all_by_root_stack(
+                    context, root_stack_id, **kwargs)]
+
     @classmethod
     def count_all_by_stack(cls, context, stack_id):
         return db_api.event_count_all_by_stack(context, stack_id)
 
+    @classmethod
+    def get_stack_ids(cls, context, after_id, limit):
+        return db_api.event_get_stack_ids(context, after_id, limit)
+
+    @classmethod
+    def delete_oldest(cls, context, stack_id, limit):
+        return db_api.event_delete_oldest(context, stack_id, limit)
+
     @classmethod
     def create(cls, context, values):
         # Using dict() allows us to be done with the sqlalchemy/model
@@ -110,6 +125,10 @@ class Event(
         return cls._from_db_object(context, cls(context=context),
                                    dict(db_api.event_create(context, values)))
 
+    @classmethod
+    def create_many(cls, context, values_list):
+        db_api.event_create_many(context, values_list)
+
     def identifier(self, stack_identifier):
         """Return a unique identifier for the event."""
 
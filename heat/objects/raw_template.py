@@ -39,7 +39,8 @@ class RawTemplate(
 ):
     # Version 1.0: Initial version
     # Version 1.1: Added files_id
-    VERSION = '1.1'
+    # Version 1.2: Added content_hash
+    VERSION = '1.2'
 
     fields = {
         'id': fields.IntegerField(),
@@ -48,6 +49,7 @@ class RawTemplate(
         'files_id': fields.IntegerField(nullable=True),
         'template': heat_fields.JsonField(),
         'environment': heat_fields.JsonField(),
+        'content_hash': fields.StringField(nullable=True),
     }
 
     @staticmethod
@@ -86,6 +88,10 @@ class RawTemplate(
         raw_template_db = db_api.raw_template_get(context, template_id)
         return cls.from_db_object(context, cls(), raw_template_db)
 
+    @classmethod
+    def get_content_hash(cls, context, template_id):
+        return db_api.raw_template_get_content_hash(context, template_id)
+
     @classmethod
     def encrypt_hidden_parameters(cls, tmpl):
         if cfg.CONF.encrypt_parameters_and_properties:
@@ -49,3 +49,7 @@ class RawTemplateFiles(
         return cls._from_db_object(context, cls(),
                                    db_api.raw_template_files_create(context,
                                                                     values))
+
+    @classmethod
+    def delete(cls, context, files_id):
+        db_api.raw_template_files_delete(context, files_id)
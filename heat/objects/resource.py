@@ -97,6 +97,7 @@ class Resource(
         'replaces': fields.IntegerField(nullable=True),
         'replaced_by': fields.IntegerField(nullable=True),
         'root_stack_id': fields.StringField(nullable=True),
+        'definition_fingerprint': fields.StringField(nullable=True),
     }
 
     @staticmethod
@@ -246,6 +247,13 @@ class Resource(
             context.cache(ResourceCache).set_by_stack_id(all)
         return all
 
+    @classmethod
+    def get_all_summary_by_root_stack(cls, context, stack_id, filters=None):
+        """Return the rows of the resources in a tree to list them."""
+        return db_api.resource_summary_get_all_by_root_stack(context,
+                                                             stack_id,
+                                                             filters)
+
     @classmethod
     def purge_deleted(cls, context, stack_id):
         return db_api.resource_purge_deleted(context, stack_id)
@@ -270,6 +278,10 @@ class Resource(
     def update_by_id(cls, context, resource_id, values):
         db_api.resource_update_and_save(context, resource_id, values)
 
+    @classmethod
+    def update_many(cls, context, values_by_id):
+        db_api.resource_update_many(context, values_by_id)
+
     def update_and_save(self, values):
         db_api.resource_update_and_save(self._context, self.id, values)
 
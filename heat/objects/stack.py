@@ -15,10 +15,13 @@
 
 """Stack object."""
 
+from oslo_config import cfg
+from oslo_serialization import jsonutils
 from oslo_versionedobjects import base
 from oslo_versionedobjects import fields
 import six
 
+from heat.common import crypt
 from heat.common import exception
 from heat.common.i18n import _
 from heat.common import identifier
@@ -60,6 +63,9 @@ class Stack(
         'prev_raw_template_id': fields.IntegerField(),
         'prev_raw_template': fields.ObjectField('RawTemplate'),
         'parent_resource_name': fields.StringField(nullable=True),
+        'root_stack_id': fields.StringField(nullable=True),
+        'ancestry': fields.ListOfStringsField(nullable=True),
+        'output_data': heat_fields.JsonField(nullable=True),
     }
 
     @staticmethod
@@ -85,6 +91,16 @@ class Stack(
     def get_root_id(cls, context, stack_id):
         return db_api.stack_get_root_id(context, stack_id)
 
+    @classmethod
+    def get_path(cls, context, stack_ids):
+        """Return (parent_resource_name, name) tuples for the given stacks."""
+        return db_api.stack_get_path(context, stack_ids)
+
+    @classmethod
+    def get_all_summary_by_root(cls, context, root_stack_id):
+        """Return the rows of the stacks in a tree to list their resources."""
+        return db_api.stack_summary_get_all_by_root(context, root_stack_id)
+
     @classmethod
     def get_by_id(cls, context, stack_id, **kwargs):
         db_stack = db_api.stack_get(context, stack_id, **kwargs)
@@ -244,6 +260,35 @@ class Stack(
         """Return action and status for the given stack."""
         return db_api.stack_get_status(context, stack_id)
 
+    @classmethod
+    def update_output_data(cls, context, stack_id, outputs, exp_state=None):
+        """Store the resolved outputs of the stack, or clear them if None.
+
+        Return whether the outputs were stored; they are not if ``exp_state``
+        no longer matches the state returned by get_status().
+        """
+        output_data = None
+        if outputs is not None:
+            if cfg.CONF.encrypt_parameters_and_properties:
+                output_data = {'encrypted': True,
+                               'outputs': crypt.encrypt(
+                                   jsonutils.dumps(outputs))}
+            else:
+                output_data = {'encrypted': False, 'outputs': outputs}
+        return db_api.stack_output_data_set(context, stack_id, output_data,
+                                            exp_state=exp_state)
+
+    @staticmethod
+    def decrypt_output_data(output_data):
+        """Return the list of outputs stored by update_output_data()."""
+        if not output_data:
+            return None
+        outputs = output_data['outputs']
+        if output_data.get('encrypted'):
+            method, value = outputs
+            outputs = jsonutils.loads(crypt.decrypt(method, value))
+        return outputs
+
     def identifier(self):
         """Return an identifier for this stack."""
         return identifier.HeatIdentifier(self.tenant, self.name, self.id)
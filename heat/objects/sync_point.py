@@ -83,6 +83,32 @@ class SyncPoint(
             atomic_key,
             input_data)
 
+    @classmethod
+    def claim(cls, context, entity_id, traversal_id, is_update):
+        return db_api.sync_point_claim(context,
+                                       entity_id,
+                                       traversal_id,
+                                       is_update)
+
+    @classmethod
+    def add_input(cls, context, values):
+        return db_api.sync_point_input_create(context, values)
+
+    @classmethod
+    def count_inputs(cls, context, entity_id, traversal_id, is_update):
+        return db_api.sync_point_input_count(context,
+                                             entity_id,
+                                             traversal_id,
+                                             is_update)
+
+    @classmethod
+    def get_inputs(cls, context, entity_id, traversal_id, is_update):
+        db_inputs = db_api.sync_point_input_get_all(context,
+                                                    entity_id,
+                                                    traversal_id,
+                                                    is_update)
+        return dict((i.sender_key, i.input_data) for i in db_inputs)
+
     @classmethod
     def delete_all_by_stack_and_traversal(cls,
                                           context,
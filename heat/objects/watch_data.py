@@ -58,3 +58,16 @@ class WatchData(
         return (cls._from_db_object(context, cls(), db_data)
                 for db_data in db_api.watch_data_get_all_by_watch_rule_id(
                     context, watch_rule_id))
+
+    @classmethod
+    def get_recent(cls, context, watch_rule_id, created_since,
+                   after_id=None):
+        return [cls._from_db_object(context, cls(), db_data)
+                for db_data in db_api.watch_data_get_recent(
+                    context, watch_rule_id, created_since,
+                    after_id=after_id)]
+
+    @classmethod
+    def delete_before(cls, context, watch_rule_id, before):
+        return db_api.watch_data_delete_before(context, watch_rule_id,
+                                               before)
@@ -34,6 +34,7 @@ class WatchRule(
         'rule': heat_fields.JsonField(nullable=True),
         'state': fields.StringField(nullable=True),
         'last_evaluated': fields.DateTimeField(nullable=True),
+        'next_evaluation': fields.DateTimeField(nullable=True),
         'stack_id': fields.StringField(),
         'watch_data': fields.ListOfObjectsField(watch_data.WatchData),
         'created_at': fields.DateTimeField(read_only=True),
@@ -73,6 +74,14 @@ class WatchRule(
                 for db_rule in db_api.watch_rule_get_all_by_stack(context,
                                                                   stack_id)]
 
+    @classmethod
+    def get_due(cls, context, now, limit, after_id=None,
+                shard_index=0, shard_count=1):
+        return [cls._from_db_object(context, cls(), db_rule)
+                for db_rule in db_api.watch_rule_get_due(
+                    context, now, limit, after_id=after_id,
+                    shard_index=shard_index, shard_count=shard_count)]
+
     @classmethod
     def update_by_id(cls, context, watch_id, values):
         db_api.watch_rule_update(context, watch_id, values)
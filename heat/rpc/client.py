@@ -61,6 +61,7 @@ class EngineClient(object):
                and list_software_configs
         1.34 - Add migrate_convergence_1 call
         1.35 - Add with_condition to list_template_functions
+        1.36 - Add live to show_stack and show_output
     """
 
     BASE_RPC_API_VERSION = '1.0'
@@ -212,18 +213,22 @@ class EngineClient(object):
                                              not_tags_any=not_tags_any),
                          version='1.33')
 
-    def show_stack(self, ctxt, stack_identity, resolve_outputs=True):
+    def show_stack(self, ctxt, stack_identity, resolve_outputs=True,
+                   live=False):
         """Returns detailed information about one or all stacks.
 
         :param ctxt: RPC context.
         :param stack_identity: Name of the stack you want to show, or None to
         show all
         :param resolve_outputs: If True, stack outputs will be resolved
+        :param live: If True, stack outputs will be resolved even if their
+        values are stored
         """
         return self.call(ctxt, self.make_msg('show_stack',
                                              stack_identity=stack_identity,
-                                             resolve_outputs=resolve_outputs),
-                         version='1.20')
+                                             resolve_outputs=resolve_outputs,
+                                             live=live),
+                         version='1.36')
 
     def preview_stack(self, ctxt, stack_name, template, params, files,
                       args, environment_files=None):
@@ -858,11 +863,12 @@ class EngineClient(object):
                                              stack_identity=stack_identity),
                          version='1.19')
 
-    def show_output(self, cntx, stack_identity, output_key):
+    def show_output(self, cntx, stack_identity, output_key, live=False):
         return self.call(cntx, self.make_msg('show_output',
                                              stack_identity=stack_identity,
-                                             output_key=output_key),
-                         version='1.19')
+                                             output_key=output_key,
+                                             live=live),
+                         version='1.36')
 
     def export_stack(self, ctxt, stack_identity):
         """Exports the stack data in JSON format.
@@ -29,6 +29,7 @@ class EngineListenerClient(object):
     API version history::
 
         1.0 - Initial version.
+        1.1 - Add nested_complete.
     """
 
     BASE_RPC_API_VERSION = '1.0'
@@ -46,3 +47,21 @@ class EngineListenerClient(object):
             return self._client.call(ctxt, 'listening')
         except messaging.MessagingTimeout:
             return False
+
+    def nested_complete(self, ctxt, stack_identity, action, status,
+                        status_reason, updated_time, outputs):
+        """Notify the engine that a nested stack of one of its stacks is done.
+
+        :param ctxt: RPC context.
+        :param stack_identity: Identity of the nested stack.
+        :param action: The action the nested stack has finished.
+        :param status: The final status of the action.
+        :param status_reason: The reason for the status.
+        :param updated_time: The ISO 8601 update time of the nested stack.
+        :param outputs: The formatted outputs of the nested stack, or None.
+        """
+        self._client.prepare(version='1.1').cast(
+            ctxt, 'nested_complete',
+            stack_identity=stack_identity, action=action, status=status,
+            status_reason=status_reason, updated_time=updated_time,
+            outputs=outputs)
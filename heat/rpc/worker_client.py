@@ -15,9 +15,13 @@
 
 """Client side of the heat worker RPC API."""
 
+from oslo_config import cfg
+
 from heat.common import messaging
 from heat.rpc import worker_api
 
+cfg.CONF.import_opt('worker_rpc_version_cap', 'heat.common.config')
+
 
 class WorkerClient(object):
     """Client side of the heat worker RPC API.
@@ -29,6 +33,7 @@ class WorkerClient(object):
         1.2 - Add adopt data argument to check_resource.
         1.3 - Added cancel_check_resource API.
         1.4 - Add converge argument to check_resource
+        1.5 - Added check_resources.
     """
 
     BASE_RPC_API_VERSION = '1.0'
@@ -36,7 +41,8 @@ class WorkerClient(object):
     def __init__(self):
         self._client = messaging.get_rpc_client(
             topic=worker_api.TOPIC,
-            version=self.BASE_RPC_API_VERSION)
+            version=self.BASE_RPC_API_VERSION,
+            version_cap=cfg.CONF.worker_rpc_version_cap)
 
     @staticmethod
     def make_msg(method, **kwargs):
@@ -62,6 +68,32 @@ class WorkerClient(object):
                   ),
                   version='1.4')
 
+    def check_resources(self, ctxt, stack_id, current_traversal, checks,
+                        adopt_stack_data, converge=False):
+        """Send a batch of checks for resources of one stack traversal.
+
+        Engines that do not support batches yet, as given by the worker RPC
+        version cap, are sent a check_resource message for each resource.
+
+        :param checks: a list of (resource_id, is_update, data) tuples, one
+                       for each resource to check.
+        """
+        if len(checks) == 1 or not self._client.can_send_version('1.5'):
+            for resource_id, is_update, data in checks:
+                self.check_resource(ctxt, resource_id, current_traversal,
+                                    data, is_update, adopt_stack_data,
+                                    converge)
+            return
+
+        self.cast(ctxt,
+                  self.make_msg(
+                      'check_resources', stack_id=stack_id,
+                      current_traversal=current_traversal,
+                      checks=[list(check) for check in checks],
+                      adopt_stack_data=adopt_stack_data, converge=converge
+                  ),
+                  version='1.5')
+
     def cancel_check_resource(self, ctxt, stack_id, engine_id):
         """Send check-resource cancel message.
 
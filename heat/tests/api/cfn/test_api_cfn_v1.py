@@ -213,8 +213,9 @@ class CfnStackControllerTest(common.HeatTestCase):
         self.m.StubOutWithMock(rpc_client.EngineClient, 'call')
         rpc_client.EngineClient.call(
             dummy_req.context, ('show_stack', {'stack_identity': None,
-                                               'resolve_outputs': True}),
-            version='1.20'
+                                               'resolve_outputs': True,
+                                               'live': False}),
+            version='1.36'
         ).AndReturn(engine_resp)
 
         self.m.ReplayAll()
@@ -237,8 +238,9 @@ class CfnStackControllerTest(common.HeatTestCase):
         self.m.StubOutWithMock(rpc_client.EngineClient, 'call')
         rpc_client.EngineClient.call(
             dummy_req.context, ('show_stack', {'stack_identity': None,
-                                               'resolve_outputs': True}),
-            version='1.20'
+                                               'resolve_outputs': True,
+                                               'live': False}),
+            version='1.36'
         ).AndReturn(engine_resp)
 
         self.m.ReplayAll()
@@ -294,8 +296,9 @@ class CfnStackControllerTest(common.HeatTestCase):
         rpc_client.EngineClient.call(
             dummy_req.context,
             ('show_stack', {'stack_identity': identity,
-                            'resolve_outputs': True}),
-            version='1.20'
+                            'resolve_outputs': True,
+                            'live': False}),
+            version='1.36'
         ).AndReturn(engine_resp)
 
         self.m.ReplayAll()
@@ -385,8 +388,9 @@ class CfnStackControllerTest(common.HeatTestCase):
         rpc_client.EngineClient.call(
             dummy_req.context,
             ('show_stack', {'stack_identity': identity,
-                            'resolve_outputs': True}),
-            version='1.20'
+                            'resolve_outputs': True,
+                            'live': False}),
+            version='1.36'
         ).AndReturn(engine_resp)
 
         self.m.ReplayAll()
@@ -446,8 +450,9 @@ class CfnStackControllerTest(common.HeatTestCase):
         self.m.StubOutWithMock(rpc_client.EngineClient, 'call')
         rpc_client.EngineClient.call(
             dummy_req.context, ('show_stack', {'stack_identity': identity,
-                                               'resolve_outputs': True},),
-            version='1.20'
+                                               'resolve_outputs': True,
+                                               'live': False},),
+            version='1.36'
         ).AndRaise(heat_exception.InvalidTenant(target='test',
                                                 actual='test'))
 
@@ -471,8 +476,9 @@ class CfnStackControllerTest(common.HeatTestCase):
         ).AndReturn(identity)
         rpc_client.EngineClient.call(
             dummy_req.context, ('show_stack', {'stack_identity': identity,
-                                               'resolve_outputs': True}),
-            version='1.20'
+                                               'resolve_outputs': True,
+                                               'live': False}),
+            version='1.36'
         ).AndRaise(AttributeError())
 
         self.m.ReplayAll()
@@ -1591,8 +1591,9 @@ class StackControllerTest(tools.ControllerTest, common.HeatTestCase):
         rpc_client.EngineClient.call(
             req.context,
             ('show_stack', {'stack_identity': dict(identity),
-                            'resolve_outputs': True}),
-            version='1.20'
+                            'resolve_outputs': True,
+                            'live': False}),
+            version='1.36'
         ).AndReturn(engine_resp)
         self.m.ReplayAll()
         response = self.controller.show(req,
@@ -1656,8 +1657,9 @@ class StackControllerTest(tools.ControllerTest, common.HeatTestCase):
         rpc_client.EngineClient.call(
             req.context,
             ('show_stack', {'stack_identity': dict(identity),
-                            'resolve_outputs': False}),
-            version='1.20'
+                            'resolve_outputs': False,
+                            'live': False}),
+            version='1.36'
         ).AndReturn(engine_resp)
         self.m.ReplayAll()
         response = self.controller.show(req,
@@ -1686,6 +1688,31 @@ class StackControllerTest(tools.ControllerTest, common.HeatTestCase):
         self.assertEqual(expected, response)
         self.m.VerifyAll()
 
+    def test_show_live(self, mock_enforce):
+        self._mock_enforce_setup(mock_enforce, 'show', True)
+        identity = identifier.HeatIdentifier(self.tenant, 'wordpress', '6')
+        req = self._get('/stacks/%(stack_name)s/%(stack_id)s' % identity,
+                        params={'live': 'true'})
+        engine_resp = [{u'stack_identity': dict(identity),
+                        u'stack_name': identity.stack_name,
+                        u'stack_action': u'CREATE',
+                        u'stack_status': u'COMPLETE'}]
+        mock_call = self.patchobject(rpc_client.EngineClient, 'call',
+                                     return_value=engine_resp)
+
+        response = self.controller.show(req,
+                                        tenant_id=identity.tenant,
+                                        stack_name=identity.stack_name,
+                                        stack_id=identity.stack_id)
+
+        self.assertEqual('CREATE_COMPLETE', response['stack']['stack_status'])
+        mock_call.assert_called_once_with(
+            req.context,
+            ('show_stack', {'stack_identity': dict(identity),
+                            'resolve_outputs': True,
+                            'live': True}),
+            version='1.36')
+
     def test_show_notfound(self, mock_enforce):
         self._mock_enforce_setup(mock_enforce, 'show', True)
         identity = identifier.HeatIdentifier(self.tenant, 'wibble', '6')
@@ -1696,8 +1723,9 @@ class StackControllerTest(tools.ControllerTest, common.HeatTestCase):
         rpc_client.EngineClient.call(
             req.context,
             ('show_stack', {'stack_identity': dict(identity),
-                            'resolve_outputs': True}),
-            version='1.20'
+                            'resolve_outputs': True,
+                            'live': False}),
+            version='1.36'
         ).AndRaise(tools.to_remote_error(error))
         self.m.ReplayAll()
 
@@ -2601,8 +2629,9 @@ class StackControllerTest(tools.ControllerTest, common.HeatTestCase):
         rpc_client.EngineClient.call(
             req.context,
             ('show_output', {'output_key': 'key',
-                             'stack_identity': dict(identity)}),
-            version='1.19'
+                             'stack_identity': dict(identity),
+                             'live': False}),
+            version='1.36'
         ).AndReturn(output)
         self.m.ReplayAll()
 
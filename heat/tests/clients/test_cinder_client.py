@@ -17,9 +17,11 @@ import uuid
 from cinderclient import exceptions as cinder_exc
 from keystoneauth1 import exceptions as ks_exceptions
 import mock
+from oslo_config import cfg
 
 from heat.common import exception
 from heat.engine.clients.os import cinder
+from heat.engine.clients import status_poller
 from heat.tests import common
 from heat.tests import utils
 
@@ -44,6 +46,35 @@ class CinderClientPluginTest(common.HeatTestCase):
         self.assertEqual(my_volume, self.cinder_plugin.get_volume(volume_id))
         self.cinder_client.volumes.get.assert_called_once_with(volume_id)
 
+    def test_poll_volume(self):
+        """Tests the poll_volume function with batch status polling."""
+        cfg.CONF.set_override('batch_status_polling', True)
+        self.addCleanup(status_poller._pollers.clear)
+        volume_id = str(uuid.uuid4())
+        my_volume = mock.MagicMock(id=volume_id)
+        self.cinder_client.volumes.list.return_value = [my_volume]
+
+        self.assertEqual(my_volume, self.cinder_plugin.poll_volume(volume_id))
+        self.cinder_client.volumes.list.assert_called_once_with(detailed=True)
+        self.assertEqual(0, self.cinder_client.volumes.get.call_count)
+
+        # A volume that is not listed is fetched individually
+        status_poller._pollers.clear()
+        other_id = str(uuid.uuid4())
+        self.assertEqual(self.cinder_client.volumes.get.return_value,
+                         self.cinder_plugin.poll_volume(other_id))
+        self.cinder_client.volumes.get.assert_called_once_with(other_id)
+
+    def test_poll_volume_disabled(self):
+        """Tests the poll_volume function without batch status polling."""
+        volume_id = str(uuid.uuid4())
+        my_volume = mock.MagicMock()
+        self.cinder_client.volumes.get.return_value = my_volume
+
+        self.assertEqual(my_volume, self.cinder_plugin.poll_volume(volume_id))
+        self.cinder_client.volumes.get.assert_called_once_with(volume_id)
+        self.assertEqual(0, self.cinder_client.volumes.list.call_count)
+
     def test_get_snapshot(self):
         """Tests the get_volume_snapshot function."""
         snapshot_id = str(uuid.uuid4())
@@ -126,6 +126,16 @@ class NeutronClientPluginTest(NeutronClientPluginTestCase):
                           self.neutron_plugin.check_lb_status,
                           '1234')
 
+    def test_list_resource_ids_and_names(self):
+        self.neutron_client.list_networks.return_value = {
+            'networks': [{'id': 'net1_id', 'name': 'net1'},
+                         {'id': 'net2_id', 'name': 'net2'}]}
+        self.assertEqual(
+            [('net1_id', 'net1'), ('net2_id', 'net2')],
+            self.neutron_plugin.list_resource_ids_and_names('network'))
+        self.neutron_client.list_networks.assert_called_once_with(
+            retrieve_all=True)
+
 
 class NeutronConstraintsValidate(common.HeatTestCase):
     scenarios = [
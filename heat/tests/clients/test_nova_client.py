@@ -25,6 +25,7 @@ import six
 
 from heat.common import exception
 from heat.engine.clients.os import nova
+from heat.engine.clients import status_poller
 from heat.tests import common
 from heat.tests.openstack.nova import fakes as fakes_nova
 from heat.tests import utils
@@ -357,6 +358,63 @@ class NovaClientPluginCheckActiveTest(NovaClientPluginTestCase):
         self.assertEqual(0, self.r_mock.call_count)
 
 
+class NovaClientPluginPollServerTest(NovaClientPluginTestCase):
+
+    def setUp(self):
+        super(NovaClientPluginPollServerTest, self).setUp()
+        cfg.CONF.set_override('batch_status_polling', True)
+        self.addCleanup(status_poller._pollers.clear)
+        self.servers = []
+        for server_id, status in (('1234', 'BUILD'), ('5678', 'ACTIVE')):
+            server = mock.Mock(status=status)
+            server.id = server_id
+            self.servers.append(server)
+        self.nova_client.servers.list.return_value = self.servers
+        self.f_mock = self.patchobject(self.nova_plugin, 'fetch_server')
+
+    def test_poll_server(self):
+        self.assertEqual(self.servers[0],
+                         self.nova_plugin.poll_server('1234'))
+        self.nova_client.servers.list.assert_called_once_with(
+            detailed=True, search_opts={}, limit=-1)
+        self.assertEqual(0, self.f_mock.call_count)
+
+    def test_poll_server_not_listed(self):
+        self.assertEqual(self.f_mock.return_value,
+                         self.nova_plugin.poll_server('9999'))
+        self.f_mock.assert_called_once_with('9999')
+
+    def test_poll_server_deleted(self):
+        self.servers[0].status = 'DELETED'
+        self.assertEqual(self.f_mock.return_value,
+                         self.nova_plugin.poll_server('1234'))
+        self.f_mock.assert_called_once_with('1234')
+
+    def test_poll_server_list_error(self):
+        self.nova_client.servers.list.side_effect = (
+            nova_exceptions.ClientException(503, 'unavailable'))
+        self.assertIsNone(self.nova_plugin.poll_server('1234'))
+        self.assertEqual(0, self.f_mock.call_count)
+
+    def test_poll_server_disabled(self):
+        cfg.CONF.set_override('batch_status_polling', False)
+        self.assertEqual(self.f_mock.return_value,
+                         self.nova_plugin.poll_server('1234'))
+        self.f_mock.assert_called_once_with('1234')
+        self.assertEqual(0, self.nova_client.servers.list.call_count)
+
+    @mock.patch('heat.common.timeutils.wallclock')
+    def test_check_active_shared_list(self, mock_wallclock):
+        mock_wallclock.side_effect = [100, 100, 100, 100, 102, 102, 102, 102]
+        # The second server is not known until the next poll
+        self.assertFalse(self.nova_plugin._check_active('1234'))
+        self.assertFalse(self.nova_plugin._check_active('5678'))
+        self.assertFalse(self.nova_plugin._check_active('1234'))
+        self.assertTrue(self.nova_plugin._check_active('5678'))
+        self.assertEqual(2, self.nova_client.servers.list.call_count)
+        self.assertEqual(0, self.f_mock.call_count)
+
+
 class NovaClientPluginUserdataTest(NovaClientPluginTestCase):
 
     def test_build_userdata(self):
@@ -0,0 +1,110 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from keystoneauth1 import session
+import mock
+from oslo_config import cfg
+
+from heat.common import context
+from heat.engine.clients import session_pool
+from heat.tests import common
+
+
+class SessionPoolTest(common.HeatTestCase):
+    def setUp(self):
+        super(SessionPoolTest, self).setUp()
+        self.pool = session_pool.SessionPool()
+
+    def _auth_plugin(self, expiring=False):
+        auth = mock.Mock()
+        auth.auth_ref.will_expire_soon.return_value = expiring
+        return auth
+
+    def test_get_reuses_session(self):
+        auth = self._auth_plugin()
+        sess = self.pool.get(('trust', 'a'), lambda: auth)
+        self.assertIsInstance(sess, session_pool.PooledSession)
+        self.assertIs(auth, sess.auth)
+        self.assertIs(sess, self.pool.get(('trust', 'a'), mock.Mock()))
+        self.assertIsNot(sess, self.pool.get(('trust', 'b'),
+                                             self._auth_plugin))
+        self.assertEqual(2, len(self.pool))
+
+    def test_get_expiring_token(self):
+        sess = self.pool.get(('trust', 'a'),
+                             lambda: self._auth_plugin(expiring=True))
+        new_sess = self.pool.get(('trust', 'a'), self._auth_plugin)
+        self.assertIsNot(sess, new_sess)
+        self.assertIs(new_sess, self.pool.get(('trust', 'a'), mock.Mock()))
+        self.assertEqual(1, len(self.pool))
+
+    def test_get_evicts_least_recently_used(self):
+        cfg.CONF.set_override('client_session_pool_size', 2)
+        sess_a = self.pool.get(('trust', 'a'), self._auth_plugin)
+        self.pool.get(('trust', 'b'), self._auth_plugin)
+        self.pool.get(('trust', 'a'), self._auth_plugin)
+        self.pool.get(('trust', 'c'), self._auth_plugin)
+        self.assertEqual(2, len(self.pool))
+        self.assertIs(sess_a, self.pool.get(('trust', 'a'), mock.Mock()))
+        self.assertNotIn(('trust', 'b'), self.pool._sessions)
+
+    def test_discard(self):
+        sess = self.pool.get(('trust', 'a'), self._auth_plugin)
+        self.pool.discard(sess)
+        self.assertEqual(0, len(self.pool))
+
+    def test_get_endpoint_cached(self):
+        auth = self._auth_plugin()
+        sess = session_pool.PooledSession(auth)
+        mock_get = self.patchobject(session.Session, 'get_endpoint',
+                                    return_value='http://nova/v2.1')
+        for i in range(3):
+            self.assertEqual('http://nova/v2.1',
+                             sess.get_endpoint(service_type='compute',
+                                               interface='public',
+                                               region_name='RegionOne'))
+        self.assertEqual(1, mock_get.call_count)
+
+        sess.get_endpoint(service_type='compute', interface='internal',
+                          region_name='RegionOne')
+        self.assertEqual(2, mock_get.call_count)
+
+        # A renewed token may have a different catalog
+        auth.auth_ref = mock.Mock()
+        sess.get_endpoint(service_type='compute', interface='public',
+                          region_name='RegionOne')
+        self.assertEqual(3, mock_get.call_count)
+
+    def test_get_endpoint_not_found_not_cached(self):
+        sess = session_pool.PooledSession(self._auth_plugin())
+        mock_get = self.patchobject(session.Session, 'get_endpoint',
+                                    return_value=None)
+        self.assertIsNone(sess.get_endpoint(service_type='compute'))
+        self.assertIsNone(sess.get_endpoint(service_type='compute'))
+        self.assertEqual(2, mock_get.call_count)
+
+    def test_password_sessions_per_user_domain(self):
+        def password_context(**kwargs):
+            return context.RequestContext(username='user', password='pass',
+                                          tenant='tenant', is_admin=False,
+                                          **kwargs)
+
+        sess = session_pool.get_session(
+            password_context(user_domain_id='d1'), self._auth_plugin)
+        self.assertIs(sess, session_pool.get_session(
+            password_context(user_domain_id='d1'), self._auth_plugin))
+        self.assertIsNot(sess, session_pool.get_session(
+            password_context(user_domain_id='d2'), self._auth_plugin))
+        self.assertIsNot(sess, session_pool.get_session(
+            password_context(user_domain_id='d1', user_domain_name='n1'),
+            self._auth_plugin))
@@ -0,0 +1,143 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+from oslo_config import cfg
+
+from heat.engine.clients import status_poller
+from heat.tests import common
+
+
+class FakeObject(object):
+    def __init__(self, object_id, status):
+        self.id = object_id
+        self.status = status
+
+
+class FakeList(object):
+    """A fake list request of a service with a few objects."""
+
+    def __init__(self, *objects):
+        self.objects = dict((obj.id, obj) for obj in objects)
+        self.calls = []
+
+    def __call__(self, changes_since):
+        self.calls.append(changes_since)
+        return list(self.objects.values())
+
+
+class StatusPollerTest(common.HeatTestCase):
+    def setUp(self):
+        super(StatusPollerTest, self).setUp()
+        cfg.CONF.set_override('status_polling_interval', 10)
+        self.now = 1000
+        self.patchobject(status_poller.timeutils, 'wallclock',
+                         side_effect=lambda: self.now)
+        self.list_func = FakeList(FakeObject('a', 'BUILD'),
+                                  FakeObject('b', 'BUILD'),
+                                  FakeObject('c', 'ACTIVE'))
+        self.poller = status_poller.StatusPoller()
+
+    def test_fetch_shares_list(self):
+        self.assertEqual('BUILD',
+                         self.poller.fetch('a', self.list_func).status)
+        self.assertIsNone(self.poller.fetch('b', self.list_func))
+        self.assertEqual([None], self.list_func.calls)
+
+        self.now += 10
+        self.assertEqual('BUILD',
+                         self.poller.fetch('a', self.list_func).status)
+        self.assertEqual('BUILD',
+                         self.poller.fetch('b', self.list_func).status)
+        self.assertEqual(2, len(self.list_func.calls))
+
+    def test_fetch_changes_since(self):
+        self.poller.fetch('a', self.list_func)
+        self.now += 10
+        self.list_func.objects['a'].status = 'ACTIVE'
+        self.assertEqual('ACTIVE',
+                         self.poller.fetch('a', self.list_func).status)
+        self.assertIsNone(self.list_func.calls[0])
+        self.assertIsNotNone(self.list_func.calls[1])
+
+    def test_fetch_changes_since_not_supported(self):
+        self.poller = status_poller.StatusPoller(changes_since=False)
+        self.poller.fetch('a', self.list_func)
+        self.now += 10
+        self.poller.fetch('a', self.list_func)
+        self.assertEqual([None, None], self.list_func.calls)
+
+    def test_fetch_not_listed(self):
+        self.assertRaises(status_poller.NotListed,
+                          self.poller.fetch, 'x', self.list_func)
+        self.assertIsNone(self.poller.fetch('x', self.list_func))
+
+        # A complete list is requested while an object has not been listed
+        self.now += 10
+        self.assertRaises(status_poller.NotListed,
+                          self.poller.fetch, 'x', self.list_func)
+        self.assertEqual([None, None], self.list_func.calls)
+
+    def test_fetch_list_failed(self):
+        self.list_func = mock.Mock(return_value=None)
+        self.assertIsNone(self.poller.fetch('a', self.list_func))
+        self.list_func.assert_called_once_with(None)
+
+    def test_expire(self):
+        self.poller.fetch('a', self.list_func)
+        self.poller.fetch('b', self.list_func)
+        self.now += 10
+        self.poller.fetch('a', self.list_func)
+        self.now += 30
+        self.poller.fetch('a', self.list_func)
+        self.assertEqual(['a'], list(self.poller._requested))
+        self.assertEqual(['a'], list(self.poller._listed))
+
+    def test_fetch_per_project(self):
+        self.addCleanup(status_poller._pollers.clear)
+        plugins = [mock.Mock(service_types=['compute']) for i in range(3)]
+        for plugin, project in zip(plugins, ['p1', 'p1', 'p2']):
+            plugin.context.tenant_id = project
+            plugin._get_region_name.return_value = 'RegionOne'
+
+        for plugin in plugins:
+            status_poller.fetch(plugin, 'a', self.list_func)
+        self.assertEqual(2, len(self.list_func.calls))
+        self.assertEqual(2, len(status_poller._pollers))
+
+    def _plugin(self, project):
+        plugin = mock.Mock(service_types=['compute'])
+        plugin.context.tenant_id = project
+        plugin._get_region_name.return_value = 'RegionOne'
+        return plugin
+
+    def test_pollers_expire_when_idle(self):
+        self.addCleanup(status_poller._pollers.clear)
+        status_poller.fetch(self._plugin('p1'), 'a', self.list_func)
+        status_poller.fetch(self._plugin('p2'), 'a', self.list_func)
+        self.now += 20
+        status_poller.fetch(self._plugin('p2'), 'a', self.list_func)
+        self.now += 20
+        status_poller.fetch(self._plugin('p3'), 'a', self.list_func)
+        self.assertEqual([('compute', 'p2', 'RegionOne'),
+                          ('compute', 'p3', 'RegionOne')],
+                         list(status_poller._pollers))
+
+    def test_pollers_bounded(self):
+        self.addCleanup(status_poller._pollers.clear)
+        self.patchobject(status_poller, '_POLLERS_MAX', new=2)
+        for project in ('p1', 'p2', 'p1', 'p3'):
+            status_poller.fetch(self._plugin(project), 'a', self.list_func)
+        self.assertEqual([('compute', 'p1', 'RegionOne'),
+                          ('compute', 'p3', 'RegionOne')],
+                         list(status_poller._pollers))
@@ -33,10 +33,12 @@ from heat.engine.clients.os.neutron import neutron_constraints as neutron
 from heat.engine.clients.os import nova
 from heat.engine.clients.os import sahara
 from heat.engine.clients.os import trove
+from heat.engine.clients import session_pool
 from heat.engine import environment
 from heat.engine import resource
 from heat.engine import resources
 from heat.engine import scheduler
+from heat.engine import template
 from heat.tests import fakes
 from heat.tests import generic_resource as generic_rsrc
 from heat.tests import utils
@@ -136,6 +138,9 @@ class HeatTestCase(testscenarios.WithScenarios,
         utils.setup_dummy_db()
         self.register_test_resources()
         self.addCleanup(utils.reset_dummy_db)
+        # Template IDs are reused by each fresh test database
+        template.clear_cache()
+        session_pool.clear()
 
     def register_test_resources(self):
         resource._register_class('GenericResourceType',
@@ -737,6 +737,126 @@ class HeatMigrationsCheckers(test_migrations.WalkVersionsMixin,
         self.assertColumnExists(engine, 'resource',
                                 'attr_data_id')
 
+    def _check_081(self, engine, data):
+        for column in ('entity_id', 'traversal_id', 'is_update',
+                       'sender_key', 'stack_id', 'input_data'):
+            self.assertColumnExists(engine, 'sync_point_input', column)
+        self.assertIndexMembers(engine, 'sync_point_input',
+                                'ix_sync_point_input_stack_traversal',
+                                ['stack_id', 'traversal_id'])
+
+    def _pre_upgrade_082(self, engine):
+        raw_template = utils.get_table(engine, 'raw_template')
+        engine.execute(raw_template.insert(),
+                       [dict(id=8201, template='{}', files='{}')])
+        stack = utils.get_table(engine, 'stack')
+        stacks = [dict(id='s8201', name='root', owner_id=None),
+                  dict(id='s8202', name='child', owner_id='s8201'),
+                  dict(id='s8203', name='grandchild', owner_id='s8202')]
+        for s in stacks:
+            s.update(raw_template_id=8201, username='steve',
+                     disable_rollback=True)
+        engine.execute(stack.insert(), stacks)
+        return stacks
+
+    def _check_082(self, engine, data):
+        self.assertColumnExists(engine, 'stack', 'root_stack_id')
+        self.assertColumnExists(engine, 'stack', 'ancestry')
+        self.assertIndexMembers(engine, 'stack', 'ix_stack_root_stack_id',
+                                ['root_stack_id'])
+        stack = utils.get_table(engine, 'stack')
+        stacks = dict((s.id, (s.root_stack_id, jsonutils.loads(s.ancestry)))
+                      for s in stack.select().where(stack.c.id.in_(
+                          [s['id'] for s in data])).execute())
+        self.assertEqual({'s8201': ('s8201', []),
+                          's8202': ('s8201', ['s8201']),
+                          's8203': ('s8201', ['s8201', 's8202'])}, stacks)
+
+    def _pre_upgrade_083(self, engine):
+        raw_template = utils.get_table(engine, 'raw_template')
+        raw_template_files = utils.get_table(engine, 'raw_template_files')
+        files = [{'id': 8301, 'files': '{}'}, {'id': 8302, 'files': '{}'}]
+        engine.execute(raw_template_files.insert(), files)
+        templates = [dict(id=8300 + i, template='{}', files='{}',
+                          files_id=8301 if i < 3 else None)
+                     for i in range(1, 5)]
+        engine.execute(raw_template.insert(), templates)
+        return templates
+
+    def _check_083(self, engine, data):
+        for table in ('raw_template', 'raw_template_files'):
+            self.assertColumnExists(engine, table, 'content_hash')
+            self.assertColumnExists(engine, table, 'ref_count')
+            self.assertIndexMembers(engine, table,
+                                    'ix_%s_content_hash' % table,
+                                    ['content_hash'])
+        raw_template = utils.get_table(engine, 'raw_template')
+        for template in raw_template.select().where(
+                raw_template.c.id.in_([t['id'] for t in data])).execute():
+            self.assertEqual(1, template.ref_count)
+        raw_template_files = utils.get_table(engine, 'raw_template_files')
+        ref_counts = dict(
+            (f.id, f.ref_count) for f in raw_template_files.select().where(
+                raw_template_files.c.id.in_([8301, 8302])).execute())
+        self.assertEqual({8301: 2, 8302: 0}, ref_counts)
+
+    def _check_084(self, engine, data):
+        self.assertIndexMembers(engine, 'watch_data',
+                                'ix_watch_data_watch_rule_id_created_at',
+                                ['watch_rule_id', 'created_at'])
+
+    def _check_085(self, engine, data):
+        self.assertColumnExists(engine, 'watch_rule', 'next_evaluation')
+        self.assertIndexMembers(engine, 'watch_rule',
+                                'ix_watch_rule_next_evaluation',
+                                ['next_evaluation'])
+
+    def _check_086(self, engine, data):
+        self.assertColumnExists(engine, 'stack', 'output_data')
+
+    def _pre_upgrade_087(self, engine):
+        raw_template = utils.get_table(engine, 'raw_template')
+        engine.execute(raw_template.insert(),
+                       [dict(id=8701, template='{}', files='{}')])
+        stack = utils.get_table(engine, 'stack')
+        stacks = [dict(id='s8701', name='root', owner_id=None,
+                       root_stack_id='s8701'),
+                  dict(id='s8702', name='child', owner_id='s8701',
+                       root_stack_id=None),
+                  dict(id='s8703', name='grandchild', owner_id='s8702',
+                       root_stack_id=None),
+                  dict(id='s8704', name='other', owner_id=None,
+                       root_stack_id=None)]
+        for s in stacks:
+            s.update(raw_template_id=8701, username='steve',
+                     disable_rollback=True)
+        engine.execute(stack.insert(), stacks)
+        event = utils.get_table(engine, 'event')
+        events = [dict(id=8700 + i, uuid=str(uuid.uuid4()), stack_id=s['id'])
+                  for i, s in enumerate(stacks)]
+        engine.execute(event.insert(), events)
+        return events
+
+    def _check_087(self, engine, data):
+        self.assertColumnExists(engine, 'event', 'root_stack_id')
+        self.assertIndexMembers(engine, 'event', 'ix_event_root_stack_id_id',
+                                ['root_stack_id', 'id'])
+        event = utils.get_table(engine, 'event')
+        roots = dict((e.stack_id, e.root_stack_id)
+                     for e in event.select().where(event.c.id.in_(
+                         [e['id'] for e in data])).execute())
+        self.assertEqual({'s8701': 's8701', 's8702': 's8701',
+                          's8703': 's8701', 's8704': 's8704'}, roots)
+
+    def _check_088(self, engine, data):
+        for table in ('event', 'resource'):
+            self.assertIndexMembers(engine, table,
+                                    'ix_%s_rsrc_prop_data_id' % table,
+                                    ['rsrc_prop_data_id'])
+
+    def _check_089(self, engine, data):
+        self.assertColumnExists(engine, 'resource', 'definition_fingerprint')
+
 
 class TestHeatMigrationsMySQL(HeatMigrationsCheckers,
                               test_base.MySQLOpportunisticTestCase):
@@ -42,6 +42,7 @@ from heat.engine.resources.aws.ec2 import instance as instances
 from heat.engine import stack as parser
 from heat.engine import template as tmpl
 from heat.engine import template_files
+from heat.rpc import api as rpc_api
 from heat.tests import common
 from heat.tests.openstack.nova import fakes as fakes_nova
 from heat.tests import utils
@@ -428,6 +429,23 @@ class SqlAlchemyTest(common.HeatTestCase):
         self.assertRaises(exception.NotFound,
                           db_api.stack_get_status, self.ctx, UUID2)
 
+    def test_stack_output_data_set(self):
+        self._setup_test_stack('stack', UUID1)
+        state = db_api.stack_get_status(self.ctx, UUID1)
+        data = {'encrypted': False, 'outputs': []}
+
+        self.assertTrue(db_api.stack_output_data_set(self.ctx, UUID1, data,
+                                                     exp_state=state))
+        self.assertEqual(data, db_api.stack_get(self.ctx, UUID1).output_data)
+
+        db_api.stack_update(self.ctx, UUID1, {'status': 'COMPLETE'})
+        self.assertFalse(db_api.stack_output_data_set(self.ctx, UUID1, None,
+                                                      exp_state=state))
+        self.assertEqual(data, db_api.stack_get(self.ctx, UUID1).output_data)
+
+        self.assertTrue(db_api.stack_output_data_set(self.ctx, UUID1, None))
+        self.assertIsNone(db_api.stack_get(self.ctx, UUID1).output_data)
+
     def test_stack_get_show_deleted_context(self):
         stack = self._setup_test_stack('stack', UUID1)[1]
 
@@ -1343,8 +1361,13 @@ def create_raw_template(context, **kwargs):
         tf = template_files.TemplateFiles({'foo': 'bar'})
         tf.store(context)
         kwargs['files_id'] = tf.files_id
+    else:
+        tf = template_files.TemplateFiles(None)
     template.update(kwargs)
-    return db_api.raw_template_create(context, template)
+    try:
+        return db_api.raw_template_create(context, template)
+    finally:
+        tf.release(context)
 
 
 def create_user_creds(ctx, **kwargs):
@@ -1552,6 +1575,88 @@ class DBAPIRawTemplateTest(common.HeatTestCase):
         self.assertRaises(exception.NotFound, db_api.raw_template_get,
                           self.ctx, tp.id)
 
+    def _ref_count(self, model, row_id):
+        return self.ctx.session.query(model.ref_count).filter_by(
+            id=row_id).scalar()
+
+    def test_raw_template_create_shared(self):
+        tp = create_raw_template(self.ctx)
+        shared_tp = create_raw_template(self.ctx, files_id=tp.files_id)
+        self.assertEqual(tp.id, shared_tp.id)
+        self.assertEqual(2, self._ref_count(models.RawTemplate, tp.id))
+        self.assertEqual(1, self._ref_count(models.RawTemplateFiles,
+                                            tp.files_id))
+
+        other_tp = create_raw_template(self.ctx, files_id=tp.files_id,
+                                       environment={'parameters': {}})
+        self.assertNotEqual(tp.id, other_tp.id)
+        self.assertEqual(2, self._ref_count(models.RawTemplateFiles,
+                                            tp.files_id))
+
+    def test_raw_template_files_create_shared(self):
+        files = db_api.raw_template_files_create(self.ctx,
+                                                 {'files': {'foo': 'bar'}})
+        shared_files = db_api.raw_template_files_create(
+            self.ctx, {'files': {'foo': 'bar'}})
+        other_files = db_api.raw_template_files_create(
+            self.ctx, {'files': {'foo': 'baz'}})
+        self.assertEqual(files.id, shared_files.id)
+        self.assertNotEqual(files.id, other_files.id)
+        self.assertEqual(2, self._ref_count(models.RawTemplateFiles,
+                                            files.id))
+
+        tp = create_raw_template(self.ctx, files_id=files.id)
+        db_api.raw_template_files_delete(self.ctx, files.id)
+        db_api.raw_template_files_delete(self.ctx, files.id)
+        self.assertEqual(1, self._ref_count(models.RawTemplateFiles,
+                                            files.id))
+        db_api.raw_template_delete(self.ctx, tp.id)
+        self.assertRaises(exception.NotFound, db_api.raw_template_files_get,
+                          self.ctx, files.id)
+
+    def test_raw_template_delete_shared(self):
+        tp = create_raw_template(self.ctx)
+        create_raw_template(self.ctx, files_id=tp.files_id)
+        db_api.raw_template_delete(self.ctx, tp.id)
+        self.assertEqual(1, self._ref_count(models.RawTemplate, tp.id))
+        self.assertIsNotNone(db_api.raw_template_files_get(self.ctx,
+                                                           tp.files_id))
+
+        db_api.raw_template_delete(self.ctx, tp.id)
+        self.assertRaises(exception.NotFound, db_api.raw_template_get,
+                          self.ctx, tp.id)
+        self.assertRaises(exception.NotFound, db_api.raw_template_files_get,
+                          self.ctx, tp.files_id)
+
+    def test_raw_template_update_shared(self):
+        tp = create_raw_template(self.ctx)
+        orig_template = tp.template
+        create_raw_template(self.ctx, files_id=tp.files_id)
+        new_t = {'HeatTemplateFormatVersion': '2012-12-12'}
+        updated_tp = db_api.raw_template_update(self.ctx, tp.id,
+                                                {'template': new_t})
+
+        self.assertNotEqual(tp.id, updated_tp.id)
+        self.assertEqual(new_t, updated_tp.template)
+        self.assertEqual(tp.files_id, updated_tp.files_id)
+        self.assertEqual(orig_template,
+                         db_api.raw_template_get(self.ctx, tp.id).template)
+        self.assertEqual(1, self._ref_count(models.RawTemplate, tp.id))
+        self.assertEqual(1, self._ref_count(models.RawTemplate,
+                                            updated_tp.id))
+        self.assertEqual(2, self._ref_count(models.RawTemplateFiles,
+                                            tp.files_id))
+
+        # The unshared copy is modified in place and is no longer found by
+        # its old content
+        newer_t = {'HeatTemplateFormatVersion': '2012-12-12',
+                   'Description': 'newer'}
+        newer_tp = db_api.raw_template_update(self.ctx, updated_tp.id,
+                                              {'template': newer_t})
+        self.assertEqual(updated_tp.id, newer_tp.id)
+        self.assertNotEqual(updated_tp.id, create_raw_template(
+            self.ctx, template=new_t, files_id=tp.files_id).id)
+
 
 class DBAPIUserCredsTest(common.HeatTestCase):
     def setUp(self):
@@ -1996,6 +2101,7 @@ class DBAPIStackTest(common.HeatTestCase):
         templates = [create_raw_template(self.ctx,
                                          files_id=tmpl_files[i].files_id
                                          ) for i in range(5)]
+        [tmpl_file.release(self.ctx) for tmpl_file in tmpl_files]
         creds = [create_user_creds(self.ctx) for i in range(5)]
         stacks = [create_stack(self.ctx, templates[i], creds[i],
                                deleted_at=deleted[i]) for i in range(5)]
@@ -2030,6 +2136,7 @@ class DBAPIStackTest(common.HeatTestCase):
         templates = [create_raw_template(self.ctx,
                                          files_id=tmpl_files[i].files_id
                                          ) for i in range(5)]
+        [tmpl_file.release(self.ctx) for tmpl_file in tmpl_files]
         values = [
             {'tenant': UUID1},
             {'tenant': UUID1},
@@ -2104,14 +2211,15 @@ class DBAPIStackTest(common.HeatTestCase):
         now = timeutils.utcnow()
         delta = datetime.timedelta(seconds=3600 * 7)
         deleted = [now - delta * i for i in range(1, 6)]
-        # the last two template_files are identical to first two
-        # (so should not be purged)
+        # the last two templates use the same template_files as the first
+        # two (so should not be purged)
         tmpl_files = [template_files.TemplateFiles(
-            {'foo': 'more file contents'}) for i in range(3)]
+            {'foo': 'more file contents %d' % i}) for i in range(3)]
         [tmpl_file.store(self.ctx) for tmpl_file in tmpl_files]
         templates = [create_raw_template(self.ctx,
                                          files_id=tmpl_files[i % 3].files_id
                                          ) for i in range(5)]
+        [tmpl_file.release(self.ctx) for tmpl_file in tmpl_files]
         creds = [create_user_creds(self.ctx) for i in range(5)]
         [create_stack(self.ctx, templates[i], creds[i],
                       deleted_at=deleted[i]) for i in range(5)]
@@ -2133,14 +2241,15 @@ class DBAPIStackTest(common.HeatTestCase):
         now = timeutils.utcnow()
         delta = datetime.timedelta(seconds=3600 * 7)
         deleted = [now - delta * i for i in range(1, 6)]
-        # the last two template_files are identical to first two
-        # (so should not be purged)
+        # the last two templates use the same template_files as the first
+        # two (so should not be purged)
         tmpl_files = [template_files.TemplateFiles(
-            {'foo': 'more file contents'}) for i in range(3)]
+            {'foo': 'more file contents %d' % i}) for i in range(3)]
         [tmpl_file.store(self.ctx) for tmpl_file in tmpl_files]
         templates = [create_raw_template(self.ctx,
                                          files_id=tmpl_files[i % 3].files_id
                                          ) for i in range(5)]
+        [tmpl_file.release(self.ctx) for tmpl_file in tmpl_files]
         creds = [create_user_creds(self.ctx) for i in range(5)]
         [create_stack(self.ctx, templates[i], creds[i],
                       deleted_at=deleted[i], tenant=UUID1
@@ -2208,6 +2317,35 @@ class DBAPIStackTest(common.HeatTestCase):
             self.assertIsNone(db_api.user_creds_get(
                 self.ctx, stacks[s].user_creds_id))
 
+    def test_purge_deleted_shared_raw_template(self):
+        now = timeutils.utcnow()
+        deleted = now - datetime.timedelta(seconds=3600)
+        t = {'heat_template_version': '2013-05-23', 'description': 'shared'}
+        templates = [create_raw_template(self.ctx, template=t)
+                     for i in range(2)]
+        self.assertEqual(templates[0].id, templates[1].id)
+        shared_id = templates[0].id
+        files_id = templates[0].files_id
+        stacks = [create_stack(self.ctx, templates[0], self.user_creds,
+                               deleted_at=deleted),
+                  create_stack(self.ctx, templates[1], self.user_creds)]
+
+        db_api.purge_deleted(age=0)
+        ctx = utils.dummy_context(is_admin=True)
+        self.assertIsNone(db_api.stack_get(ctx, stacks[0].id,
+                                           show_deleted=True))
+        self.assertEqual(1, ctx.session.query(
+            models.RawTemplate.ref_count).filter_by(id=shared_id).scalar())
+
+        db_api.stack_delete(ctx, stacks[1].id)
+        db_api.purge_deleted(age=0)
+        self.assertRaises(exception.NotFound, db_api.raw_template_get,
+                          ctx, shared_id)
+        # The files are still used by self.template
+        self.assertEqual(1, ctx.session.query(
+            models.RawTemplateFiles.ref_count).filter_by(
+                id=files_id).scalar())
+
     def test_purge_deleted_batch_arg(self):
         now = timeutils.utcnow()
         delta = datetime.timedelta(seconds=3600)
@@ -2220,6 +2358,53 @@ class DBAPIStackTest(common.HeatTestCase):
             db_api.purge_deleted(age=0, batch_size=2)
             self.assertEqual(4, mock_ps.call_count)
 
+    def test_purge_deleted_workers(self):
+        now = timeutils.utcnow()
+        deleted = now - datetime.timedelta(seconds=3600)
+        shared = create_raw_template(
+            self.ctx, template={'heat_template_version': '2013-05-23'})
+        creds = create_user_creds(self.ctx)
+        stacks = [create_stack(self.ctx, shared, creds, deleted_at=deleted,
+                               id='%x%s' % (i, UUID1[1:]))
+                  for i in range(0, 16, 3)]
+        resources = [create_resource(self.ctx, stack) for stack in stacks]
+        events = [create_event(self.ctx, stack_id=stack.id)
+                  for stack in stacks]
+        live = create_stack(self.ctx, self.template, self.user_creds)
+
+        # The test database has a single sqlite connection, which cannot be
+        # used by several threads that each start a transaction, so run the
+        # workers one after the other.
+        self.patchobject(db_api.threading.Thread, 'start',
+                         new=db_api.threading.Thread.run)
+        self.patchobject(db_api.threading.Thread, 'join')
+        db_api.purge_deleted(age=0, batch_size=1, workers=3)
+
+        ctx = utils.dummy_context(is_admin=True)
+        for stack in stacks:
+            self.assertIsNone(db_api.stack_get(ctx, stack.id,
+                                               show_deleted=True))
+        for res, ev in zip(resources, events):
+            self.assertIsNone(ctx.session.query(models.Resource).get(res.id))
+            self.assertIsNone(ctx.session.query(models.Event).get(ev.id))
+            self.assertIsNone(ctx.session.query(
+                models.ResourcePropertiesData).get(res.rsrc_prop_data_id))
+        self.assertRaises(exception.NotFound,
+                          db_api.raw_template_get, ctx, shared.id)
+        self.assertIsNone(db_api.user_creds_get(self.ctx, creds['id']))
+        self.assertIsNotNone(db_api.stack_get(ctx, live.id))
+
+    def test_purge_deleted_id_ranges(self):
+        self.assertEqual([(None, None)], db_api._id_ranges(1))
+        self.assertEqual([(None, '5555'), ('5555', 'aaaa'), ('aaaa', None)],
+                         db_api._id_ranges(3))
+
+    def test_purge_deleted_invalid_workers(self):
+        self.assertRaises(exception.Error, db_api.purge_deleted,
+                          age=0, workers='many')
+        self.assertRaises(exception.Error, db_api.purge_deleted,
+                          age=-1)
+
     def test_stack_get_root_id(self):
         root = create_stack(self.ctx, self.template, self.user_creds,
                             name='root stack')
@@ -2241,6 +2426,76 @@ class DBAPIStackTest(common.HeatTestCase):
         self.assertIsNone(db_api.stack_get_root_id(
             self.ctx, 'non existent stack'))
 
+    def test_stack_create_ancestry(self):
+        root = create_stack(self.ctx, self.template, self.user_creds,
+                            name='root stack')
+        child_1 = create_stack(self.ctx, self.template, self.user_creds,
+                               name='child 1 stack', owner_id=root.id)
+        child_2 = create_stack(self.ctx, self.template, self.user_creds,
+                               name='child 2 stack', owner_id=child_1.id)
+
+        self.assertEqual(root.id, root.root_stack_id)
+        self.assertEqual([], root.ancestry)
+        self.assertEqual(root.id, child_1.root_stack_id)
+        self.assertEqual([root.id], child_1.ancestry)
+        self.assertEqual(root.id, child_2.root_stack_id)
+        self.assertEqual([root.id, child_1.id], child_2.ancestry)
+
+    def test_stack_get_root_id_legacy(self):
+        root = create_stack(self.ctx, self.template, self.user_creds,
+                            name='root stack')
+        child_1 = create_stack(self.ctx, self.template, self.user_creds,
+                               name='child 1 stack', owner_id=root.id)
+        # Simulate stacks created before the ancestry was stored
+        self.ctx.session.query(models.Stack).update(
+            {'root_stack_id': None, 'ancestry': None})
+        child_2 = create_stack(self.ctx, self.template, self.user_creds,
+                               name='child 2 stack', owner_id=child_1.id)
+
+        self.assertEqual([root.id, child_1.id], child_2.ancestry)
+        self.assertEqual(root.id, db_api.stack_get_root_id(
+            self.ctx, child_1.id))
+        self.assertEqual(root.id, db_api.stack_get_root_id(
+            self.ctx, root.id))
+
+    def test_stack_summary_get_all_by_root_legacy(self):
+        root = create_stack(self.ctx, self.template, self.user_creds,
+                            name='root stack')
+        child_1 = create_stack(self.ctx, self.template, self.user_creds,
+                               name='child 1 stack', owner_id=root.id)
+        grandchild = create_stack(self.ctx, self.template, self.user_creds,
+                                  name='grandchild stack',
+                                  owner_id=child_1.id)
+        create_stack(self.ctx, self.template, self.user_creds,
+                     name='other stack')
+        # Simulate stacks created before the root stack ID was stored
+        self.ctx.session.query(models.Stack).update(
+            {'root_stack_id': None, 'ancestry': None})
+        child_2 = create_stack(self.ctx, self.template, self.user_creds,
+                               name='child 2 stack', owner_id=root.id)
+
+        stacks = db_api.stack_summary_get_all_by_root(self.ctx, root.id)
+        self.assertEqual(sorted([root.id, child_1.id, grandchild.id,
+                                 child_2.id]),
+                         sorted(s.id for s in stacks))
+
+    def test_stack_get_path(self):
+        root = create_stack(self.ctx, self.template, self.user_creds,
+                            name='root_stack')
+        child_1 = create_stack(self.ctx, self.template, self.user_creds,
+                               name='child_1_stack', owner_id=root.id,
+                               parent_resource_name='res_1')
+        child_2 = create_stack(self.ctx, self.template, self.user_creds,
+                               name='child_2_stack', owner_id=child_1.id,
+                               parent_resource_name='res_2')
+
+        self.assertEqual([(None, 'root_stack'), ('res_1', 'child_1_stack'),
+                          ('res_2', 'child_2_stack')],
+                         db_api.stack_get_path(self.ctx,
+                                               child_2.ancestry +
+                                               [child_2.id]))
+        self.assertEqual([], db_api.stack_get_path(self.ctx, []))
+
     def test_stack_count_total_resources(self):
 
         def add_resources(stack, count, root_stack_id):
@@ -2330,6 +2585,24 @@ class DBAPIResourceTest(common.HeatTestCase):
         self.assertRaises(exception.NotFound, db_api.resource_get,
                           self.ctx, UUID2)
 
+    def test_resource_update_many(self):
+        res1 = create_resource(self.ctx, self.stack)
+        res2 = create_resource(self.ctx, self.stack, name='res2')
+
+        db_api.resource_update_many(self.ctx, {
+            res1.id: {'action': 'UPDATE', 'status': 'IN_PROGRESS'},
+            res2.id: {'status': 'FAILED', 'physical_resource_id': UUID2},
+            res2.id + 100: {'status': 'FAILED'}})
+
+        ret_res1 = db_api.resource_get(self.ctx, res1.id, refresh=True)
+        self.assertEqual(('UPDATE', 'IN_PROGRESS'),
+                         (ret_res1.action, ret_res1.status))
+        self.assertEqual(UUID1, ret_res1.physical_resource_id)
+        ret_res2 = db_api.resource_get(self.ctx, res2.id, refresh=True)
+        self.assertEqual(('create', 'FAILED'),
+                         (ret_res2.action, ret_res2.status))
+        self.assertEqual(UUID2, ret_res2.physical_resource_id)
+
     def test_resource_get_by_name_and_stack(self):
         create_resource(self.ctx, self.stack)
 
@@ -2708,6 +2981,27 @@ class DBAPIEventTest(common.HeatTestCase):
         self.assertEqual('create_complete', ret_event.resource_status_reason)
         self.assertEqual({'foo2': 'ev_bar'}, ret_event.rsrc_prop_data.data)
 
+    def test_event_create_many(self):
+        stack = create_stack(self.ctx, self.template, self.user_creds)
+        values = {
+            'stack_id': stack.id,
+            'resource_action': 'CREATE',
+            'resource_name': 'res',
+            'physical_resource_id': UUID1,
+            'resource_status_reason': 'x' * 300,
+        }
+        db_api.event_create_many(self.ctx, [
+            dict(values, resource_status='IN_PROGRESS', uuid=UUID2),
+            dict(values, resource_status='COMPLETE')])
+
+        events = sorted(db_api.event_get_all_by_stack(self.ctx, stack.id),
+                        key=lambda e: e.id)
+        self.assertEqual(['IN_PROGRESS', 'COMPLETE'],
+                         [e.resource_status for e in events])
+        self.assertEqual(UUID2, events[0].uuid)
+        self.assertIsNotNone(events[1].uuid)
+        self.assertEqual('x' * 255, events[1].resource_status_reason)
+
     def test_event_get_all_by_tenant(self):
         self.stack1 = create_stack(self.ctx, self.template, self.user_creds,
                                    tenant='tenant1')
@@ -2766,6 +3060,53 @@ class DBAPIEventTest(common.HeatTestCase):
         events = db_api.event_get_all_by_stack(self.ctx, self.stack2.id)
         self.assertEqual(1, len(events))
 
+    def test_event_get_all_by_root_stack(self):
+        root = create_stack(self.ctx, self.template, self.user_creds)
+        child = create_stack(self.ctx, self.template, self.user_creds,
+                             owner_id=root.id, nested_depth=1)
+        grandchild = create_stack(self.ctx, self.template, self.user_creds,
+                                  owner_id=child.id, nested_depth=2)
+        deleted = create_stack(self.ctx, self.template, self.user_creds,
+                               owner_id=root.id, nested_depth=1,
+                               deleted_at=timeutils.utcnow())
+        other = create_stack(self.ctx, self.template, self.user_creds)
+        for stack in (root, child, grandchild, deleted, root):
+            create_event(self.ctx, stack_id=stack.id, root_stack_id=root.id,
+                         resource_name=stack.id)
+        create_event(self.ctx, stack_id=other.id, root_stack_id=other.id)
+
+        events = db_api.event_get_all_by_root_stack(self.ctx, root.id)
+        self.assertEqual([root.id, grandchild.id, child.id, root.id],
+                         [e.stack_id for e in events])
+        ids = [e.id for e in events]
+        self.assertEqual(sorted(ids, reverse=True), ids)
+
+        events = db_api.event_get_all_by_root_stack(self.ctx, root.id,
+                                                    nested_depth=1)
+        self.assertEqual([root.id, child.id, root.id],
+                         [e.stack_id for e in events])
+
+        events = db_api.event_get_all_by_root_stack(self.ctx, root.id,
+                                                    limit=2)
+        self.assertEqual(ids[:2], [e.id for e in events])
+        events = db_api.event_get_all_by_root_stack(self.ctx, root.id,
+                                                    limit=2,
+                                                    marker=events[1].uuid)
+        self.assertEqual(ids[2:], [e.id for e in events])
+
+        events = db_api.event_get_all_by_root_stack(self.ctx, root.id,
+                                                    sort_dir='asc',
+                                                    marker=events[0].uuid)
+        self.assertEqual([ids[1], ids[0]], [e.id for e in events])
+
+        events = db_api.event_get_all_by_root_stack(
+            self.ctx, root.id, filters={'resource_name': child.id})
+        self.assertEqual([child.id], [e.stack_id for e in events])
+
+        events = db_api.event_get_all_by_root_stack(
+            self.ctx, root.id, sort_keys=['resource_type'])
+        self.assertEqual(4, len(events))
+
     def test_event_count_all_by_stack(self):
         self.stack1 = create_stack(self.ctx, self.template, self.user_creds)
         self.stack2 = create_stack(self.ctx, self.template, self.user_creds)
@@ -2835,6 +3176,45 @@ class DBAPIWatchRuleTest(common.HeatTestCase):
         wrs = db_api.watch_rule_get_all_by_stack(self.ctx, self.stack1.id)
         self.assertEqual(2, len(wrs))
 
+    def test_watch_rule_get_due(self):
+        now = timeutils.utcnow()
+        past = now - datetime.timedelta(seconds=10)
+        future = now + datetime.timedelta(seconds=10)
+        deleted_stack = create_stack(self.ctx, self.template,
+                                     self.user_creds)
+        values = [
+            {'name': 'due', 'next_evaluation': past},
+            {'name': 'new', 'next_evaluation': None},
+            {'name': 'later', 'next_evaluation': future},
+            {'name': 'suspended', 'next_evaluation': past,
+             'state': rpc_api.WATCH_STATE_SUSPENDED},
+            {'name': 'ceilometer', 'next_evaluation': past,
+             'state': rpc_api.WATCH_STATE_CEILOMETER_CONTROLLED},
+            {'name': 'deleted', 'next_evaluation': past,
+             'stack_id': deleted_stack.id},
+            {'name': 'due2', 'next_evaluation': now},
+        ]
+        wrs = [create_watch_rule(self.ctx, self.stack, **val)
+               for val in values]
+        db_api.stack_delete(self.ctx, deleted_stack.id)
+
+        due = db_api.watch_rule_get_due(self.ctx, now, 10)
+        self.assertEqual(['due', 'new', 'due2'], [wr.name for wr in due])
+
+        due = db_api.watch_rule_get_due(self.ctx, now, 2)
+        self.assertEqual(['due', 'new'], [wr.name for wr in due])
+        due = db_api.watch_rule_get_due(self.ctx, now, 2,
+                                        after_id=due[-1].id)
+        self.assertEqual(['due2'], [wr.name for wr in due])
+
+        shards = [db_api.watch_rule_get_due(self.ctx, now, 10,
+                                            shard_index=i, shard_count=2)
+                  for i in range(2)]
+        for i, shard in enumerate(shards):
+            self.assertTrue(all(wr.id % 2 == i for wr in shard))
+        self.assertEqual(set([wrs[0].id, wrs[1].id, wrs[6].id]),
+                         set(wr.id for shard in shards for wr in shard))
+
     def test_watch_rule_update(self):
         watch_rule = create_watch_rule(self.ctx, self.stack)
         values = {
@@ -2893,6 +3273,36 @@ class DBAPIWatchDataTest(common.HeatTestCase):
         data = [wd.data for wd in watch_data]
         [self.assertIn(val['data'], data) for val in values]
 
+    def _create_aged_watch_data(self, now):
+        return [create_watch_data(
+            self.ctx, self.watch_rule, data={'foo': age},
+            created_at=now - datetime.timedelta(seconds=age))
+            for age in (300, 200, 100)]
+
+    def test_watch_data_get_recent(self):
+        now = timeutils.utcnow()
+        wds = self._create_aged_watch_data(now)
+        since = now - datetime.timedelta(seconds=250)
+
+        recent = db_api.watch_data_get_recent(self.ctx, self.watch_rule.id,
+                                              since)
+        self.assertEqual([wds[1].id, wds[2].id], [wd.id for wd in recent])
+
+        recent = db_api.watch_data_get_recent(self.ctx, self.watch_rule.id,
+                                              since, after_id=wds[1].id)
+        self.assertEqual([wds[2].id], [wd.id for wd in recent])
+
+    def test_watch_data_delete_before(self):
+        now = timeutils.utcnow()
+        wds = self._create_aged_watch_data(now)
+
+        deleted = db_api.watch_data_delete_before(
+            self.ctx, self.watch_rule.id,
+            now - datetime.timedelta(seconds=150))
+        self.assertEqual(2, deleted)
+        self.assertEqual([wds[2].id],
+                         [wd.id for wd in db_api.watch_data_get_all(self.ctx)])
+
 
 class DBAPIServiceTest(common.HeatTestCase):
     def setUp(self):
@@ -3246,6 +3656,58 @@ class DBAPISyncPointTest(common.HeatTestCase):
         )
         self.assertIsNone(ret_sync_point_stack)
 
+    def test_sync_point_inputs(self):
+        sync_point = create_sync_point(
+            self.ctx, entity_id=str(self.resources[0].id),
+            stack_id=self.stack.id, traversal_id=self.stack.current_traversal
+        )
+        for i, sender in enumerate(['tuple:(1, True)', 'tuple:(2, True)']):
+            db_api.sync_point_input_create(self.ctx, {
+                'entity_id': sync_point.entity_id,
+                'traversal_id': sync_point.traversal_id,
+                'is_update': sync_point.is_update,
+                'stack_id': self.stack.id,
+                'sender_key': sender,
+                'input_data': {'input_data': {sender: i}}})
+        # a duplicate report from the same sender replaces its data
+        db_api.sync_point_input_create(self.ctx, {
+            'entity_id': sync_point.entity_id,
+            'traversal_id': sync_point.traversal_id,
+            'is_update': sync_point.is_update,
+            'stack_id': self.stack.id,
+            'sender_key': 'tuple:(2, True)',
+            'input_data': {'input_data': {'tuple:(2, True)': 5}}})
+
+        self.assertEqual(2, db_api.sync_point_input_count(
+            self.ctx, sync_point.entity_id, sync_point.traversal_id,
+            sync_point.is_update))
+        inputs = db_api.sync_point_input_get_all(
+            self.ctx, sync_point.entity_id, sync_point.traversal_id,
+            sync_point.is_update)
+        self.assertEqual({'tuple:(1, True)': 0, 'tuple:(2, True)': 5},
+                         dict((i.sender_key,
+                               i.input_data['input_data'][i.sender_key])
+                              for i in inputs))
+
+        rows_deleted = db_api.sync_point_delete_all_by_stack_and_traversal(
+            self.ctx, self.stack.id, self.stack.current_traversal)
+        self.assertEqual(1, rows_deleted)
+        self.assertEqual(0, db_api.sync_point_input_count(
+            self.ctx, sync_point.entity_id, sync_point.traversal_id,
+            sync_point.is_update))
+
+    def test_sync_point_claim(self):
+        sync_point = create_sync_point(
+            self.ctx, entity_id=str(self.resources[0].id),
+            stack_id=self.stack.id, traversal_id=self.stack.current_traversal
+        )
+        self.assertTrue(db_api.sync_point_claim(
+            self.ctx, sync_point.entity_id, sync_point.traversal_id,
+            sync_point.is_update))
+        self.assertFalse(db_api.sync_point_claim(
+            self.ctx, sync_point.entity_id, sync_point.traversal_id,
+            sync_point.is_update))
+
     @mock.patch.object(time, 'sleep')
     def test_syncpoint_create_deadlock(self, sleep):
         with mock.patch('sqlalchemy.orm.Session.add',
@@ -3401,6 +3863,8 @@ class DBAPICryptParamsPropsTest(common.HeatTestCase):
             a_resource:
                 type: GenericResourceType
         ''')
+        # Identical templates would share a row, so keep them distinct
+        self.t['description'] = str(uuid.uuid4())
         template = {
             'template': self.t,
             'files': {'foo': 'bar'},
@@ -14,7 +14,9 @@
 import datetime
 import uuid
 
+import eventlet
 import mock
+from oslo_config import cfg
 from oslo_messaging.rpc import dispatcher
 from oslo_serialization import jsonutils as json
 from oslo_utils import timeutils
@@ -630,7 +632,7 @@ class SoftwareConfigServiceTest(common.HeatTestCase):
                        'metadata_software_deployments')
     @mock.patch.object(db_api, 'resource_update')
     @mock.patch.object(db_api, 'resource_get_by_physical_resource_id')
-    @mock.patch.object(service_software_config.requests, 'put')
+    @mock.patch.object(service_software_config.requests.Session, 'put')
     def test_push_metadata_software_deployments(
             self, put, res_get, res_upd, md_sd):
         rs = mock.Mock()
@@ -660,7 +662,7 @@ class SoftwareConfigServiceTest(common.HeatTestCase):
                        'metadata_software_deployments')
     @mock.patch.object(db_api, 'resource_update')
     @mock.patch.object(db_api, 'resource_get_by_physical_resource_id')
-    @mock.patch.object(service_software_config.requests, 'put')
+    @mock.patch.object(service_software_config.requests.Session, 'put')
     def test_push_metadata_software_deployments_retry(
             self, put, res_get, res_upd, md_sd):
         rs = mock.Mock()
@@ -691,7 +693,7 @@ class SoftwareConfigServiceTest(common.HeatTestCase):
                        'metadata_software_deployments')
     @mock.patch.object(db_api, 'resource_update')
     @mock.patch.object(db_api, 'resource_get_by_physical_resource_id')
-    @mock.patch.object(service_software_config.requests, 'put')
+    @mock.patch.object(service_software_config.requests.Session, 'put')
     def test_push_metadata_software_deployments_temp_url(
             self, put, res_get, res_upd, md_sd):
         rs = mock.Mock()
@@ -762,6 +764,45 @@ class SoftwareConfigServiceTest(common.HeatTestCase):
         queue.post.assert_called_once_with(
             {'body': result_metadata, 'ttl': 3600})
 
+    @mock.patch.object(service_software_config.SoftwareConfigService,
+                       '_store_metadata_software_deployments')
+    @mock.patch.object(eventlet, 'spawn_after')
+    def test_push_metadata_software_deployments_deferred(
+            self, spawn_after, store):
+        cfg.CONF.set_override('deployment_metadata_push_delay', 2)
+        swc = self.engine.software_config
+        swc._push_metadata_software_deployments(self.ctx, '1234', None)
+        swc._push_metadata_software_deployments(self.ctx, '1234', None)
+        swc._push_metadata_software_deployments(self.ctx, '5678', None)
+
+        self.assertEqual(2, spawn_after.call_count)
+        spawn_after.assert_any_call(2, swc._deferred_push,
+                                    self.ctx, '1234', None)
+        store.assert_not_called()
+
+        swc._deferred_push(self.ctx, '1234', None)
+        store.assert_called_once_with(self.ctx, '1234', None)
+
+        # Changes after the push has started are pushed again
+        swc._push_metadata_software_deployments(self.ctx, '1234', None)
+        self.assertEqual(3, spawn_after.call_count)
+
+    @mock.patch.object(service_software_config.SoftwareConfigService,
+                       '_store_metadata_software_deployments')
+    @mock.patch.object(eventlet, 'spawn_after')
+    def test_flush_metadata_pushes(self, spawn_after, store):
+        cfg.CONF.set_override('deployment_metadata_push_delay', 2)
+        store.side_effect = exception.ConcurrentTransaction(action='push')
+        swc = self.engine.software_config
+        swc._push_metadata_software_deployments(self.ctx, '1234', 'project1')
+
+        swc.flush_metadata_pushes()
+        spawn_after.return_value.cancel.assert_called_once_with()
+        store.assert_called_once_with(self.ctx, '1234', 'project1')
+
+        swc.flush_metadata_pushes()
+        self.assertEqual(1, store.call_count)
+
     @mock.patch.object(service_software_config.SoftwareConfigService,
                        'signal_software_deployment')
     @mock.patch.object(swift.SwiftClientPlugin, '_create')
@@ -212,6 +212,26 @@ class StackEventTest(common.HeatTestCase):
                                              marker=marker, sort_dir=sort_dir,
                                              filters=filters)
 
+    @mock.patch.object(event_object.Event, 'get_all_by_root_stack')
+    @mock.patch.object(service.EngineService, '_get_stack')
+    def test_nested_event_list_with_marker_and_filters(self, mock_get,
+                                                       mock_get_all):
+        limit = object()
+        marker = object()
+        sort_keys = object()
+        sort_dir = object()
+        filters = {}
+        mock_get.return_value = mock.Mock(id=1)
+        self.eng.list_events(self.ctx, 1, limit=limit, marker=marker,
+                             sort_keys=sort_keys, sort_dir=sort_dir,
+                             filters=filters, nested_depth=2)
+
+        mock_get_all.assert_called_once_with(self.ctx, 1, limit=limit,
+                                             sort_keys=sort_keys,
+                                             marker=marker, sort_dir=sort_dir,
+                                             filters=filters,
+                                             nested_depth=2)
+
     @mock.patch.object(event_object.Event, 'get_all_by_tenant')
     def test_tenant_events_list_with_marker_and_filters(self, mock_get_all):
         limit = object()
@@ -245,37 +245,51 @@ class StackResourcesServiceTest(common.HeatTestCase):
     def test_stack_resources_list_with_depth(self, mock_load):
         mock_load.return_value = self.stack
         resources = six.itervalues(self.stack)
-        self.stack.iter_resources = mock.Mock(return_value=resources)
+        self.stack.iter_resource_summaries = mock.Mock(return_value=resources)
         self.eng.list_stack_resources(self.ctx,
                                       self.stack.identifier(),
                                       2)
-        self.stack.iter_resources.assert_called_once_with(2,
-                                                          filters=None)
+        self.stack.iter_resource_summaries.assert_called_once_with(
+            2, filters=None)
 
     @mock.patch.object(stack.Stack, 'load')
     @tools.stack_context('service_resources_list_test_stack_with_max_depth')
     def test_stack_resources_list_with_max_depth(self, mock_load):
         mock_load.return_value = self.stack
         resources = six.itervalues(self.stack)
-        self.stack.iter_resources = mock.Mock(return_value=resources)
+        self.stack.iter_resource_summaries = mock.Mock(return_value=resources)
         self.eng.list_stack_resources(self.ctx,
                                       self.stack.identifier(),
                                       99)
         max_depth = cfg.CONF.max_nested_stack_depth
-        self.stack.iter_resources.assert_called_once_with(max_depth,
-                                                          filters=None)
+        self.stack.iter_resource_summaries.assert_called_once_with(
+            max_depth, filters=None)
+
+    @mock.patch.object(stack.Stack, 'load')
+    @tools.stack_context('service_resources_list_test_stack_with_detail')
+    def test_stack_resources_list_with_detail(self, mock_load):
+        mock_load.return_value = self.stack
+        resources = six.itervalues(self.stack)
+        self.stack.iter_resources = mock.Mock(return_value=resources)
+        self.stack.iter_resource_summaries = mock.Mock()
+        resources = self.eng.list_stack_resources(self.ctx,
+                                                  self.stack.identifier(),
+                                                  2, with_detail=True)
+        self.stack.iter_resources.assert_called_once_with(2, filters=None)
+        self.assertFalse(self.stack.iter_resource_summaries.called)
+        self.assertIn('metadata', resources[0])
 
     @mock.patch.object(stack.Stack, 'load')
     @tools.stack_context('service_resources_list_test_stack')
     def test_stack_resources_filter_type(self, mock_load):
         mock_load.return_value = self.stack
         resources = six.itervalues(self.stack)
-        self.stack.iter_resources = mock.Mock(return_value=resources)
+        self.stack.iter_resource_summaries = mock.Mock(return_value=resources)
         filters = {'type': 'AWS::EC2::Instance'}
         resources = self.eng.list_stack_resources(self.ctx,
                                                   self.stack.identifier(),
                                                   filters=filters)
-        self.stack.iter_resources.assert_called_once_with(
+        self.stack.iter_resource_summaries.assert_called_once_with(
             0, filters={})
         self.assertIn('AWS::EC2::Instance', resources[0]['resource_type'])
 
@@ -284,12 +298,12 @@ class StackResourcesServiceTest(common.HeatTestCase):
     def test_stack_resources_filter_type_not_found(self, mock_load):
         mock_load.return_value = self.stack
         resources = six.itervalues(self.stack)
-        self.stack.iter_resources = mock.Mock(return_value=resources)
+        self.stack.iter_resource_summaries = mock.Mock(return_value=resources)
         filters = {'type': 'NonExisted'}
         resources = self.eng.list_stack_resources(self.ctx,
                                                   self.stack.identifier(),
                                                   filters=filters)
-        self.stack.iter_resources.assert_called_once_with(
+        self.stack.iter_resource_summaries.assert_called_once_with(
             0, filters={})
         self.assertEqual(0, len(resources))
 
@@ -12,14 +12,13 @@
 #    under the License.
 
 import mock
+from oslo_config import cfg
 from oslo_messaging.rpc import dispatcher
 
 from heat.common import exception
 from heat.engine import service
-from heat.engine import service_stack_watch
 from heat.engine import stack
 from heat.engine import watchrule
-from heat.objects import stack as stack_object
 from heat.objects import watch_data as watch_data_object
 from heat.objects import watch_rule as watch_rule_object
 from heat.rpc import api as rpc_api
@@ -38,28 +37,36 @@ class StackWatchTest(common.HeatTestCase):
         # self.eng.engine_id = 'engine-fake-uuid'
 
     def _create_periodic_tasks(self):
+        self.eng.manage_thread_grp = mock.Mock()
         self.eng.create_periodic_tasks()
-        self.eng.manage_thread_grp.wait()
-
-    @mock.patch.object(service_stack_watch.StackWatch, 'start_watch_task')
-    @mock.patch.object(stack_object.Stack, 'get_all')
-    @mock.patch.object(service.service.Service, 'start')
-    def test_start_watches_all_stacks(self, mock_super_start, mock_get_all,
-                                      start_watch_task):
-        s1 = mock.Mock(id=1)
-        s2 = mock.Mock(id=2)
-        mock_get_all.return_value = [s1, s2]
-        start_watch_task.return_value = None
 
+    def test_periodic_watch_task_created(self):
+        cfg.CONF.set_override('enable_cloud_watch_lite', True)
         self.eng.thread_group_mgr = None
         self._create_periodic_tasks()
 
-        mock_get_all.assert_called_once_with(mock.ANY,
-                                             show_hidden=True)
-        calls = start_watch_task.call_args_list
-        self.assertEqual(2, start_watch_task.call_count)
-        self.assertIn(mock.call(1, mock.ANY), calls)
-        self.assertIn(mock.call(2, mock.ANY), calls)
+        self.assertIsNotNone(self.eng.thread_group_mgr)
+        self.assertEqual('a-host', self.eng.stack_watch.host)
+        self.eng.manage_thread_grp.add_timer.assert_called_once_with(
+            cfg.CONF.periodic_interval,
+            self.eng.stack_watch.periodic_watcher_task)
+
+    def test_periodic_event_prune_task_created(self):
+        cfg.CONF.set_override('event_purge_interval', 30)
+        self._create_periodic_tasks()
+
+        self.assertEqual('a-host', self.eng.event_pruner.host)
+        self.eng.manage_thread_grp.add_timer.assert_called_with(
+            30, self.eng.event_pruner.periodic_prune_task)
+
+    def test_periodic_event_prune_task_created_without_watch(self):
+        cfg.CONF.set_override('enable_cloud_watch_lite', False)
+        cfg.CONF.set_override('event_purge_interval', 30)
+        self._create_periodic_tasks()
+
+        self.assertIsNone(self.eng.stack_watch)
+        self.eng.manage_thread_grp.add_timer.assert_called_once_with(
+            30, self.eng.event_pruner.periodic_prune_task)
 
     @tools.stack_context('service_show_watch_test_stack', False)
     def test_show_watch(self):
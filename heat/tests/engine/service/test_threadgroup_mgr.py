@@ -55,6 +55,22 @@ class ThreadGroupManagerTest(common.HeatTestCase):
                 self.stack, self.lock_mock,
                 self.f, *self.fargs, **self.fkwargs)
 
+    def test_tgm_start_with_acquired_lock_release(self):
+        thm = service.ThreadGroupManager()
+        self.patchobject(thm, 'start', return_value=mock.Mock())
+        self.stack.status = 'COMPLETE'
+        self.stack.action = 'CREATE'
+        th = thm.start_with_acquired_lock(self.stack, self.lock_mock, self.f)
+
+        release = th.link.call_args[0][0]
+        release(th)
+        self.stack.persist_state_and_release_lock.assert_called_once_with(
+            self.lock_mock.engine_id)
+        # The outputs resolved to store them are also sent to the owner
+        self.stack.store_outputs.assert_called_once_with()
+        self.stack.notify_owner.assert_called_once_with(
+            self.stack.store_outputs.return_value)
+
     def test_tgm_start(self):
         stack_id = 'test'
 
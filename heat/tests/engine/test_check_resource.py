@@ -672,6 +672,34 @@ class MiscMethodsTest(common.HeatTestCase):
             ('A', True), {}, True, None)
         self.assertTrue(mock_sync.called)
 
+    @mock.patch.object(sync_point, 'sync')
+    def test_propagate_check_resource_batched(self, mock_sync):
+        def sync(cnxt, entity_id, current_traversal, is_update, propagate,
+                 predecessors, new_data):
+            propagate(entity_id, {'input_data': {}})
+
+        mock_sync.side_effect = sync
+        rpc_client = mock.Mock()
+        checks = []
+        check_resource.propagate_check_resource(
+            self.ctx, rpc_client, 'B',
+            self.stack.current_traversal, mock.ANY,
+            ('A', True), {}, True, None, checks)
+        self.assertEqual([('B', True, {'input_data': {}})], checks)
+        self.assertFalse(rpc_client.check_resource.called)
+
+    def test_check_resources_batch_size(self):
+        cfg.CONF.set_override('check_resource_batch_size', 2)
+        rpc_client = mock.Mock()
+        checks = [(i, True, {}) for i in range(5)]
+        check_resource.check_resources(self.ctx, rpc_client, 'stack-id',
+                                       'traversal', checks, None)
+        self.assertEqual(
+            [mock.call(self.ctx, 'stack-id', 'traversal', checks[0:2], None),
+             mock.call(self.ctx, 'stack-id', 'traversal', checks[2:4], None),
+             mock.call(self.ctx, 'stack-id', 'traversal', checks[4:], None)],
+            rpc_client.check_resources.call_args_list)
+
     @mock.patch.object(resource.Resource, 'create_convergence')
     @mock.patch.object(resource.Resource, 'update_convergence')
     def test_check_resource_update_init_action(self, mock_update, mock_create):
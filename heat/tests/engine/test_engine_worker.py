@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import eventlet
 import mock
 
 from heat.db.sqlalchemy import api as db_api
@@ -29,7 +30,7 @@ from heat.tests import utils
 class WorkerServiceTest(common.HeatTestCase):
     def test_make_sure_rpc_version(self):
         self.assertEqual(
-            '1.4',
+            '1.5',
             worker.WorkerService.RPC_API_VERSION,
             ('RPC version is changed, please update this test to new version '
              'and make sure additional test cases are added for RPC APIs '
@@ -136,6 +137,51 @@ class WorkerServiceTest(common.HeatTestCase):
         # ensure remove is also called
         self.assertTrue(mock_tgm.remove_msg_queue.called)
 
+    @mock.patch.object(stack_objects.Stack, 'get_by_id')
+    @mock.patch.object(worker.WorkerService, '_check_resource')
+    def test_check_resources_separate_contexts(self, mock_check,
+                                               mock_get_stack):
+        self.worker = worker.WorkerService('host-1',
+                                           'topic-1',
+                                           'engine_id',
+                                           mock.Mock())
+        ctx = utils.dummy_context()
+        checks = [('res-1', True, {}), ('res-2', True, {}),
+                  ('res-3', False, {})]
+        self.worker.check_resources(ctx, 'stack-id', 'traversal', checks,
+                                    None)
+        self.assertEqual(3, mock_check.call_count)
+        contexts = [c[0][0] for c in mock_check.call_args_list]
+        self.assertEqual(3, len(set(id(c) for c in contexts)))
+        self.assertNotIn(ctx, contexts)
+        for c in contexts:
+            self.assertEqual(ctx.tenant_id, c.tenant_id)
+        self.assertEqual(['res-1', 'res-2', 'res-3'],
+                         sorted(c[0][1] for c in mock_check.call_args_list))
+
+    @mock.patch.object(stack_objects.Stack, 'get_by_id')
+    @mock.patch.object(worker.WorkerService, '_check_resource')
+    def test_check_resources_all_concurrent(self, mock_check,
+                                            mock_get_stack):
+        self.worker = worker.WorkerService('host-1',
+                                           'topic-1',
+                                           'engine_id',
+                                           mock.Mock())
+        running = []
+        max_running = []
+
+        def check(cnxt, resource_id, *args):
+            running.append(resource_id)
+            max_running.append(len(running))
+            eventlet.sleep(0)
+            running.remove(resource_id)
+
+        mock_check.side_effect = check
+        checks = [('res-%d' % i, True, {}) for i in range(10)]
+        self.worker.check_resources(utils.dummy_context(), 'stack-id',
+                                    'traversal', checks, None)
+        self.assertEqual(10, max(max_running))
+
     @mock.patch.object(worker, '_wait_for_cancellation')
     @mock.patch.object(worker, '_cancel_check_resource')
     @mock.patch.object(wc.WorkerClient, 'cancel_check_resource')
@@ -0,0 +1,148 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import six
+
+from heat.db.sqlalchemy import models
+from heat.engine import api
+from heat.engine import resource_summary
+from heat.engine import stack
+from heat.engine import template
+from heat.tests import common
+from heat.tests import generic_resource as generic_rsrc
+from heat.tests import utils
+
+root_template = {
+    'HeatTemplateFormatVersion': '2012-12-12',
+    'Resources': {
+        'A': {'Type': 'StackResourceType'},
+        'B': {'Type': 'GenericResourceType', 'DependsOn': 'A'},
+        'C': {'Type': 'GenericResourceType', 'DependsOn': ['A', 'B']},
+    }
+}
+
+nested_template = {
+    'HeatTemplateFormatVersion': '2012-12-12',
+    'Resources': {
+        'D': {'Type': 'GenericResourceType'},
+        'E': {'Type': 'GenericResourceType', 'DependsOn': 'D'},
+    }
+}
+
+
+class ResourceSummaryTest(common.HeatTestCase):
+    def setUp(self):
+        super(ResourceSummaryTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        self.root = stack.Stack(self.ctx, 'root',
+                                template.Template(root_template))
+        self.root.store()
+        self._store_resources(self.root)
+
+        # The name the test StackResourceType gives its nested stack
+        nested_name = self.root['A'].physical_resource_name()
+        self.nested = stack.Stack(self.ctx, nested_name,
+                                  template.Template(nested_template),
+                                  owner_id=self.root.id, nested_depth=1,
+                                  parent_resource='A')
+        self.nested.store()
+        self._store_resources(self.nested)
+        self.root['A'].resource_id_set(self.nested.id)
+
+    def _store_resources(self, stk):
+        for rsrc in six.itervalues(stk.resources):
+            rsrc.state_set(rsrc.CREATE, rsrc.COMPLETE)
+
+    def _list(self, stk, method, *args, **kwargs):
+        rsrcs = getattr(stk, method)(*args, **kwargs)
+        return sorted((api.format_stack_resource(r, detail=False)
+                       for r in rsrcs),
+                      key=lambda r: r['resource_name'])
+
+    def _compare(self, nested_depth, filters=None):
+        stk = stack.Stack.load(self.ctx, stack_id=self.root.id)
+        expected = self._list(stk, 'iter_resources', nested_depth,
+                              filters=filters)
+        stk = stack.Stack.load(self.ctx, stack_id=self.root.id)
+        actual = self._list(stk, 'iter_resource_summaries', nested_depth,
+                            filters=filters)
+        for res in expected:
+            res['required_by'] = sorted(res['required_by'])
+        for res in actual:
+            res['required_by'] = sorted(res['required_by'])
+        self.assertEqual(expected, actual)
+        return actual
+
+    def test_summaries(self):
+        resources = self._compare(0)
+        self.assertEqual(['A', 'B', 'C'],
+                         [r['resource_name'] for r in resources])
+        self.assertEqual(['B', 'C'], resources[0]['required_by'])
+        self.assertEqual(['C'], resources[1]['required_by'])
+        self.assertEqual(dict(self.nested.identifier()),
+                         resources[0]['nested_stack_id'])
+
+    def test_summaries_nested(self):
+        resources = self._compare(1)
+        self.assertEqual(['A', 'B', 'C', 'D', 'E'],
+                         [r['resource_name'] for r in resources])
+        self.assertEqual('A', resources[3]['parent_resource'])
+
+    def test_summaries_nested_legacy(self):
+        # Stacks created before the root stack ID was stored have none
+        self.ctx.session.query(models.Stack).update(
+            {'root_stack_id': None, 'ancestry': None})
+        resources = self._compare(1)
+        self.assertEqual(['A', 'B', 'C', 'D', 'E'],
+                         [r['resource_name'] for r in resources])
+
+    def test_summaries_of_nested_stack(self):
+        stk = stack.Stack.load(self.ctx, stack_id=self.nested.id)
+        expected = self._list(stk, 'iter_resources')
+        stk = stack.Stack.load(self.ctx, stack_id=self.nested.id)
+        self.assertEqual(expected, self._list(stk, 'iter_resource_summaries'))
+
+    def test_summaries_filtered(self):
+        self.root['B'].state_set(self.root.UPDATE, self.root.FAILED)
+        self.nested['D'].state_set(self.root.UPDATE, self.root.FAILED)
+        resources = self._compare(1, filters={'status': 'FAILED'})
+        self.assertEqual(['B', 'D'], [r['resource_name'] for r in resources])
+
+    def test_summaries_no_resource_objects(self):
+        stk = stack.Stack.load(self.ctx, stack_id=self.root.id)
+        with mock.patch.object(stack.Stack, 'load') as mock_load:
+            summaries = list(stk.iter_resource_summaries(1))
+        self.assertEqual(5, len(summaries))
+        for summary in summaries:
+            self.assertIsInstance(summary, resource_summary.ResourceSummary)
+        self.assertFalse(mock_load.called)
+        self.assertIsNone(stk._resources)
+
+    def test_summaries_implicit_dependencies(self):
+        self.patchobject(generic_rsrc.GenericResource, 'add_dependencies')
+        stk = stack.Stack.load(self.ctx, stack_id=self.root.id)
+        summaries = list(stk.iter_resource_summaries(1))
+        self.assertEqual(5, len(summaries))
+        for summary in summaries:
+            self.assertNotIsInstance(summary,
+                                     resource_summary.ResourceSummary)
+
+    def test_summaries_implicit_dependency_types(self):
+        self.patchobject(generic_rsrc.GenericResource, 'add_dependencies')
+        self.patchobject(generic_rsrc.GenericResource,
+                         'implicit_dependency_types',
+                         new=('OS::Neutron::Subnet',))
+        stk = stack.Stack.load(self.ctx, stack_id=self.root.id)
+        for summary in stk.iter_resource_summaries(1):
+            self.assertIsInstance(summary, resource_summary.ResourceSummary)
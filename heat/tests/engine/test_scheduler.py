@@ -77,6 +77,7 @@ class DependencyTaskGroupTest(common.HeatTestCase):
         self.aggregate_exceptions = False
         self.error_wait_time = None
         self.reverse_order = False
+        self.event_driven = False
 
     @contextlib.contextmanager
     def _dep_test(self, *edges):
@@ -87,7 +88,8 @@ class DependencyTaskGroupTest(common.HeatTestCase):
         tg = scheduler.DependencyTaskGroup(
             deps, dummy, reverse=self.reverse_order,
             error_wait_time=self.error_wait_time,
-            aggregate_exceptions=self.aggregate_exceptions)
+            aggregate_exceptions=self.aggregate_exceptions,
+            event_driven=self.event_driven)
 
         self.m.StubOutWithMock(dummy, 'do_step')
 
@@ -392,6 +394,60 @@ class DependencyTaskGroupTest(common.HeatTestCase):
         self.assertIs(e2, exc)
 
 
+class EventDrivenDependencyTaskGroupTest(DependencyTaskGroupTest):
+    def setUp(self):
+        super(EventDrivenDependencyTaskGroupTest, self).setUp()
+        self.event_driven = True
+
+    def _run_group(self, edges, num_steps):
+        log = []
+
+        def task(key):
+            for i in range(1, num_steps[key] + 1):
+                log.append('%s%d' % (key, i))
+                yield
+
+        def sleep(wait_time):
+            log.append('sleep%d' % wait_time)
+
+        deps = dependencies.Dependencies(edges)
+        tg = scheduler.DependencyTaskGroup(deps, task, event_driven=True)
+        self.patchobject(scheduler.TaskRunner, '_sleep', side_effect=sleep)
+        scheduler.TaskRunner(tg)(wait_time=1)
+        return log
+
+    def test_new_tasks_do_not_wait(self):
+        log = self._run_group([('b', 'a')], {'a': 2, 'b': 2})
+        self.assertEqual(['a1', 'sleep0', 'a2', 'sleep1',
+                          'b1', 'sleep0', 'b2', 'sleep1'], log)
+
+    def test_only_new_tasks_stepped_without_waiting(self):
+        log = self._run_group([('late', 'quick'), ('slow', None),
+                               ('quick', None)],
+                              {'quick': 2, 'slow': 5, 'late': 2})
+        self.assertEqual(['sleep0', 'sleep1'], log[2:6:3])
+        self.assertEqual(set(['quick1', 'slow1']), set(log[:2]))
+        self.assertEqual(set(['quick2', 'slow2']), set(log[3:5]))
+        self.assertEqual(['slow3', 'late1', 'sleep0', 'late2', 'sleep1',
+                          'slow4', 'sleep1', 'slow5', 'sleep1'], log[6:])
+
+    def test_completion_readies_dependents_once(self):
+        deps = dependencies.Dependencies([('last', 'a'), ('last', 'b'),
+                                          ('a', 'first'), ('b', 'first')])
+        started = []
+
+        def task(key):
+            started.append(key)
+            yield
+
+        tg = scheduler.DependencyTaskGroup(deps, task, event_driven=True)
+        scheduler.TaskRunner(tg)(wait_time=None)
+
+        self.assertEqual('first', started[0])
+        self.assertEqual(set(['a', 'b']), set(started[1:3]))
+        self.assertEqual(['last'], started[3:])
+
+
 class TaskTest(common.HeatTestCase):
 
     def setUp(self):
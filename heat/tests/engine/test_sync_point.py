@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import mock
+from oslo_config import cfg
 from oslo_db import exception
 
 from heat.engine import sync_point
@@ -93,3 +94,62 @@ class SyncPointTestCase(common.HeatTestCase):
         stack.converge_stack(stack.t, action=stack.CREATE)
         mock_sleep_time = self.sync_with_sleep(ctx, stack)
         mock_sleep_time.assert_called_once_with(mock.ANY)
+
+
+class KeyedSyncPointTestCase(common.HeatTestCase):
+    def setUp(self):
+        super(KeyedSyncPointTestCase, self).setUp()
+        cfg.CONF.set_override('convergence_keyed_sync_points', True)
+        self.ctx = utils.dummy_context()
+        self.stack = tools.get_stack('test_stack', utils.dummy_context(),
+                                     template=tools.string_template_five,
+                                     convergence=True)
+        self.stack.converge_stack(self.stack.t, action=self.stack.CREATE)
+        self.graph = self.stack.convergence_dependencies.graph()
+
+    def test_sync_waiting(self):
+        resource = self.stack['C']
+        predecessors = set(self.graph[(resource.id, True)])
+        self.assertGreater(len(predecessors), 1)
+
+        sender = sorted(predecessors)[0]
+        mock_callback = mock.Mock()
+        sync_point.sync(self.ctx, resource.id, self.stack.current_traversal,
+                        True, mock_callback, predecessors, {sender: None})
+        self.assertFalse(mock_callback.called)
+        # the shared input_data blob is not written in keyed mode
+        updated_sync_point = sync_point.get(self.ctx, resource.id,
+                                            self.stack.current_traversal,
+                                            True)
+        self.assertEqual(0, updated_sync_point.atomic_key)
+
+    def test_sync_ready(self):
+        resource = self.stack['C']
+        predecessors = set(self.graph[(resource.id, True)])
+
+        mock_callback = mock.Mock()
+        for i, sender in enumerate(sorted(predecessors)):
+            sync_point.sync(self.ctx, resource.id,
+                            self.stack.current_traversal, True,
+                            mock_callback, predecessors, {sender: {'v': i}})
+        expected = dict((sender, {'v': i})
+                        for i, sender in enumerate(sorted(predecessors)))
+        mock_callback.assert_called_once_with(
+            resource.id, sync_point.serialize_input_data(expected))
+
+    @mock.patch('eventlet.sleep')
+    def test_sync_propagates_once(self, mock_sleep):
+        resource = self.stack['C']
+        predecessors = set(self.graph[(resource.id, True)])
+
+        mock_callback = mock.Mock()
+        for sender in sorted(predecessors):
+            sync_point.sync(self.ctx, resource.id,
+                            self.stack.current_traversal, True,
+                            mock_callback, predecessors, {sender: None})
+        # a redelivered message from a predecessor does not propagate again
+        sync_point.sync(self.ctx, resource.id, self.stack.current_traversal,
+                        True, mock_callback, predecessors,
+                        {sorted(predecessors)[0]: None})
+        self.assertEqual(1, mock_callback.call_count)
+        self.assertFalse(mock_sleep.called)
@@ -0,0 +1,117 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from heat.engine import write_behind
+from heat.objects import event as event_object
+from heat.objects import resource as resource_objects
+from heat.tests import common
+from heat.tests import utils
+
+
+@mock.patch.object(event_object.Event, 'create_many')
+@mock.patch.object(resource_objects.Resource, 'update_many')
+@mock.patch.object(resource_objects.Resource, 'update_by_id')
+class WriteBufferTest(common.HeatTestCase):
+    def setUp(self):
+        super(WriteBufferTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        self.buffer = write_behind.WriteBuffer(self.ctx)
+
+    def test_flush(self, mock_update, mock_update_many, mock_create_many):
+        self.buffer.update_resource(1, {'action': 'CREATE',
+                                        'status': 'IN_PROGRESS'})
+        self.buffer.update_resource(2, {'status': 'IN_PROGRESS'})
+        self.buffer.update_resource(1, {'status': 'COMPLETE'})
+        self.buffer.add_event({'resource_name': 'a'})
+        self.buffer.add_event({'resource_name': 'b'})
+        self.assertEqual(4, len(self.buffer))
+
+        self.buffer.flush()
+
+        mock_update_many.assert_called_once_with(
+            self.ctx, {1: {'action': 'CREATE', 'status': 'COMPLETE'},
+                       2: {'status': 'IN_PROGRESS'}})
+        mock_create_many.assert_called_once_with(
+            self.ctx, [{'resource_name': 'a'}, {'resource_name': 'b'}])
+        self.assertFalse(mock_update.called)
+        self.assertEqual(0, len(self.buffer))
+
+    def test_flush_empty(self, mock_update, mock_update_many,
+                         mock_create_many):
+        self.buffer.flush()
+        self.assertFalse(mock_update_many.called)
+        self.assertFalse(mock_create_many.called)
+
+    def test_flush_resource(self, mock_update, mock_update_many,
+                            mock_create_many):
+        self.buffer.update_resource(1, {'status': 'COMPLETE'})
+        self.buffer.update_resource(2, {'status': 'IN_PROGRESS'})
+
+        self.buffer.flush_resource(1)
+        self.buffer.flush_resource(3)
+
+        mock_update.assert_called_once_with(self.ctx, 1,
+                                            {'status': 'COMPLETE'})
+        self.buffer.flush()
+        mock_update_many.assert_called_once_with(
+            self.ctx, {2: {'status': 'IN_PROGRESS'}})
+
+
+class FlushEachStepTest(common.HeatTestCase):
+    def setUp(self):
+        super(FlushEachStepTest, self).setUp()
+        self.stack = mock.Mock(context=utils.dummy_context(),
+                               write_buffer=None)
+        self.flushes = []
+        self.patchobject(write_behind.WriteBuffer, 'flush',
+                         side_effect=lambda: self.flushes.append(
+                             self.stack.write_buffer is not None))
+
+    def _task(self, fail=False):
+        for i in range(3):
+            self.assertIsNotNone(self.stack.write_buffer)
+            yield i
+        if fail:
+            raise ValueError('boom')
+
+    def test_steps(self):
+        steps = list(write_behind.flush_each_step(self.stack, self._task()))
+
+        self.assertEqual([0, 1, 2], steps)
+        self.assertEqual([True] * 4, self.flushes)
+        self.assertIsNone(self.stack.write_buffer)
+
+    def test_failure(self):
+        task = write_behind.flush_each_step(self.stack, self._task(True))
+
+        self.assertRaises(ValueError, list, task)
+        self.assertEqual([True] * 4, self.flushes)
+        self.assertIsNone(self.stack.write_buffer)
+
+    def test_thrown_exception(self):
+        task = write_behind.flush_each_step(self.stack, self._task())
+        next(task)
+
+        self.assertRaises(ValueError, task.throw, ValueError('timeout'))
+        self.assertEqual([True] * 2, self.flushes)
+        self.assertIsNone(self.stack.write_buffer)
+
+    def test_cancel(self):
+        task = write_behind.flush_each_step(self.stack, self._task())
+        next(task)
+
+        task.close()
+        self.assertEqual([True] * 2, self.flushes)
+        self.assertIsNone(self.stack.write_buffer)
@@ -402,6 +402,40 @@ class ResourceGroupTest(common.HeatTestCase):
             res_prop['listprop'] = list(res_prop['listprop'])
         self.assertEqual(expect, nested)
 
+    def test_member_definitions_share_structure(self):
+        stack = utils.parse_stack(template)
+        snip = stack.t.resource_definitions(stack)['group1']
+        resg = resource_group.ResourceGroup('test', snip, stack)
+        res_def = {
+            'type': 'OverwrittenFnGetRefIdType',
+            'properties': {
+                'Foo': 'Bar_%index%',
+                'static': {'a': ['b', 'c']},
+                'nested': {'a': ['%index%_0', 'c'], 'b': ['d']}
+            },
+            'metadata': {'m': 'v'}
+        }
+        defn0 = resg.build_resource_definition('0', res_def)
+        defn1 = resg.build_resource_definition('1', res_def)
+
+        props0 = defn0._properties
+        props1 = defn1._properties
+        self.assertEqual({'Foo': 'Bar_0',
+                          'static': {'a': ['b', 'c']},
+                          'nested': {'a': ['0_0', 'c'], 'b': ['d']}},
+                         props0)
+        self.assertEqual('Bar_1', props1['Foo'])
+        self.assertEqual(['1_0', 'c'], props1['nested']['a'])
+        self.assertEqual(['%index%_0', 'c'],
+                         res_def['properties']['nested']['a'])
+        self.assertIs(res_def['properties']['static'], props0['static'])
+        self.assertIs(props0['static'], props1['static'])
+        self.assertIs(props0['nested']['b'], props1['nested']['b'])
+
+        defn0.set_group_index(0)
+        self.assertEqual({'m': 'v'}, defn1.metadata())
+        self.assertEqual({'m': 'v'}, res_def['metadata'])
+
     def test_custom_index_var(self):
         templ = copy.deepcopy(template_repl)
         templ['resources']['group1']['properties']['index_var'] = "__foo__"
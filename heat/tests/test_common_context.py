@@ -195,6 +195,47 @@ class TestRequestContext(common.HeatTestCase):
         self.assertRaises(exception.AuthorizationFailure, getattr,
                           ctx, 'auth_plugin')
 
+    def test_trust_context_session_shared(self):
+        self.ctx['trust_id'] = 'trust_id'
+        mock_load = self.patchobject(ks_loading, 'load_auth_from_conf_options')
+        mock_load.return_value.auth_ref = None
+        ctx1 = context.RequestContext.from_dict(self.ctx)
+        ctx2 = context.RequestContext.from_dict(self.ctx)
+        self.assertIs(ctx1.keystone_session, ctx2.keystone_session)
+        self.assertIs(mock_load.return_value, ctx2.auth_plugin)
+        self.assertIs(mock_load.return_value, ctx2.keystone_session.auth)
+        mock_load.assert_called_once_with(cfg.CONF,
+                                          context.TRUSTEE_CONF_GROUP,
+                                          trust_id='trust_id')
+
+        self.ctx['trust_id'] = 'other_trust_id'
+        ctx3 = context.RequestContext.from_dict(self.ctx)
+        self.assertIsNot(ctx1.keystone_session, ctx3.keystone_session)
+
+    def test_session_not_shared_with_auth_plugin(self):
+        self.ctx.update(auth_token_info=None, password=None)
+        ctx1 = context.RequestContext.from_dict(self.ctx)
+        ctx2 = context.RequestContext(auth_token='123', is_admin=False,
+                                      auth_plugin=mock.Mock())
+        self.assertIsNot(ctx1.keystone_session, ctx2.keystone_session)
+        self.assertIs(ctx2.auth_plugin, ctx2.keystone_session.auth)
+
+    def test_session_pool_disabled(self):
+        cfg.CONF.set_override('client_session_pool_size', 0)
+        self.ctx.update(auth_token_info=None, password=None)
+        ctx1 = context.RequestContext.from_dict(self.ctx)
+        ctx2 = context.RequestContext.from_dict(self.ctx)
+        self.assertIsNot(ctx1.keystone_session, ctx2.keystone_session)
+
+    def test_reload_auth_plugin_discards_session(self):
+        self.ctx.update(auth_token_info=None, password=None)
+        ctx1 = context.RequestContext.from_dict(self.ctx)
+        sess = ctx1.keystone_session
+        ctx1.reload_auth_plugin()
+        self.assertIsNot(sess, ctx1.keystone_session)
+        ctx2 = context.RequestContext.from_dict(self.ctx)
+        self.assertIs(ctx1.keystone_session, ctx2.keystone_session)
+
     def test_cache(self):
         ctx = context.RequestContext.from_dict(self.ctx)
 
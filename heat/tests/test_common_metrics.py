@@ -0,0 +1,112 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import socket
+
+import mock
+from oslo_config import cfg
+
+from heat.common import metrics
+from heat.engine import scheduler
+from heat.tests import common
+
+
+class MetricsTest(common.HeatTestCase):
+    def setUp(self):
+        super(MetricsTest, self).setUp()
+        cfg.CONF.set_override('enable_metrics', True)
+        self.addCleanup(metrics._registry.reset)
+
+    def test_disabled(self):
+        cfg.CONF.set_override('enable_metrics', False)
+        metrics.timing('resource.handle', 1, 'OS::Heat::None', 'CREATE')
+        metrics.incr('polls')
+        metrics.gauge('backlog', 3)
+        with metrics.timer('resource.check'):
+            pass
+        self.assertEqual({'histograms': {}, 'counters': {}, 'gauges': {}},
+                         metrics.snapshot())
+
+    def test_histogram(self):
+        for value in (0.05, 2, 7):
+            metrics.timing('resource.handle', value,
+                           'OS::Nova::Server', 'CREATE')
+        histogram = metrics.snapshot()['histograms'][
+            'resource.handle.OS_Nova_Server.CREATE']
+        self.assertEqual(3, histogram['count'])
+        self.assertAlmostEqual(9.05, histogram['sum'])
+        self.assertEqual(0.05, histogram['min'])
+        self.assertEqual(7, histogram['max'])
+        self.assertEqual({'0.1': 1, '5': 1, '10': 1}, histogram['buckets'])
+
+    def test_counters_and_gauges(self):
+        metrics.incr('polls')
+        metrics.incr('polls', 2)
+        metrics.gauge('backlog', 3)
+        metrics.gauge('backlog', 1)
+        snapshot = metrics.snapshot()
+        self.assertEqual({'polls': 3}, snapshot['counters'])
+        self.assertEqual({'backlog': 1}, snapshot['gauges'])
+
+    def test_statsd(self):
+        cfg.CONF.set_override('metrics_statsd_host', '127.0.0.1')
+        mock_socket = self.patchobject(socket, 'socket').return_value
+        metrics.timing('resource.handle', 0.25, 'OS::Heat::None', 'CREATE')
+        metrics.incr('polls')
+        metrics.gauge('backlog', 3)
+        address = ('127.0.0.1', 8125)
+        mock_socket.sendto.assert_has_calls([
+            mock.call(b'heat.resource.handle.OS_Heat_None.CREATE:250|ms',
+                      address),
+            mock.call(b'heat.polls:1|c', address),
+            mock.call(b'heat.backlog:3|g', address)])
+
+    def test_statsd_error(self):
+        cfg.CONF.set_override('metrics_statsd_host', '127.0.0.1')
+        mock_socket = self.patchobject(socket, 'socket').return_value
+        mock_socket.sendto.side_effect = socket.error
+        metrics.incr('polls')
+        self.assertEqual({'polls': 1}, metrics.snapshot()['counters'])
+
+    def test_db_calls_counted_per_task(self):
+        def task(calls):
+            for i in range(calls):
+                metrics.count_db_call()
+                yield
+
+        runner_1 = scheduler.TaskRunner(task, 1)
+        runner_2 = scheduler.TaskRunner(task, 2)
+        runner_1.start()
+        runner_2.start()
+        while not (runner_1.step() and runner_2.step()):
+            pass
+        metrics.count_db_call()
+
+        self.assertEqual(1, runner_1.metrics_scope.db_calls)
+        self.assertEqual(2, runner_2.metrics_scope.db_calls)
+        self.assertIsNone(metrics.current_scope())
+
+    def test_meter_db_calls(self):
+        def task():
+            metrics.count_db_call()
+            meter = metrics.Meter('resource.action', 'CREATE')
+            metrics.count_db_call()
+            yield
+            metrics.count_db_call()
+            meter.stop()
+
+        scheduler.TaskRunner(task)(wait_time=None)
+        histograms = metrics.snapshot()['histograms']
+        self.assertEqual(1, histograms['resource.action.CREATE']['count'])
+        self.assertEqual(
+            2, histograms['resource.action.db_calls.CREATE']['sum'])
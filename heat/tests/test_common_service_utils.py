@@ -14,6 +14,8 @@
 # limitations under the License.
 
 import datetime
+import mock
+from oslo_config import cfg
 from oslo_utils import timeutils
 import uuid
 
@@ -72,3 +74,25 @@ class TestServiceUtils(common.HeatTestCase):
                               datetime.timedelta(0, 50))
         service_dict = service_utils.format_service(service)
         self.assertEqual(service_dict['status'], 'up')
+
+    @mock.patch.object(service_utils.service_objects.Service, 'get_all')
+    def test_engine_shard(self, service_get_all):
+        now = timeutils.utcnow()
+        stale = now - datetime.timedelta(
+            seconds=4 * cfg.CONF.periodic_interval)
+        service_get_all.return_value = [
+            mock.Mock(host='host3', binary='heat-engine', updated_at=now),
+            mock.Mock(host='host1', binary='heat-engine', updated_at=None,
+                      created_at=now),
+            mock.Mock(host='host1', binary='heat-engine', updated_at=now),
+            mock.Mock(host='host0', binary='heat-engine', updated_at=stale),
+            mock.Mock(host='host0', binary='heat-api', updated_at=now),
+        ]
+
+        self.assertEqual((1, 3), service_utils.engine_shard(None, 'host2'))
+        self.assertEqual((1, 2), service_utils.engine_shard(None, 'host3'))
+
+    @mock.patch.object(service_utils.service_objects.Service, 'get_all')
+    def test_engine_shard_list_error(self, service_get_all):
+        service_get_all.side_effect = Exception('boom')
+        self.assertEqual((0, 1), service_utils.engine_shard(None, 'host1'))
@@ -11,12 +11,14 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import mock
 import six
 
 from heat.common import exception
 from heat.engine import constraints
 from heat.engine import environment
 from heat.tests import common
+from heat.tests import utils
 
 
 class SchemaTest(common.HeatTestCase):
@@ -581,3 +583,68 @@ class CustomConstraintTest(common.HeatTestCase):
 
         constraint = constraints.CustomConstraint("zero", environment=self.env)
         self.assertEqual("zero", constraint["custom_constraint"])
+
+
+class ListedConstraint(constraints.BaseCustomConstraint):
+    resource_client_name = 'nova'
+    resource_getter_name = 'get_thing'
+    resource_lister_name = 'list_things'
+
+
+class PrefetchTest(common.HeatTestCase):
+
+    def setUp(self):
+        super(PrefetchTest, self).setUp()
+        self.env = environment.Environment({})
+        self.env.register_constraint('test.listed', ListedConstraint)
+        self.ctx = utils.dummy_context()
+        self.plugin = mock.Mock()
+        self.plugin.list_things.return_value = [('id1', 'one'),
+                                                ('id2', 'two'),
+                                                ('id3', 'two')]
+        self.patchobject(self.ctx.clients, 'client_plugin',
+                         return_value=self.plugin)
+
+    def test_prefetch(self):
+        constraints.prefetch(self.ctx, self.env,
+                             {'test.listed': set(['id1', 'one'])})
+        self.plugin.list_things.assert_called_once_with()
+
+        constraint = ListedConstraint()
+        self.assertTrue(constraint.validate('id1', self.ctx))
+        self.assertTrue(constraint.validate('one', self.ctx))
+        self.assertTrue(constraint.validate('id3', self.ctx))
+        self.assertFalse(self.plugin.get_thing.called)
+
+        # Ambiguous names and unlisted values are validated individually
+        self.assertTrue(constraint.validate('two', self.ctx))
+        self.assertTrue(constraint.validate('other', self.ctx))
+        self.plugin.get_thing.assert_has_calls([mock.call('two'),
+                                                mock.call('other')])
+
+        constraints.prefetch(self.ctx, self.env,
+                             {'test.listed': set(['id2', 'id3'])})
+        self.plugin.list_things.assert_called_once_with()
+
+    def test_prefetch_single_value(self):
+        constraints.prefetch(self.ctx, self.env,
+                             {'test.listed': set(['id1'])})
+        self.assertFalse(self.plugin.list_things.called)
+
+    def test_prefetch_not_listable(self):
+        self.env.register_constraint('test.unlisted',
+                                     constraints.BaseCustomConstraint)
+        constraints.prefetch(self.ctx, self.env,
+                             {'test.unlisted': set(['id1', 'id2']),
+                              'test.unknown': set(['id1', 'id2'])})
+        self.assertNotIn(constraints.BaseCustomConstraint,
+                         self.ctx.cache(constraints.ListedResources))
+
+    def test_prefetch_list_error(self):
+        self.plugin.list_things.side_effect = Exception('boom')
+        constraints.prefetch(self.ctx, self.env,
+                             {'test.listed': set(['id1', 'id2'])})
+        self.assertNotIn(ListedConstraint,
+                         self.ctx.cache(constraints.ListedResources))
+        self.assertTrue(ListedConstraint().validate('id1', self.ctx))
+        self.plugin.get_thing.assert_called_once_with('id1')
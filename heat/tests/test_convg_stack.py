@@ -34,6 +34,8 @@ class StackConvergenceCreateUpdateDeleteTest(common.HeatTestCase):
     def setUp(self):
         super(StackConvergenceCreateUpdateDeleteTest, self).setUp()
         cfg.CONF.set_override('convergence_engine', True)
+        # send a check_resource message for each resource
+        cfg.CONF.set_override('check_resource_batch_size', 1)
         self.stack = None
 
     @mock.patch.object(parser.Stack, 'mark_complete')
@@ -132,6 +134,25 @@ class StackConvergenceCreateUpdateDeleteTest(common.HeatTestCase):
                     is_update, None, False))
         self.assertEqual(expected_calls, mock_cr.mock_calls)
 
+    @mock.patch.object(worker_client.WorkerClient, 'check_resources')
+    def test_conv_string_five_instance_stack_create_batched(self, mock_crs,
+                                                            mock_cr):
+        cfg.CONF.set_override('check_resource_batch_size', 20)
+        stack = tools.get_stack('test_stack', utils.dummy_context(),
+                                template=tools.string_template_five,
+                                convergence=True)
+        stack.store()
+        stack.converge_stack(template=stack.t, action=stack.CREATE)
+
+        checks = [(rsrc_id, is_update, {'input_data': {}})
+                  for rsrc_id, is_update in
+                  stack.convergence_dependencies.leaves()]
+        self.assertEqual(2, len(checks))
+        mock_crs.assert_called_once_with(stack.context, stack.id,
+                                         stack.current_traversal, checks,
+                                         None, False)
+        self.assertFalse(mock_cr.called)
+
     def _mock_convg_db_update_requires(self):
         """Updates requires column of resources.
 
@@ -1098,6 +1098,49 @@ class StackServiceTest(common.HeatTestCase):
              'output_value': None},
             output)
 
+    def test_stack_show_output_cached(self):
+        cfg.CONF.set_override('cache_stack_outputs', True)
+        t = template_format.parse(tools.wp_template)
+        t['outputs'] = {'test': {'value': 'first', 'description': 'sec'}}
+        tmpl = templatem.Template(t)
+        cached = {'output_key': 'test', 'output_value': 'stored',
+                  'description': 'sec'}
+        stack = parser.Stack(self.ctx, 'service_list_outputs_stack', tmpl,
+                             output_data={'encrypted': False,
+                                          'outputs': [cached]})
+
+        self.patchobject(self.eng, '_get_stack')
+        self.patchobject(parser.Stack, 'load', return_value=stack)
+
+        self.assertEqual(cached,
+                         self.eng.show_output(self.ctx, mock.ANY, 'test'))
+        self.assertEqual('first',
+                         self.eng.show_output(self.ctx, mock.ANY, 'test',
+                                              live=True)['output_value'])
+
+    def test_stack_show_cached_outputs(self):
+        cfg.CONF.set_override('cache_stack_outputs', True)
+        t = template_format.parse(tools.wp_template)
+        t['outputs'] = {'test': {'value': 'first', 'description': 'sec'}}
+        cached = {'output_key': 'test', 'output_value': 'stored',
+                  'description': 'sec'}
+        stack = parser.Stack(self.ctx, 'service_show_outputs_stack',
+                             templatem.Template(t),
+                             output_data={'encrypted': False,
+                                          'outputs': [cached]})
+        store_outputs = self.patchobject(stack, 'store_outputs')
+
+        self.patchobject(self.eng, '_get_stack')
+        self.patchobject(parser.Stack, 'load', return_value=stack)
+
+        result = self.eng.show_stack(self.ctx, mock.ANY)[0]
+        self.assertEqual([cached], result['outputs'])
+        self.assertFalse(store_outputs.called)
+
+        result = self.eng.show_stack(self.ctx, mock.ANY, live=True)[0]
+        self.assertEqual('first', result['outputs'][0]['output_value'])
+        store_outputs.assert_called_once_with(result['outputs'])
+
     def test_stack_list_all_empty(self):
         sl = self.eng.list_stacks(self.ctx)
 
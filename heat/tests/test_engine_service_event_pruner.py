@@ -0,0 +1,104 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+from oslo_config import cfg
+
+from heat.engine import service_event_pruner
+from heat.objects import event as event_object
+from heat.tests import common
+
+
+class EventPrunerTest(common.HeatTestCase):
+
+    def setUp(self):
+        super(EventPrunerTest, self).setUp()
+        cfg.CONF.set_override('max_events_per_stack', 10)
+        cfg.CONF.set_override('event_purge_batch_size', 4)
+        self.patchobject(service_event_pruner.service_utils, 'engine_shard',
+                         return_value=(0, 1))
+        self.pruner = service_event_pruner.EventPruner('host1')
+
+    @mock.patch.object(event_object.Event, 'delete_oldest')
+    def test_prune_stack_events(self, delete_oldest):
+        delete_oldest.side_effect = lambda cnxt, sid, limit: limit
+        self.assertEqual(9, self.pruner.prune_stack_events(None, 's1', 9))
+        self.assertEqual([mock.call(None, 's1', 4),
+                          mock.call(None, 's1', 4),
+                          mock.call(None, 's1', 1)],
+                         delete_oldest.call_args_list)
+
+    @mock.patch.object(event_object.Event, 'delete_oldest')
+    def test_prune_stack_events_none_left(self, delete_oldest):
+        delete_oldest.side_effect = [4, 0]
+        self.assertEqual(4, self.pruner.prune_stack_events(None, 's1', 9))
+        self.assertEqual(2, delete_oldest.call_count)
+
+    @mock.patch.object(service_event_pruner.EventPruner,
+                       'prune_stack_events')
+    @mock.patch.object(event_object.Event, 'count_all_by_stack')
+    @mock.patch.object(event_object.Event, 'get_stack_ids')
+    def test_periodic_prune_task(self, get_stack_ids, count_all_by_stack,
+                                 prune_stack_events):
+        self.patchobject(service_event_pruner, 'SCAN_BATCH_SIZE', new=3)
+        get_stack_ids.side_effect = [[(1, 's1'), (2, 's2'), (3, 's1')],
+                                     [(4, 's2'), (5, 's3')]]
+        counts = {'s1': 12, 's2': 5, 's3': 11}
+        count_all_by_stack.side_effect = lambda cnxt, sid: counts[sid]
+
+        self.pruner.periodic_prune_task()
+
+        self.assertEqual([mock.call(mock.ANY, 0, 3),
+                          mock.call(mock.ANY, 3, 3)],
+                         get_stack_ids.call_args_list)
+        self.assertEqual(3, count_all_by_stack.call_count)
+        self.assertEqual([mock.call(mock.ANY, 's1', 2),
+                          mock.call(mock.ANY, 's3', 1)],
+                         prune_stack_events.call_args_list)
+        self.assertEqual(5, self.pruner.last_event_id)
+        self.assertEqual(3, self.pruner.backlog)
+
+        # Only the events created since the previous run are scanned
+        get_stack_ids.side_effect = [[]]
+        self.pruner.periodic_prune_task()
+        get_stack_ids.assert_called_with(mock.ANY, 5, 3)
+        self.assertEqual(0, self.pruner.backlog)
+
+    @mock.patch.object(event_object.Event, 'count_all_by_stack')
+    @mock.patch.object(event_object.Event, 'get_stack_ids')
+    def test_periodic_prune_task_shard(self, get_stack_ids,
+                                       count_all_by_stack):
+        service_event_pruner.service_utils.engine_shard.return_value = (1, 2)
+        stack_ids = ['s%d' % i for i in range(20)]
+        get_stack_ids.return_value = list(enumerate(stack_ids))
+        count_all_by_stack.return_value = 0
+
+        self.pruner.periodic_prune_task()
+
+        checked = set(c[0][1] for c in count_all_by_stack.call_args_list)
+        self.assertTrue(0 < len(checked) < 20)
+        other = service_event_pruner.EventPruner('host0')
+        self.assertTrue(all(not other._in_shard(sid, 0, 2)
+                            for sid in checked))
+
+    @mock.patch.object(event_object.Event, 'get_stack_ids')
+    def test_periodic_prune_task_unlimited(self, get_stack_ids):
+        cfg.CONF.set_override('max_events_per_stack', 0)
+        self.pruner.periodic_prune_task()
+        self.assertFalse(get_stack_ids.called)
+
+    @mock.patch.object(event_object.Event, 'get_stack_ids')
+    def test_periodic_prune_task_db_error(self, get_stack_ids):
+        get_stack_ids.side_effect = Exception('boom')
+        self.pruner.periodic_prune_task()
+        self.assertEqual(0, self.pruner.last_event_id)
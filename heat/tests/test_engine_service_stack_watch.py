@@ -11,10 +11,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
+
 import mock
+from oslo_config import cfg
 
 from heat.engine import service_stack_watch
-from heat.rpc import api as rpc_api
 from heat.tests import common
 from heat.tests import utils
 
@@ -25,94 +27,79 @@ class StackServiceWatcherTest(common.HeatTestCase):
         super(StackServiceWatcherTest, self).setUp()
         self.ctx = utils.dummy_context(tenant_id='stack_service_test_tenant')
 
-    @mock.patch.object(service_stack_watch.stack_object.Stack,
-                       'get_all_by_owner_id')
-    @mock.patch.object(service_stack_watch.watch_rule_object.WatchRule,
-                       'get_all_by_stack')
-    @mock.patch.object(service_stack_watch.watch_rule_object.WatchRule,
-                       'update_by_id')
-    def test_periodic_watch_task_not_created(self, watch_rule_update,
-                                             watch_rule_get_all_by_stack,
-                                             stack_get_all_by_owner_id):
-        """Test case for not creating periodic task for cloud watch lite alarm.
-
-        If there is no cloud watch lite alarm, then don't create a periodic
-        task for it.
-        """
-        stack_id = 83
-        watch_rule_get_all_by_stack.return_value = []
-        stack_get_all_by_owner_id.return_value = []
+    @mock.patch.object(service_stack_watch.watchrule.WatchRule, 'load')
+    @mock.patch.object(service_stack_watch.stack.Stack, 'load')
+    @mock.patch.object(service_stack_watch.stack_object.Stack, 'get_by_id')
+    def test_check_stack_watches(self, stack_get, stack_load, rule_load):
+        """Test that the stack is only fully loaded to run alarm actions."""
+        stack_id = 91
+        wrs = [mock.Mock(), mock.Mock()]
+        quiet, alarmed = mock.Mock(), mock.Mock()
+        quiet.evaluate.return_value = []
+        alarmed.evaluate.return_value = ['action']
+        rule_load.side_effect = [quiet, alarmed]
+        light_stk, full_stk = mock.Mock(), mock.Mock()
+        stack_load.side_effect = [light_stk, full_stk]
         tg = mock.Mock()
         sw = service_stack_watch.StackWatch(tg)
-        sw.start_watch_task(stack_id, self.ctx)
-
-        # assert that add_timer is NOT called.
-        self.assertEqual([], tg.add_timer.call_args_list)
+        quiet.last_evaluated = alarmed.last_evaluated = sw.started_at
+
+        sw.check_stack_watches(stack_id, wrs)
+
+        db_stack = stack_get.return_value
+        self.assertEqual([mock.call(mock.ANY, stack=db_stack,
+                                    use_stored_context=True,
+                                    load_template=False),
+                          mock.call(mock.ANY, stack=db_stack,
+                                    use_stored_context=True)],
+                         stack_load.call_args_list)
+        self.assertEqual([mock.call(light_stk.context, watch=wr)
+                          for wr in wrs],
+                         rule_load.call_args_list)
+        tg.start.assert_called_once_with(stack_id, mock.ANY, full_stk,
+                                         ['action'],
+                                         alarmed.get_details.return_value)
 
-    @mock.patch.object(service_stack_watch.stack_object.Stack,
-                       'get_all_by_owner_id')
-    @mock.patch.object(service_stack_watch.watch_rule_object.WatchRule,
-                       'get_all_by_stack')
     @mock.patch.object(service_stack_watch.watch_rule_object.WatchRule,
                        'update_by_id')
-    def test_periodic_watch_task_created(self, watch_rule_update,
-                                         watch_rule_get_all_by_stack,
-                                         stack_get_all_by_owner_id):
-        """Test case for creating periodic task for cloud watch lite alarm.
-
-        If there is no cloud watch lite alarm, then DO create a periodic task
-        for it.
-        """
-        stack_id = 86
-        wr1 = mock.Mock()
-        wr1.id = 4
-        wr1.state = rpc_api.WATCH_STATE_NODATA
-
-        watch_rule_get_all_by_stack.return_value = [wr1]
-        stack_get_all_by_owner_id.return_value = []
-        tg = mock.Mock()
-        sw = service_stack_watch.StackWatch(tg)
-        sw.start_watch_task(stack_id, self.ctx)
-
-        # assert that add_timer IS called.
-        self.assertEqual([mock.call(stack_id, sw.periodic_watcher_task,
-                                    sid=stack_id)],
-                         tg.add_timer.call_args_list)
-
-    @mock.patch.object(service_stack_watch.stack_object.Stack,
-                       'get_all_by_owner_id')
-    @mock.patch.object(service_stack_watch.watch_rule_object.WatchRule,
-                       'get_all_by_stack')
+    @mock.patch.object(service_stack_watch.watchrule.WatchRule, 'load')
+    @mock.patch.object(service_stack_watch.stack.Stack, 'load')
+    @mock.patch.object(service_stack_watch.stack_object.Stack, 'get_by_id')
+    def test_check_stack_watches_after_start(self, stack_get, stack_load,
+                                             rule_load, rule_update):
+        """Test that rules are not evaluated for the time before startup."""
+        sw = service_stack_watch.StackWatch(mock.Mock())
+        period = datetime.timedelta(seconds=60)
+        rule = mock.Mock(id=4, timeperiod=period,
+                         last_evaluated=sw.started_at - 2 * period)
+        rule_load.return_value = rule
+
+        sw.check_stack_watches(91, [mock.Mock()])
+
+        rule.evaluate.assert_not_called()
+        rule_update.assert_called_once_with(
+            mock.ANY, 4, {'last_evaluated': sw.started_at,
+                          'next_evaluation': sw.started_at + period})
+
+    @mock.patch.object(service_stack_watch.StackWatch, 'check_stack_watches')
     @mock.patch.object(service_stack_watch.watch_rule_object.WatchRule,
-                       'update_by_id')
-    def test_periodic_watch_task_created_nested(self, watch_rule_update,
-                                                watch_rule_get_all_by_stack,
-                                                stack_get_all_by_owner_id):
-        stack_id = 90
-
-        def my_wr_get(cnxt, sid):
-            if sid == stack_id:
-                return []
-            wr1 = mock.Mock()
-            wr1.id = 4
-            wr1.state = rpc_api.WATCH_STATE_NODATA
-            return [wr1]
-
-        watch_rule_get_all_by_stack.side_effect = my_wr_get
-
-        def my_nested_get(cnxt, sid):
-            if sid == stack_id:
-                nested_stack = mock.Mock()
-                nested_stack.id = 55
-                return [nested_stack]
-            return []
-
-        stack_get_all_by_owner_id.side_effect = my_nested_get
-        tg = mock.Mock()
-        sw = service_stack_watch.StackWatch(tg)
-        sw.start_watch_task(stack_id, self.ctx)
-
-        # assert that add_timer IS called.
-        self.assertEqual([mock.call(stack_id, sw.periodic_watcher_task,
-                                    sid=stack_id)],
-                         tg.add_timer.call_args_list)
+                       'get_due')
+    def test_periodic_watcher_task(self, get_due, check_stack_watches):
+        cfg.CONF.set_override('watch_evaluation_batch_size', 3)
+        wrs = [mock.Mock(id=i, stack_id=sid)
+               for i, sid in enumerate(['s1', 's2', 's1', 's3'])]
+        get_due.side_effect = [wrs[:3], wrs[3:]]
+        sw = service_stack_watch.StackWatch(mock.Mock(), 'host1')
+        self.patchobject(sw, '_shard', return_value=(1, 2))
+
+        sw.periodic_watcher_task()
+
+        self.assertEqual([mock.call(mock.ANY, mock.ANY, 3, after_id=None,
+                                    shard_index=1, shard_count=2),
+                          mock.call(mock.ANY, mock.ANY, 3, after_id=2,
+                                    shard_index=1, shard_count=2)],
+                         get_due.call_args_list)
+        self.assertEqual([mock.call('s1', [wrs[0], wrs[2]]),
+                          mock.call('s2', [wrs[1]]),
+                          mock.call('s3', [wrs[3]])],
+                         check_stack_watches.call_args_list)
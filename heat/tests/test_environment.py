@@ -89,6 +89,17 @@ class EnvironmentTest(common.HeatTestCase):
                          env.get_resource_info('OS::Some::Name',
                                                'my_db_server').name)
 
+    def test_global_registry_glob_added(self):
+        env = environment.Environment({})
+        self.assertRaises(exception.EntityNotFound,
+                          env.get_resource_info, 'OS::Foo::Bar')
+        env.load({u'resource_registry': {u'OS::Foo::*': 'OS::Heat::None'}})
+        self.assertEqual('OS::Heat::None',
+                         env.get_resource_info('OS::Foo::Bar').name)
+        env.load({u'resource_registry': {u'OS::Foo::*': None}})
+        self.assertRaises(exception.EntityNotFound,
+                          env.get_resource_info, 'OS::Foo::Bar')
+
     def test_map_one_resource_type(self):
         new_env = {u'parameters': {u'a': u'ff', u'b': u'ss'},
                    u'resource_registry': {u'resources':
@@ -926,6 +937,23 @@ class HookMatchTest(common.HeatTestCase):
         self.assertTrue(registry.matches_hook('some_prefix', other_hook))
         self.assertTrue(registry.matches_hook('_suffix_blah', other_hook))
 
+    def test_character_class_matches(self):
+        registry = environment.ResourceRegistry(None, {})
+        registry.load({'resources': {u'res[0-9]': {u'hooks': self.hook}}})
+
+        self.assertTrue(registry.matches_hook('res1', self.hook))
+        self.assertFalse(registry.matches_hook('resa', self.hook))
+        self.assertFalse(registry.matches_hook('res[0-9]', self.hook))
+
+    def test_matches_after_load(self):
+        registry = environment.ResourceRegistry(None, {})
+        registry.load({'resources': {u'a': {u'hooks': self.hook}}})
+        self.assertFalse(registry.matches_hook('b', self.hook))
+
+        registry.load({'resources': {u'b*': {u'hooks': self.hook}}})
+        self.assertTrue(registry.matches_hook('a', self.hook))
+        self.assertTrue(registry.matches_hook('b', self.hook))
+
     def test_hook_types(self):
         resources = {
             u'hook': {
@@ -184,6 +184,52 @@ class EventTest(EventCommon):
         self.assertIsNotNone(self.ctx.session.query(
             models.ResourcePropertiesData).get(rpd4_id))
 
+    def test_store_no_purge_with_purge_interval(self):
+        cfg.CONF.set_override('event_purge_batch_size', 1)
+        cfg.CONF.set_override('max_events_per_stack', 1)
+        cfg.CONF.set_override('event_purge_interval', 60)
+        self.resource.resource_id_set('resource_physical_id')
+
+        for physical_id in ('alabama', 'arizona'):
+            e = event.Event(self.ctx, self.stack, 'TEST', 'IN_PROGRESS',
+                            'Testing', physical_id,
+                            self.resource._rsrc_prop_data,
+                            self.resource.name, self.resource.type())
+            e.store()
+        self.assertEqual(2, event_object.Event.count_all_by_stack(
+            self.ctx, self.stack.id))
+
+        self.assertEqual(1, event_object.Event.delete_oldest(
+            self.ctx, self.stack.id, 1))
+        events = event_object.Event.get_all_by_stack(self.ctx, self.stack.id)
+        self.assertEqual(['arizona'],
+                         [ev.physical_resource_id for ev in events])
+
+    def test_delete_oldest_keeps_shared_resource_props_data(self):
+        rpd = rpd_object.ResourcePropertiesData.create(
+            self.ctx, {'encrypted': False, 'data': {'foo': 'bar'}})
+        other = stack.Stack(self.ctx, 'event_other_stack',
+                            template.Template(tmpl))
+        other.store()
+        self.addCleanup(stack_object.Stack.delete, self.ctx, other.id)
+        for stk in (self.stack, other):
+            e = event.Event(self.ctx, stk, 'TEST', 'IN_PROGRESS', 'Testing',
+                            'alabama', rpd, self.resource.name,
+                            self.resource.type())
+            e.store()
+
+        self.assertEqual(1, event_object.Event.delete_oldest(
+            self.ctx, self.stack.id, 10))
+        self.assertIsNotNone(self.ctx.session.query(
+            models.ResourcePropertiesData).get(rpd.id))
+
+        self.assertEqual(1, event_object.Event.delete_oldest(
+            self.ctx, other.id, 10))
+        self.assertIsNone(self.ctx.session.query(
+            models.ResourcePropertiesData).get(rpd.id))
+        self.assertEqual(0, event_object.Event.delete_oldest(
+            self.ctx, other.id, 10))
+
     def test_identifier(self):
         event_uuid = 'abc123yc-9f88-404d-a85b-531529456xyz'
         e = event.Event(self.ctx, self.stack, 'TEST', 'IN_PROGRESS', 'Testing',
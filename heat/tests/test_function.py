@@ -57,6 +57,14 @@ class TestFunctionResult(function.Function):
         return super(TestFunctionResult, self).result()
 
 
+class TestFunctionPure(function.Function):
+    pure = True
+
+    def result(self):
+        self.calls = getattr(self, 'calls', 0) + 1
+        return {'wibble': [function.resolve(self.args)]}
+
+
 class FunctionTest(common.HeatTestCase):
     def test_equal(self):
         func = TestFunction(None, 'foo', ['bar', 'baz'])
@@ -170,6 +178,35 @@ class ResolveTest(common.HeatTestCase):
                          result)
         self.assertIsNot(result, snippet)
 
+    def test_resolve_constant(self):
+        func = TestFunctionPure(None, 'foo', ['bar', 'baz'])
+        self.assertTrue(function.is_constant({'blarg': func}))
+
+        result = function.resolve({'blarg': func})
+        self.assertEqual({'blarg': {'wibble': [['bar', 'baz']]}}, result)
+        result['blarg']['wibble'].append('quux')
+
+        self.assertEqual({'wibble': [['bar', 'baz']]},
+                         function.resolve(func))
+        self.assertEqual(1, func.calls)
+
+    def test_resolve_not_constant(self):
+        impure = TestFunction(None, 'foo', ['bar', 'baz'])
+        func = TestFunctionPure(None, 'foo', ['bar', impure])
+        self.assertFalse(function.is_constant(func))
+
+        function.resolve(func)
+        self.assertEqual({'wibble': [['bar', 'wibble']]},
+                         function.resolve(func))
+        self.assertEqual(2, func.calls)
+
+    def test_resolve_constant_error(self):
+        func = TestFunctionValueError(None, 'foo', ['bar', 'baz'])
+        func.pure = True
+        self.assertTrue(function.is_constant(func))
+        self.assertRaises(ValueError, function.resolve, func)
+        self.assertRaises(ValueError, function.resolve, func)
+
 
 class ValidateTest(common.HeatTestCase):
     def setUp(self):
@@ -2465,6 +2465,19 @@ class HotStackTest(common.HeatTestCase):
                          self.stack.parameters['OS::stack_id'])
         self.m.VerifyAll()
 
+    def test_pseudo_param_not_constant(self):
+        tmpl = template.Template(hot_tpl_empty)
+        self.stack = parser.Stack(self.ctx, 'param_id_test', tmpl)
+        snippet = self.stack.t.parse(self.stack.defn, {
+            'list_join': ['/', [{'get_param': 'OS::stack_name'},
+                                {'get_param': 'OS::stack_id'}]]})
+        self.assertFalse(function.is_constant(snippet))
+        self.assertEqual('param_id_test/None', function.resolve(snippet))
+
+        self.stack.store()
+        self.assertEqual('param_id_test/%s' % self.stack.id,
+                         function.resolve(snippet))
+
     def test_set_wrong_param(self):
         tmpl = template.Template(hot_tpl_empty)
         stack_id = identifier.HeatIdentifier('', "stack_testit", None)
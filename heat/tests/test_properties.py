@@ -1266,6 +1266,49 @@ class PropertiesTest(common.HeatTestCase):
         except exception.StackValidationFailed:
             self.fail("Constraints should not have been evaluated.")
 
+    def test_custom_constraint_values(self):
+        network = properties.Schema(
+            properties.Schema.STRING,
+            constraints=[constraints.CustomConstraint('neutron.network')])
+        schema = {
+            'image': properties.Schema(
+                properties.Schema.STRING,
+                constraints=[constraints.CustomConstraint('glance.image')]),
+            'flavor': properties.Schema(
+                properties.Schema.STRING,
+                default='m1.small',
+                constraints=[constraints.CustomConstraint('nova.flavor')]),
+            'networks': properties.Schema(
+                properties.Schema.LIST,
+                schema=properties.Schema(
+                    properties.Schema.MAP,
+                    schema={'network': network,
+                            'fixed_ip': properties.Schema(
+                                properties.Schema.STRING)})),
+            'name': properties.Schema(properties.Schema.STRING),
+            'key_name': properties.Schema(
+                properties.Schema.STRING,
+                constraints=[constraints.CustomConstraint('nova.keypair')]),
+        }
+        data = {'image': 'cirros', 'name': 'server',
+                'networks': [{'network': 'net1'},
+                             {'network': 'net2', 'fixed_ip': '10.0.0.2'},
+                             {'fixed_ip': '10.0.0.3'}],
+                'key_name': {'get_attr': ['key', 'name']}}
+
+        def test_resolver(value):
+            if isinstance(value, dict):
+                raise exception.InvalidTemplateAttribute(resource='key',
+                                                         key='name')
+            return value
+
+        props = properties.Properties(schema, data, test_resolver)
+        self.assertEqual([('glance.image', 'cirros'),
+                          ('neutron.network', 'net1'),
+                          ('neutron.network', 'net2'),
+                          ('nova.flavor', 'm1.small')],
+                         sorted(props.custom_constraint_values()))
+
     def test_schema_from_params(self):
         params_snippet = {
             "DBUsername": {
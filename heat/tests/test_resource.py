@@ -26,6 +26,7 @@ import six
 
 from heat.common import exception
 from heat.common.i18n import _
+from heat.common import metrics
 from heat.common import short_id
 from heat.common import timeutils
 from heat.db.sqlalchemy import api as db_api
@@ -636,6 +637,31 @@ class ResourceTest(common.HeatTestCase):
                              rpd_object.ResourcePropertiesData.get_by_id(
                                  res.context, res._attr_data_id).data)
 
+    def test_attributes_store_clears_outputs(self):
+        cfg.CONF.set_override('cache_stack_outputs', True)
+        tmpl = template.Template({
+            'heat_template_version': '2016-10-14',
+            'resources': {
+                'used': {'type': 'ResWithStringPropAndAttr'},
+                'unused': {'type': 'ResWithStringPropAndAttr'}},
+            'outputs': {
+                'out': {'value': {'get_attr': ['used', 'string']}}}})
+        stk = parser.Stack(utils.dummy_context(), 'test_stack', tmpl)
+        stk.store()
+        clear_outputs = self.patchobject(stk, 'clear_outputs')
+
+        for name in ('unused', 'used'):
+            res = stk[name]
+            res.action = res.CREATE
+            res.status = res.COMPLETE
+            res.store()
+            with mock.patch.object(res, '_resolve_attribute',
+                                   return_value='word'):
+                res.attributes['string']
+            res.store_attributes()
+            self.assertIsNotNone(res._attr_data_id)
+            self.assertEqual(name == 'used', clear_outputs.called)
+
     def test_attributes_load_stored(self):
         res_def = rsrc_defn.ResourceDefinition('test_resource',
                                                'ResWithStringPropAndAttr')
@@ -1259,6 +1285,25 @@ class ResourceTest(common.HeatTestCase):
 
         self.m.VerifyAll()
 
+    def test_create_metrics(self):
+        cfg.CONF.set_override('enable_metrics', True)
+        self.addCleanup(metrics._registry.reset)
+        tmpl = rsrc_defn.ResourceDefinition('test_resource', 'Foo')
+        res = generic_rsrc.CancellableResource('test_resource', tmpl,
+                                               self.stack)
+        self.patchobject(res, 'check_create_complete',
+                         side_effect=[False, False, True])
+
+        scheduler.TaskRunner(res.create)()
+
+        histograms = metrics.snapshot()['histograms']
+        self.assertEqual(1, histograms['resource.handle.Foo.CREATE']['count'])
+        self.assertEqual(3, histograms['resource.check.Foo.CREATE']['count'])
+        self.assertEqual(3, histograms['resource.polls.Foo.CREATE']['sum'])
+        self.assertEqual(1, histograms['resource.action.Foo.CREATE']['count'])
+        self.assertEqual(
+            1, histograms['resource.action.db_calls.Foo.CREATE']['count'])
+
     def test_preview(self):
         tmpl = rsrc_defn.ResourceDefinition('test_resource',
                                             'GenericResourceType')
@@ -1290,6 +1335,59 @@ class ResourceTest(common.HeatTestCase):
 
         self.m.VerifyAll()
 
+    def test_update_unchanged_definition(self):
+        tmpl = rsrc_defn.ResourceDefinition('test_resource',
+                                            'GenericResourceType',
+                                            {'Foo': 'abc'})
+        res = generic_rsrc.ResourceWithProps('test_resource', tmpl, self.stack)
+        res.update_allowed_properties = ('Foo',)
+        scheduler.TaskRunner(res.create)()
+        self.assertEqual((res.CREATE, res.COMPLETE), res.state)
+        db_res = resource_objects.Resource.get_obj(res.context, res.id)
+        self.assertEqual(tmpl.freeze().fingerprint(),
+                         db_res.definition_fingerprint)
+
+        mock_prepare = self.patchobject(res, '_prepare_update_props')
+        utmpl = rsrc_defn.ResourceDefinition('test_resource',
+                                             'GenericResourceType',
+                                             {'Foo': 'abc'})
+        scheduler.TaskRunner(res.update, utmpl)()
+        self.assertEqual((res.CREATE, res.COMPLETE), res.state)
+        self.assertFalse(mock_prepare.called)
+
+    def test_update_records_definition_fingerprint(self):
+        tmpl = rsrc_defn.ResourceDefinition('test_resource',
+                                            'GenericResourceType',
+                                            {'Foo': 'abc'})
+        res = generic_rsrc.ResourceWithProps('test_resource', tmpl, self.stack)
+        res.update_allowed_properties = ('Foo',)
+        scheduler.TaskRunner(res.create)()
+
+        utmpl = rsrc_defn.ResourceDefinition('test_resource',
+                                             'GenericResourceType',
+                                             {'Foo': 'xyz'})
+        self.patchobject(generic_rsrc.ResourceWithProps, 'handle_update')
+        scheduler.TaskRunner(res.update, utmpl)()
+        self.assertEqual((res.UPDATE, res.COMPLETE), res.state)
+        db_res = resource_objects.Resource.get_obj(res.context, res.id)
+        self.assertEqual(utmpl.freeze().fingerprint(),
+                         db_res.definition_fingerprint)
+
+    def test_update_unchanged_definition_failed(self):
+        tmpl = rsrc_defn.ResourceDefinition('test_resource',
+                                            'GenericResourceType',
+                                            {'Foo': 'abc'})
+        res = generic_rsrc.ResourceWithProps('test_resource', tmpl, self.stack)
+        res.update_allowed_properties = ('Foo',)
+        scheduler.TaskRunner(res.create)()
+        res.state_set(res.CHECK, res.FAILED)
+
+        utmpl = rsrc_defn.ResourceDefinition('test_resource',
+                                             'GenericResourceType',
+                                             {'Foo': 'abc'})
+        updater = scheduler.TaskRunner(res.update, utmpl)
+        self.assertRaises(resource.UpdateReplace, updater)
+
     def test_update_replace_with_resource_name(self):
         tmpl = rsrc_defn.ResourceDefinition('test_resource',
                                             'GenericResourceType',
@@ -2729,6 +2827,7 @@ class ResourceTest(common.HeatTestCase):
         self.assertTrue(mock_stack_load.called)
         mock_stack_load.assert_called_with(stack.context,
                                            stack_id=stack.id,
+                                           stack=None,
                                            cache_data=data)
         self.assertTrue(mock_load_data.called)
 
@@ -157,7 +157,7 @@ class EngineRpcAPITestCase(common.HeatTestCase):
 
     def test_show_stack(self):
         self._test_engine_api('show_stack', 'call', stack_identity='wordpress',
-                              resolve_outputs=True)
+                              resolve_outputs=True, live=False)
 
     def test_preview_stack(self):
         self._test_engine_api('preview_stack', 'call', stack_name='wordpress',
@@ -413,7 +413,7 @@ class EngineRpcAPITestCase(common.HeatTestCase):
     def test_stack_show_output(self):
         self._test_engine_api(
             'show_output', 'call', stack_identity=self.identity,
-            output_key='test', version='1.19')
+            output_key='test', live=False, version='1.36')
 
     def test_export_stack(self):
         self._test_engine_api('export_stack',
@@ -68,3 +68,23 @@ class ListenerClientTest(common.HeatTestCase):
         self.assertFalse(ret)
         mock_prepare_client.call.assert_called_once_with(mock_cnxt,
                                                          'listening')
+
+    @mock.patch('heat.common.messaging.get_rpc_client',
+                return_value=mock.Mock())
+    def test_nested_complete(self, rpc_client_method):
+        mock_rpc_client = rpc_client_method.return_value
+        mock_prepare_client = mock_rpc_client.prepare.return_value
+        mock_version_client = mock_prepare_client.prepare.return_value
+        mock_cnxt = mock.Mock()
+        identity = {'stack_name': 'nested', 'stack_id': 'a-b-c',
+                    'tenant': 't', 'path': ''}
+
+        listener_client = rpc_client.EngineListenerClient('engine-007')
+        listener_client.nested_complete(mock_cnxt, identity, 'CREATE',
+                                        'COMPLETE', 'done', None, [])
+
+        mock_prepare_client.prepare.assert_called_once_with(version='1.1')
+        mock_version_client.cast.assert_called_once_with(
+            mock_cnxt, 'nested_complete', stack_identity=identity,
+            action='CREATE', status='COMPLETE', status_reason='done',
+            updated_time=None, outputs=[])
@@ -14,6 +14,7 @@
 # limitations under the License.
 
 import mock
+from oslo_config import cfg
 
 from heat.rpc import worker_api as rpc_api
 from heat.rpc import worker_client as rpc_client
@@ -45,7 +46,7 @@ class WorkerClientTest(common.HeatTestCase):
         worker_client = rpc_client.WorkerClient()
         rpc_client_method.assert_called_once_with(
             version=rpc_client.WorkerClient.BASE_RPC_API_VERSION,
-            topic=rpc_api.TOPIC)
+            topic=rpc_api.TOPIC, version_cap=None)
 
         self.assertEqual(mock_rpc_client,
                          worker_client._client,
@@ -97,3 +98,51 @@ class WorkerClientTest(common.HeatTestCase):
                 version='1.3')
             # ensure correct rpc method is called
             mock_cast.cast.assert_called_with(mock_cnxt, method, **kwargs)
+
+    def test_check_resources(self):
+        mock_cnxt = mock.Mock()
+        checks = [(1, True, {'input_data': {}}),
+                  (2, False, {'input_data': {}})]
+        with mock.patch('heat.common.messaging.get_rpc_client'):
+            wc = rpc_client.WorkerClient()
+            with mock.patch.object(wc, 'cast') as mock_cast:
+                wc.check_resources(mock_cnxt, 'stack-id', 'traversal',
+                                   checks, None)
+        mock_cast.assert_called_once_with(
+            mock_cnxt,
+            ('check_resources', {'stack_id': 'stack-id',
+                                 'current_traversal': 'traversal',
+                                 'checks': [[1, True, {'input_data': {}}],
+                                            [2, False, {'input_data': {}}]],
+                                 'adopt_stack_data': None,
+                                 'converge': False}),
+            version='1.5')
+
+    def test_check_resources_single(self):
+        mock_cnxt = mock.Mock()
+        checks = [(1, True, {'input_data': {}})]
+        with mock.patch('heat.common.messaging.get_rpc_client'):
+            wc = rpc_client.WorkerClient()
+            with mock.patch.object(wc, 'check_resource') as mock_cr:
+                wc.check_resources(mock_cnxt, 'stack-id', 'traversal',
+                                   checks, None, True)
+        mock_cr.assert_called_once_with(mock_cnxt, 1, 'traversal',
+                                        {'input_data': {}}, True, None, True)
+
+    def test_check_resources_version_cap(self):
+        cfg.CONF.set_override('worker_rpc_version_cap', '1.4')
+        mock_cnxt = mock.Mock()
+        checks = [(1, True, {'input_data': {}}),
+                  (2, False, {'input_data': {}})]
+        wc = rpc_client.WorkerClient()
+        with mock.patch.object(wc, 'cast') as mock_cast:
+            with mock.patch.object(wc, 'check_resource') as mock_cr:
+                wc.check_resources(mock_cnxt, 'stack-id', 'traversal',
+                                   checks, None)
+        self.assertFalse(mock_cast.called)
+        self.assertEqual(
+            [mock.call(mock_cnxt, 1, 'traversal', {'input_data': {}}, True,
+                       None, False),
+             mock.call(mock_cnxt, 2, 'traversal', {'input_data': {}}, False,
+                       None, False)],
+            mock_cr.call_args_list)
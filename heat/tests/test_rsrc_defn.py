@@ -226,6 +226,36 @@ class ResourceDefinitionTest(common.HeatTestCase):
         self.assertNotEqual(rd1, rd2)
         self.assertNotEqual(hash(rd1), hash(rd2))
 
+    def test_hash_function(self):
+        rd1 = self.make_me_one_with_everything()
+        rd2 = rsrc_defn.ResourceDefinition(
+            'rsrc', 'SomeType',
+            properties={'Foo': {'Fn::Join': ['a', ['b', 'r']]},
+                        'Blarg': 'wibble'},
+            metadata={'Baz': {'Fn::Join': ['u', ['q', '', 'x']]}},
+            depends=['other_resource'],
+            deletion_policy='Retain',
+            update_policy={'SomePolicy': {}})
+        self.assertEqual(rd1, rd2)
+        self.assertEqual(hash(rd1), hash(rd2))
+
+    def test_fingerprint(self):
+        rd1 = self.make_me_one_with_everything()
+        rd2 = self.make_me_one_with_everything()
+        rd2.name = 'other'
+        self.assertEqual(64, len(rd1.fingerprint()))
+        self.assertEqual(rd1.fingerprint(), rd2.fingerprint())
+
+        rd3 = rsrc_defn.ResourceDefinition('rsrc', 'SomeType',
+                                           properties={'Blarg': 'wibble'})
+        self.assertNotEqual(rd1.fingerprint(), rd3.fingerprint())
+
+    def test_fingerprint_group_index(self):
+        rd = rsrc_defn.ResourceDefinition('rsrc', 'SomeType')
+        fingerprint = rd.fingerprint()
+        rd.set_group_index(1)
+        self.assertNotEqual(fingerprint, rd.fingerprint())
+
 
 class ResourceDefinitionDiffTest(common.HeatTestCase):
     def test_properties_diff(self):
@@ -23,6 +23,7 @@ import fixtures
 import mock
 import mox
 from oslo_config import cfg
+from oslo_utils import timeutils as oslo_timeutils
 import six
 
 from heat.common import context
@@ -32,6 +33,7 @@ from heat.common import timeutils
 from heat.db.sqlalchemy import api as db_api
 from heat.engine.clients.os import keystone
 from heat.engine.clients.os import nova
+from heat.engine import constraints
 from heat.engine import environment
 from heat.engine import function
 from heat.engine import node_data
@@ -42,6 +44,7 @@ from heat.engine import stack
 from heat.engine import stk_defn
 from heat.engine import template
 from heat.engine import update
+from heat.objects import event as event_object
 from heat.objects import raw_template as raw_template_object
 from heat.objects import resource as resource_objects
 from heat.objects import stack as stack_object
@@ -454,7 +457,9 @@ class StackTest(common.HeatTestCase):
                              prev_raw_template_id=None,
                              current_deps=None, cache_data=None,
                              nested_depth=0,
-                             deleted_time=None)
+                             deleted_time=None,
+                             ancestry=[],
+                             output_data=None)
 
         self.m.ReplayAll()
         stack.Stack.load(self.ctx, stack_id=self.stack.id)
@@ -610,10 +615,34 @@ class StackTest(common.HeatTestCase):
         stacks = list(stack.Stack.load_all(self.ctx, show_nested=True))
         self.assertEqual(3, len(stacks))
 
+    def test_store_template_shared(self):
+        tmpl = {'HeatTemplateFormatVersion': '2012-12-12',
+                'Resources': {'A': {'Type': 'GenericResourceType'},
+                              'B': {'Type': 'GenericResourceType'}}}
+        stack1 = stack.Stack(self.ctx, 'stack1',
+                             template.Template(copy.deepcopy(tmpl)))
+        stack1.store()
+        stack2 = stack.Stack(self.ctx, 'stack2',
+                             template.Template(copy.deepcopy(tmpl)))
+        stack2.store()
+        shared_id = stack1.t.id
+        self.assertEqual(shared_id, stack2.t.id)
+
+        stack2.remove_resource('B')
+        self.assertNotEqual(shared_id, stack2.t.id)
+        self.assertEqual(stack2.t.id, stack_object.Stack.get_by_id(
+            self.ctx, stack2.id).raw_template_id)
+        self.assertIn('B', template.Template.load(
+            self.ctx, shared_id)[stack1.t.RESOURCES])
+        self.assertNotIn('B', template.Template.load(
+            self.ctx, stack2.t.id)[stack2.t.RESOURCES])
+
     def test_load_all_not_found(self):
         stack1 = stack.Stack(self.ctx, 'stack1', self.tmpl)
         stack1.store()
-        tmpl2 = template.Template(copy.deepcopy(empty_template))
+        t2 = copy.deepcopy(empty_template)
+        t2['Description'] = 'stack2'
+        tmpl2 = template.Template(t2)
         stack2 = stack.Stack(self.ctx, 'stack2', tmpl2)
         stack2.store()
 
@@ -1233,6 +1262,199 @@ class StackTest(common.HeatTestCase):
                          '(a foo) is incorrect.', self.stack.status_reason)
         self.m.VerifyAll()
 
+    def _batched_stack(self):
+        cfg.CONF.set_override('batch_resource_writes', True)
+        tmpl = {'HeatTemplateFormatVersion': '2012-12-12',
+                'Resources': {
+                    'AResource': {'Type': 'GenericResourceType'},
+                    'BResource': {'Type': 'GenericResourceType',
+                                  'DependsOn': 'AResource'}}}
+        self.stack = stack.Stack(self.ctx, 'batch_test_stack',
+                                 template.Template(tmpl),
+                                 disable_rollback=True)
+        self.stack.store()
+
+    def _stored_resource_states(self):
+        return dict((name, (db_res.action, db_res.status))
+                    for name, db_res in six.iteritems(
+                        resource_objects.Resource.get_all_by_stack(
+                            self.ctx, self.stack.id)))
+
+    def test_create_batch_resource_writes(self):
+        self._batched_stack()
+
+        with mock.patch.object(resource_objects.Resource,
+                               'update_by_id') as mock_update:
+            self.stack.create()
+
+        self.assertEqual((stack.Stack.CREATE, stack.Stack.COMPLETE),
+                         self.stack.state)
+        self.assertFalse(mock_update.called)
+        self.assertIsNone(self.stack.write_buffer)
+        self.assertEqual({'AResource': ('CREATE', 'COMPLETE'),
+                          'BResource': ('CREATE', 'COMPLETE')},
+                         self._stored_resource_states())
+        events = event_object.Event.get_all_by_stack(self.ctx,
+                                                     self.stack.id)
+        self.assertEqual(
+            [('AResource', 'IN_PROGRESS'), ('AResource', 'COMPLETE'),
+             ('BResource', 'IN_PROGRESS'), ('BResource', 'COMPLETE')],
+            [(e.resource_name, e.resource_status)
+             for e in sorted(events, key=lambda e: e.id)
+             if e.resource_name != self.stack.name])
+
+    def test_create_failed_batch_resource_writes(self):
+        self._batched_stack()
+
+        with mock.patch.object(generic_rsrc.GenericResource, 'handle_create',
+                               side_effect=Exception('boom')):
+            self.stack.create()
+
+        self.assertEqual((stack.Stack.CREATE, stack.Stack.FAILED),
+                         self.stack.state)
+        self.assertIsNone(self.stack.write_buffer)
+        self.assertEqual({'AResource': ('CREATE', 'FAILED'),
+                          'BResource': ('INIT', 'COMPLETE')},
+                         self._stored_resource_states())
+
+    def _nested_stack(self):
+        cfg.CONF.set_override('nested_stack_notify', True)
+        tmpl = {'heat_template_version': '2016-10-14',
+                'resources': {'AResource': {'type': 'GenericResourceType'}},
+                'outputs': {'TestOutput': {
+                    'value': {'get_resource': 'AResource'}}}}
+        parent = stack.Stack(self.ctx, 'parent_stack',
+                             template.Template(tmpl))
+        parent.store()
+        self.stack = stack.Stack(self.ctx, 'nested_stack',
+                                 template.Template(tmpl),
+                                 owner_id=parent.id)
+        self.stack.store()
+
+    @mock.patch('heat.rpc.listener_client.EngineListenerClient')
+    @mock.patch('heat.objects.stack_lock.StackLock.get_engine_id',
+                return_value='engine-007')
+    def test_notify_owner(self, mock_engine_id, mock_client):
+        self._nested_stack()
+        self.stack.create()
+        self.stack.notify_owner()
+
+        mock_engine_id.assert_called_once_with(self.ctx,
+                                               self.stack.owner_id)
+        mock_client.assert_called_once_with('engine-007')
+        mock_client.return_value.nested_complete.assert_called_once_with(
+            self.ctx, dict(self.stack.identifier()), 'CREATE', 'COMPLETE',
+            'Stack CREATE completed successfully',
+            self.stack.updated_time.isoformat(),
+            [{'output_key': 'TestOutput', 'output_value': 'AResource',
+              'description': 'No description given'}])
+
+    @mock.patch('heat.rpc.listener_client.EngineListenerClient')
+    @mock.patch('heat.objects.stack_lock.StackLock.get_engine_id',
+                return_value='engine-007')
+    def test_notify_owner_resolved_outputs(self, mock_engine_id,
+                                           mock_client):
+        self._nested_stack()
+        self.stack.create()
+        outputs = [{'output_key': 'TestOutput', 'output_value': 'resolved'}]
+        with mock.patch.object(stack.api, 'format_stack_outputs') as fmt:
+            self.stack.notify_owner(outputs)
+        self.assertFalse(fmt.called)
+        self.assertEqual(
+            outputs,
+            mock_client.return_value.nested_complete.call_args[0][-1])
+
+    @mock.patch('heat.rpc.listener_client.EngineListenerClient')
+    @mock.patch('heat.objects.stack_lock.StackLock.get_engine_id',
+                return_value=None)
+    def test_notify_owner_not_locked(self, mock_engine_id, mock_client):
+        self._nested_stack()
+        self.stack.create()
+        self.stack.notify_owner()
+
+        self.assertFalse(mock_client.called)
+
+    @mock.patch('heat.rpc.listener_client.EngineListenerClient')
+    def test_notify_owner_disabled(self, mock_client):
+        self._nested_stack()
+        cfg.CONF.set_override('nested_stack_notify', False)
+        self.stack.create()
+        self.stack.notify_owner()
+
+        self.assertFalse(mock_client.called)
+
+    def _output_stack(self):
+        cfg.CONF.set_override('cache_stack_outputs', True)
+        tmpl = {'heat_template_version': '2016-10-14',
+                'resources': {'AResource': {'type': 'GenericResourceType'}},
+                'outputs': {'TestOutput': {
+                    'value': {'get_resource': 'AResource'}}}}
+        self.stack = stack.Stack(self.ctx, 'output_stack',
+                                 template.Template(tmpl))
+        self.stack.store()
+        self.stack.create()
+        # The final state is written when the stack lock is released
+        self.stack._persist_state()
+
+    def test_store_outputs(self):
+        self._output_stack()
+        resolved = self.stack.store_outputs()
+        self.assertEqual('AResource', resolved[0]['output_value'])
+
+        loaded = stack.Stack.load(self.ctx, stack_id=self.stack.id)
+        self.assertEqual([{'output_key': 'TestOutput',
+                           'output_value': 'AResource',
+                           'description': 'No description given'}],
+                         loaded.cached_outputs())
+
+        loaded.state_set(loaded.UPDATE, loaded.IN_PROGRESS, 'Updating')
+        loaded = stack.Stack.load(self.ctx, stack_id=self.stack.id)
+        self.assertIsNone(loaded.cached_outputs())
+
+    def test_store_outputs_encrypted(self):
+        cfg.CONF.set_override('encrypt_parameters_and_properties', True)
+        self._output_stack()
+        self.stack.store_outputs()
+
+        db_stack = stack_object.Stack.get_by_id(self.ctx, self.stack.id)
+        self.assertTrue(db_stack.output_data['encrypted'])
+        self.assertNotIn('AResource', str(db_stack.output_data))
+        loaded = stack.Stack.load(self.ctx, stack_id=self.stack.id)
+        self.assertEqual('AResource',
+                         loaded.cached_outputs()[0]['output_value'])
+
+    def test_store_outputs_disabled(self):
+        self._output_stack()
+        cfg.CONF.set_override('cache_stack_outputs', False)
+        self.assertIsNone(self.stack.store_outputs())
+
+        db_stack = stack_object.Stack.get_by_id(self.ctx, self.stack.id)
+        self.assertIsNone(db_stack.output_data)
+
+    def test_store_outputs_state_changed(self):
+        now = oslo_timeutils.utcnow()
+        oslo_timeutils.set_time_override(now)
+        self.addCleanup(oslo_timeutils.clear_time_override)
+        self._output_stack()
+        self.stack.state_set(self.stack.UPDATE, self.stack.COMPLETE, 'Done')
+        loaded = stack.Stack.load(self.ctx, stack_id=self.stack.id)
+        outputs = [{'output_key': 'TestOutput', 'output_value': 'old'}]
+
+        # Another update completes after the outputs were resolved
+        oslo_timeutils.advance_time_seconds(10)
+        self.stack.state_set(self.stack.UPDATE, self.stack.IN_PROGRESS, '')
+        loaded.store_outputs(outputs)
+        self.stack.state_set(self.stack.UPDATE, self.stack.COMPLETE, 'Done')
+        loaded.store_outputs(outputs)
+
+        db_stack = stack_object.Stack.get_by_id(self.ctx, self.stack.id)
+        self.assertIsNone(db_stack.output_data)
+
+        loaded = stack.Stack.load(self.ctx, stack_id=self.stack.id)
+        loaded.store_outputs(outputs)
+        db_stack = stack_object.Stack.get_by_id(self.ctx, self.stack.id)
+        self.assertEqual(outputs, db_stack.output_data['outputs'])
+
     def test_stack_create_timeout(self):
         self.m.StubOutWithMock(scheduler.DependencyTaskGroup, '__call__')
         self.m.StubOutWithMock(timeutils, 'wallclock')
@@ -1393,6 +1615,38 @@ class StackTest(common.HeatTestCase):
         db_stack = stack_object.Stack.get_by_id(self.ctx, stack_ownee.id)
         self.assertEqual(self.stack.id, db_stack.owner_id)
 
+    def test_store_saves_ancestry(self):
+        self.stack = stack.Stack(self.ctx, 'owner_stack', self.tmpl)
+        self.stack.store()
+        stack_ownee = stack.Stack(self.ctx, 'ownee_stack', self.tmpl,
+                                  owner_id=self.stack.id)
+        stack_ownee.store()
+        self.assertEqual([self.stack.id], stack_ownee.ancestry)
+
+        db_stack = stack_object.Stack.get_by_id(self.ctx, stack_ownee.id)
+        self.assertEqual(self.stack.id, db_stack.root_stack_id)
+        self.assertEqual([self.stack.id], db_stack.ancestry)
+
+        loaded = stack.Stack.load(self.ctx, stack_id=stack_ownee.id)
+        self.patchobject(stack_object.Stack, 'get_root_id')
+        self.assertEqual(self.stack.id, loaded.root_stack_id())
+        self.assertFalse(stack_object.Stack.get_root_id.called)
+
+    def test_path_in_stack(self):
+        self.stack = stack.Stack(self.ctx, 'owner_stack', self.tmpl)
+        self.stack.store()
+        stack_ownee = stack.Stack(self.ctx, 'ownee_stack', self.tmpl,
+                                  owner_id=self.stack.id,
+                                  parent_resource='parent')
+        stack_ownee.store()
+        self.patchobject(stack.Stack, 'object_path_in_stack')
+
+        self.assertEqual([(None, 'owner_stack')],
+                         self.stack.path_in_stack())
+        self.assertEqual([(None, 'owner_stack'), ('parent', 'ownee_stack')],
+                         stack_ownee.path_in_stack())
+        self.assertFalse(stack.Stack.object_path_in_stack.called)
+
     def test_init_user_creds_id(self):
         ctx_init = utils.dummy_context(user='my_user',
                                        password='my_pass')
@@ -2089,6 +2343,97 @@ class StackTest(common.HeatTestCase):
                                  template.Template(tmpl))
         self.assertIsNone(self.stack.validate())
 
+    def test_validate_prefetches_constraint_values(self):
+        tmpl = {
+            'HeatTemplateFormatVersion': '2012-12-12',
+            'Resources': {
+                'R1': {'Type': 'ResourceWithCustomConstraint',
+                       'Properties': {'Foo': 'net1'}},
+                'R2': {'Type': 'ResourceWithCustomConstraint',
+                       'Properties': {'Foo': 'net2'}},
+                'R3': {'Type': 'ResourceWithCustomConstraint',
+                       'Properties': {'Foo': 'net1'}},
+                'R4': {'Type': 'ResourceWithCustomConstraint',
+                       'Properties': {'Foo': {'Fn::GetAtt': ['R1', 'Foo']}}}}
+        }
+        self.stack = stack.Stack(self.ctx, 'test_stack',
+                                 template.Template(tmpl))
+        mock_prefetch = self.patchobject(constraints, 'prefetch')
+        self.patchobject(constraints.CustomConstraint, 'validate')
+        self.assertIsNone(self.stack.validate())
+        mock_prefetch.assert_called_once_with(
+            self.ctx, self.stack.env,
+            {'neutron.network': set(['net1', 'net2'])})
+
+        mock_prefetch.reset_mock()
+        self.stack.validate(validate_res_tmpl_only=True)
+        self.assertFalse(mock_prefetch.called)
+
+    def test_validate_concurrent(self):
+        cfg.CONF.set_override('max_concurrent_validations', 2)
+        tmpl = {
+            'HeatTemplateFormatVersion': '2012-12-12',
+            'Resources': {
+                'A': {'Type': 'GenericResourceType'},
+                'B': {'Type': 'GenericResourceType', 'DependsOn': 'A'},
+                'C': {'Type': 'GenericResourceType', 'DependsOn': 'B'},
+                'D': {'Type': 'GenericResourceType', 'DependsOn': 'C'}}
+        }
+        self.stack = stack.Stack(self.ctx, 'test_stack',
+                                 template.Template(tmpl))
+        running = []
+        max_running = []
+        sessions = []
+
+        def validate(rsrc):
+            sessions.append(rsrc.context.session)
+            running.append(rsrc.name)
+            max_running.append(len(running))
+            eventlet.sleep(0.01 if rsrc.name == 'B' else 0)
+            running.remove(rsrc.name)
+            if rsrc.name in ('B', 'D'):
+                raise exception.StackValidationFailed(
+                    message='%s is invalid' % rsrc.name)
+
+        self.patchobject(generic_rsrc.GenericResource, 'validate',
+                         side_effect=validate, autospec=True)
+        ex = self.assertRaises(exception.StackValidationFailed,
+                               self.stack.validate)
+        self.assertEqual('B is invalid', six.text_type(ex))
+        self.assertEqual(2, max(max_running))
+        # Each concurrent validation has its own database session
+        self.assertEqual(len(sessions), len(set(sessions)))
+        self.assertNotIn(self.ctx.session, sessions)
+
+    def test_validate_concurrent_nested(self):
+        cfg.CONF.set_override('max_concurrent_validations', 2)
+        resources = dict((name, {'Type': 'GenericResourceType',
+                                 'Metadata': {'name': name}})
+                         for name in ('A', 'B', 'C'))
+        tmpl = {'HeatTemplateFormatVersion': '2012-12-12',
+                'Resources': resources}
+        self.stack = stack.Stack(self.ctx, 'test_stack',
+                                 template.Template(tmpl))
+        threads = self.ctx.cache(stack.ValidationThreads).threads
+        validated = []
+        max_threads = []
+
+        def validate(rsrc):
+            max_threads.append(len(threads))
+            if rsrc.stack is self.stack:
+                # Validate a nested stack, as a stack resource would
+                stack.Stack(self.ctx, 'nested_%s' % rsrc.name,
+                            template.Template(tmpl)).validate()
+            eventlet.sleep(0)
+            validated.append(rsrc.name)
+
+        self.patchobject(generic_rsrc.GenericResource, 'validate',
+                         side_effect=validate, autospec=True)
+        self.stack.validate()
+        self.assertEqual(12, len(validated))
+        self.assertEqual(2, max(max_threads))
+        self.assertEqual(0, len(threads))
+
     def test_param_validate_value(self):
         tmpl = template_format.parse("""
         HeatTemplateFormatVersion: '2012-12-12'
@@ -12,6 +12,7 @@
 #    under the License.
 
 import contextlib
+import datetime
 import json
 import uuid
 
@@ -876,6 +877,110 @@ class StackResourceCheckCompleteTest(StackResourceBaseTest):
             self.parent_resource.context, self.parent_resource.resource_id)
 
 
+class StackResourceNotifyTest(StackResourceBaseTest):
+    def setUp(self):
+        super(StackResourceNotifyTest, self).setUp()
+        cfg.CONF.set_override('nested_stack_notify', True)
+        self.nested_id = str(uuid.uuid4())
+        self.parent_resource.resource_id = self.nested_id
+        self.mock_status = self.patchobject(stack_object.Stack, 'get_status')
+        self.mock_status.return_value = ['CREATE', 'IN_PROGRESS', '', None]
+        self.mock_lock = self.patchobject(stack_lock.StackLock,
+                                          'get_engine_id',
+                                          return_value=None)
+        self.mock_get = self.patchobject(stack_object.Stack, 'get_by_id')
+        self.mock_get.return_value.convergence = False
+        self.addCleanup(stack_resource._nested_status.clear)
+
+    def _notify(self, action='CREATE', status='COMPLETE', reason='',
+                updated_time=None, outputs=None):
+        stack_resource.nested_stack_complete(self.nested_id, action, status,
+                                             reason, updated_time, outputs)
+
+    def test_notified_complete(self):
+        outputs = [{'output_key': 'key', 'output_value': 'value'}]
+        self._notify(outputs=outputs)
+        self.parent_resource._rpc_client = mock.MagicMock()
+
+        self.assertTrue(self.parent_resource.check_create_complete())
+        self.assertEqual('value', self.parent_resource.get_output('key'))
+        self.mock_status.assert_not_called()
+        self.mock_lock.assert_not_called()
+        self.parent_resource._rpc_client.show_stack.assert_not_called()
+        self.assertNotIn(self.nested_id, stack_resource._nested_status)
+
+    def test_notified_failed(self):
+        self._notify(status='FAILED', reason='broken on purpose')
+
+        self.assertRaises(exception.ResourceFailure,
+                          self.parent_resource.check_create_complete)
+        self.mock_status.assert_not_called()
+
+    def test_notified_other_action(self):
+        self._notify(action='UPDATE')
+
+        self.assertFalse(self.parent_resource.check_create_complete())
+        self.mock_status.assert_called_once_with(
+            self.parent_resource.context, self.nested_id)
+        self.assertIn(self.nested_id, stack_resource._nested_status)
+
+    def test_notified_update_not_started(self):
+        self._notify(action='UPDATE', updated_time='2016-01-01T00:00:00')
+        cookie = {'previous': {
+            'state': ('UPDATE', 'COMPLETE'),
+            'updated_at': datetime.datetime(2016, 1, 1)}}
+
+        self.assertFalse(
+            self.parent_resource.check_update_complete(cookie=cookie))
+        self.mock_status.assert_not_called()
+
+    @mock.patch('heat.common.timeutils.wallclock')
+    def test_poll_throttled(self, mock_wallclock):
+        cfg.CONF.set_override('nested_stack_poll_interval', 30)
+        mock_wallclock.side_effect = [100, 110, 129, 130]
+        for i in range(4):
+            self.assertFalse(self.parent_resource.check_create_complete())
+        self.assertEqual(2, self.mock_status.call_count)
+
+    def test_poll_not_throttled_convergence_nested(self):
+        cfg.CONF.set_override('nested_stack_poll_interval', 30)
+        self.mock_get.return_value.convergence = True
+        for i in range(3):
+            self.assertFalse(self.parent_resource.check_create_complete())
+        self.assertEqual(3, self.mock_status.call_count)
+        self.mock_get.assert_called_once_with(
+            self.parent_resource.context, self.nested_id, show_deleted=True,
+            eager_load=False)
+
+    def test_poll_not_throttled_convergence_parent(self):
+        cfg.CONF.set_override('nested_stack_poll_interval', 30)
+        self.parent_resource.stack.convergence = True
+        for i in range(3):
+            self.assertFalse(self.parent_resource.check_create_complete())
+        self.assertEqual(3, self.mock_status.call_count)
+        self.mock_get.assert_not_called()
+
+    def test_poll_not_throttled_when_disabled(self):
+        cfg.CONF.set_override('nested_stack_notify', False)
+        for i in range(3):
+            self.assertFalse(self.parent_resource.check_create_complete())
+        self.assertEqual(3, self.mock_status.call_count)
+
+    def test_clear_on_new_action(self):
+        self._notify(action='SUSPEND')
+        self.parent_resource._rpc_client = mock.MagicMock()
+
+        self.parent_resource.handle_suspend()
+        self.assertNotIn(self.nested_id, stack_resource._nested_status)
+
+    def test_nested_status_bounded(self):
+        self.patchobject(stack_resource, '_NESTED_STATUS_MAX', new=2)
+        for stack_id in ('a', 'b', 'c'):
+            stack_resource.nested_stack_complete(stack_id, 'CREATE',
+                                                 'COMPLETE', '', None, None)
+        self.assertEqual(['b', 'c'], list(stack_resource._nested_status))
+
+
 class WithTemplateTest(StackResourceBaseTest):
 
     scenarios = [
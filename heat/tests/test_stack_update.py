@@ -11,6 +11,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import copy
 
 import mock
@@ -18,6 +19,7 @@ import mock
 from heat.common import exception
 from heat.common import template_format
 from heat.db.sqlalchemy import api as db_api
+from heat.db.sqlalchemy import models
 from heat.engine import environment
 from heat.engine import resource
 from heat.engine import rsrc_defn
@@ -67,10 +69,32 @@ class StackUpdateTest(common.HeatTestCase):
         self.assertEqual((stack.Stack.UPDATE, stack.Stack.COMPLETE),
                          self.stack.state)
         self.assertIn('BResource', self.stack)
-        self.assertNotEqual(raw_template_id, self.stack.t.id)
         self.assertNotEqual(raw_template_id, self.stack.prev_raw_template_id)
-        self.assertRaises(exception.NotFound,
-                          db_api.raw_template_get, self.ctx, raw_template_id)
+        # Identical templates share a row, so the stack's template may have
+        # been updated in place to the new content, but the old content must
+        # have been released
+        self.assertEqual(tmpl2['Resources'], db_api.raw_template_get(
+            self.ctx, self.stack.t.id).template['Resources'])
+        raw_templates = self.ctx.session.query(models.RawTemplate).all()
+        self.assertNotIn({'AResource': {'Type': 'GenericResourceType'}},
+                         [rt.template['Resources'] for rt in raw_templates])
+        # Every reference from a stack, including the deleted backup stack,
+        # is counted
+        refs = collections.Counter()
+        for s in self.ctx.session.query(models.Stack):
+            refs.update(i for i in (s.raw_template_id,
+                                    s.prev_raw_template_id)
+                        if i is not None)
+        self.assertEqual(dict(refs),
+                         dict((rt.id, rt.ref_count) for rt in raw_templates))
+
+        # Once the stacks are purged, none of the templates are left
+        template_ids = set(refs)
+        self.stack.delete()
+        db_api.purge_deleted(age=0)
+        for template_id in template_ids:
+            self.assertRaises(exception.NotFound,
+                              db_api.raw_template_get, self.ctx, template_id)
 
     def test_update_remove(self):
         tmpl = {'HeatTemplateFormatVersion': '2012-12-12',
@@ -1051,15 +1075,16 @@ class StackUpdateTest(common.HeatTestCase):
             self.assertEqual(
                 'abc',
                 self.stack['AResource']._stored_properties_data['Foo'])
-            self.assertEqual(5, mock_db_update.call_count)
-            self.assertEqual('UPDATE',
-                             mock_db_update.call_args_list[0][0][2]['action'])
-            self.assertEqual('IN_PROGRESS',
-                             mock_db_update.call_args_list[0][0][2]['status'])
-            self.assertEqual('ROLLBACK',
-                             mock_db_update.call_args_list[1][0][2]['action'])
-            self.assertEqual('IN_PROGRESS',
-                             mock_db_update.call_args_list[1][0][2]['status'])
+            # Ignore the stacks being pointed at modified copies of
+            # templates that they shared with each other
+            state_updates = [args[2] for args, kwargs
+                             in mock_db_update.call_args_list
+                             if 'action' in args[2]]
+            self.assertEqual(5, len(state_updates))
+            self.assertEqual('UPDATE', state_updates[0]['action'])
+            self.assertEqual('IN_PROGRESS', state_updates[0]['status'])
+            self.assertEqual('ROLLBACK', state_updates[1]['action'])
+            self.assertEqual('IN_PROGRESS', state_updates[1]['status'])
 
         mock_create.assert_called_once_with()
 
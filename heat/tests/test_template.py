@@ -16,11 +16,13 @@ import hashlib
 import json
 
 import fixtures
+from oslo_config import cfg
 import six
 from stevedore import extension
 
 from heat.common import exception
 from heat.common import template_format
+from heat.db.sqlalchemy import api as db_api
 from heat.engine.cfn import functions as cfn_funcs
 from heat.engine.cfn import parameters as cfn_p
 from heat.engine.cfn import template as cfn_t
@@ -33,6 +35,7 @@ from heat.engine import rsrc_defn
 from heat.engine import stack
 from heat.engine import stk_defn
 from heat.engine import template
+from heat.objects import raw_template as template_object
 from heat.tests import common
 from heat.tests.openstack.nova import fakes as fakes_nova
 from heat.tests import utils
@@ -1527,6 +1530,119 @@ class TemplateTest(common.HeatTestCase):
         self.assertEqual(hot_tmpl.env, empty_template.env)
 
 
+class TemplateCacheTest(common.HeatTestCase):
+    def setUp(self):
+        super(TemplateCacheTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        self.tmpl = template.Template({'HeatTemplateFormatVersion':
+                                       '2012-12-12',
+                                       'Resources': {}},
+                                      env=environment.Environment(
+                                          {'foo': 'bar'}))
+        self.tmpl.store(self.ctx)
+        self.get_by_id = self.patchobject(
+            template_object.RawTemplate, 'get_by_id',
+            wraps=template_object.RawTemplate.get_by_id)
+
+    def test_load_cached(self):
+        first = template.Template.load(self.ctx, self.tmpl.id)
+        second = template.Template.load(self.ctx, self.tmpl.id)
+        self.assertEqual(1, self.get_by_id.call_count)
+        self.assertEqual(self.tmpl.id, second.id)
+        self.assertEqual(first.t, second.t)
+        self.assertEqual({'foo': 'bar'}, second.env.params)
+
+    def test_load_with_raw_template_refreshes_cache(self):
+        raw = template_object.RawTemplate.get_by_id(self.ctx, self.tmpl.id)
+        raw.template = dict(raw.template, Description='refreshed')
+        template.Template.load(self.ctx, self.tmpl.id, raw)
+        loaded = template.Template.load(self.ctx, self.tmpl.id)
+        self.assertEqual(1, self.get_by_id.call_count)
+        self.assertEqual('refreshed', loaded.t['Description'])
+
+    def test_load_does_not_share_template(self):
+        first = template.Template.load(self.ctx, self.tmpl.id)
+        first.t['Resources']['foo'] = {'Type': 'GenericResourceType'}
+        first.env.params['foo'] = 'baz'
+        second = template.Template.load(self.ctx, self.tmpl.id)
+        self.assertEqual({}, second.t['Resources'])
+        self.assertEqual({'foo': 'bar'}, second.env.params)
+
+    def test_store_invalidates(self):
+        first = template.Template.load(self.ctx, self.tmpl.id)
+        first.t['Resources']['foo'] = {'Type': 'GenericResourceType'}
+        first.store(self.ctx)
+        second = template.Template.load(self.ctx, self.tmpl.id)
+        self.assertEqual(2, self.get_by_id.call_count)
+        self.assertEqual({'foo': {'Type': 'GenericResourceType'}},
+                         second.t['Resources'])
+
+    def test_load_after_update_by_other_engine(self):
+        template.Template.load(self.ctx, self.tmpl.id)
+        t = dict(self.tmpl.t, Description='updated elsewhere')
+        db_api.raw_template_update(self.ctx, self.tmpl.id, {'template': t})
+        loaded = template.Template.load(utils.dummy_context(), self.tmpl.id)
+        self.assertEqual(2, self.get_by_id.call_count)
+        self.assertEqual('updated elsewhere', loaded.t['Description'])
+
+    def test_load_checks_content_hash_once_per_context(self):
+        get_content_hash = self.patchobject(
+            template_object.RawTemplate, 'get_content_hash',
+            wraps=template_object.RawTemplate.get_content_hash)
+        template.Template.load(self.ctx, self.tmpl.id)
+        ctx = utils.dummy_context()
+        template.Template.load(ctx, self.tmpl.id)
+        template.Template.load(ctx, self.tmpl.id)
+        self.assertEqual(1, self.get_by_id.call_count)
+        self.assertEqual(1, get_content_hash.call_count)
+
+    def test_delete_invalidates(self):
+        template.Template.load(self.ctx, self.tmpl.id)
+        template.Template.delete(self.ctx, self.tmpl.id)
+        self.assertRaises(exception.NotFound, template.Template.load,
+                          self.ctx, self.tmpl.id)
+
+    def test_cache_size(self):
+        cfg.CONF.set_override('template_cache_size', 1)
+        other = template.Template(copy.deepcopy(empty_template))
+        other.store(self.ctx)
+        template.Template.load(self.ctx, self.tmpl.id)
+        template.Template.load(self.ctx, other.id)
+        template.Template.load(self.ctx, other.id)
+        self.assertEqual(2, self.get_by_id.call_count)
+        template.Template.load(self.ctx, self.tmpl.id)
+        self.assertEqual(3, self.get_by_id.call_count)
+
+    def test_cache_max_bytes(self):
+        other = template.Template(copy.deepcopy(empty_template))
+        other.store(self.ctx)
+        template.Template.load(self.ctx, self.tmpl.id)
+        template.Template.load(self.ctx, other.id)
+        size = template._template_cache._total_size
+        cfg.CONF.set_override('template_cache_max_bytes', size - 1)
+        template.clear_cache()
+        template.Template.load(self.ctx, self.tmpl.id)
+        template.Template.load(self.ctx, other.id)
+        template.Template.load(self.ctx, other.id)
+        self.assertEqual(4, self.get_by_id.call_count)
+        self.assertLess(template._template_cache._total_size, size)
+        template.Template.load(self.ctx, self.tmpl.id)
+        self.assertEqual(5, self.get_by_id.call_count)
+
+    def test_cache_too_large(self):
+        cfg.CONF.set_override('template_cache_max_bytes', 10)
+        template.Template.load(self.ctx, self.tmpl.id)
+        template.Template.load(self.ctx, self.tmpl.id)
+        self.assertEqual(2, self.get_by_id.call_count)
+        self.assertEqual(0, template._template_cache._total_size)
+
+    def test_cache_disabled(self):
+        cfg.CONF.set_override('template_cache_size', 0)
+        template.Template.load(self.ctx, self.tmpl.id)
+        template.Template.load(self.ctx, self.tmpl.id)
+        self.assertEqual(2, self.get_by_id.call_count)
+
+
 class TemplateFnErrorTest(common.HeatTestCase):
     scenarios = [
         ('select_from_list_not_int',
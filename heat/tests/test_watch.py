@@ -18,9 +18,11 @@ import mock
 from oslo_utils import timeutils
 
 from heat.common import exception
+from heat.db.sqlalchemy import api as db_api
 from heat.engine import stack
 from heat.engine import template
 from heat.engine import watchrule
+from heat.objects import watch_data
 from heat.objects import watch_rule
 from heat.tests import common
 from heat.tests import utils
@@ -309,6 +311,87 @@ class WatchRuleTest(common.HeatTestCase):
             self.assertEqual(datetime.timedelta(seconds=int(rule['Period'])),
                              wr.timeperiod)
 
+    def test_evaluate_stored_data(self):
+        rule = {'EvaluationPeriods': '1',
+                'MetricName': 'test_metric',
+                'Period': '300',
+                'Statistic': 'Maximum',
+                'ComparisonOperator': 'GreaterThanOrEqualToThreshold',
+                'Threshold': '30'}
+        now = timeutils.utcnow()
+        self.addCleanup(timeutils.clear_time_override)
+        self.addCleanup(watchrule._windows.clear)
+
+        wr = watchrule.WatchRule(context=self.ctx,
+                                 watch_name='storeddata',
+                                 rule=rule,
+                                 stack_id=self.stack_id)
+        wr.store()
+        for age, value in ((400, 50), (200, 40), (100, 20)):
+            timeutils.set_time_override(now - datetime.timedelta(seconds=age))
+            wr.create_watch_data({'test_metric': {'Value': value,
+                                                  'Unit': 'Count'}})
+
+        timeutils.set_time_override(now)
+        wr = watchrule.WatchRule.load(self.ctx, 'storeddata')
+        self.assertEqual('ALARM', wr.get_alarm_state())
+        window = watchrule._windows[wr.id]
+        self.assertEqual(2, window.count)
+
+        # Data older than the period is pruned when the rule is evaluated
+        wr.last_evaluated = now - datetime.timedelta(seconds=300)
+        wr.evaluate()
+        self.assertEqual([40, 20], [
+            wd.data['test_metric']['Value']
+            for wd in watch_data.WatchData.get_all_by_watch_rule_id(
+                self.ctx, wr.id)])
+
+        # Only new data is read when the rule is next evaluated
+        timeutils.set_time_override(now + datetime.timedelta(seconds=150))
+        wr.create_watch_data({'test_metric': {'Value': 10, 'Unit': 'Count'}})
+        wr = watchrule.WatchRule.load(self.ctx, 'storeddata')
+        with mock.patch.object(watch_data.WatchData, 'get_recent',
+                               return_value=[]) as mock_recent:
+            self.assertEqual('NORMAL', wr.get_alarm_state())
+        mock_recent.assert_called_once_with(
+            self.ctx, wr.id, mock.ANY, after_id=window.last_id)
+        self.assertIs(window, watchrule._windows[wr.id])
+        self.assertEqual(2, window.count)
+        self.assertEqual(20, window.maximum)
+
+        # The window is rebuilt from all of the data in the period once the
+        # data it was built from has expired, in case another engine stored
+        # data that was not read incrementally
+        timeutils.set_time_override(now + datetime.timedelta(seconds=300))
+        wr = watchrule.WatchRule.load(self.ctx, 'storeddata')
+        with mock.patch.object(watch_data.WatchData, 'get_recent',
+                               return_value=[]) as mock_recent:
+            wr.get_alarm_state()
+        mock_recent.assert_called_once_with(
+            self.ctx, wr.id, mock.ANY, after_id=None)
+        self.assertIsNot(window, watchrule._windows[wr.id])
+
+    def test_windows_bounded(self):
+        rule = {'EvaluationPeriods': '1',
+                'MetricName': 'test_metric',
+                'Period': '300',
+                'Statistic': 'Maximum',
+                'ComparisonOperator': 'GreaterThanOrEqualToThreshold',
+                'Threshold': '30'}
+        self.addCleanup(watchrule._windows.clear)
+        self.patchobject(watchrule, '_WINDOWS_MAX', new=2)
+        wrs = []
+        for i in range(3):
+            wr = watchrule.WatchRule(context=self.ctx,
+                                     watch_name='bounded%d' % i,
+                                     rule=rule,
+                                     stack_id=self.stack_id)
+            wr.store()
+            wrs.append(wr)
+        for wr in wrs[:2] + wrs[0:1] + wrs[2:]:
+            wr.get_alarm_state()
+        self.assertEqual([wrs[0].id, wrs[2].id], list(watchrule._windows))
+
     def test_store(self):
         # Setup
         rule = {u'EvaluationPeriods': u'1',
@@ -333,6 +416,31 @@ class WatchRuleTest(common.HeatTestCase):
         self.assertEqual(watchrule.WatchRule.NODATA, dbwr.state)
         self.assertEqual(rule, dbwr.rule)
 
+    def test_store_next_evaluation(self):
+        rule = {'EvaluationPeriods': '1',
+                'MetricName': 'test_metric',
+                'Period': '300',
+                'Statistic': 'Maximum',
+                'ComparisonOperator': 'GreaterThanOrEqualToThreshold',
+                'Threshold': '30'}
+        now = timeutils.utcnow()
+        timeutils.set_time_override(now)
+        self.addCleanup(timeutils.clear_time_override)
+        period = datetime.timedelta(seconds=300)
+
+        wr = watchrule.WatchRule(context=self.ctx, watch_name='storetest',
+                                 stack_id=self.stack_id, rule=rule)
+        wr.store()
+        dbwr = db_api.watch_rule_get(self.ctx, wr.id)
+        self.assertEqual(now + period, dbwr.next_evaluation)
+
+        timeutils.advance_time_delta(period)
+        wr = watchrule.WatchRule.load(self.ctx, watch_name='storetest')
+        wr.evaluate()
+        dbwr = db_api.watch_rule_get(self.ctx, wr.id)
+        self.assertEqual(now + period, dbwr.last_evaluated)
+        self.assertEqual(now + 2 * period, dbwr.next_evaluation)
+
     def test_evaluate(self):
         # Setup
         rule = {'EvaluationPeriods': '1',
@@ -976,3 +1084,48 @@ class WatchRuleTest(common.HeatTestCase):
         # Test
         self.assertRaises(ValueError, wr.set_watch_state, None)
         self.assertRaises(ValueError, wr.set_watch_state, "BADSTATE")
+
+
+class MetricWindowTest(common.HeatTestCase):
+    def setUp(self):
+        super(MetricWindowTest, self).setUp()
+        self.start = timeutils.utcnow()
+        self.window = watchrule.MetricWindow(datetime.timedelta(seconds=30))
+
+    def _add(self, offset, value, data_id=None):
+        self.window.add(self.start + datetime.timedelta(seconds=offset),
+                        value, data_id)
+
+    def _expire(self, offset):
+        self.window.expire(self.start + datetime.timedelta(seconds=offset))
+
+    def test_aggregates(self):
+        for offset, value in enumerate([3.0, 1.0, 4.0, 1.0, 5.0]):
+            self._add(offset * 10, value)
+        self._expire(40)
+        self.assertEqual(4, self.window.count)
+        self.assertEqual(11.0, self.window.sum)
+        self.assertEqual(1.0, self.window.minimum)
+        self.assertEqual(5.0, self.window.maximum)
+
+        self._expire(60)
+        self.assertEqual(2, self.window.count)
+        self.assertEqual(6.0, self.window.sum)
+        self.assertEqual(1.0, self.window.minimum)
+        self.assertEqual(5.0, self.window.maximum)
+
+        self._expire(70)
+        self.assertEqual(1, self.window.count)
+        self.assertEqual(5.0, self.window.minimum)
+
+        self._expire(101)
+        self.assertEqual(0, self.window.count)
+        self.assertEqual(0.0, self.window.sum)
+
+    def test_add_duplicate(self):
+        self._add(0, 2.0, data_id=1)
+        self._add(1, 3.0, data_id=2)
+        self._add(1, 3.0, data_id=2)
+        self._add(0, 2.0, data_id=1)
+        self.assertEqual(2, self.window.count)
+        self.assertEqual(2, self.window.last_id)